@@ -1,3 +1,9 @@
-from aitoolbox.torchtrain import *
-from aitoolbox.torchtrain.callbacks import *
-from aitoolbox.experiment import *
+from aitoolbox.utils.lazy_import import lazy_module_attributes
+from aitoolbox.torchtrain import _LAZY_ATTRIBUTES as _TORCHTRAIN_ATTRIBUTES
+from aitoolbox.torchtrain.callbacks import _LAZY_ATTRIBUTES as _CALLBACKS_ATTRIBUTES
+from aitoolbox.experiment import _LAZY_ATTRIBUTES as _EXPERIMENT_ATTRIBUTES
+
+_LAZY_ATTRIBUTES = {**_TORCHTRAIN_ATTRIBUTES, **_CALLBACKS_ATTRIBUTES, **_EXPERIMENT_ATTRIBUTES}
+
+__all__ = list(_LAZY_ATTRIBUTES)
+__getattr__, __dir__ = lazy_module_attributes(__name__, _LAZY_ATTRIBUTES)
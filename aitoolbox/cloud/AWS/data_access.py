@@ -1,19 +1,31 @@
 from abc import ABC, abstractmethod
-import boto3
-import botocore
 import os
 import shutil
 
+from aitoolbox.cloud.transfer import CloudTransferEngine, is_retryable_error, is_retryable_status_code, \
+    list_folder_files
+
+# S3 error codes of the transient errors used when the HTTP status code is not available
+S3_TRANSIENT_ERROR_CODES = ('RequestTimeout', 'SlowDown', 'Throttling', 'ThrottlingException',
+                            'InternalError', 'ServiceUnavailable')
+
 
 class BaseDataSaver:
-    def __init__(self, bucket_name='model-result'):
+    def __init__(self, bucket_name='model-result', transfer_engine=None):
         """Base class implementing S3 file saving logic
 
         Args:
             bucket_name (str): S3 bucket into which the files will be saved
+            transfer_engine (aitoolbox.cloud.transfer.CloudTransferEngine or None): engine executing the parallel
+                multipart uploads. If not provided, the engine with the default settings is created.
         """
+        import boto3
+
         self.bucket_name = bucket_name
         self.s3_client = boto3.client('s3')
+        self.transfer_engine = transfer_engine if transfer_engine is not None \
+            else CloudTransferEngine(should_retry_fn=is_retryable_s3_error)
+        self.transfer_config = get_s3_transfer_config(self.transfer_engine)
 
     def save_file(self, local_file_path, cloud_file_path):
         """Save / upload file on local drive to the AWS S3
@@ -25,8 +37,22 @@ class BaseDataSaver:
         Returns:
             None
         """
-        self.s3_client.upload_file(os.path.expanduser(local_file_path),
-                                   self.bucket_name, cloud_file_path)
+        self.transfer_engine.transfer(*self._get_upload_job(os.path.expanduser(local_file_path), cloud_file_path))
+
+    def save_files(self, file_paths):
+        """Concurrently save / upload multiple files on local drive to the AWS S3
+
+        Args:
+            file_paths (list): list of ``(local_file_path, cloud_file_path)`` tuples
+
+        Returns:
+            None
+        """
+        transfer_config = get_s3_transfer_config(self.transfer_engine, num_files=len(file_paths))
+        self.transfer_engine.transfer_many([
+            self._get_upload_job(os.path.expanduser(local_file_path), cloud_file_path, transfer_config)
+            for local_file_path, cloud_file_path in file_paths
+        ])
 
     def save_folder(self, local_folder_path, cloud_folder_path):
         """Save / upload the contents of the local folder on the local drive to AWS S3
@@ -50,25 +76,35 @@ class BaseDataSaver:
         Returns:
             None
         """
-        for root, dirs, files in os.walk(local_folder_path):
-            for filename in files:
-                local_file_path = os.path.join(root, filename)
-                file_path_inside_folder = os.path.relpath(local_file_path, local_folder_path)
-                s3_file_path = os.path.join(cloud_folder_path, file_path_inside_folder)
+        self.save_files(list_folder_files(local_folder_path, cloud_folder_path))
+
+    def _get_upload_job(self, local_file_path, cloud_file_path, transfer_config=None):
+        transfer_config = transfer_config if transfer_config is not None else self.transfer_config
+
+        def upload_file():
+            self.s3_client.upload_file(local_file_path, self.bucket_name, cloud_file_path, Config=transfer_config)
 
-                self.s3_client.upload_file(local_file_path, self.bucket_name, s3_file_path)
+        return upload_file, os.path.getsize(local_file_path)
 
 
 class BaseDataLoader:
-    def __init__(self, bucket_name='dataset-store', local_base_data_folder_path='~/project/data'):
+    def __init__(self, bucket_name='dataset-store', local_base_data_folder_path='~/project/data',
+                 transfer_engine=None):
         """Base class implementing S3 file downloading logic
 
         Args:
             bucket_name (str): S3 bucket from which the files will be downloaded
             local_base_data_folder_path (str): local main experiment saving folder
+            transfer_engine (aitoolbox.cloud.transfer.CloudTransferEngine or None): engine executing the parallel
+                multipart downloads. If not provided, the engine with the default settings is created.
         """
+        import boto3
+
         self.bucket_name = bucket_name
         self.s3 = boto3.resource('s3')
+        self.transfer_engine = transfer_engine if transfer_engine is not None \
+            else CloudTransferEngine(should_retry_fn=is_retryable_s3_error)
+        self.transfer_config = get_s3_transfer_config(self.transfer_engine)
 
         self.local_base_data_folder_path = os.path.expanduser(local_base_data_folder_path)
         self.available_prepocessed_datasets = []
@@ -83,6 +119,8 @@ class BaseDataLoader:
         Returns:
             None
         """
+        import botocore.exceptions
+
         local_file_path = os.path.expanduser(local_file_path)
 
         if os.path.isfile(local_file_path):
@@ -90,13 +128,68 @@ class BaseDataLoader:
         else:
             print('Local file does not exist on the local disk. Downloading from S3')
             try:
-                self.s3.Bucket(self.bucket_name).download_file(cloud_file_path, local_file_path)
+                self.transfer_engine.transfer(*self._get_download_job(cloud_file_path, local_file_path))
             except botocore.exceptions.ClientError as e:
                 if e.response['Error']['Code'] == "404":
                     print("The object does not exist on S3.")
                 else:
                     raise
 
+    def load_files(self, file_paths):
+        """Concurrently download multiple files from AWS S3 to the local drive
+
+        Files which already exist on the local drive are not downloaded.
+
+        Args:
+            file_paths (list): list of ``(cloud_file_path, local_file_path)`` tuples
+
+        Returns:
+            None
+        """
+        missing_file_paths = [(cloud_file_path, os.path.expanduser(local_file_path))
+                              for cloud_file_path, local_file_path in file_paths
+                              if not os.path.isfile(os.path.expanduser(local_file_path))]
+
+        transfer_config = get_s3_transfer_config(self.transfer_engine, num_files=len(missing_file_paths))
+        self.transfer_engine.transfer_many([
+            self._get_download_job(cloud_file_path, local_file_path, transfer_config)
+            for cloud_file_path, local_file_path in missing_file_paths
+        ])
+
+    def load_folder(self, cloud_folder_path, local_folder_path):
+        """Concurrently download the contents of the folder on AWS S3 to the local drive
+
+        Args:
+            cloud_folder_path (str): path of the folder on S3 inside the specified bucket
+            local_folder_path (str): local destination folder path
+
+        Returns:
+            None
+        """
+        prefix = cloud_folder_path.rstrip('/') + '/' if cloud_folder_path else ''
+        paginator = self.s3.meta.client.get_paginator('list_objects_v2')
+
+        file_paths = []
+        for page in paginator.paginate(Bucket=self.bucket_name, Prefix=prefix):
+            for s3_object in page.get('Contents', []):
+                if not s3_object['Key'].endswith('/'):
+                    file_paths.append((s3_object['Key'],
+                                       os.path.join(local_folder_path, s3_object['Key'][len(prefix):])))
+
+        self.load_files(file_paths)
+
+    def _get_download_job(self, cloud_file_path, local_file_path, transfer_config=None):
+        transfer_config = transfer_config if transfer_config is not None else self.transfer_config
+
+        def download_file():
+            local_folder_path = os.path.dirname(local_file_path)
+            if local_folder_path:
+                os.makedirs(local_folder_path, exist_ok=True)
+            self.s3.meta.client.download_file(self.bucket_name, cloud_file_path, local_file_path,
+                                              Config=transfer_config)
+
+        return download_file, lambda: os.path.getsize(local_file_path)
+
     def exists_local_data_folder(self, data_folder_name, protect_local_folder=True):
         """Check if a specific folder exists in the base data folder
 
@@ -124,6 +217,49 @@ class BaseDataLoader:
         return preproc_dataset_name in self.available_prepocessed_datasets
 
 
+def get_s3_transfer_config(transfer_engine, num_files=1):
+    """Build the boto3 multipart transfer config based on the transfer engine settings
+
+    Args:
+        transfer_engine (aitoolbox.cloud.transfer.CloudTransferEngine): transfer engine
+        num_files (int): number of the files transferred concurrently by the engine. The engine's concurrency budget
+            is split between the files and the multipart transfer of each of them.
+
+    Returns:
+        boto3.s3.transfer.TransferConfig: boto3 transfer config
+    """
+    from boto3.s3.transfer import TransferConfig
+
+    return TransferConfig(multipart_threshold=transfer_engine.multipart_threshold,
+                          multipart_chunksize=transfer_engine.multipart_chunksize,
+                          max_concurrency=transfer_engine.get_per_file_concurrency(num_files))
+
+
+def is_retryable_s3_error(error):
+    """Decide if the S3 transfer error is worth retrying
+
+    Client errors (e.g. missing object, denied access or bad request) are not retried, except for the throttling and
+    timeouts. Server side errors are retried.
+
+    Args:
+        error (Exception): raised transfer error
+
+    Returns:
+        bool: if the transfer should be retried
+    """
+    import botocore.exceptions
+
+    if isinstance(error, botocore.exceptions.ClientError):
+        status_code = error.response.get('ResponseMetadata', {}).get('HTTPStatusCode')
+        error_code = str(error.response.get('Error', {}).get('Code'))
+        if status_code is None and error_code.isdigit():
+            status_code = int(error_code)
+        if status_code is None:
+            return error_code in S3_TRANSIENT_ERROR_CODES
+        return is_retryable_status_code(status_code)
+    return is_retryable_error(error)
+
+
 class AbstractDatasetFetcher(ABC):
     @abstractmethod
     def fetch_dataset(self, dataset_name=None, protect_local_folder=True):
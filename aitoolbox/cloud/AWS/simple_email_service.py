@@ -1,6 +1,4 @@
 import os
-import boto3
-from botocore.exceptions import ClientError
 from email.mime.text import MIMEText
 from email.mime.application import MIMEApplication
 from email.mime.multipart import MIMEMultipart
@@ -28,6 +26,8 @@ class SESSender:
         self.aws_region = aws_region
         self.CHARSET = "UTF-8"
 
+        import boto3
+
         # Create a new SES resource and specify a region.
         self.client = boto3.client('ses', region_name=self.aws_region)
 
@@ -42,6 +42,8 @@ class SESSender:
         Returns:
             None
         """
+        from botocore.exceptions import ClientError
+
         # Create a multipart/mixed parent container.
         msg = MIMEMultipart('mixed')
         msg['Subject'] = subject
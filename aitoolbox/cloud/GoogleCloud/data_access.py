@@ -1,17 +1,26 @@
 import os
-from google.cloud import storage
+
+from aitoolbox.cloud.transfer import CloudTransferEngine, list_folder_files
+
+# Google Cloud Storage requires the chunk size to be a multiple of 256 KB
+GCS_CHUNK_SIZE_MULTIPLE = 256 * 1024
 
 
 class BaseGoogleStorageDataSaver:
-    def __init__(self, bucket_name='model-result'):
+    def __init__(self, bucket_name='model-result', transfer_engine=None):
         """
 
         Args:
             bucket_name (str):
+            transfer_engine (aitoolbox.cloud.transfer.CloudTransferEngine or None): engine executing the parallel
+                chunked uploads. If not provided, the engine with the default settings is created.
         """
+        from google.cloud import storage
+
         self.bucket_name = bucket_name
         self.gcs_client = storage.Client()
         self.gcs_bucket = self.gcs_client.get_bucket(bucket_name)
+        self.transfer_engine = transfer_engine if transfer_engine is not None else CloudTransferEngine()
 
     def save_file(self, local_file_path, cloud_file_path):
         """
@@ -23,21 +32,62 @@ class BaseGoogleStorageDataSaver:
         Returns:
             None
         """
-        blob = self.gcs_bucket.blob(cloud_file_path)
-        blob.upload_from_filename(local_file_path)
+        self.transfer_engine.transfer(*self._get_upload_job(os.path.expanduser(local_file_path), cloud_file_path))
+
+    def save_files(self, file_paths):
+        """Concurrently upload multiple files on local drive to the Google Cloud Storage
+
+        Args:
+            file_paths (list): list of ``(local_file_path, cloud_file_path)`` tuples
+
+        Returns:
+            None
+        """
+        self.transfer_engine.transfer_many([
+            self._get_upload_job(os.path.expanduser(local_file_path), cloud_file_path)
+            for local_file_path, cloud_file_path in file_paths
+        ])
+
+    def save_folder(self, local_folder_path, cloud_folder_path):
+        """Upload the contents of the local folder on the local drive to the Google Cloud Storage
+
+        Args:
+            local_folder_path (str): local path to the folder which should be uploaded
+            cloud_folder_path (str): destination path on Google Cloud Storage where the folder content is uploaded
+
+        Returns:
+            None
+        """
+        self.save_files(list_folder_files(local_folder_path, cloud_folder_path))
+
+    def _get_upload_job(self, local_file_path, cloud_file_path):
+        num_bytes = os.path.getsize(local_file_path)
+
+        def upload_file():
+            blob = self.gcs_bucket.blob(cloud_file_path,
+                                        chunk_size=get_gcs_chunk_size(self.transfer_engine, num_bytes))
+            blob.upload_from_filename(local_file_path)
+
+        return upload_file, num_bytes
 
 
 class BaseGoogleStorageDataLoader:
-    def __init__(self, bucket_name='dataset-store', local_dataset_folder_path='~/project/data'):
+    def __init__(self, bucket_name='dataset-store', local_dataset_folder_path='~/project/data',
+                 transfer_engine=None):
         """
 
         Args:
             bucket_name (str):
             local_dataset_folder_path (str):
+            transfer_engine (aitoolbox.cloud.transfer.CloudTransferEngine or None): engine executing the parallel
+                chunked downloads. If not provided, the engine with the default settings is created.
         """
+        from google.cloud import storage
+
         self.bucket_name = bucket_name
         self.gcs_client = storage.Client()
         self.gcs_bucket = self.gcs_client.get_bucket(bucket_name)
+        self.transfer_engine = transfer_engine if transfer_engine is not None else CloudTransferEngine()
 
         self.local_dataset_folder_path = os.path.expanduser(local_dataset_folder_path)
         self.available_prepocessed_datasets = []
@@ -58,5 +108,51 @@ class BaseGoogleStorageDataLoader:
             print('File already exists on local disk. Not downloading from Google Cloud Storage')
         else:
             print('Local file does not exist on the local disk. Downloading from Google Cloud Storage.')
-            blob = self.gcs_bucket.blob(cloud_file_path)
+            self.transfer_engine.transfer(*self._get_download_job(cloud_file_path, local_file_path))
+
+    def load_files(self, file_paths):
+        """Concurrently download multiple files from the Google Cloud Storage to the local drive
+
+        Files which already exist on the local drive are not downloaded.
+
+        Args:
+            file_paths (list): list of ``(cloud_file_path, local_file_path)`` tuples
+
+        Returns:
+            None
+        """
+        download_jobs = []
+        for cloud_file_path, local_file_path in file_paths:
+            local_file_path = os.path.expanduser(local_file_path)
+            if not os.path.isfile(local_file_path):
+                download_jobs.append(self._get_download_job(cloud_file_path, local_file_path))
+
+        self.transfer_engine.transfer_many(download_jobs)
+
+    def _get_download_job(self, cloud_file_path, local_file_path):
+        def download_file():
+            local_folder_path = os.path.dirname(local_file_path)
+            if local_folder_path:
+                os.makedirs(local_folder_path, exist_ok=True)
+            blob = self.gcs_bucket.blob(cloud_file_path, chunk_size=get_gcs_chunk_size(self.transfer_engine))
             blob.download_to_filename(local_file_path)
+
+        return download_file, lambda: os.path.getsize(local_file_path)
+
+
+def get_gcs_chunk_size(transfer_engine, num_bytes=None):
+    """Get the Google Cloud Storage blob chunk size based on the transfer engine multipart settings
+
+    Args:
+        transfer_engine (aitoolbox.cloud.transfer.CloudTransferEngine): transfer engine
+        num_bytes (int or None): size of the uploaded file. Files below the multipart threshold are uploaded in
+            a single request.
+
+    Returns:
+        int or None: chunk size rounded to the multiple of 256 KB or ``None`` for the single request transfer
+    """
+    if num_bytes is not None and num_bytes <= transfer_engine.multipart_threshold:
+        return None
+
+    num_multiples = max(transfer_engine.multipart_chunksize // GCS_CHUNK_SIZE_MULTIPLE, 1)
+    return num_multiples * GCS_CHUNK_SIZE_MULTIPLE
@@ -0,0 +1,267 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class TransferStats:
+    def __init__(self):
+        """Throughput metrics of the cloud storage transfers"""
+        self.num_files = 0
+        self.num_bytes = 0
+        self.num_retries = 0
+        self.num_failed = 0
+        self.transfer_time = 0.
+
+        self._lock = threading.Lock()
+
+    def record(self, num_files=0, num_bytes=0, num_retries=0, num_failed=0, transfer_time=0.):
+        """Thread-safe update of the transfer metrics
+
+        Args:
+            num_files (int): number of successfully transferred files
+            num_bytes (int): number of successfully transferred bytes
+            num_retries (int): number of retried transfer attempts
+            num_failed (int): number of files which failed to transfer even after all the retries
+            transfer_time (float): wall-clock duration of the transfer in seconds
+
+        Returns:
+            None
+        """
+        with self._lock:
+            self.num_files += num_files
+            self.num_bytes += num_bytes
+            self.num_retries += num_retries
+            self.num_failed += num_failed
+            self.transfer_time += transfer_time
+
+    def get_stats(self):
+        """Get the transfer metrics
+
+        Returns:
+            dict: numbers of transferred files, bytes, retries and failures, the total transfer time and the throughput
+            in bytes and files per second
+        """
+        with self._lock:
+            return {
+                'num_files': self.num_files,
+                'num_bytes': self.num_bytes,
+                'num_retries': self.num_retries,
+                'num_failed': self.num_failed,
+                'transfer_time': self.transfer_time,
+                'bytes_per_sec': self.num_bytes / self.transfer_time if self.transfer_time > 0 else 0.,
+                'files_per_sec': self.num_files / self.transfer_time if self.transfer_time > 0 else 0.
+            }
+
+
+class CloudTransferEngine:
+    def __init__(self, max_concurrency=10, multipart_chunksize=8 * 1024 * 1024, multipart_threshold=8 * 1024 * 1024,
+                 num_retries=3, retry_backoff=0.5, max_retry_backoff=10., should_retry_fn=None):
+        """Parallel cloud storage transfer engine shared by all the S3 and Google Cloud Storage savers and loaders
+
+        The engine is storage agnostic: every file transfer is provided as a callable doing the actual upload or
+        download. Multiple files are transferred concurrently in the thread pool and each failed transfer is retried
+        with the exponential backoff. The storage specific wrappers use ``multipart_chunksize`` and
+        ``multipart_threshold`` to split the large files into parts: S3 multipart transfers send the parts in
+        parallel, while Google Cloud Storage uses them as the resumable upload / ranged download chunks.
+
+        Args:
+            max_concurrency (int): maximum number of the concurrent connections. When transferring multiple files
+                the budget is split between the concurrently transferred files and the parallel parts of each file
+                (see :meth:`get_per_file_concurrency`).
+            multipart_chunksize (int): size in bytes of the individual parts of the multipart transfer
+            multipart_threshold (int): file size in bytes above which the multipart transfer is used
+            num_retries (int): number of retries of the failed transfer
+            retry_backoff (float): initial wait in seconds before the retry. Doubled with each further retry.
+            max_retry_backoff (float): maximum wait in seconds before the retry
+            should_retry_fn (callable or None): function taking the raised exception and deciding if the transfer
+                should be retried. If not provided, only the transient errors are retried: connection errors,
+                timeouts, throttling (HTTP 429) and server side (HTTP 5xx) errors.
+        """
+        if max_concurrency < 1:
+            raise ValueError(f'max_concurrency has to be at least 1. Provided: {max_concurrency}')
+        if num_retries < 0:
+            raise ValueError(f'num_retries can not be negative. Provided: {num_retries}')
+
+        self.max_concurrency = max_concurrency
+        self.multipart_chunksize = multipart_chunksize
+        self.multipart_threshold = multipart_threshold
+        self.num_retries = num_retries
+        self.retry_backoff = retry_backoff
+        self.max_retry_backoff = max_retry_backoff
+        self.should_retry_fn = should_retry_fn if should_retry_fn is not None else is_retryable_error
+
+        self.stats = TransferStats()
+
+    def transfer(self, transfer_fn, num_bytes=0):
+        """Execute a single file transfer with retries
+
+        Args:
+            transfer_fn (callable): function without arguments doing the transfer
+            num_bytes (int or callable): size of the transferred file used for the throughput metrics. When the size
+                is known only after the transfer (e.g. download), a function returning the size can be provided.
+
+        Returns:
+            object: return value of the ``transfer_fn``
+        """
+        start_time = time.time()
+        try:
+            return self._transfer_with_retry(transfer_fn, num_bytes)
+        finally:
+            self.stats.record(transfer_time=time.time() - start_time)
+
+    def transfer_many(self, transfer_jobs):
+        """Concurrently execute multiple file transfers in the thread pool
+
+        All the transfers are attempted even if some of them fail. The first encountered error is raised
+        after all the transfers have finished.
+
+        Args:
+            transfer_jobs (list): list of ``(transfer_fn, num_bytes)`` tuples as expected by :meth:`transfer`
+
+        Returns:
+            list: return values of the transfer functions in the order of the provided jobs
+        """
+        if len(transfer_jobs) == 0:
+            return []
+
+        start_time = time.time()
+        try:
+            with ThreadPoolExecutor(max_workers=min(self.max_concurrency, len(transfer_jobs))) as executor:
+                futures = [executor.submit(self._transfer_with_retry, transfer_fn, num_bytes)
+                           for transfer_fn, num_bytes in transfer_jobs]
+        finally:
+            self.stats.record(transfer_time=time.time() - start_time)
+
+        for future in futures:
+            if future.exception() is not None:
+                raise future.exception()
+        return [future.result() for future in futures]
+
+    def get_per_file_concurrency(self, num_files=1):
+        """Number of the parallel parts of a single file transfer when transferring multiple files concurrently
+
+        :meth:`transfer_many` already transfers up to ``max_concurrency`` files in parallel. In order to keep the
+        total number of connections within ``max_concurrency``, the budget is split among the concurrently
+        transferred files.
+
+        Args:
+            num_files (int): number of the transferred files
+
+        Returns:
+            int: maximum number of the concurrently transferred parts of each file
+        """
+        return max(1, self.max_concurrency // max(1, min(self.max_concurrency, num_files)))
+
+    def get_stats(self):
+        """Get the throughput metrics of all the transfers done by the engine
+
+        Returns:
+            dict: transfer metrics
+        """
+        return self.stats.get_stats()
+
+    def reset_stats(self):
+        """Reset the transfer metrics
+
+        Returns:
+            None
+        """
+        self.stats = TransferStats()
+
+    def _transfer_with_retry(self, transfer_fn, num_bytes):
+        num_retries = 0
+        while True:
+            try:
+                result = transfer_fn()
+                self.stats.record(num_files=1, num_bytes=num_bytes() if callable(num_bytes) else num_bytes,
+                                  num_retries=num_retries)
+                return result
+            except Exception as e:
+                if num_retries >= self.num_retries or not self.should_retry_fn(e):
+                    self.stats.record(num_retries=num_retries, num_failed=1)
+                    raise
+
+                time.sleep(self.get_retry_wait(num_retries))
+                num_retries += 1
+
+    def get_retry_wait(self, retry_idx):
+        """Exponential backoff wait before the retry
+
+        Args:
+            retry_idx (int): index of the retry
+
+        Returns:
+            float: wait in seconds
+        """
+        return min(self.retry_backoff * 2 ** retry_idx, self.max_retry_backoff)
+
+
+def is_retryable_error(error):
+    """Default decision which transfer errors are worth retrying
+
+    Only the transient errors are retried: connection errors and timeouts (also the ones of the HTTP client libraries
+    which don't derive from the builtin exceptions), throttling and server side errors. Client errors such as
+    the missing objects, denied access or bad requests are not retried.
+
+    Args:
+        error (Exception): raised transfer error
+
+    Returns:
+        bool: if the transfer should be retried
+    """
+    if isinstance(error, (ConnectionError, TimeoutError)):
+        return True
+
+    status_code = get_error_status_code(error)
+    if status_code is not None:
+        return is_retryable_status_code(status_code)
+
+    return any(error_cls.__name__.endswith(('ConnectionError', 'Timeout', 'TimeoutError'))
+               for error_cls in type(error).__mro__)
+
+
+def is_retryable_status_code(status_code):
+    """Check if the HTTP status code signals a transient error
+
+    Args:
+        status_code (int): HTTP status code
+
+    Returns:
+        bool: if the request should be retried
+    """
+    return status_code >= 500 or status_code in (408, 429)
+
+
+def get_error_status_code(error):
+    """Get the HTTP status code of the error raised by the cloud storage client library
+
+    Args:
+        error (Exception): raised transfer error
+
+    Returns:
+        int or None: HTTP status code or ``None`` if the error doesn't carry it
+    """
+    for status_code in [getattr(error, 'code', None), getattr(getattr(error, 'response', None), 'status_code', None)]:
+        if isinstance(status_code, int) and not isinstance(status_code, bool):
+            return status_code
+    return None
+
+
+def list_folder_files(local_folder_path, cloud_folder_path):
+    """List all the files inside the local folder together with their destination paths in the cloud storage
+
+    Args:
+        local_folder_path (str): local folder path
+        cloud_folder_path (str): destination folder path in the cloud storage
+
+    Returns:
+        list: list of ``(local_file_path, cloud_file_path)`` tuples
+    """
+    file_paths = []
+    for root, dirs, files in os.walk(local_folder_path):
+        for filename in files:
+            local_file_path = os.path.join(root, filename)
+            file_path_inside_folder = os.path.relpath(local_file_path, local_folder_path)
+            file_paths.append((local_file_path, os.path.join(cloud_folder_path, file_path_inside_folder)))
+    return file_paths
@@ -1,2 +1,10 @@
-from aitoolbox.experiment.result_package.basic_packages import (
-    BinaryClassificationResultPackage, ClassificationResultPackage, RegressionResultPackage)
+from aitoolbox.utils.lazy_import import lazy_module_attributes
+
+_LAZY_ATTRIBUTES = {
+    'BinaryClassificationResultPackage': 'aitoolbox.experiment.result_package.basic_packages',
+    'ClassificationResultPackage': 'aitoolbox.experiment.result_package.basic_packages',
+    'RegressionResultPackage': 'aitoolbox.experiment.result_package.basic_packages'
+}
+
+__all__ = list(_LAZY_ATTRIBUTES)
+__getattr__, __dir__ = lazy_module_attributes(__name__, _LAZY_ATTRIBUTES)
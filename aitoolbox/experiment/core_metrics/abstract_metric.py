@@ -4,7 +4,7 @@ import numpy as np
 
 
 class AbstractBaseMetric(ABC):
-    def __init__(self, y_true, y_predicted, metric_name, np_array=True):
+    def __init__(self, y_true, y_predicted, metric_name, np_array=True, stats_reduce_fn=None):
         """Base metric with core metric functionality needed by all the derived actual performance metrics
 
         Args:
@@ -12,13 +12,25 @@ class AbstractBaseMetric(ABC):
             y_predicted (numpy.array or list or str): predicted targets
             metric_name (str): name of the calculated metric
             np_array (bool): should the provided targets be converted to numpy array or left as they are
+            stats_reduce_fn (callable or None): function taking the dict of sufficient statistics calculated on the
+                provided (local) data shard and returning the statistics summed up over all the data shards. E.g. in
+                the DDP training the
+                :meth:`aitoolbox.torchtrain.train_loop.components.ddp_handler.DDPHandler.mp_sum_dict`.
+                When provided, the metric is calculated from the reduced statistics which requires the metric to
+                support the sufficient statistics (see :meth:`supports_sufficient_stats`).
         """
         self.y_true = np.array(y_true) if np_array else y_true
         self.y_predicted = np.array(y_predicted) if np_array else y_predicted
         self.metric_name = metric_name
         self.metric_result = None
 
-        self.metric_result = self.calculate_metric()
+        if stats_reduce_fn is not None:
+            if not self.supports_sufficient_stats():
+                raise ValueError(f'Metric {self.metric_name} does not support the calculation from the reduced '
+                                 f'sufficient statistics')
+            self.metric_result = self.calculate_metric_from_stats(stats_reduce_fn(self.calculate_sufficient_stats()))
+        else:
+            self.metric_result = self.calculate_metric()
 
     @abstractmethod
     def calculate_metric(self):
@@ -29,6 +41,34 @@ class AbstractBaseMetric(ABC):
         """
         pass
 
+    @classmethod
+    def supports_sufficient_stats(cls):
+        """Check if the metric can be calculated from the sufficient statistics merged over the data shards
+
+        Metrics which can be calculated from statistics that are simply summed up over the data shards (e.g. confusion
+        counts, sums or histograms) implement ``calculate_sufficient_stats()`` returning the dict of statistics
+        calculated on the provided data and ``calculate_metric_from_stats(stats)`` calculating the metric from the
+        statistics summed up over all the data shards. This enables the sharded metric evaluation where only the small
+        statistics instead of the full predictions are communicated between the processes.
+
+        Returns:
+            bool: if the metric implements the sufficient statistics
+        """
+        return all(callable(getattr(cls, method_name, None))
+                   for method_name in ['calculate_sufficient_stats', 'calculate_metric_from_stats'])
+
+    @staticmethod
+    def merge_sufficient_stats(stats_list):
+        """Merge the sufficient statistics calculated on multiple data shards by summing them up
+
+        Args:
+            stats_list (list): list of sufficient statistics dicts
+
+        Returns:
+            dict: merged sufficient statistics
+        """
+        return {k: sum(stats[k] for stats in stats_list) for k in stats_list[0]}
+
     def get_metric(self):
         """Returns metric result
 
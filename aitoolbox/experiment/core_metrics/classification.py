@@ -1,11 +1,10 @@
 import numpy as np
-from sklearn.metrics import roc_auc_score, precision_recall_curve, auc, accuracy_score, f1_score, precision_score, recall_score
 
 from aitoolbox.experiment.core_metrics.abstract_metric import AbstractBaseMetric
 
 
 class AccuracyMetric(AbstractBaseMetric):
-    def __init__(self, y_true, y_predicted, positive_class_thresh=0.5):
+    def __init__(self, y_true, y_predicted, positive_class_thresh=0.5, stats_reduce_fn=None):
         """Model prediction accuracy
 
         Args:
@@ -13,11 +12,32 @@ class AccuracyMetric(AbstractBaseMetric):
             y_predicted (numpy.ndarray or list): predicted targets
             positive_class_thresh (float or None): predicted probability positive class threshold.
                 Set it to None when dealing with multi-class labels.
+            stats_reduce_fn (callable or None): function summing up the sufficient statistics over the data shards.
+                When provided, the metric is calculated from the reduced statistics in the sharded evaluation.
         """
         self.positive_class_thresh = positive_class_thresh
-        AbstractBaseMetric.__init__(self, y_true, y_predicted, metric_name='Accuracy')
+        AbstractBaseMetric.__init__(self, y_true, y_predicted, metric_name='Accuracy', stats_reduce_fn=stats_reduce_fn)
 
     def calculate_metric(self):
+        from sklearn.metrics import accuracy_score
+
+        self.prepare_labels()
+        return accuracy_score(self.y_true, self.y_predicted)
+
+    def calculate_sufficient_stats(self):
+        if len(self.y_true) == 0:
+            return {'num_correct': 0, 'num_samples': 0}
+
+        self.prepare_labels()
+        y_true = self.y_true.reshape(len(self.y_true), -1)
+        y_predicted = self.y_predicted.reshape(len(self.y_predicted), -1)
+        return {'num_correct': np.sum(np.all(y_true == y_predicted, axis=1)), 'num_samples': len(y_true)}
+
+    def calculate_metric_from_stats(self, stats):
+        return float(stats['num_correct'] / stats['num_samples'])
+
+    def prepare_labels(self):
+        """Convert the predicted probabilities and one-hot encoded targets into the labels"""
         if len(self.y_predicted.shape) > 1 and self.y_predicted.shape[1] > 1:
             self.y_predicted = np.argmax(self.y_predicted, axis=1)
         elif self.positive_class_thresh is not None:
@@ -30,8 +50,6 @@ class AccuracyMetric(AbstractBaseMetric):
         if len(self.y_true.shape) > 1 and self.y_true.shape[1] > 1:
             self.y_true = np.argmax(self.y_true, axis=1)
 
-        return accuracy_score(self.y_true, self.y_predicted)
-
 
 class ROCAUCMetric(AbstractBaseMetric):
     def __init__(self, y_true, y_predicted):
@@ -44,6 +62,8 @@ class ROCAUCMetric(AbstractBaseMetric):
         AbstractBaseMetric.__init__(self, y_true, y_predicted, metric_name='ROC_AUC')
 
     def calculate_metric(self):
+        from sklearn.metrics import roc_auc_score
+
         return roc_auc_score(self.y_true, self.y_predicted)
 
 
@@ -58,56 +78,121 @@ class PrecisionRecallCurveAUCMetric(AbstractBaseMetric):
         AbstractBaseMetric.__init__(self, y_true, y_predicted, metric_name='PrecisionRecall_AUC')
 
     def calculate_metric(self):
+        from sklearn.metrics import precision_recall_curve, auc
+
         precision, recall, thresholds = precision_recall_curve(self.y_true, self.y_predicted)
         return auc(recall, precision)
 
 
 class F1ScoreMetric(AbstractBaseMetric):
-    def __init__(self, y_true, y_predicted, positive_class_thresh=0.5):
+    def __init__(self, y_true, y_predicted, positive_class_thresh=0.5, stats_reduce_fn=None):
         """Model prediction F1 score
 
         Args:
             y_true (numpy.ndarray or list): ground truth targets
             y_predicted (numpy.ndarray or list): predicted targets
             positive_class_thresh (float): predicted probability positive class threshold
+            stats_reduce_fn (callable or None): function summing up the sufficient statistics over the data shards.
+                When provided, the metric is calculated from the reduced statistics in the sharded evaluation.
         """
         self.positive_class_thresh = positive_class_thresh
-        AbstractBaseMetric.__init__(self, y_true, y_predicted, metric_name='F1_score')
+        AbstractBaseMetric.__init__(self, y_true, y_predicted, metric_name='F1_score', stats_reduce_fn=stats_reduce_fn)
 
     def calculate_metric(self):
+        from sklearn.metrics import f1_score
+
         y_label_predicted = np.where(self.y_predicted > self.positive_class_thresh, 1, 0)
         return f1_score(self.y_true, y_label_predicted)
 
+    def calculate_sufficient_stats(self):
+        return calculate_binary_confusion_counts(self.y_true, self.y_predicted, self.positive_class_thresh)
+
+    def calculate_metric_from_stats(self, stats):
+        return safe_divide(2 * stats['tp'], 2 * stats['tp'] + stats['fp'] + stats['fn'])
+
 
 class PrecisionMetric(AbstractBaseMetric):
-    def __init__(self, y_true, y_predicted, positive_class_thresh=0.5):
+    def __init__(self, y_true, y_predicted, positive_class_thresh=0.5, stats_reduce_fn=None):
         """Model prediction precision
 
         Args:
             y_true (numpy.ndarray or list): ground truth targets
             y_predicted (numpy.ndarray or list): predicted targets
             positive_class_thresh (float): predicted probability positive class threshold
+            stats_reduce_fn (callable or None): function summing up the sufficient statistics over the data shards.
+                When provided, the metric is calculated from the reduced statistics in the sharded evaluation.
         """
         self.positive_class_thresh = positive_class_thresh
-        AbstractBaseMetric.__init__(self, y_true, y_predicted, metric_name='Precision')
+        AbstractBaseMetric.__init__(self, y_true, y_predicted, metric_name='Precision', stats_reduce_fn=stats_reduce_fn)
 
     def calculate_metric(self):
+        from sklearn.metrics import precision_score
+
         y_label_predicted = np.where(self.y_predicted > self.positive_class_thresh, 1, 0)
         return precision_score(self.y_true, y_label_predicted)
 
+    def calculate_sufficient_stats(self):
+        return calculate_binary_confusion_counts(self.y_true, self.y_predicted, self.positive_class_thresh)
+
+    def calculate_metric_from_stats(self, stats):
+        return safe_divide(stats['tp'], stats['tp'] + stats['fp'])
+
 
 class RecallMetric(AbstractBaseMetric):
-    def __init__(self, y_true, y_predicted, positive_class_thresh=0.5):
+    def __init__(self, y_true, y_predicted, positive_class_thresh=0.5, stats_reduce_fn=None):
         """Model prediction recall score
 
         Args:
             y_true (numpy.ndarray or list): ground truth targets
             y_predicted (numpy.ndarray or list): predicted targets
             positive_class_thresh (float): predicted probability positive class threshold
+            stats_reduce_fn (callable or None): function summing up the sufficient statistics over the data shards.
+                When provided, the metric is calculated from the reduced statistics in the sharded evaluation.
         """
         self.positive_class_thresh = positive_class_thresh
-        AbstractBaseMetric.__init__(self, y_true, y_predicted, metric_name='Recall')
+        AbstractBaseMetric.__init__(self, y_true, y_predicted, metric_name='Recall', stats_reduce_fn=stats_reduce_fn)
 
     def calculate_metric(self):
+        from sklearn.metrics import recall_score
+
         y_label_predicted = np.where(self.y_predicted > self.positive_class_thresh, 1, 0)
         return recall_score(self.y_true, y_label_predicted)
+
+    def calculate_sufficient_stats(self):
+        return calculate_binary_confusion_counts(self.y_true, self.y_predicted, self.positive_class_thresh)
+
+    def calculate_metric_from_stats(self, stats):
+        return safe_divide(stats['tp'], stats['tp'] + stats['fn'])
+
+
+def calculate_binary_confusion_counts(y_true, y_predicted, positive_class_thresh):
+    """Calculate the binary classification confusion counts which are the sufficient statistics of F1, precision, recall
+
+    Args:
+        y_true (numpy.ndarray): ground truth binary targets
+        y_predicted (numpy.ndarray): predicted probabilities
+        positive_class_thresh (float): predicted probability positive class threshold
+
+    Returns:
+        dict: true positive, false positive and false negative counts
+    """
+    y_true = np.ravel(y_true) == 1
+    y_label_predicted = np.ravel(y_predicted) > positive_class_thresh
+    return {
+        'tp': np.sum(y_true & y_label_predicted),
+        'fp': np.sum(~y_true & y_label_predicted),
+        'fn': np.sum(y_true & ~y_label_predicted)
+    }
+
+
+def safe_divide(numerator, denominator):
+    """Divide and return 0 in the case of the zero denominator (same as scikit-learn's ``zero_division`` default)
+
+    Args:
+        numerator (int or float or numpy.number): numerator
+        denominator (int or float or numpy.number): denominator
+
+    Returns:
+        float: division result
+    """
+    return float(numerator / denominator) if denominator > 0 else 0.
@@ -1,31 +1,69 @@
-from aitoolbox.experiment.core_metrics.abstract_metric import AbstractBaseMetric
+import numpy as np
 
-from sklearn.metrics import mean_squared_error, mean_absolute_error
+from aitoolbox.experiment.core_metrics.abstract_metric import AbstractBaseMetric
 
 
 class MeanSquaredErrorMetric(AbstractBaseMetric):
-    def __init__(self, y_true, y_predicted):
+    def __init__(self, y_true, y_predicted, stats_reduce_fn=None):
         """Model prediction MSE
 
         Args:
             y_true (numpy.ndarray or list): ground truth targets
             y_predicted (numpy.ndarray or list): predicted targets
+            stats_reduce_fn (callable or None): function summing up the sufficient statistics over the data shards.
+                When provided, the metric is calculated from the reduced statistics in the sharded evaluation.
         """
-        AbstractBaseMetric.__init__(self, y_true, y_predicted, metric_name='Mean_squared_error')
+        AbstractBaseMetric.__init__(self, y_true, y_predicted, metric_name='Mean_squared_error',
+                                    stats_reduce_fn=stats_reduce_fn)
 
     def calculate_metric(self):
+        from sklearn.metrics import mean_squared_error
+
         return mean_squared_error(self.y_true, self.y_predicted)
 
+    def calculate_sufficient_stats(self):
+        error = calculate_regression_error(self.y_true, self.y_predicted)
+        return {'sum_squared_error': np.sum(error ** 2), 'num_values': error.size}
+
+    def calculate_metric_from_stats(self, stats):
+        return float(stats['sum_squared_error'] / stats['num_values'])
+
 
 class MeanAbsoluteErrorMetric(AbstractBaseMetric):
-    def __init__(self, y_true, y_predicted):
+    def __init__(self, y_true, y_predicted, stats_reduce_fn=None):
         """Model prediction MAE
 
         Args:
             y_true (numpy.ndarray or list): ground truth targets
             y_predicted (numpy.ndarray or list): predicted targets
+            stats_reduce_fn (callable or None): function summing up the sufficient statistics over the data shards.
+                When provided, the metric is calculated from the reduced statistics in the sharded evaluation.
         """
-        AbstractBaseMetric.__init__(self, y_true, y_predicted, metric_name='Mean_absolute_error')
+        AbstractBaseMetric.__init__(self, y_true, y_predicted, metric_name='Mean_absolute_error',
+                                    stats_reduce_fn=stats_reduce_fn)
 
     def calculate_metric(self):
+        from sklearn.metrics import mean_absolute_error
+
         return mean_absolute_error(self.y_true, self.y_predicted)
+
+    def calculate_sufficient_stats(self):
+        error = calculate_regression_error(self.y_true, self.y_predicted)
+        return {'sum_absolute_error': np.sum(np.abs(error)), 'num_values': error.size}
+
+    def calculate_metric_from_stats(self, stats):
+        return float(stats['sum_absolute_error'] / stats['num_values'])
+
+
+def calculate_regression_error(y_true, y_predicted):
+    """Calculate the prediction error with the 1D targets treated as single output columns as in scikit-learn
+
+    Args:
+        y_true (numpy.ndarray): ground truth targets
+        y_predicted (numpy.ndarray): predicted targets
+
+    Returns:
+        numpy.ndarray: 2D prediction error of shape (num_samples, num_outputs)
+    """
+    num_outputs = int(np.prod(y_true.shape[1:]))
+    return y_true.reshape(len(y_true), num_outputs).astype(np.float64) - y_predicted.reshape(len(y_true), num_outputs)
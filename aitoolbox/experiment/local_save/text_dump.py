@@ -0,0 +1,285 @@
+import os
+import json
+import zlib
+import queue
+import threading
+
+DUMP_FORMATS = ('jsonl', 'tsv')
+
+
+def get_text_dump_paths(file_path):
+    """Get the paths of the data and the index files of the text dump
+
+    Args:
+        file_path (str): text dump path without the extensions
+
+    Returns:
+        (str, str): data file path and index file path
+    """
+    return f'{file_path}.gz', f'{file_path}.gz.idx'
+
+
+class TextDumpWriter:
+    def __init__(self, file_path, fields, dump_format='jsonl', block_size=1000, background=False,
+                 max_pending_blocks=4):
+        """Writer of the per-example text records into a single indexed and compressed file
+
+        Instead of writing a separate small file for each evaluated example, the records are buffered and every
+        ``block_size`` records are encoded as JSON lines or TSV rows and compressed into a separate gzip member
+        appended to the single data file. The data file is therefore a valid gzip file readable by the standard
+        tools (e.g. ``zcat``). The byte offsets of the blocks are stored in the small JSON index file next to
+        the data file, which enables the random access via the :class:`TextDumpReader`.
+
+        Optionally, the encoding, compression and writing is done on the background thread so that the evaluation
+        doesn't wait for the (network) file system.
+
+        Args:
+            file_path (str): path of the text dump without the extensions. The data is written into ``file_path.gz``
+                and the index into ``file_path.gz.idx``. Existing dump at the same path is overwritten.
+            fields (list or tuple): names of the record fields
+            dump_format (str): record encoding, either ``'jsonl'`` or ``'tsv'``
+            block_size (int): number of records compressed together into a single block
+            background (bool): encode and write the blocks on the background thread
+            max_pending_blocks (int): maximum number of blocks waiting to be written by the background thread
+        """
+        if dump_format not in DUMP_FORMATS:
+            raise ValueError(f'dump_format {dump_format} not supported. Supported formats: {DUMP_FORMATS}')
+        if block_size < 1:
+            raise ValueError(f'block_size has to be at least 1. Provided: {block_size}')
+
+        self.data_path, self.index_path = get_text_dump_paths(file_path)
+        self.fields = list(fields)
+        self.dump_format = dump_format
+        self.block_size = block_size
+        self.background = background
+
+        dump_dir = os.path.dirname(self.data_path)
+        if dump_dir:
+            os.makedirs(dump_dir, exist_ok=True)
+        self.data_file = open(self.data_path, 'wb')
+        self.blocks = []
+        self.num_records = 0
+
+        self.buffer = []
+        self.write_queue = queue.Queue(maxsize=max_pending_blocks)
+        self.worker = None
+        self.error = None
+
+    def write(self, record):
+        """Write a single record
+
+        Args:
+            record (dict or list or tuple): record as the dict with the field names as keys or as the sequence of
+                field values in the order of the ``fields``
+
+        Returns:
+            None
+        """
+        self.buffer.append(record)
+        if len(self.buffer) >= self.block_size:
+            self._submit_buffer()
+
+    def write_records(self, records):
+        """Write multiple records
+
+        Args:
+            records (list or iterable): records in the same format as in :meth:`write`
+
+        Returns:
+            None
+        """
+        for record in records:
+            self.write(record)
+
+    def close(self):
+        """Write all the buffered records, close the data file and write the index
+
+        Returns:
+            (str, str): data file path and index file path
+        """
+        try:
+            self._submit_buffer()
+            if self.worker is not None:
+                self.write_queue.put(None)
+                self.worker.join()
+                self.worker = None
+            self.raise_worker_error()
+        finally:
+            self.data_file.close()
+
+        with open(self.index_path, 'w', encoding='utf-8') as f:
+            json.dump({'format': self.dump_format, 'fields': self.fields,
+                       'num_records': self.num_records, 'blocks': self.blocks}, f)
+        return self.data_path, self.index_path
+
+    def raise_worker_error(self):
+        """Re-raise the error which happened on the background thread in the calling thread
+
+        Raises:
+            RuntimeError
+
+        Returns:
+            None
+        """
+        if self.error is not None:
+            error, self.error = self.error, None
+            raise RuntimeError('Text dump writing on the background thread failed') from error
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _submit_buffer(self):
+        if len(self.buffer) == 0:
+            return
+
+        block, self.buffer = self.buffer, []
+        if not self.background:
+            self._write_block(block)
+        else:
+            self.raise_worker_error()
+            if self.worker is None:
+                self.worker = threading.Thread(target=self._write_loop, name='TextDumpWriter', daemon=True)
+                self.worker.start()
+            self.write_queue.put(block)
+
+    def _write_loop(self):
+        while True:
+            block = self.write_queue.get()
+            if block is None:
+                return
+            try:
+                if self.error is None:
+                    self._write_block(block)
+            except Exception as e:
+                self.error = e
+
+    def _write_block(self, block):
+        lines = [self._encode_record(record) for record in block]
+        if self.dump_format == 'tsv' and self.num_records == 0:
+            lines.insert(0, '\t'.join(self.fields))
+
+        compressor = zlib.compressobj(wbits=31)
+        compressed = compressor.compress(('\n'.join(lines) + '\n').encode('utf-8')) + compressor.flush()
+
+        self.blocks.append([self.data_file.tell(), len(compressed), self.num_records, len(block)])
+        self.data_file.write(compressed)
+        self.num_records += len(block)
+
+    def _encode_record(self, record):
+        values = [record[field] for field in self.fields] if isinstance(record, dict) else list(record)
+        if len(values) != len(self.fields):
+            raise ValueError(f'Record has {len(values)} values while {len(self.fields)} fields are defined')
+
+        if self.dump_format == 'jsonl':
+            return json.dumps(dict(zip(self.fields, values)), ensure_ascii=False)
+        return '\t'.join(escape_tsv_value(value) for value in values)
+
+
+class TextDumpReader:
+    def __init__(self, file_path):
+        """Reader of the text dump written by the :class:`TextDumpWriter`
+
+        Records are returned as dicts. Only the compressed block holding the requested record is read and
+        decompressed.
+
+        Args:
+            file_path (str): path of the text dump without the extensions, same as given to the writer
+        """
+        self.data_path, self.index_path = get_text_dump_paths(file_path)
+        with open(self.index_path, encoding='utf-8') as f:
+            index = json.load(f)
+
+        self.dump_format = index['format']
+        self.fields = index['fields']
+        self.num_records = index['num_records']
+        self.blocks = index['blocks']
+        self.block_starts = [first_record for _, _, first_record, _ in self.blocks]
+
+        self.cached_block = None
+
+    def __len__(self):
+        return self.num_records
+
+    def __getitem__(self, idx):
+        if idx < 0:
+            idx += self.num_records
+        if not 0 <= idx < self.num_records:
+            raise IndexError(f'Record index {idx} out of range for the dump with {self.num_records} records')
+
+        block_idx = next(i for i in range(len(self.block_starts) - 1, -1, -1) if self.block_starts[i] <= idx)
+        return self.read_block(block_idx)[idx - self.block_starts[block_idx]]
+
+    def __iter__(self):
+        for block_idx in range(len(self.blocks)):
+            yield from self.read_block(block_idx)
+
+    def read_block(self, block_idx):
+        """Read and decode all the records of the block
+
+        Args:
+            block_idx (int): index of the block
+
+        Returns:
+            list: list of record dicts
+        """
+        if self.cached_block is not None and self.cached_block[0] == block_idx:
+            return self.cached_block[1]
+
+        offset, size, first_record, _ = self.blocks[block_idx]
+        with open(self.data_path, 'rb') as f:
+            f.seek(offset)
+            lines = zlib.decompress(f.read(size), wbits=31).decode('utf-8').split('\n')[:-1]
+
+        if self.dump_format == 'jsonl':
+            records = [json.loads(line) for line in lines]
+        else:
+            if first_record == 0:
+                lines = lines[1:]
+            records = [dict(zip(self.fields, map(unescape_tsv_value, line.split('\t')))) for line in lines]
+
+        self.cached_block = block_idx, records
+        return records
+
+
+TSV_ESCAPES = {'\\': '\\\\', '\t': '\\t', '\n': '\\n', '\r': '\\r'}
+TSV_UNESCAPES = {'\\': '\\', 't': '\t', 'n': '\n', 'r': '\r'}
+
+
+def escape_tsv_value(value):
+    """Convert the value into the string which can be stored in the TSV cell
+
+    Args:
+        value: value to be stored
+
+    Returns:
+        str: escaped string
+    """
+    return ''.join(TSV_ESCAPES.get(ch, ch) for ch in str(value))
+
+
+def unescape_tsv_value(value):
+    """Restore the original string from the escaped TSV cell value
+
+    Args:
+        value (str): escaped TSV cell value
+
+    Returns:
+        str: original string
+    """
+    if '\\' not in value:
+        return value
+
+    chars = []
+    escaped = False
+    for ch in value:
+        if escaped:
+            chars.append(TSV_UNESCAPES.get(ch, ch))
+            escaped = False
+        elif ch == '\\':
+            escaped = True
+        else:
+            chars.append(ch)
+    return ''.join(chars)
@@ -36,6 +36,8 @@ class AbstractResultPackage(ABC):
         self.additional_results = None
         self.additional_results_dump_paths = None
         self.results_dict = None
+        # Only set for the duration of the prepare_results_dict() call in the sharded evaluation
+        self.stats_reduce_fn = None
 
         self.requires_loss = False
 
@@ -57,7 +59,21 @@ class AbstractResultPackage(ABC):
         """
         pass
 
-    def prepare_result_package(self, y_true, y_predicted, hyperparameters=None, **kwargs):
+    def supports_sharded_evaluation(self):
+        """Check if the result package can be evaluated on the data shards by reducing only the metric statistics
+
+        Result packages which calculate only the metrics implementing the mergeable sufficient statistics (see
+        :meth:`aitoolbox.experiment.core_metrics.abstract_metric.AbstractBaseMetric.supports_sufficient_stats`)
+        should override this method and return ``True``. Such packages have to pass the ``self.stats_reduce_fn`` to
+        their metrics inside :meth:`prepare_results_dict`. In the DDP training these packages can then be evaluated on
+        the local prediction shard of each process without gathering the full predictions.
+
+        Returns:
+            bool: if sharded evaluation is supported
+        """
+        return False
+
+    def prepare_result_package(self, y_true, y_predicted, hyperparameters=None, stats_reduce_fn=None, **kwargs):
         """Prepares the result package by taking labels and running them through the specified metrics
 
         This function is automatically called from the torchtrain callbacks to evaluate the provided callback.
@@ -68,6 +84,9 @@ class AbstractResultPackage(ABC):
             y_true (numpy.ndarray or list): ground truth targets
             y_predicted (numpy.ndarray or list): predicted targets
             hyperparameters (dict or None): dictionary filled with the set hyperparameters
+            stats_reduce_fn (callable or None): when provided, ``y_true`` and ``y_predicted`` are only the local data
+                shard and the metrics are calculated from the sufficient statistics reduced with this function across
+                all the shards. Only to be used with the packages which support sharded evaluation.
             **kwargs (dict): additional results for the result package
 
         Returns:
@@ -84,11 +103,18 @@ class AbstractResultPackage(ABC):
             self.y_true = y_true
             self.y_predicted = y_predicted
 
+        if stats_reduce_fn is not None and not self.supports_sharded_evaluation():
+            raise ValueError(f'Result package {self.pkg_name} does not support the sharded evaluation')
+
         self.results_dict = None
         self.hyperparameters = hyperparameters
         self.additional_results = kwargs
 
-        self.results_dict = self.prepare_results_dict()
+        self.stats_reduce_fn = stats_reduce_fn
+        try:
+            self.results_dict = self.prepare_results_dict()
+        finally:
+            self.stats_reduce_fn = None
 
     @staticmethod
     def auto_y_input_array_convert(y_array):
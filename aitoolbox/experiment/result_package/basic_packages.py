@@ -23,12 +23,19 @@ class GeneralResultPackage(AbstractResultPackage):
         self.qa_check_hyperparameters_dict()
         results_dict = {}
 
+        metric_kwargs = {'stats_reduce_fn': self.stats_reduce_fn} if self.stats_reduce_fn is not None else {}
+
         for metric in self.metrics_list:
-            metric_result = metric(self.y_true, self.y_predicted)
+            metric_result = metric(self.y_true, self.y_predicted, **metric_kwargs)
             results_dict = results_dict + metric_result
             
         return results_dict
 
+    def supports_sharded_evaluation(self):
+        return all(isinstance(metric, type) and issubclass(metric, AbstractBaseMetric) and
+                   metric.supports_sufficient_stats()
+                   for metric in self.metrics_list)
+
     def qa_check_metrics_list(self):
         if len(self.metrics_list) == 0:
             self.warn_about_result_data_problem('Metrics list is empty')
@@ -79,10 +86,14 @@ class ClassificationResultPackage(AbstractResultPackage):
                                        strict_content_check=strict_content_check, **kwargs)
 
     def prepare_results_dict(self):
-        accuracy_result = AccuracyMetric(self.y_true, self.y_predicted, positive_class_thresh=None).get_metric_dict()
+        accuracy_result = AccuracyMetric(self.y_true, self.y_predicted, positive_class_thresh=None,
+                                         stats_reduce_fn=self.stats_reduce_fn).get_metric_dict()
 
         return accuracy_result
 
+    def supports_sharded_evaluation(self):
+        return True
+
         
 class RegressionResultPackage(AbstractResultPackage):
     def __init__(self, strict_content_check=False, **kwargs):
@@ -98,7 +109,10 @@ class RegressionResultPackage(AbstractResultPackage):
                                        strict_content_check=strict_content_check, **kwargs)
 
     def prepare_results_dict(self):
-        mse_result = MeanSquaredErrorMetric(self.y_true, self.y_predicted)
-        mae_result = MeanAbsoluteErrorMetric(self.y_true, self.y_predicted)
+        mse_result = MeanSquaredErrorMetric(self.y_true, self.y_predicted, stats_reduce_fn=self.stats_reduce_fn)
+        mae_result = MeanAbsoluteErrorMetric(self.y_true, self.y_predicted, stats_reduce_fn=self.stats_reduce_fn)
 
         return mse_result + mae_result
+
+    def supports_sharded_evaluation(self):
+        return True
@@ -1,11 +1,29 @@
 import os
 import csv
 import numpy as np
-import seaborn as sns
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_pdf import PdfPages
-import matplotlib.style as style
-style.use('ggplot')
+
+_plot_style_applied = False
+
+
+def import_plotting_libs():
+    """Import the plotting libraries only once the plots are actually generated
+
+    Matplotlib and seaborn are slow to import so they aren't imported together with the training components.
+    The ggplot style is applied on the first import.
+
+    Returns:
+        (module, module): ``matplotlib.pyplot`` and ``seaborn`` modules
+    """
+    global _plot_style_applied
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    if not _plot_style_applied:
+        import matplotlib.style as style
+        style.use('ggplot')
+        _plot_style_applied = True
+
+    return plt, sns
 
 
 class TrainingHistoryPlotter:
@@ -47,6 +65,7 @@ class TrainingHistoryPlotter:
         return plots_paths
 
     def plot_png(self, training_history, plots_local_folder_path, plots_folder_name):
+        plt, _ = import_plotting_libs()
         plots_paths = []
 
         for metric_name, fig in self.generate_plots(training_history):
@@ -54,7 +73,7 @@ class TrainingHistoryPlotter:
             file_path = os.path.join(plots_local_folder_path, file_name)
 
             fig.savefig(file_path)
-            plt.close()
+            plt.close(fig)
 
             plots_paths.append([os.path.join(plots_folder_name, file_name), file_path])
 
@@ -64,6 +83,8 @@ class TrainingHistoryPlotter:
         file_name = f'{plots_file_name}.pdf'
         file_path = os.path.join(plots_local_folder_path, file_name)
 
+        from matplotlib.backends.backend_pdf import PdfPages
+
         with PdfPages(file_path) as pdf_pages:
             for _, fig in self.generate_plots(training_history):
                 pdf_pages.savefig(fig)
@@ -88,6 +109,8 @@ class TrainingHistoryPlotter:
         Returns:
             plt.figure: plot figure
         """
+        plt, sns = import_plotting_libs()
+
         fig = plt.figure()
         fig.set_size_inches(10, 8)
         
@@ -218,6 +241,7 @@ class GradientPlotter:
         return plots_paths
 
     def plot_png(self, model_layer_gradients, grad_plots_local_folder_path, plots_folder_name):
+        plt, _ = import_plotting_libs()
         plots_paths = []
 
         for layer_name, fig in self.generate_dist_plots(model_layer_gradients):
@@ -225,7 +249,7 @@ class GradientPlotter:
             file_path = os.path.join(grad_plots_local_folder_path, file_name)
 
             fig.savefig(file_path)
-            plt.close()
+            plt.close(fig)
 
             plots_paths.append([os.path.join(plots_folder_name, file_name), file_path])
 
@@ -235,6 +259,8 @@ class GradientPlotter:
         file_name = f'{plots_file_name}.pdf'
         file_path = os.path.join(plots_local_folder_path, file_name)
 
+        from matplotlib.backends.backend_pdf import PdfPages
+
         with PdfPages(file_path) as pdf_pages:
             for _, fig in self.generate_dist_plots(model_layer_gradients):
                 pdf_pages.savefig(fig)
@@ -263,6 +289,8 @@ class GradientPlotter:
         Returns:
             plt.figure: plot figure
         """
+        plt, sns = import_plotting_libs()
+
         fig = plt.figure()
         fig.set_size_inches(10, 8)
 
@@ -19,6 +19,9 @@ class TrainingHistory:
         self.train_history = {'loss': [], 'accumulated_loss': [], 'val_loss': []} if has_validation \
             else {'loss': [], 'accumulated_loss': []}
 
+        # Additional information needed to interpret the tracked results, e.g. how the train loss was evaluated
+        self.metadata = {}
+
         self.strict_content_check = strict_content_check
         self.empty_train_history = {'loss': [], 'accumulated_loss': [], 'val_loss': []} if has_validation \
             else {'loss': [], 'accumulated_loss': []}
@@ -34,6 +37,23 @@ class TrainingHistory:
             self.train_history[metric_name] = []
         self.train_history[metric_name].append(metric_result)
         
+    def insert_metadata(self, metadata_name, metadata_value):
+        """Insert or overwrite the metadata describing the tracked results
+
+        Args:
+            metadata_name (str): name of the metadata
+            metadata_value: metadata content
+        """
+        self.metadata[metadata_name] = metadata_value
+
+    def get_metadata(self):
+        """Returns the training history metadata dict
+
+        Returns:
+            dict: training history metadata
+        """
+        return self.metadata
+
     def get_train_history(self):
         """Returns the whole train history dict in its original form without any transformations
 
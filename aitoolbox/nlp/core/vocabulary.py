@@ -1,8 +1,20 @@
+import json
+from collections import Counter
+from itertools import chain, islice, repeat
+import numpy as np
+import torch
+
+from aitoolbox.utils.util import map_in_process_chunks
+
 
 class Vocabulary:
     def __init__(self, name, document_level=False):
         """Vocabulary used for storing the tokens and converting between the indices and the tokens
 
+        Tokens are stored in the contiguous index to token list together with the hashed token to index dict. This
+        way the bulk encoding and decoding methods (:meth:`encode_sentences` and :meth:`decode_sentences`) can
+        convert whole sets of sentences with vectorised array operations.
+
         Args:
             name (str): name of the vocabulary / type of vocabulary. Needed just for tracking purposes
             document_level (bool): If the vocabulary is on the sentence level or on the document level. Document
@@ -21,18 +33,60 @@ class Vocabulary:
         self.name = name
         self.document_level = document_level
         self.trimmed = False
-        self.word2index = {}
-        self.word2count = {}
         if not self.document_level:
-            self.index2word = {self.PAD_token: "PAD", self.OOV_token: "OOV", self.SOS_token: "SOS", self.EOS_token: "EOS"}
             self.default_tokens = [self.PAD_token, self.OOV_token, self.SOS_token, self.EOS_token]
+            self.default_words = ["PAD", "OOV", "SOS", "EOS"]
         else:
-            self.index2word = {self.PAD_token: "PAD", self.OOV_token: "OOV", self.SOS_token: "SOS",
-                               self.EOS_token: "EOS", self.SOD_token: "SOD", self.EOD_token: "EOD"}
             self.default_tokens = [self.PAD_token, self.OOV_token, self.SOS_token, self.EOS_token,
                                    self.SOD_token, self.EOD_token]
+            self.default_words = ["PAD", "OOV", "SOS", "EOS", "SOD", "EOD"]
+
+        self.words = list(self.default_words)
+        self.word2index = {}
+        self.word2count = {}
+        self.word_array = None
+        self.index2word_dict = None
+
+    def __setstate__(self, state):
+        if 'words' not in state:
+            # Vocabulary pickled before the words were stored in the contiguous list
+            index2word = state.pop('index2word')
+            state.pop('num_words', None)
+            state['words'] = [index2word[idx] for idx in range(len(index2word))]
+            state['default_words'] = state['words'][:len(state['default_tokens'])]
+            state['word_array'] = None
+        state['index2word_dict'] = None
+        self.__dict__.update(state)
+
+    @property
+    def num_words(self):
+        return len(self.words)
+
+    @property
+    def index2word(self):
+        """Index to word mapping represented as a dict
 
-        self.num_words = len(self.default_tokens)
+        The dict is built only once and then reused until the vocabulary changes.
+
+        Returns:
+            dict: index to word dict
+        """
+        if self.index2word_dict is None or len(self.index2word_dict) != self.num_words:
+            self.index2word_dict = dict(enumerate(self.words))
+        return self.index2word_dict
+
+    @index2word.setter
+    def index2word(self, index2word):
+        """Replace the index to word mapping
+
+        Args:
+            index2word (dict or list): index to word dict with the contiguous indices starting at 0 or the list of
+                words where the list index is the word index
+        """
+        if isinstance(index2word, dict):
+            index2word = [index2word[idx] for idx in range(len(index2word))]
+        self.words = list(index2word)
+        self.reset_word_lookups()
 
     def add_sentence(self, sentence_tokens):
         """Add tokenized sentence to the vocabulary
@@ -43,8 +97,36 @@ class Vocabulary:
         Returns:
             None
         """
-        for word in sentence_tokens:
-            self.add_word(str(word))
+        self.add_word_counts(Counter(map(str, sentence_tokens)))
+
+    def add_sentences(self, sentences):
+        """Add multiple tokenized sentences to the vocabulary at once
+
+        Args:
+            sentences (list): list of sentences, each represented as a list of tokens
+
+        Returns:
+            None
+        """
+        self.add_word_counts(Counter(map(str, chain.from_iterable(sentences))))
+
+    def add_corpus_shards(self, corpus_shards, num_workers=None):
+        """Count the words in the sharded corpus in parallel processes and add them to the vocabulary
+
+        The words are added in the order of the shards so the resulting indices are the same as if the shard
+        sentences were added one after another via :meth:`add_sentences`.
+
+        Args:
+            corpus_shards (list): list of corpus shards, each represented as a list of tokenized sentences
+            num_workers (int or None): number of processes counting the words. If not provided, the number of
+                CPUs is used.
+
+        Returns:
+            None
+        """
+        for shard_counts in map_in_process_chunks(count_shard_words, corpus_shards,
+                                                  num_workers=num_workers, chunk_size=1):
+            self.add_word_counts(shard_counts)
 
     def add_word(self, word):
         """Add the single word to the vocabulary
@@ -58,11 +140,30 @@ class Vocabulary:
         if word not in self.word2index:
             self.word2index[word] = self.num_words
             self.word2count[word] = 1
-            self.index2word[self.num_words] = word
-            self.num_words += 1
+            self.words.append(word)
+            self.reset_word_lookups()
         else:
             self.word2count[word] += 1
 
+    def add_word_counts(self, word_counts):
+        """Add words together with their counts to the vocabulary
+
+        Args:
+            word_counts (dict or collections.Counter): word counts. New words get indices in the dict order.
+
+        Returns:
+            None
+        """
+        new_words = [word for word in word_counts if word not in self.word2index]
+        self.word2index.update(zip(new_words, range(self.num_words, self.num_words + len(new_words))))
+        self.words += new_words
+        if len(new_words) > 0:
+            self.reset_word_lookups()
+
+        word2count = self.word2count
+        for word, count in word_counts.items():
+            word2count[word] = word2count.get(word, 0) + count
+
     def trim(self, min_count):
         """Remove words below a certain count threshold
 
@@ -76,29 +177,17 @@ class Vocabulary:
             return
         self.trimmed = True
 
-        keep_words = []
-
-        for k, v in self.word2count.items():
-            if v >= min_count:
-                keep_words.append(k)
+        keep_words = [word for word, count in self.word2count.items() if count >= min_count]
 
         print('keep_words {} / {} = {:.4f}'.format(
             len(keep_words), len(self.word2index), len(keep_words) / len(self.word2index)
         ))
 
-        # Reinitialize dictionaries
-        self.word2index = {}
-        self.word2count = {}
-        if not self.document_level:
-            self.index2word = {self.PAD_token: "PAD", self.OOV_token: "OOV", self.SOS_token: "SOS", self.EOS_token: "EOS"}
-            self.num_words = 4  # Count SOS, EOS, PAD
-        else:
-            self.index2word = {self.PAD_token: "PAD", self.OOV_token: "OOV", self.SOS_token: "SOS", self.EOS_token: "EOS",
-                               self.SOD_token: "SOD", self.EOD_token: "EOD"}
-            self.num_words = 6
-
-        for word in keep_words:
-            self.add_word(word)
+        # Kept words are re-indexed with their count reset to 1, same as when adding them again one by one
+        self.words = self.default_words + keep_words
+        self.word2index = dict(zip(keep_words, range(len(self.default_words), self.num_words)))
+        self.word2count = dict.fromkeys(keep_words, 1)
+        self.reset_word_lookups()
 
     def convert_sent2idx_sent(self, sent_tokens, start_end_token=True):
         """Convert the given tokenized string sentence into the indices
@@ -114,7 +203,7 @@ class Vocabulary:
             raise ValueError('word2index is empty')
 
         return ([self.SOS_token] if start_end_token else []) + \
-               [self.word2index[word] if word in self.word2index else self.OOV_token for word in sent_tokens] + \
+               list(map(self.word2index.get, sent_tokens, repeat(self.OOV_token))) + \
                ([self.EOS_token] if start_end_token else [])
 
     def convert_idx_sent2sent(self, idx_sent, rm_default_tokens=False):
@@ -128,10 +217,182 @@ class Vocabulary:
         Returns:
             list: sentence represented as a sequence of the string tokens
         """
-        if len(self.index2word) == 0:
+        return self.decode_sentences([idx_sent], rm_default_tokens=rm_default_tokens)[0]
+
+    def encode_sentences(self, sentences, start_end_token=True, max_length=None, return_tensor=False):
+        """Convert multiple tokenized sentences into the padded array of indices
+
+        Args:
+            sentences (list): list of sentences, each represented as a list of string tokens
+            start_end_token (bool): add the start and the end of the sentence tokens
+            max_length (int or None): truncate the sentences to the maximum length (including the start and
+                the end tokens). If not provided, the array is padded to the longest sentence.
+            return_tensor (bool): return torch tensors instead of the NumPy arrays
+
+        Returns:
+            (numpy.ndarray or torch.Tensor, numpy.ndarray or torch.Tensor): padded ``(num_sentences, length)`` array
+            of token indices and the array of sentence lengths
+        """
+        if len(self.word2index) == 0:
             raise ValueError('word2index is empty')
 
-        if rm_default_tokens:
-            return [self.index2word[idx_word] for idx_word in idx_sent if idx_word not in self.default_tokens]
+        num_extra = 2 if start_end_token else 0
+        word_lengths = np.fromiter(map(len, sentences), dtype=np.int64, count=len(sentences))
+        if max_length is not None:
+            if max_length < num_extra:
+                raise ValueError(f'max_length has to be at least {num_extra}. Provided: {max_length}')
+            word_lengths = np.minimum(word_lengths, max_length - num_extra)
+            sentences = [islice(sent, max_length - num_extra) for sent in sentences]
+        lengths = word_lengths + num_extra
+        max_word_length = int(word_lengths.max()) if len(sentences) > 0 else 0
+
+        flat_idx = np.fromiter(
+            chain.from_iterable(map(self.word2index.get, sent, repeat(self.OOV_token)) for sent in sentences),
+            dtype=np.int64, count=int(word_lengths.sum())
+        )
+
+        idx_sentences = np.full((len(sentences), max_word_length + num_extra), self.PAD_token, dtype=np.int64)
+        word_mask = np.arange(max_word_length) < word_lengths[:, None]
+        idx_sentences[:, num_extra // 2:num_extra // 2 + max_word_length][word_mask] = flat_idx
+
+        if start_end_token:
+            idx_sentences[:, 0] = self.SOS_token
+            idx_sentences[np.arange(len(sentences)), lengths - 1] = self.EOS_token
+
+        if return_tensor:
+            return torch.from_numpy(idx_sentences), torch.from_numpy(lengths)
+        return idx_sentences, lengths
+
+    def decode_sentences(self, idx_sentences, lengths=None, rm_default_tokens=False):
+        """Convert multiple sentences of token indices back to the string tokens
+
+        Args:
+            idx_sentences (list or numpy.ndarray or torch.Tensor): list of index token sentences or the padded 2D
+                array of index tokens
+            lengths (list or numpy.ndarray or torch.Tensor or None): lengths of the sentences in the padded array.
+                If not provided, the whole rows are decoded.
+            rm_default_tokens (bool): should the default tokens such as padding and start/end sentence tokens be
+                removed from the result.
+
+        Returns:
+            list: sentences represented as lists of the string tokens
+        """
+        if isinstance(idx_sentences, torch.Tensor):
+            idx_sentences = idx_sentences.detach().cpu().numpy()
+
+        if isinstance(idx_sentences, np.ndarray) and idx_sentences.ndim == 2:
+            if lengths is None:
+                lengths = np.full(len(idx_sentences), idx_sentences.shape[1], dtype=np.int64)
+            else:
+                lengths = np.asarray(lengths.cpu() if isinstance(lengths, torch.Tensor) else lengths, dtype=np.int64)
+            flat_idx = idx_sentences[np.arange(idx_sentences.shape[1]) < lengths[:, None]]
         else:
-            return [self.index2word[idx_word] for idx_word in idx_sent]
+            idx_sentences = [np.asarray(sent.cpu() if isinstance(sent, torch.Tensor) else sent, dtype=np.int64)
+                             for sent in idx_sentences]
+            lengths = np.fromiter(map(len, idx_sentences), dtype=np.int64, count=len(idx_sentences))
+            flat_idx = np.concatenate(idx_sentences) if len(idx_sentences) > 0 else np.zeros(0, dtype=np.int64)
+
+        flat_idx = flat_idx.astype(np.int64, copy=False)
+        if len(flat_idx) > 0 and (flat_idx.min() < 0 or flat_idx.max() >= self.num_words):
+            raise KeyError(f'Token index out of the vocabulary range [0, {self.num_words - 1}]')
+
+        if rm_default_tokens:
+            keep_mask = ~np.isin(flat_idx, self.default_tokens)
+            flat_idx = flat_idx[keep_mask]
+            sent_ids = np.repeat(np.arange(len(lengths)), lengths)[keep_mask]
+            lengths = np.bincount(sent_ids, minlength=len(lengths))
+
+        flat_words = self.get_word_array()[flat_idx].tolist()
+        offsets = np.concatenate(([0], np.cumsum(lengths))).tolist()
+        return [flat_words[start:end] for start, end in zip(offsets[:-1], offsets[1:])]
+
+    def get_word_array(self):
+        """Get the index to word mapping as the NumPy object array used for the vectorised decoding
+
+        Returns:
+            numpy.ndarray: array of words where the array index is the word index
+        """
+        if self.word_array is None or len(self.word_array) != self.num_words:
+            self.word_array = np.empty(self.num_words, dtype=object)
+            self.word_array[:] = self.words
+        return self.word_array
+
+    def reset_word_lookups(self):
+        """Invalidate the cached index to word lookups after the vocabulary words change
+
+        Returns:
+            None
+        """
+        self.word_array = None
+        self.index2word_dict = None
+
+    def save(self, file_path):
+        """Save the vocabulary into the compact NumPy archive
+
+        Words are stored as the single UTF-8 encoded buffer together with the word offsets, so the loading doesn't
+        need to unpickle or parse each word separately.
+
+        Args:
+            file_path (str): path of the saved vocabulary file. The ``.npz`` extension is appended if missing.
+
+        Returns:
+            None
+        """
+        encoded_words = [word.encode('utf-8') for word in self.words]
+        offsets = np.zeros(len(encoded_words) + 1, dtype=np.int64)
+        np.cumsum([len(word) for word in encoded_words], out=offsets[1:])
+        counts = np.fromiter(map(self.word2count.get, self.words[len(self.default_words):], repeat(0)),
+                             dtype=np.int64, count=self.num_words - len(self.default_words))
+        metadata = {'name': self.name, 'document_level': self.document_level, 'trimmed': self.trimmed}
+
+        np.savez(file_path,
+                 words=np.frombuffer(b''.join(encoded_words), dtype=np.uint8), offsets=offsets, counts=counts,
+                 metadata=np.array(json.dumps(metadata)))
+
+    @classmethod
+    def load(cls, file_path):
+        """Load the vocabulary saved with :meth:`save`
+
+        Args:
+            file_path (str): path to the saved vocabulary file
+
+        Returns:
+            Vocabulary: loaded vocabulary
+        """
+        with np.load(file_path) as vocab_file:
+            words_buffer = vocab_file['words'].tobytes()
+            offsets = vocab_file['offsets'].tolist()
+            counts = vocab_file['counts'].tolist()
+            metadata = json.loads(str(vocab_file['metadata']))
+
+        vocab = cls(metadata['name'], document_level=metadata['document_level'])
+        vocab.trimmed = metadata['trimmed']
+        vocab.words = [words_buffer[start:end].decode('utf-8') for start, end in zip(offsets[:-1], offsets[1:])]
+        added_words = vocab.words[len(vocab.default_words):]
+        vocab.word2index = dict(zip(added_words, range(len(vocab.default_words), vocab.num_words)))
+        vocab.word2count = dict(zip(added_words, counts))
+        return vocab
+
+
+def count_words(sentences):
+    """Count the words in the tokenized sentences
+
+    Args:
+        sentences (list): list of sentences, each represented as a list of tokens
+
+    Returns:
+        collections.Counter: word counts
+    """
+    return Counter(map(str, chain.from_iterable(sentences)))
+
+
+def count_shard_words(corpus_shards):
+    """Count the words in the tokenized sentences of the corpus shards
+
+    Args:
+        corpus_shards (list): list of corpus shards, each represented as a list of tokenized sentences
+
+    Returns:
+        collections.Counter: word counts
+    """
+    return count_words(chain.from_iterable(corpus_shards))
@@ -1,16 +1,16 @@
 import os
 import re
 import shutil
-import string
-from collections import Counter
 import numpy as np
-from pyrouge import Rouge155
-from rouge import Rouge
-from nltk.translate.bleu_score import sentence_bleu, corpus_bleu
-from torchnlp.metrics import bleu
-from transformers import glue_compute_metrics, xnli_compute_metrics
 
 from aitoolbox.experiment.core_metrics.abstract_metric import AbstractBaseMetric
+from aitoolbox.experiment.local_save.text_dump import TextDumpWriter, get_text_dump_paths
+from aitoolbox.nlp.experiment_evaluation.rouge_scoring import RougeScorer
+from aitoolbox.nlp.experiment_evaluation.bleu_scoring import BLEUScorer
+from aitoolbox.nlp.experiment_evaluation.qa_scoring import QAScorer, normalize_answer, compute_token_f1
+
+ANSWER_TEXT_DUMP_NAME = 'answer_pred_true.jsonl'
+TRANSLATION_TEXT_DUMP_NAME = 'translations.jsonl'
 
 
 class ROUGEMetric(AbstractBaseMetric):
@@ -37,6 +37,8 @@ class ROUGEMetric(AbstractBaseMetric):
         AbstractBaseMetric.__init__(self, y_true, y_predicted, metric_name='ROGUE', np_array=False)
 
     def calculate_metric(self):
+        from rouge import Rouge
+
         if self.output_text_dir is not None:
             # Not affecting the metric calculation. Just for record keeping it drops the texts to disk so they can be
             # reviewed
@@ -66,8 +68,13 @@ class ROUGEMetric(AbstractBaseMetric):
         self.y_predicted = [' '.join(sent) if len(sent) > 0 else ' ' for sent in self.y_predicted]
 
     @staticmethod
-    def dump_answer_text_to_disk(true_text, pred_text, output_text_dir, output_text_cleaning_regex, target_actual_text):
-        """
+    def dump_answer_text_to_disk(true_text, pred_text, output_text_dir, output_text_cleaning_regex, target_actual_text,
+                                 background=False):
+        """Dump the predicted and true answers into the single compressed JSONL text dump
+
+        All the answers are written as the ``{'id', 'predicted', 'true'}`` records into the
+        ``answer_pred_true.jsonl.gz`` dump with its index file next to it. The dump can be read back with
+        the :class:`~aitoolbox.experiment.local_save.text_dump.TextDumpReader`.
 
         Problems:
             Defined regex text cleaning to deal with Illegal division by zero
@@ -79,17 +86,14 @@ class ROUGEMetric(AbstractBaseMetric):
             output_text_dir (str):
             output_text_cleaning_regex (list):
             target_actual_text (bool):
+            background (bool): compress and write the dump on the background thread
 
         Returns:
-
+            (str, str): text dump data file path and index file path
         """
-        if os.path.exists(output_text_dir):
-            shutil.rmtree(output_text_dir)
-
-        os.mkdir(output_text_dir)
-
-        for i, (pred_answ, true_answ) in enumerate(zip(pred_text, true_text)):
-            with open(os.path.join(output_text_dir, f'answer_pred_true_{i}.txt'), 'w', encoding='utf-8') as f:
+        with TextDumpWriter(os.path.join(output_text_dir, ANSWER_TEXT_DUMP_NAME),
+                            fields=('id', 'predicted', 'true'), background=background) as dump_writer:
+            for i, (pred_answ, true_answ) in enumerate(zip(pred_text, true_text)):
                 # Default regex cleaners: (r'<.*?>', r'[^a-zA-Z0-9.?! ]+')
                 pred_answ_clean = ROUGEPerlMetric.regex_clean_text(pred_answ, output_text_cleaning_regex)
                 pred_answ_clean = ' '.join(pred_answ_clean) if len(pred_answ_clean) > 0 else ' '
@@ -100,9 +104,52 @@ class ROUGEMetric(AbstractBaseMetric):
                     true_answ_clean = ROUGEPerlMetric.regex_clean_text(true_answ, output_text_cleaning_regex)
                 true_answ_clean = ' '.join(true_answ_clean)
 
-                f.write(f'Answer to question {i}:\n')
-                f.write(f'Predicted:\t{pred_answ_clean}\n')
-                f.write(f'True:\t{true_answ_clean}\n')
+                dump_writer.write((i, pred_answ_clean, true_answ_clean))
+
+        return get_text_dump_paths(os.path.join(output_text_dir, ANSWER_TEXT_DUMP_NAME))
+
+
+class ROUGENativeMetric(AbstractBaseMetric):
+    def __init__(self, y_true, y_predicted, target_actual_text=False, output_text_dir=None,
+                 rouge_n=(1, 2), rouge_l=True, num_workers=0, stats_reduce_fn=None):
+        """ROGUE score calculation using the native ROUGE-N and ROUGE-L implementation
+
+        Doesn't depend on the external packages and scores the already tokenized texts directly. Large evaluation
+        sets can be scored in parallel processes. The result has the same format as the :class:`ROUGEMetric`.
+
+        Args:
+            y_true (numpy.array or list):
+            y_predicted (numpy.array or list):
+            target_actual_text (bool):
+            output_text_dir (str):
+            rouge_n (tuple or list): n-gram sizes of the calculated ROUGE-N scores
+            rouge_l (bool): calculate the ROUGE-L score
+            num_workers (int): number of processes used for the scoring
+            stats_reduce_fn (callable or None): function summing up the sufficient statistics over the data shards.
+                When provided, the metric is calculated from the reduced statistics in the sharded evaluation.
+        """
+        self.target_actual_text = target_actual_text
+        self.output_text_dir = output_text_dir
+        self.scorer = RougeScorer(rouge_n=rouge_n, rouge_l=rouge_l, num_workers=num_workers)
+        AbstractBaseMetric.__init__(self, y_true, y_predicted, metric_name='ROGUE', np_array=False,
+                                    stats_reduce_fn=stats_reduce_fn)
+
+    def calculate_metric(self):
+        if self.output_text_dir is not None:
+            # Not affecting the metric calculation. Just for record keeping it drops the texts to disk so they can be
+            # reviewed
+            ROUGEMetric.dump_answer_text_to_disk(self.y_true, self.y_predicted,
+                                                 self.output_text_dir, (r'<.*?>', r'[^a-zA-Z0-9.?! ]+'),
+                                                 self.target_actual_text)
+
+        return self.scorer.score_summary(self.scorer.score(self.y_true, self.y_predicted))
+
+    def calculate_sufficient_stats(self):
+        scores = self.scorer.score(self.y_true, self.y_predicted)
+        return {'score_sums': scores.sum(axis=0), 'num_texts': len(scores)}
+
+    def calculate_metric_from_stats(self, stats):
+        return self.scorer.score_summary(stats['score_sums'][None] / stats['num_texts'])
 
 
 class ROUGEPerlMetric(AbstractBaseMetric):
@@ -135,6 +182,8 @@ class ROUGEPerlMetric(AbstractBaseMetric):
         AbstractBaseMetric.__init__(self, y_true, y_predicted, metric_name='ROGUE_Perl', np_array=False)
 
     def calculate_metric(self):
+        from pyrouge import Rouge155
+
         self.dump_answer_text_to_disk(self.y_true, self.y_predicted,
                                       self.output_text_dir, self.output_text_cleaning_regex,
                                       self.target_actual_text)
@@ -214,7 +263,7 @@ class ROUGEPerlMetric(AbstractBaseMetric):
 
 class ExactMatchTextMetric(AbstractBaseMetric):
     def __init__(self, y_true, y_predicted,
-                 target_actual_text=False, output_text_dir=None):
+                 target_actual_text=False, output_text_dir=None, scorer=None, stats_reduce_fn=None):
         """Calculate exact match of answered strings
 
         Args:
@@ -222,13 +271,19 @@ class ExactMatchTextMetric(AbstractBaseMetric):
             y_predicted (numpy.array or list):
             target_actual_text (bool):
             output_text_dir (str):
+            scorer (aitoolbox.nlp.experiment_evaluation.qa_scoring.QAScorer or None): QA scoring engine. Share
+                the same scorer with the :class:`F1TextMetric` to score the answers only once.
+            stats_reduce_fn (callable or None): function summing up the sufficient statistics over the data shards.
+                When provided, the metric is calculated from the reduced statistics in the sharded evaluation.
         """
         if len(y_true) != len(y_predicted):
             raise ValueError(f'len(y_true) != len(y_predicted). Got {len(y_true)} != {len(y_predicted)}')
 
         self.target_actual_text = target_actual_text
         self.output_text_dir = output_text_dir
-        AbstractBaseMetric.__init__(self, y_true, y_predicted, metric_name='EM', np_array=False)
+        self.scorer = scorer if scorer is not None else QAScorer()
+        AbstractBaseMetric.__init__(self, y_true, y_predicted, metric_name='EM', np_array=False,
+                                    stats_reduce_fn=stats_reduce_fn)
 
     def calculate_metric(self):
         if self.output_text_dir is not None:
@@ -237,49 +292,31 @@ class ExactMatchTextMetric(AbstractBaseMetric):
             ROUGEMetric.dump_answer_text_to_disk(self.y_true, self.y_predicted,
                                                  self.output_text_dir, [], self.target_actual_text)
 
-        if not self.target_actual_text:
-            self.y_true = [' '.join(sent) for sent in self.y_true]
-        self.y_predicted = [' '.join(sent) for sent in self.y_predicted]
+        return self.calculate_metric_from_stats(self.calculate_sufficient_stats())
 
-        em = 0
-        for pred_answ, true_answ in zip(self.y_predicted, self.y_true):
-            em += int(self.normalize_answer(pred_answ) == self.normalize_answer(true_answ))
+    def calculate_sufficient_stats(self):
+        em_scores, _ = self.scorer.score_answer_tokens(self.y_true, self.y_predicted, self.target_actual_text)
+        return {'em_sum': float(sum(em_scores.tolist())), 'num_answers': len(em_scores)}
 
-        return 100. * em / len(self.y_true)
+    def calculate_metric_from_stats(self, stats):
+        return 100. * stats['em_sum'] / stats['num_answers']
 
     @staticmethod
     def normalize_answer(text_str):
         """Convert to lowercase and remove punctuation, articles and extra whitespace.
 
-        All methods below this line are from the official SQuAD 2.0 eval script
-        https://worksheets.codalab.org/rest/bundles/0x6b567e1cf2e041ec80d7098f031c5c9e/contents/blob/
-
         Args:
             text_str (str):
 
         Returns:
             str
         """
-        def remove_articles(text):
-            regex = re.compile(r'\b(a|an|the)\b', re.UNICODE)
-            return re.sub(regex, ' ', text)
-
-        def white_space_fix(text):
-            return ' '.join(text.split())
-
-        def remove_punc(text):
-            exclude = set(string.punctuation)
-            return ''.join(ch for ch in text if ch not in exclude)
-
-        def lower(text):
-            return text.lower()
-
-        return white_space_fix(remove_articles(remove_punc(lower(text_str))))
+        return normalize_answer(text_str)
 
 
 class F1TextMetric(AbstractBaseMetric):
     def __init__(self, y_true, y_predicted,
-                 target_actual_text=False, output_text_dir=None):
+                 target_actual_text=False, output_text_dir=None, scorer=None, stats_reduce_fn=None):
         """Calculate F1 score of answered strings
 
         Args:
@@ -287,13 +324,19 @@ class F1TextMetric(AbstractBaseMetric):
             y_predicted (numpy.array or list):
             target_actual_text (bool):
             output_text_dir (str):
+            scorer (aitoolbox.nlp.experiment_evaluation.qa_scoring.QAScorer or None): QA scoring engine. Share
+                the same scorer with the :class:`ExactMatchTextMetric` to score the answers only once.
+            stats_reduce_fn (callable or None): function summing up the sufficient statistics over the data shards.
+                When provided, the metric is calculated from the reduced statistics in the sharded evaluation.
         """
         if len(y_true) != len(y_predicted):
             raise ValueError(f'len(y_true) != len(y_predicted). Got {len(y_true)} != {len(y_predicted)}')
 
         self.target_actual_text = target_actual_text
         self.output_text_dir = output_text_dir
-        AbstractBaseMetric.__init__(self, y_true, y_predicted, metric_name='F1', np_array=False)
+        self.scorer = scorer if scorer is not None else QAScorer()
+        AbstractBaseMetric.__init__(self, y_true, y_predicted, metric_name='F1', np_array=False,
+                                    stats_reduce_fn=stats_reduce_fn)
 
     def calculate_metric(self):
         if self.output_text_dir is not None:
@@ -302,45 +345,35 @@ class F1TextMetric(AbstractBaseMetric):
             ROUGEMetric.dump_answer_text_to_disk(self.y_true, self.y_predicted,
                                                  self.output_text_dir, [], self.target_actual_text)
 
-        if not self.target_actual_text:
-            self.y_true = [' '.join(sent) for sent in self.y_true]
-        self.y_predicted = [' '.join(sent) for sent in self.y_predicted]
+        return self.calculate_metric_from_stats(self.calculate_sufficient_stats())
 
-        f1 = 0
-        for pred_answ, true_answ in zip(self.y_predicted, self.y_true):
-            f1 += self.compute_f1(true_answ, pred_answ)
+    def calculate_sufficient_stats(self):
+        _, f1_scores = self.scorer.score_answer_tokens(self.y_true, self.y_predicted, self.target_actual_text)
+        return {'f1_sum': float(sum(f1_scores.tolist())), 'num_answers': len(f1_scores)}
 
-        return 100. * f1 / len(self.y_true)
+    def calculate_metric_from_stats(self, stats):
+        return 100. * stats['f1_sum'] / stats['num_answers']
 
     @staticmethod
     def compute_f1(a_gold, a_pred):
-        gold_toks = F1TextMetric.get_tokens(a_gold)
-        pred_toks = F1TextMetric.get_tokens(a_pred)
-        common = Counter(gold_toks) & Counter(pred_toks)
-        num_same = sum(common.values())
-        if len(gold_toks) == 0 or len(pred_toks) == 0:
-            # If either is no-answer, then F1 is 1 if they agree, 0 otherwise
-            return int(gold_toks == pred_toks)
-        if num_same == 0:
-            return 0
-        precision = 1.0 * num_same / len(pred_toks)
-        recall = 1.0 * num_same / len(gold_toks)
-        f1 = (2 * precision * recall) / (precision + recall)
-        return f1
+        return compute_token_f1(F1TextMetric.get_tokens(a_gold), F1TextMetric.get_tokens(a_pred))
 
     @staticmethod
     def get_tokens(s):
         if not s:
             return []
-        return ExactMatchTextMetric.normalize_answer(s).split()
+        return normalize_answer(s).split()
 
 
 class BLEUSentenceScoreMetric(AbstractBaseMetric):
-    def __init__(self, y_true, y_predicted, source_sents=None, output_text_dir=None):
+    def __init__(self, y_true, y_predicted, source_sents=None, output_text_dir=None, bleu_stats=None, num_workers=0,
+                 stats_reduce_fn=None):
         """BLEU score calculation
 
-        NLTK provides the sentence_bleu() function for evaluating a candidate sentence
-        against one or more reference sentences.
+        Average of the sentence BLEU scores calculated with the vectorised
+        :class:`~aitoolbox.nlp.experiment_evaluation.bleu_scoring.BLEUScorer`. The scores are the same as
+        the ones returned by the NLTK sentence_bleu() function for evaluating a candidate sentence
+        against the reference sentence.
 
         https://machinelearningmastery.com/calculate-bleu-score-for-text-python/
 
@@ -356,6 +389,12 @@ class BLEUSentenceScoreMetric(AbstractBaseMetric):
             y_predicted (list):
             source_sents (list or None):
             output_text_dir (str or None):
+            bleu_stats (numpy.ndarray or None): precomputed per-sentence BLEU statistics as returned by
+                :meth:`~aitoolbox.nlp.experiment_evaluation.bleu_scoring.BLEUScorer.compute_statistics`.
+                Useful when the same statistics are shared with the :class:`BLEUCorpusScoreMetric`.
+            num_workers (int): number of processes used to compute the BLEU statistics
+            stats_reduce_fn (callable or None): function summing up the sufficient statistics over the data shards.
+                When provided, the metric is calculated from the reduced statistics in the sharded evaluation.
 
         """
         if output_text_dir is not None and source_sents is None:
@@ -364,25 +403,49 @@ class BLEUSentenceScoreMetric(AbstractBaseMetric):
 
         self.output_text_dir = output_text_dir
         self.source_sents = source_sents
-        AbstractBaseMetric.__init__(self, y_true, y_predicted, metric_name='BLEU_sentence_score', np_array=False)
+        self.bleu_stats = bleu_stats
+        self.scorer = BLEUScorer(num_workers=num_workers)
+        AbstractBaseMetric.__init__(self, y_true, y_predicted, metric_name='BLEU_sentence_score', np_array=False,
+                                    stats_reduce_fn=stats_reduce_fn)
 
     def calculate_metric(self):
-        self.check_transl_sent_num_match([self.y_true, self.y_predicted])
-
-        sentence_bleu_results = [sentence_bleu([true_t], pred_t) for true_t, pred_t in zip(self.y_true, self.y_predicted)]
+        sentence_bleu_results = self.get_sentence_scores()
 
         if self.output_text_dir is not None:
             self.dump_translation_text_to_disk(self.source_sents,
                                                [' '.join(sent) for sent in self.y_predicted],
                                                [' '.join(sent) for sent in self.y_true],
-                                               sentence_bleu_results, self.output_text_dir)
+                                               sentence_bleu_results.tolist(), self.output_text_dir)
 
         return np.mean(sentence_bleu_results)
 
+    def calculate_sufficient_stats(self):
+        sentence_bleu_results = self.get_sentence_scores()
+        return {'bleu_sum': sentence_bleu_results.sum(), 'num_sents': len(sentence_bleu_results)}
+
+    def calculate_metric_from_stats(self, stats):
+        return float(stats['bleu_sum'] / stats['num_sents'])
+
+    def get_sentence_scores(self):
+        """Calculate the BLEU score of each sentence
+
+        Returns:
+            numpy.ndarray: sentence BLEU scores
+        """
+        self.check_transl_sent_num_match([self.y_true, self.y_predicted])
+
+        if self.bleu_stats is None:
+            self.bleu_stats = self.scorer.compute_statistics(self.y_true, self.y_predicted)
+        return self.scorer.sentence_scores(self.bleu_stats)
+
     @staticmethod
     def dump_translation_text_to_disk(source_sents, pred_translations, true_translations, sentence_bleu_results,
-                                      output_text_dir):
-        """
+                                      output_text_dir, background=False):
+        """Dump the translations into the single compressed JSONL text dump
+
+        All the translations are written as the ``{'id', 'source', 'predicted', 'true', 'bleu'}`` records into
+        the ``translations.jsonl.gz`` dump with its index file next to it. The dump can be read back with
+        the :class:`~aitoolbox.experiment.local_save.text_dump.TextDumpReader`.
 
         Args:
             source_sents (list):
@@ -390,25 +453,25 @@ class BLEUSentenceScoreMetric(AbstractBaseMetric):
             true_translations (list):
             sentence_bleu_results (list):
             output_text_dir (str):
+            background (bool): compress and write the dump on the background thread
 
         Returns:
-
+            (str, str): text dump data file path and index file path
         """
         BLEUSentenceScoreMetric.check_transl_sent_num_match([pred_translations, true_translations,
                                                              source_sents, sentence_bleu_results])
 
-        if os.path.exists(output_text_dir):
-            shutil.rmtree(output_text_dir)
-
-        os.mkdir(output_text_dir)
+        with TextDumpWriter(os.path.join(output_text_dir, TRANSLATION_TEXT_DUMP_NAME),
+                            fields=('id', 'source', 'predicted', 'true', 'bleu'),
+                            background=background) as dump_writer:
+            for i, (source, pred_transl, true_transl, bleu_result) in enumerate(zip(source_sents, pred_translations,
+                                                                                    true_translations,
+                                                                                    sentence_bleu_results)):
+                if not isinstance(source, str):
+                    source = ' '.join(str(token) for token in source)
+                dump_writer.write((i, source, pred_transl, true_transl, bleu_result))
 
-        for i, (source, pred_transl, true_transl, bleu_result) in enumerate(zip(source_sents, pred_translations,
-                                                                                true_translations, sentence_bleu_results)):
-            with open(os.path.join(output_text_dir, f'transl_{i}.txt'), 'w', encoding='utf-8') as f:
-                f.write(f'Source:\t{source}\n')
-                f.write(f'Predicted:\t{pred_transl}\n')
-                f.write(f'True:\t{true_transl}\n')
-                f.write(f'BLEU: {bleu_result}\n')
+        return get_text_dump_paths(os.path.join(output_text_dir, TRANSLATION_TEXT_DUMP_NAME))
 
     @staticmethod
     def check_transl_sent_num_match(sent_types):
@@ -429,11 +492,13 @@ class BLEUSentenceScoreMetric(AbstractBaseMetric):
 
 
 class BLEUCorpusScoreMetric(AbstractBaseMetric):
-    def __init__(self, y_true, y_predicted, source_sents=None, output_text_dir=None):
+    def __init__(self, y_true, y_predicted, source_sents=None, output_text_dir=None, bleu_stats=None, num_workers=0,
+                 stats_reduce_fn=None):
         """BLEU corpus score calculation
 
-        Function called corpus_bleu() for calculating the BLEU score for multiple sentences such as a paragraph or
-        a document.
+        Calculated with the vectorised :class:`~aitoolbox.nlp.experiment_evaluation.bleu_scoring.BLEUScorer` which
+        gives the same score as the NLTK corpus_bleu() function for calculating the BLEU score for multiple sentences
+        such as a paragraph or a document.
 
         https://machinelearningmastery.com/calculate-bleu-score-for-text-python/
 
@@ -450,11 +515,20 @@ class BLEUCorpusScoreMetric(AbstractBaseMetric):
             y_predicted (list):
             source_sents (list or None):
             output_text_dir (str or None):
+            bleu_stats (numpy.ndarray or None): precomputed per-sentence BLEU statistics as returned by
+                :meth:`~aitoolbox.nlp.experiment_evaluation.bleu_scoring.BLEUScorer.compute_statistics`.
+                Useful when the same statistics are shared with the :class:`BLEUSentenceScoreMetric`.
+            num_workers (int): number of processes used to compute the BLEU statistics
+            stats_reduce_fn (callable or None): function summing up the sufficient statistics over the data shards.
+                When provided, the metric is calculated from the reduced statistics in the sharded evaluation.
 
         """
         self.output_text_dir = output_text_dir
         self.source_sents = source_sents
-        AbstractBaseMetric.__init__(self, y_true, y_predicted, metric_name='BLEU_corpus_score', np_array=False)
+        self.bleu_stats = bleu_stats
+        self.scorer = BLEUScorer(num_workers=num_workers)
+        AbstractBaseMetric.__init__(self, y_true, y_predicted, metric_name='BLEU_corpus_score', np_array=False,
+                                    stats_reduce_fn=stats_reduce_fn)
 
     def calculate_metric(self):
         BLEUSentenceScoreMetric.check_transl_sent_num_match([self.y_true, self.y_predicted])
@@ -465,7 +539,20 @@ class BLEUCorpusScoreMetric(AbstractBaseMetric):
                                                                   [' '.join(sent) for sent in self.y_true],
                                                                   ['na'] * len(self.y_predicted), self.output_text_dir)
 
-        return corpus_bleu([[sent] for sent in self.y_true], self.y_predicted)
+        return self.calculate_metric_from_stats(self.calculate_sufficient_stats())
+
+    def calculate_sufficient_stats(self):
+        BLEUSentenceScoreMetric.check_transl_sent_num_match([self.y_true, self.y_predicted])
+
+        if self.bleu_stats is None:
+            self.bleu_stats = self.scorer.compute_statistics(self.y_true, self.y_predicted)
+        # Sentences shorter than the n-gram order are counted as having a single n-gram, same as in NLTK
+        max_order = self.scorer.max_order
+        corpus_stats = np.maximum(self.bleu_stats, [0] * max_order + [1] * max_order + [0, 0]).sum(axis=0)
+        return {'bleu_stats': corpus_stats}
+
+    def calculate_metric_from_stats(self, stats):
+        return self.scorer.corpus_score(stats['bleu_stats'][None])
 
 
 class BLEUScoreStrTorchNLPMetric(AbstractBaseMetric):
@@ -499,6 +586,8 @@ class BLEUScoreStrTorchNLPMetric(AbstractBaseMetric):
         AbstractBaseMetric.__init__(self, y_true, y_predicted, metric_name='BLEU_str_torchNLP_score', np_array=False)
 
     def calculate_metric(self):
+        from torchnlp.metrics import bleu
+
         BLEUSentenceScoreMetric.check_transl_sent_num_match([self.y_true, self.y_predicted])
 
         sentence_bleu_results = [
@@ -543,6 +632,8 @@ class GLUEMetric(AbstractBaseMetric):
         super().__init__(y_true, y_predicted, metric_name=f'GLUE_{task_name}')
 
     def calculate_metric(self):
+        from transformers import glue_compute_metrics
+
         metric_dict = glue_compute_metrics(task_name=self.task_name, preds=self.y_predicted, labels=self.y_true)
         metric_dict = {k.replace('/', '_'): v for k, v in metric_dict.items()}
         return metric_dict
@@ -561,6 +652,8 @@ class XNLIMetric(AbstractBaseMetric):
         super().__init__(y_true, y_predicted, metric_name='xnli_accuracy')
 
     def calculate_metric(self):
+        from transformers import xnli_compute_metrics
+
         metric_dict = xnli_compute_metrics(task_name='xnli', preds=self.y_predicted, labels=self.y_true)
         metric_dict = {k.replace('/', '_'): v for k, v in metric_dict.items()}
         return metric_dict
@@ -1,19 +1,23 @@
 import os
+import numpy as np
 
 from aitoolbox.utils import dict_util
 from aitoolbox.experiment.local_save.local_results_save import BaseLocalResultsSaver
 from aitoolbox.experiment.result_package.abstract_result_packages import AbstractResultPackage
 from aitoolbox.experiment.core_metrics.classification import AccuracyMetric
-from aitoolbox.nlp.experiment_evaluation.NLP_metrics import ROUGEMetric, ROUGEPerlMetric, \
+from aitoolbox.experiment.local_save.text_dump import get_text_dump_paths
+from aitoolbox.nlp.experiment_evaluation.NLP_metrics import ROUGEMetric, ROUGENativeMetric, ROUGEPerlMetric, \
     ExactMatchTextMetric, F1TextMetric, \
     BLEUSentenceScoreMetric, BLEUCorpusScoreMetric, BLEUScoreStrTorchNLPMetric, PerplexityMetric, \
-    GLUEMetric, XNLIMetric
+    GLUEMetric, XNLIMetric, ANSWER_TEXT_DUMP_NAME, TRANSLATION_TEXT_DUMP_NAME
+from aitoolbox.nlp.experiment_evaluation.qa_scoring import QAScorer
+from aitoolbox.nlp.experiment_evaluation.bleu_scoring import BLEUScorer
 from aitoolbox.nlp.experiment_evaluation.attention_heatmap import AttentionHeatMap
 
 
 class QuestionAnswerResultPackage(AbstractResultPackage):
     def __init__(self, paragraph_text_tokens, target_actual_text=None, output_text_dir=None,
-                 use_perl_rouge=False, flatten_result_dict=False,
+                 use_perl_rouge=False, use_native_rouge=False, flatten_result_dict=False, qa_scoring_workers=0,
                  strict_content_check=False, **kwargs):
         """Question Answering task performance evaluation result package
 
@@ -22,11 +26,18 @@ class QuestionAnswerResultPackage(AbstractResultPackage):
             target_actual_text (list or None):
             output_text_dir (str or None):
             use_perl_rouge (bool):
+            use_native_rouge (bool): calculate ROUGE with the native implementation
+                (:class:`~aitoolbox.nlp.experiment_evaluation.NLP_metrics.ROUGENativeMetric`) instead of
+                the ``rouge`` package
             flatten_result_dict (bool):
+            qa_scoring_workers (int): number of processes used to calculate the exact match, F1 and native ROUGE
+                scores of the large evaluation sets
             strict_content_check (bool):
             **kwargs (dict):
 
         """
+        if use_perl_rouge and use_native_rouge:
+            raise ValueError('Only one of use_perl_rouge or use_native_rouge can be selected.')
         if use_perl_rouge is True and output_text_dir is None:
             raise ValueError('When using the perl based ROUGE definition the output_text_dir path must be given.')
         if target_actual_text is not None:
@@ -42,7 +53,11 @@ class QuestionAnswerResultPackage(AbstractResultPackage):
 
         self.output_text_dir = os.path.expanduser(output_text_dir) if output_text_dir else None
         self.use_perl_rouge = use_perl_rouge
+        self.use_native_rouge = use_native_rouge
         self.flatten_result_dict = flatten_result_dict
+        self.qa_scoring_workers = qa_scoring_workers
+        # Scorer shared between the EM and F1 metrics and kept between evaluations to reuse the normalized answers
+        self.qa_scorer = QAScorer(num_workers=qa_scoring_workers)
 
     def prepare_results_dict(self):
         """
@@ -67,15 +82,20 @@ class QuestionAnswerResultPackage(AbstractResultPackage):
                      for start_span, end_span, paragraph_text in
                      zip(y_span_start_predicted.astype('int'), y_span_end_predicted.astype('int'), self.paragraph_text_tokens)]
 
-        if not self.use_perl_rouge:
+        if self.use_native_rouge:
+            rogue_metric = ROUGENativeMetric(true_text, pred_text, target_actual_text=self.use_target_actual_text,
+                                             output_text_dir=self.output_text_dir, num_workers=self.qa_scoring_workers)
+        elif not self.use_perl_rouge:
             rogue_metric = ROUGEMetric(true_text, pred_text, target_actual_text=self.use_target_actual_text,
                                        output_text_dir=self.output_text_dir)
         else:
             rogue_metric = ROUGEPerlMetric(true_text, pred_text, self.output_text_dir,
                                            target_actual_text=self.use_target_actual_text)
 
-        em_metric = ExactMatchTextMetric(true_text, pred_text, target_actual_text=self.use_target_actual_text)
-        f1_metric = F1TextMetric(true_text, pred_text, target_actual_text=self.use_target_actual_text)
+        em_metric = ExactMatchTextMetric(true_text, pred_text, target_actual_text=self.use_target_actual_text,
+                                         scorer=self.qa_scorer)
+        f1_metric = F1TextMetric(true_text, pred_text, target_actual_text=self.use_target_actual_text,
+                                 scorer=self.qa_scorer)
 
         results_dict = rogue_metric + em_metric + f1_metric
 
@@ -94,9 +114,15 @@ class QuestionAnswerResultPackage(AbstractResultPackage):
 
     def list_additional_results_dump_paths(self):
         if self.output_text_dir is not None:
-            zip_path = self.zip_additional_results_dump(self.output_text_dir, self.output_text_dir)
-            zip_file_name = os.path.basename(zip_path)
-            return [[zip_file_name, zip_path]]
+            if self.use_perl_rouge:
+                # Perl ROUGE needs each answer in a separate file, so these still have to be zipped
+                zip_path = self.zip_additional_results_dump(self.output_text_dir, self.output_text_dir)
+                zip_file_name = os.path.basename(zip_path)
+                return [[zip_file_name, zip_path]]
+
+            # Answers are already dumped into the single compressed file which doesn't need to be zipped
+            return [[os.path.basename(path), path]
+                    for path in get_text_dump_paths(os.path.join(self.output_text_dir, ANSWER_TEXT_DUMP_NAME))]
 
 
 class QuestionAnswerSpanClassificationResultPackage(AbstractResultPackage):
@@ -168,7 +194,8 @@ class TextSummarizationResultPackage(AbstractResultPackage):
 
 class MachineTranslationResultPackage(AbstractResultPackage):
     def __init__(self, target_vocab, source_vocab=None, source_sents=None, output_text_dir=None, output_attn_heatmap_dir=None,
-                 strict_content_check=False, **kwargs):
+                 bleu_workers=0, attn_heatmap_max_plots=None, attn_heatmap_selection='first',
+                 save_attention_matrices=False, attn_heatmap_workers=0, strict_content_check=False, **kwargs):
         """Machine Translation task performance evaluation package
 
         Args:
@@ -177,6 +204,15 @@ class MachineTranslationResultPackage(AbstractResultPackage):
             source_sents (list or None):
             output_text_dir (str or None):
             output_attn_heatmap_dir (str or None):
+            bleu_workers (int): number of processes used to compute the BLEU statistics
+            attn_heatmap_max_plots (int or None): maximum number of plotted attention heatmaps. If ``None``
+                the heatmaps of all the sentences are plotted.
+            attn_heatmap_selection (str): selection of the plotted sentences when ``attn_heatmap_max_plots`` is set.
+                Either ``'first'``, ``'random'`` or ``'top_k'`` / ``'bottom_k'`` which plot the sentences with
+                the highest / lowest sentence BLEU scores.
+            save_attention_matrices (bool): additionally save all the raw attention matrices into a single compressed
+                file in the ``output_attn_heatmap_dir``
+            attn_heatmap_workers (int): number of processes rendering the attention heatmaps
             strict_content_check (bool):
             **kwargs (dict):
 
@@ -197,7 +233,12 @@ class MachineTranslationResultPackage(AbstractResultPackage):
         self.source_sents = source_sents
         self.output_text_dir = output_text_dir
         self.output_attn_heatmap_dir = output_attn_heatmap_dir
+        self.attn_heatmap_max_plots = attn_heatmap_max_plots
+        self.attn_heatmap_selection = attn_heatmap_selection
+        self.save_attention_matrices = save_attention_matrices
+        self.attn_heatmap_workers = attn_heatmap_workers
         self.attention_matrices = None
+        self.bleu_scorer = BLEUScorer(num_workers=bleu_workers)
 
         self.y_true_text = None
         self.y_predicted_text = None
@@ -210,12 +251,15 @@ class MachineTranslationResultPackage(AbstractResultPackage):
                 saved attention heatmap plot files and perplexity
 
         """
-        self.y_true_text = [self.target_vocab.convert_idx_sent2sent(sent, rm_default_tokens=True) for sent in self.y_true]
-        self.y_predicted_text = [self.target_vocab.convert_idx_sent2sent(sent, rm_default_tokens=True) for sent in self.y_predicted]
+        self.y_true_text = self.target_vocab.decode_sentences(self.y_true, rm_default_tokens=True)
+        self.y_predicted_text = self.target_vocab.decode_sentences(self.y_predicted, rm_default_tokens=True)
 
+        # BLEU statistics are computed once directly from the vocabulary indices and shared by both BLEU metrics
+        bleu_stats = self.bleu_scorer.compute_statistics(self.remove_default_tokens(self.y_true),
+                                                         self.remove_default_tokens(self.y_predicted))
         bleu_avg_sent = BLEUSentenceScoreMetric(self.y_true_text, self.y_predicted_text,
-                                                self.source_sents, self.output_text_dir)
-        bleu_corpus_result = BLEUCorpusScoreMetric(self.y_true_text, self.y_predicted_text)
+                                                self.source_sents, self.output_text_dir, bleu_stats=bleu_stats)
+        bleu_corpus_result = BLEUCorpusScoreMetric(self.y_true_text, self.y_predicted_text, bleu_stats=bleu_stats)
         # bleu_perl_result = BLEUScoreStrTorchNLPMetric(self.y_true_text, self.y_predicted_text)
 
         perplexity_result = PerplexityMetric(self.additional_results['additional_results']['loss'])
@@ -228,16 +272,36 @@ class MachineTranslationResultPackage(AbstractResultPackage):
             self.attention_matrices = self.additional_results['additional_results']['attention_matrices']
 
             source_sent_idx_tokens = self.additional_results['additional_results']['source_sent_text']
-            source_sent_text = [self.source_vocab.convert_idx_sent2sent(sent, rm_default_tokens=False)
-                                for sent in source_sent_idx_tokens]
+            source_sent_text = self.source_vocab.decode_sentences(source_sent_idx_tokens, rm_default_tokens=False)
+
+            selection_scores = None
+            if self.attn_heatmap_selection in ['top_k', 'bottom_k']:
+                selection_scores = self.bleu_scorer.sentence_scores(bleu_stats)
 
             attn_heatmap_metric = AttentionHeatMap(self.attention_matrices, source_sent_text, self.y_predicted_text,
-                                                   self.output_attn_heatmap_dir)
+                                                   self.output_attn_heatmap_dir,
+                                                   max_plots=self.attn_heatmap_max_plots,
+                                                   plot_selection=self.attn_heatmap_selection,
+                                                   selection_scores=selection_scores,
+                                                   save_attention_matrices=self.save_attention_matrices,
+                                                   num_workers=self.attn_heatmap_workers)
 
             results_dict = results_dict + attn_heatmap_metric
 
         return results_dict
 
+    def remove_default_tokens(self, idx_sents):
+        """Remove the padding, start and end of sentence and other default tokens from the index sentences
+
+        Args:
+            idx_sents (list or numpy.ndarray): sentences of the target vocabulary indices
+
+        Returns:
+            list: sentences as the NumPy arrays of indices without the default tokens
+        """
+        idx_sents = [np.asarray(sent, dtype=np.int64).reshape(-1) for sent in idx_sents]
+        return [sent[~np.isin(sent, self.target_vocab.default_tokens)] for sent in idx_sents]
+
     def set_experiment_dir_path_for_additional_results(self, project_name, experiment_name, experiment_timestamp,
                                                        local_model_result_folder_path):
         if self.output_text_dir is not None:
@@ -256,9 +320,11 @@ class MachineTranslationResultPackage(AbstractResultPackage):
         additional_results_paths = []
 
         if self.output_text_dir is not None:
-            zip_path = self.zip_additional_results_dump(self.output_text_dir, self.output_text_dir)
-            zip_file_name = os.path.basename(zip_path)
-            additional_results_paths.append([zip_file_name, zip_path])
+            # Translations are already dumped into the single compressed file which doesn't need to be zipped
+            additional_results_paths += [
+                [os.path.basename(path), path]
+                for path in get_text_dump_paths(os.path.join(self.output_text_dir, TRANSLATION_TEXT_DUMP_NAME))
+            ]
 
         if self.output_attn_heatmap_dir is not None:
             zip_path = self.zip_additional_results_dump(self.output_attn_heatmap_dir, self.output_attn_heatmap_dir)
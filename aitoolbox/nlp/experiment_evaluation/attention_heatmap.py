@@ -1,48 +1,116 @@
 import os
 import shutil
+import numpy as np
+import torch
 import matplotlib.pyplot as plt
 import matplotlib.gridspec as gridspec
+from matplotlib.figure import Figure
 from matplotlib.font_manager import FontProperties
 import seaborn as sns
 
 from aitoolbox.experiment.core_metrics.abstract_metric import AbstractBaseMetric
+from aitoolbox.utils.util import map_in_process_chunks
+
+PLOT_SELECTIONS = ('first', 'random', 'top_k', 'bottom_k')
+ATTENTION_MATRICES_FILE_NAME = 'attention_matrices.npz'
 
 
 class AttentionHeatMap(AbstractBaseMetric):
-    def __init__(self, attention_matrices, source_sentences, target_sentences, plot_save_dir):
+    def __init__(self, attention_matrices, source_sentences, target_sentences, plot_save_dir,
+                 max_plots=None, plot_selection='first', selection_scores=None, seed=0,
+                 save_attention_matrices=False, num_workers=0, chunk_size=50):
         """Neural attention heatmap plotting
 
+        Plots are rendered with the :class:`AttentionHeatMapRenderer` which reuses the same figure for all
+        the plots. When ``num_workers`` is set, the plots are split into chunks which are rendered in
+        the process pool.
+
         Args:
             attention_matrices (numpy.array or list): list of attention 2D matrices
             source_sentences (list): list of corresponding source sentence text tokens
             target_sentences (list): list of corresponding target sentence text tokens
             plot_save_dir (str): folder path on local drive where the plots should be saved
+            max_plots (int or None): maximum number of plotted sentences. If ``None`` all the sentences are plotted.
+            plot_selection (str): how the plotted sentences are selected when ``max_plots`` is set:
+                ``'first'`` plots the first sentences, ``'random'`` plots a random sample of sentences,
+                ``'top_k'`` and ``'bottom_k'`` plot the sentences with the highest or the lowest
+                ``selection_scores``
+            selection_scores (numpy.array or list or None): per-sentence scores used by the ``'top_k'`` and
+                ``'bottom_k'`` plot selection, e.g. sentence BLEU scores
+            seed (int): random seed for the ``'random'`` plot selection
+            save_attention_matrices (bool): additionally save all the raw attention matrices together with
+                the sentence tokens into a single compressed ``attention_matrices.npz`` file for offline viewing.
+                Can be loaded with :func:`load_attention_matrices`.
+            num_workers (int): number of processes rendering the plots in parallel. When ``0`` or ``1``
+                the plots are rendered in the current process.
+            chunk_size (int): number of plots rendered in a single parallel process task
 
         """
         if len(attention_matrices) != len(source_sentences) != len(target_sentences):
             raise ValueError(f'Lengths of attention_matrices, source_sentences and target_sentences are not the same. '
                              f'Their lengths are: {len(attention_matrices)}, {len(source_sentences)}, {len(target_sentences)}')
+        if plot_selection not in PLOT_SELECTIONS:
+            raise ValueError(f'plot_selection {plot_selection} not supported. Supported selections: {PLOT_SELECTIONS}')
+        if plot_selection in ['top_k', 'bottom_k'] and selection_scores is None:
+            raise ValueError(f'plot_selection {plot_selection} requires the selection_scores to be provided.')
 
         self.attention_matrices = attention_matrices
         self.source_sentences = source_sentences
         self.target_sentences = target_sentences
         self.plot_save_dir = plot_save_dir
+
+        self.max_plots = max_plots
+        self.plot_selection = plot_selection
+        self.selection_scores = selection_scores
+        self.seed = seed
+        self.save_attention_matrices = save_attention_matrices
+        self.num_workers = num_workers
+        self.chunk_size = chunk_size
         AbstractBaseMetric.__init__(self, None, None, metric_name='Attention_HeatMap', np_array=False)
 
     def calculate_metric(self):
         dir_path = self.prepare_folder_for_saving(self.plot_save_dir)
-        output_plot_paths = []
 
-        for i, (attn_matrix, source_sent, target_sent) in \
-                enumerate(zip(self.attention_matrices, self.source_sentences, self.target_sentences)):
-            plot_file_path = os.path.join(dir_path, f'attn_plot_{i}.png')
-            output_plot_paths.append(plot_file_path)
+        attention_matrices = [to_numpy(attn_matrix)[:len(target_sent)]
+                              for attn_matrix, target_sent in zip(self.attention_matrices, self.target_sentences)]
+
+        if self.save_attention_matrices:
+            save_attention_matrices(os.path.join(self.plot_save_dir, ATTENTION_MATRICES_FILE_NAME),
+                                    attention_matrices, self.source_sentences, self.target_sentences)
+
+        plot_tasks = [(attention_matrices[i], self.source_sentences[i], self.target_sentences[i],
+                       os.path.join(dir_path, f'attn_plot_{i}.png'))
+                      for i in self.select_plot_indices()]
+
+        map_in_process_chunks(render_attention_plots, plot_tasks,
+                              num_workers=self.num_workers, chunk_size=self.chunk_size)
+
+        return [plot_file_path for _, _, _, plot_file_path in plot_tasks]
+
+    def select_plot_indices(self):
+        """Select the indices of the sentences which get plotted
 
-            attn_matrix = attn_matrix[:len(target_sent)]
+        Returns:
+            list: sorted indices of the selected sentences
+        """
+        num_sents = len(self.attention_matrices)
+        if self.max_plots is None or self.max_plots >= num_sents:
+            return list(range(num_sents))
 
-            self.plot_sentence_attention(attn_matrix, source_sent, target_sent, plot_file_path)
+        if self.plot_selection == 'first':
+            selected_idx = np.arange(self.max_plots)
+        elif self.plot_selection == 'random':
+            selected_idx = np.random.RandomState(self.seed).choice(num_sents, self.max_plots, replace=False)
+        else:
+            scores = np.asarray(self.selection_scores, dtype=np.float64)
+            if len(scores) != num_sents:
+                raise ValueError(f'Length of selection_scores {len(scores)} does not match '
+                                 f'the number of sentences {num_sents}.')
+            if self.plot_selection == 'top_k':
+                scores = -scores
+            selected_idx = np.argsort(scores, kind='stable')[:self.max_plots]
 
-        return output_plot_paths
+        return sorted(selected_idx.tolist())
 
     @staticmethod
     def plot_sentence_attention(attention_matrix, sentence_source, sentence_target, plot_file_path=None):
@@ -66,27 +134,7 @@ class AttentionHeatMap(AbstractBaseMetric):
         ax = plt.subplot(gs[0])
         ax_c = plt.subplot(gs[1])
 
-        cmap = sns.light_palette((200, 75, 60), input="husl", as_cmap=True)
-        # prop = FontProperties(fname='fonts/IPAfont00303/ipam.ttf', size=12)
-        ax = sns.heatmap(attention_matrix, xticklabels=sentence_source, yticklabels=sentence_target,
-                         ax=ax, cmap=cmap, cbar_ax=ax_c)
-
-        ax.xaxis.tick_top()
-        ax.yaxis.tick_right()
-
-        ax.set_xticklabels(sentence_target, minor=True, rotation=60, size=12)
-
-        for label in ax.get_xticklabels(minor=False):
-            label.set_fontsize(12)
-            # label.set_font_properties(prop)
-
-        for label in ax.get_yticklabels(minor=False):
-            label.set_fontsize(12)
-            label.set_rotation(-90)
-            label.set_horizontalalignment('left')
-
-        ax.set_xlabel("Source", size=20)
-        ax.set_ylabel("Hypothesis", size=20)
+        draw_attention_heatmap(ax, ax_c, attention_matrix, sentence_source, sentence_target)
 
         if plot_file_path:
             fig.savefig(plot_file_path, format="png")
@@ -109,3 +157,160 @@ class AttentionHeatMap(AbstractBaseMetric):
         dir_path = os.path.join(output_plot_dir, 'attention_heatmaps')
         os.mkdir(dir_path)
         return dir_path
+
+
+class AttentionHeatMapRenderer:
+    def __init__(self):
+        """Attention heatmap renderer reusing the same figure and axes for all the rendered plots
+
+        The figure is created directly without the pyplot state machine so creating it is cheap and it is never
+        registered with the GUI backend. Between the plots only the axes are cleared.
+        """
+        self.fig = Figure(figsize=(8, 8))
+        gs = gridspec.GridSpec(2, 2, width_ratios=[12, 1], height_ratios=[12, 1], figure=self.fig)
+        self.ax = self.fig.add_subplot(gs[0])
+        self.ax_c = self.fig.add_subplot(gs[1])
+        self.cmap = sns.light_palette((200, 75, 60), input="husl", as_cmap=True)
+
+    def render(self, attention_matrix, sentence_source, sentence_target, plot_file_path):
+        """Render the attention matrix heatmap and save it as the PNG file
+
+        Args:
+            attention_matrix (np.array): 2D attention matrix
+            sentence_source (list): corresponding source sentence text tokens
+            sentence_target (list): corresponding target sentence text tokens
+            plot_file_path (str): local drive file path where to save the plotted attention matrix heatmap
+
+        Returns:
+            None
+        """
+        self.ax.clear()
+        self.ax_c.clear()
+        draw_attention_heatmap(self.ax, self.ax_c, attention_matrix, sentence_source, sentence_target, self.cmap)
+        self.fig.savefig(plot_file_path, format="png")
+
+
+def render_attention_plots(plot_tasks):
+    """Render the chunk of attention heatmap plots with a single reused figure
+
+    Args:
+        plot_tasks (list): list of (attention matrix, source tokens, target tokens, plot file path) tuples
+
+    Returns:
+        None
+    """
+    if len(plot_tasks) == 0:
+        return
+
+    renderer = AttentionHeatMapRenderer()
+    for attention_matrix, sentence_source, sentence_target, plot_file_path in plot_tasks:
+        renderer.render(attention_matrix, sentence_source, sentence_target, plot_file_path)
+
+
+def draw_attention_heatmap(ax, ax_c, attention_matrix, sentence_source, sentence_target, cmap=None):
+    """Draw the attention matrix heatmap into the provided axes
+
+    Args:
+        ax (matplotlib.axes.Axes): heatmap axes
+        ax_c (matplotlib.axes.Axes): colorbar axes
+        attention_matrix (np.array): 2D attention matrix
+        sentence_source (list): corresponding source sentence text tokens
+        sentence_target (list): corresponding target sentence text tokens
+        cmap (matplotlib.colors.Colormap or None): heatmap colormap
+
+    Returns:
+        matplotlib.axes.Axes: heatmap axes
+    """
+    if cmap is None:
+        cmap = sns.light_palette((200, 75, 60), input="husl", as_cmap=True)
+    # prop = FontProperties(fname='fonts/IPAfont00303/ipam.ttf', size=12)
+    ax = sns.heatmap(attention_matrix, xticklabels=sentence_source, yticklabels=sentence_target,
+                     ax=ax, cmap=cmap, cbar_ax=ax_c)
+
+    ax.xaxis.tick_top()
+    ax.yaxis.tick_right()
+
+    ax.set_xticklabels(sentence_target, minor=True, rotation=60, size=12)
+
+    for label in ax.get_xticklabels(minor=False):
+        label.set_fontsize(12)
+        # label.set_font_properties(prop)
+
+    for label in ax.get_yticklabels(minor=False):
+        label.set_fontsize(12)
+        label.set_rotation(-90)
+        label.set_horizontalalignment('left')
+
+    ax.set_xlabel("Source", size=20)
+    ax.set_ylabel("Hypothesis", size=20)
+    return ax
+
+
+def save_attention_matrices(file_path, attention_matrices, source_sentences, target_sentences):
+    """Save the attention matrices and the sentence tokens into a single compressed NumPy file
+
+    Matrices of different shapes are flattened and concatenated into a single array, the sentence tokens are
+    stored as concatenated string arrays. No pickling is needed to load the file.
+
+    Args:
+        file_path (str): path of the ``.npz`` file
+        attention_matrices (list): list of attention 2D matrices
+        source_sentences (list): list of corresponding source sentence text tokens
+        target_sentences (list): list of corresponding target sentence text tokens
+
+    Returns:
+        str: path of the saved file
+    """
+    attention_matrices = [to_numpy(attn_matrix).astype(np.float32) for attn_matrix in attention_matrices]
+    shapes = np.array([attn_matrix.shape for attn_matrix in attention_matrices], dtype=np.int64).reshape(-1, 2)
+
+    np.savez_compressed(
+        file_path,
+        attention_values=np.concatenate([attn_matrix.reshape(-1) for attn_matrix in attention_matrices] +
+                                        [np.zeros(0, dtype=np.float32)]),
+        attention_shapes=shapes,
+        source_tokens=np.array([str(token) for sent in source_sentences for token in sent], dtype=str),
+        source_lengths=np.array([len(sent) for sent in source_sentences], dtype=np.int64),
+        target_tokens=np.array([str(token) for sent in target_sentences for token in sent], dtype=str),
+        target_lengths=np.array([len(sent) for sent in target_sentences], dtype=np.int64)
+    )
+    return file_path
+
+
+def load_attention_matrices(file_path):
+    """Load the attention matrices and the sentence tokens saved with :func:`save_attention_matrices`
+
+    Args:
+        file_path (str): path of the ``.npz`` file
+
+    Returns:
+        (list, list, list): attention matrices, source sentence tokens and target sentence tokens
+    """
+    with np.load(file_path) as data:
+        shapes = data['attention_shapes']
+        if len(shapes) == 0:
+            return [], [], []
+
+        values = np.split(data['attention_values'], np.cumsum(shapes.prod(axis=1))[:-1])
+        attention_matrices = [attn_values.reshape(shape) for attn_values, shape in zip(values, shapes)]
+
+        source_sentences = [sent.tolist()
+                            for sent in np.split(data['source_tokens'], np.cumsum(data['source_lengths'])[:-1])]
+        target_sentences = [sent.tolist()
+                            for sent in np.split(data['target_tokens'], np.cumsum(data['target_lengths'])[:-1])]
+
+    return attention_matrices, source_sentences, target_sentences
+
+
+def to_numpy(attention_matrix):
+    """Convert the attention matrix into the NumPy array
+
+    Args:
+        attention_matrix (numpy.array or torch.Tensor or list): attention matrix
+
+    Returns:
+        numpy.array: attention matrix NumPy array
+    """
+    if isinstance(attention_matrix, torch.Tensor):
+        return attention_matrix.detach().cpu().numpy()
+    return np.asarray(attention_matrix)
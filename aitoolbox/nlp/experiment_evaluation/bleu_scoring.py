@@ -0,0 +1,160 @@
+import numpy as np
+import torch
+
+from aitoolbox.utils.util import map_in_process_chunks
+
+
+class BLEUScorer:
+    def __init__(self, max_order=4, num_workers=0, chunk_size=10000):
+        """Vectorised BLEU scoring engine
+
+        The modified n-gram precision counts of all the sentence pairs are computed at once with NumPy array
+        operations over the integer encoded tokens. N-grams are identified by the integer keys built incrementally
+        from the (n-1)-gram keys and the next token id, so the higher order n-grams never have to be materialized as
+        tuples. Sentence and corpus BLEU scores are then both calculated from the same per-sentence statistics.
+
+        The scores are the same as the NLTK ``sentence_bleu`` and ``corpus_bleu`` with the uniform weights and
+        without the smoothing (a sentence without any matching n-gram of some order gets the score of 0).
+
+        Args:
+            max_order (int): maximum n-gram order
+            num_workers (int): number of processes computing the statistics of the sentence chunks in parallel.
+                When ``0`` or ``1`` the statistics are computed in the current process.
+            chunk_size (int): number of sentence pairs processed in a single parallel process task
+        """
+        if max_order < 1:
+            raise ValueError(f'max_order has to be at least 1. Provided: {max_order}')
+
+        self.max_order = max_order
+        self.num_workers = num_workers
+        self.chunk_size = chunk_size
+
+    def compute_statistics(self, references, hypotheses):
+        """Compute the per-sentence BLEU statistics
+
+        Args:
+            references (list): reference sentences as lists of string tokens or sequences of integer token ids
+                (e.g. the :class:`~aitoolbox.nlp.core.vocabulary.Vocabulary` indices)
+            hypotheses (list): hypothesis sentences in the same format as the references
+
+        Returns:
+            numpy.ndarray: statistics array of shape ``(num_sentences, 2 * max_order + 2)`` holding the matched n-gram
+            counts and the hypothesis n-gram counts for each order followed by the hypothesis and the reference lengths
+        """
+        if len(references) != len(hypotheses):
+            raise ValueError(f'len(references) != len(hypotheses). Got {len(references)} != {len(hypotheses)}')
+
+        chunk_stats = map_in_process_chunks(self._compute_chunk_statistics, references, hypotheses,
+                                            num_workers=self.num_workers, chunk_size=self.chunk_size)
+        return np.concatenate(chunk_stats) if len(chunk_stats) > 1 else chunk_stats[0]
+
+    def _compute_chunk_statistics(self, references, hypotheses):
+        references, hypotheses = encode_token_ids(references, hypotheses)
+        num_sents = len(references)
+
+        ref_lengths = np.fromiter(map(len, references), dtype=np.int64, count=num_sents)
+        hyp_lengths = np.fromiter(map(len, hypotheses), dtype=np.int64, count=num_sents)
+        lengths = np.concatenate((ref_lengths, hyp_lengths))
+
+        token_ids = np.concatenate(references + hypotheses) if lengths.sum() > 0 else np.zeros(0, dtype=np.int64)
+        # Sentence of each token, hypothesis sentences are offset by the number of sentences
+        token_sents = np.repeat(np.arange(2 * num_sents), lengths)
+        tokens_left = lengths[token_sents] - (np.arange(len(token_ids)) - np.repeat(np.cumsum(lengths) - lengths,
+                                                                                     lengths))
+        unigram_keys = np.unique(token_ids, return_inverse=True)[1].reshape(-1)
+        num_unigrams = int(unigram_keys.max()) + 1 if len(unigram_keys) > 0 else 1
+
+        stats = np.zeros((num_sents, 2 * self.max_order + 2), dtype=np.int64)
+        stats[:, -2] = hyp_lengths
+        stats[:, -1] = ref_lengths
+
+        ngram_starts = np.arange(len(token_ids))
+        ngram_keys = unigram_keys
+        for n in range(1, self.max_order + 1):
+            if n > 1:
+                has_ngram = tokens_left[ngram_starts] >= n
+                ngram_starts = ngram_starts[has_ngram]
+                ngram_keys = ngram_keys[has_ngram] * num_unigrams + unigram_keys[ngram_starts + n - 1]
+                ngram_keys = np.unique(ngram_keys, return_inverse=True)[1].reshape(-1)
+
+            num_ngram_keys = int(ngram_keys.max()) + 1 if len(ngram_keys) > 0 else 1
+            ngram_sents = token_sents[ngram_starts]
+            is_hyp = ngram_sents >= num_sents
+            sent_ngram_keys = (ngram_sents % num_sents) * num_ngram_keys + ngram_keys
+
+            sent_ngrams, sent_ngram_idx = np.unique(sent_ngram_keys, return_inverse=True)
+            sent_ngram_idx = sent_ngram_idx.reshape(-1)
+            ref_counts = np.bincount(sent_ngram_idx[~is_hyp], minlength=len(sent_ngrams))
+            hyp_counts = np.bincount(sent_ngram_idx[is_hyp], minlength=len(sent_ngrams))
+
+            stats[:, n - 1] = np.bincount(sent_ngrams // num_ngram_keys, weights=np.minimum(ref_counts, hyp_counts),
+                                          minlength=num_sents)
+            stats[:, self.max_order + n - 1] = np.maximum(hyp_lengths - n + 1, 0)
+
+        return stats
+
+    def sentence_scores(self, stats):
+        """Calculate the sentence BLEU scores
+
+        Args:
+            stats (numpy.ndarray): per-sentence statistics as returned by :meth:`compute_statistics`
+
+        Returns:
+            numpy.ndarray: sentence BLEU scores
+        """
+        matches = stats[:, :self.max_order].astype(np.float64)
+        # Same as NLTK, the hypotheses shorter than the n-gram order are counted as having a single n-gram
+        totals = np.maximum(stats[:, self.max_order:2 * self.max_order], 1).astype(np.float64)
+        return self._bleu(matches, totals, stats[:, -2].astype(np.float64), stats[:, -1].astype(np.float64))
+
+    def corpus_score(self, stats):
+        """Calculate the corpus BLEU score
+
+        Args:
+            stats (numpy.ndarray): per-sentence statistics as returned by :meth:`compute_statistics`
+
+        Returns:
+            float: corpus BLEU score
+        """
+        matches = stats[:, :self.max_order].sum(axis=0, keepdims=True).astype(np.float64)
+        totals = np.maximum(stats[:, self.max_order:2 * self.max_order], 1).sum(axis=0, keepdims=True)
+        hyp_length, ref_length = stats[:, -2:].sum(axis=0).astype(np.float64)
+        return float(self._bleu(matches, totals.astype(np.float64), np.array([hyp_length]), np.array([ref_length]))[0])
+
+    def _bleu(self, matches, totals, hyp_lengths, ref_lengths):
+        has_all_matches = np.all(matches > 0, axis=1)
+        log_precisions = np.log(np.where(matches > 0, matches, 1.) / totals).mean(axis=1)
+
+        with np.errstate(divide='ignore'):
+            brevity_penalty = np.where(hyp_lengths > ref_lengths, 1.,
+                                       np.exp(1. - ref_lengths / np.maximum(hyp_lengths, 1.)))
+        brevity_penalty[hyp_lengths == 0] = 0.
+
+        return np.where(has_all_matches, brevity_penalty * np.exp(log_precisions), 0.)
+
+
+def encode_token_ids(references, hypotheses):
+    """Encode the token sentences into the integer token id arrays
+
+    Sentences which are already given as the integer sequences (e.g. the vocabulary indices) are used as they are.
+
+    Args:
+        references (list): reference sentences as lists of tokens or integer token ids
+        hypotheses (list): hypothesis sentences as lists of tokens or integer token ids
+
+    Returns:
+        (list, list): reference and hypothesis sentences as the int64 NumPy arrays
+    """
+    sentences = [sent.cpu().numpy() if isinstance(sent, torch.Tensor) else sent
+                 for sent in list(references) + list(hypotheses)]
+
+    if all(isinstance(sent, np.ndarray) and sent.dtype.kind in 'iu' or
+           not isinstance(sent, np.ndarray) and all(isinstance(token, (int, np.integer)) for token in sent)
+           for sent in sentences):
+        id_sentences = [np.asarray(sent, dtype=np.int64).reshape(-1) for sent in sentences]
+    else:
+        token_ids = {}
+        id_sentences = [np.array([token_ids.setdefault(token, len(token_ids)) for token in sent], dtype=np.int64)
+                        for sent in sentences]
+
+    return id_sentences[:len(references)], id_sentences[len(references):]
@@ -0,0 +1,163 @@
+import re
+import string
+from collections import Counter
+from itertools import chain
+import numpy as np
+
+from aitoolbox.utils.util import map_in_process_chunks
+
+PUNCTUATION_TABLE = str.maketrans('', '', string.punctuation)
+ARTICLES_REGEX = re.compile(r'\b(a|an|the)\b', re.UNICODE)
+
+
+def normalize_answer(text_str):
+    """Convert to lowercase and remove punctuation, articles and extra whitespace
+
+    Same normalization as in the official SQuAD 2.0 eval script
+    https://worksheets.codalab.org/rest/bundles/0x6b567e1cf2e041ec80d7098f031c5c9e/contents/blob/
+    with the punctuation table and the articles regex compiled only once.
+
+    Args:
+        text_str (str): answer text
+
+    Returns:
+        str: normalized answer text
+    """
+    return ' '.join(ARTICLES_REGEX.sub(' ', text_str.lower().translate(PUNCTUATION_TABLE)).split())
+
+
+def compute_token_f1(gold_toks, pred_toks):
+    """Compute the F1 score between the normalized gold and predicted answer tokens
+
+    Args:
+        gold_toks (tuple or list): normalized gold answer tokens
+        pred_toks (tuple or list): normalized predicted answer tokens
+
+    Returns:
+        float or int: F1 score
+    """
+    if len(gold_toks) == 0 or len(pred_toks) == 0:
+        # If either is no-answer, then F1 is 1 if they agree, 0 otherwise
+        return int(gold_toks == pred_toks)
+    common = Counter(gold_toks) & Counter(pred_toks)
+    num_same = sum(common.values())
+    if num_same == 0:
+        return 0
+    precision = 1.0 * num_same / len(pred_toks)
+    recall = 1.0 * num_same / len(gold_toks)
+    return (2 * precision * recall) / (precision + recall)
+
+
+class QAScorer:
+    def __init__(self, num_workers=0, shard_size=10000, max_cache_size=1000000):
+        """Shared SQuAD-style exact match and F1 scoring engine for the question answering evaluation
+
+        Each answer text is normalized and tokenized only once and the normalized forms are cached between
+        the evaluations. Exact match and F1 are computed in the same pass over the answers and the per-answer
+        scores are cached as well, so when both the ``ExactMatchTextMetric`` and the ``F1TextMetric`` use the same
+        scorer, the answers are scored only once. Large evaluation sets can be split into shards which are scored
+        in the process pool.
+
+        Args:
+            num_workers (int): number of processes scoring the answer shards in parallel. When ``0`` or ``1``
+                the answers are scored in the current process.
+            shard_size (int): number of answers scored in a single parallel process task. Evaluation sets smaller
+                than this are always scored in the current process.
+            max_cache_size (int): maximum number of cached normalized texts and answer scores after which
+                the caches are cleared
+        """
+        self.num_workers = num_workers
+        self.shard_size = shard_size
+        self.max_cache_size = max_cache_size
+
+        self.normalized_cache = {}
+        self.score_cache = {}
+
+    def get_tokens(self, text):
+        """Get the normalized answer tokens
+
+        Args:
+            text (str): answer text
+
+        Returns:
+            tuple: normalized answer tokens
+        """
+        tokens = self.normalized_cache.get(text)
+        if tokens is None:
+            if len(self.normalized_cache) >= self.max_cache_size:
+                self.normalized_cache.clear()
+            tokens = tuple(normalize_answer(text).split()) if text else ()
+            self.normalized_cache[text] = tokens
+        return tokens
+
+    def score_answer(self, true_text, pred_text):
+        """Score a single predicted answer
+
+        Args:
+            true_text (str): ground truth answer text
+            pred_text (str): predicted answer text
+
+        Returns:
+            (int, float): exact match and F1 score
+        """
+        gold_toks = self.get_tokens(true_text)
+        pred_toks = self.get_tokens(pred_text)
+        return int(gold_toks == pred_toks), compute_token_f1(gold_toks, pred_toks)
+
+    def score(self, true_texts, pred_texts):
+        """Score the predicted answers
+
+        Args:
+            true_texts (list): ground truth answer texts
+            pred_texts (list): predicted answer texts
+
+        Returns:
+            (numpy.ndarray, numpy.ndarray): per-answer exact match and F1 scores
+        """
+        if len(true_texts) != len(pred_texts):
+            raise ValueError(f'len(true_texts) != len(pred_texts). Got {len(true_texts)} != {len(pred_texts)}')
+
+        answer_pairs = list(zip(true_texts, pred_texts))
+        missing_pairs = list(dict.fromkeys(pair for pair in answer_pairs if pair not in self.score_cache))
+
+        if len(self.score_cache) + len(missing_pairs) > self.max_cache_size:
+            self.score_cache.clear()
+            missing_pairs = list(dict.fromkeys(answer_pairs))
+
+        shard_scores = map_in_process_chunks(self.score_answer_pairs, missing_pairs,
+                                             num_workers=self.num_workers, chunk_size=self.shard_size)
+        self.score_cache.update(zip(missing_pairs, chain.from_iterable(shard_scores)))
+
+        scores = np.array([self.score_cache[pair] for pair in answer_pairs], dtype=np.float64).reshape(-1, 2)
+        return scores[:, 0], scores[:, 1]
+
+    def score_answer_tokens(self, y_true, y_predicted, target_actual_text=False):
+        """Score the predicted answers given as the lists of tokens
+
+        Args:
+            y_true (list): ground truth answers as lists of tokens or as texts when ``target_actual_text`` is set
+            y_predicted (list): predicted answers as lists of tokens
+            target_actual_text (bool): if the ground truth answers are provided as the texts
+
+        Returns:
+            (numpy.ndarray, numpy.ndarray): per-answer exact match and F1 scores
+        """
+        if not target_actual_text:
+            y_true = [' '.join(sent) for sent in y_true]
+        y_predicted = [' '.join(sent) for sent in y_predicted]
+        return self.score(y_true, y_predicted)
+
+    def score_answer_pairs(self, answer_pairs):
+        """Score the shard of the (ground truth, predicted) answer text pairs
+
+        Args:
+            answer_pairs (list): list of (ground truth, predicted) answer text tuples
+
+        Returns:
+            list: list of (exact match, F1) score tuples
+        """
+        return [self.score_answer(*pair) for pair in answer_pairs]
+
+    def __getstate__(self):
+        # Caches aren't sent to the parallel scoring processes
+        return {**self.__dict__, 'normalized_cache': {}, 'score_cache': {}}
@@ -0,0 +1,181 @@
+from collections import Counter
+import numpy as np
+
+from aitoolbox.utils.util import map_in_process_chunks
+
+SCORE_TYPES = ('p', 'r', 'f')
+
+
+def get_ngram_counts(token_ids, n):
+    """Count the n-grams in the sequence of token ids
+
+    Args:
+        token_ids (list): sequence of integer token ids
+        n (int): n-gram size
+
+    Returns:
+        collections.Counter: n-gram tuple counts
+    """
+    if n == 1:
+        return Counter(token_ids)
+    return Counter(zip(*[token_ids[i:] for i in range(n)]))
+
+
+def lcs_length(x, y):
+    """Length of the longest common subsequence of the two token id sequences
+
+    Uses the bit-parallel formulation of the LCS dynamic programming (Hyyrö, 2004) where the whole DP table column
+    is stored in the bits of a single Python integer. This way each token of ``y`` is processed with a few integer
+    operations instead of the ``len(x)`` Python level table updates.
+
+    Args:
+        x (list): first sequence of integer token ids
+        y (list): second sequence of integer token ids
+
+    Returns:
+        int: LCS length
+    """
+    if len(x) < len(y):
+        x, y = y, x
+    if len(y) == 0:
+        return 0
+
+    match_masks = {}
+    for i, token_id in enumerate(x):
+        match_masks[token_id] = match_masks.get(token_id, 0) | (1 << i)
+
+    all_bits = (1 << len(x)) - 1
+    column = all_bits
+    for token_id in y:
+        matches = column & match_masks.get(token_id, 0)
+        column = ((column + matches) | (column - matches)) & all_bits
+    return len(x) - bin(column).count('1')
+
+
+def precision_recall_f(overlap_count, hypothesis_count, reference_count):
+    """Calculate the precision, recall and F1 score from the overlap counts
+
+    Args:
+        overlap_count (int): number of the overlapping units
+        hypothesis_count (int): number of the units in the hypothesis
+        reference_count (int): number of the units in the reference
+
+    Returns:
+        (float, float, float): precision, recall and F1 score
+    """
+    precision = overlap_count / hypothesis_count if hypothesis_count > 0 else 0.
+    recall = overlap_count / reference_count if reference_count > 0 else 0.
+    f_score = 2. * precision * recall / (precision + recall) if precision + recall > 0 else 0.
+    return precision, recall, f_score
+
+
+class RougeScorer:
+    def __init__(self, rouge_n=(1, 2), rouge_l=True, num_workers=0, chunk_size=1000):
+        """Native ROUGE-N and ROUGE-L scorer
+
+        Tokens are mapped to the integer ids and the ROUGE-N overlap is counted as the clipped n-gram count
+        overlap (same as in the original ROUGE-1.5.5). ROUGE-L is based on the longest common subsequence of
+        the whole hypothesis and the reference computed with the bit-parallel dynamic programming. The scored text
+        pairs can be split into chunks which are scored in parallel processes.
+
+        Compared to the ``rouge`` package the repeated n-grams are counted with the clipped counts instead of
+        counting every distinct n-gram once, and the texts are not split into sentences at the full stops: the full
+        stop is an ordinary token and ROUGE-L is the LCS of the whole texts instead of the union LCS over the
+        sentences. The scores therefore differ on the texts with repeated n-grams or multiple sentences.
+
+        Args:
+            rouge_n (tuple or list): n-gram sizes of the calculated ROUGE-N scores
+            rouge_l (bool): calculate the ROUGE-L score
+            num_workers (int): number of processes scoring the text chunks in parallel. When ``0`` or ``1``
+                the texts are scored in the current process.
+            chunk_size (int): number of text pairs scored in a single parallel process task
+        """
+        if len(rouge_n) == 0 and not rouge_l:
+            raise ValueError('At least one ROUGE score type has to be calculated')
+        if any(n < 1 for n in rouge_n):
+            raise ValueError(f'ROUGE-N n-gram sizes have to be at least 1. Provided: {rouge_n}')
+
+        self.rouge_n = tuple(rouge_n)
+        self.rouge_l = rouge_l
+        self.num_workers = num_workers
+        self.chunk_size = chunk_size
+
+    @property
+    def score_names(self):
+        return [f'rouge-{n}' for n in self.rouge_n] + (['rouge-l'] if self.rouge_l else [])
+
+    def score(self, references, hypotheses):
+        """Score the hypotheses against the references
+
+        Args:
+            references (list): reference texts as strings or lists of tokens
+            hypotheses (list): hypothesis texts as strings or lists of tokens
+
+        Returns:
+            numpy.ndarray: scores array of shape ``(num_texts, num_rouge_types, 3)`` where the last dimension holds
+            the precision, recall and F1 score
+        """
+        if len(references) != len(hypotheses):
+            raise ValueError(f'len(references) != len(hypotheses). Got {len(references)} != {len(hypotheses)}')
+
+        text_pairs = [(tokenize(reference), tokenize(hypothesis))
+                      for reference, hypothesis in zip(references, hypotheses)]
+
+        chunk_scores = map_in_process_chunks(self.score_chunk, text_pairs,
+                                             num_workers=self.num_workers, chunk_size=self.chunk_size)
+        return np.concatenate(chunk_scores) if len(chunk_scores) > 1 else chunk_scores[0]
+
+    def score_chunk(self, text_pairs):
+        """Score the chunk of the tokenized text pairs
+
+        Args:
+            text_pairs (list): list of (reference tokens, hypothesis tokens) tuples
+
+        Returns:
+            numpy.ndarray: scores array of shape ``(num_texts, num_rouge_types, 3)``
+        """
+        token_ids = {}
+        scores = np.zeros((len(text_pairs), len(self.score_names), len(SCORE_TYPES)))
+
+        for i, (reference, hypothesis) in enumerate(text_pairs):
+            reference_ids = [token_ids.setdefault(token, len(token_ids)) for token in reference]
+            hypothesis_ids = [token_ids.setdefault(token, len(token_ids)) for token in hypothesis]
+
+            for j, n in enumerate(self.rouge_n):
+                reference_ngrams = get_ngram_counts(reference_ids, n)
+                hypothesis_ngrams = get_ngram_counts(hypothesis_ids, n)
+                overlap_count = sum((reference_ngrams & hypothesis_ngrams).values())
+                scores[i, j] = precision_recall_f(overlap_count,
+                                                  max(len(hypothesis_ids) - n + 1, 0),
+                                                  max(len(reference_ids) - n + 1, 0))
+            if self.rouge_l:
+                scores[i, -1] = precision_recall_f(lcs_length(reference_ids, hypothesis_ids),
+                                                   len(hypothesis_ids), len(reference_ids))
+        return scores
+
+    def score_summary(self, scores):
+        """Average the per-text scores into the ``rouge`` package style result dict
+
+        Args:
+            scores (numpy.ndarray): scores as returned by :meth:`score`
+
+        Returns:
+            dict: average scores, e.g. ``{'rouge-1': {'f': ..., 'p': ..., 'r': ...}, ...}``
+        """
+        mean_scores = scores.mean(axis=0) if len(scores) > 0 else scores.sum(axis=0)
+        return {score_name: dict(zip(SCORE_TYPES, mean_scores[i].tolist()))
+                for i, score_name in enumerate(self.score_names)}
+
+
+def tokenize(text):
+    """Split the text into tokens if it is not already tokenized
+
+    Args:
+        text (str or list): text string or list of tokens
+
+    Returns:
+        list: list of string tokens
+    """
+    if isinstance(text, str):
+        return text.split()
+    return [str(token) for token in text]
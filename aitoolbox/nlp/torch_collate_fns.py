@@ -1,4 +1,6 @@
 import torch
+from torch.nn.utils.rnn import pad_sequence
+from torch.utils.data.dataloader import default_collate
 
 
 def qa_concat_ctx_span_collate_fn(data):
@@ -19,18 +21,104 @@ def qa_concat_ctx_span_collate_fn(data):
         trg_seqs: torch tensor of shape (batch_size, padded_length).
         trg_lengths: list of length (batch_size); valid length for each padded target sequence.
     """
-
-    def merge(sequences):
-        lengths = [len(seq) for seq in sequences]
-        padded_seqs = torch.zeros(len(sequences), max(lengths)).long()
-        for i, seq in enumerate(sequences):
-            end = lengths[i]
-            padded_seqs[i, :end] = seq[:end]
-        return padded_seqs, torch.LongTensor(lengths)
-
     paragraph, question, span = list(zip(*data))
 
-    paragraph_pad, paragraph_lengths = merge(paragraph)
-    question_pad, question_lengths = merge(question)
+    paragraph_pad, paragraph_lengths = pad_sequences(paragraph, dtype=torch.long)
+    question_pad, question_lengths = pad_sequences(question, dtype=torch.long)
 
     return paragraph_pad, paragraph_lengths, question_pad, question_lengths, torch.LongTensor(span)
+
+
+def pad_sequences(sequences, padding_value=0, dtype=None):
+    """Pad the variable length sequences into a single batch tensor
+
+    All the sequences are copied into the padded tensor with a single vectorised operation.
+
+    Args:
+        sequences (list or tuple): sequences as tensors, numpy arrays or lists. Sequences can have additional
+            trailing dimensions which have to match between the sequences.
+        padding_value (int or float): value of the padding elements
+        dtype (torch.dtype or None): data type of the padded tensor. If not provided, the data type of the sequences
+            is used.
+
+    Returns:
+        (torch.Tensor, torch.Tensor): padded tensor of shape (batch_size, max_length, ...), lengths of
+        the sequences
+    """
+    tensors = [torch.as_tensor(seq, dtype=dtype) for seq in sequences]
+    lengths = torch.tensor([len(tensor) for tensor in tensors], dtype=torch.long)
+    padded = pad_sequence(tensors, batch_first=True, padding_value=padding_value)
+    return padded, lengths
+
+
+def get_padding_mask(lengths, max_length=None):
+    """Get the mask of the valid (non-padding) positions in the padded batch
+
+    Args:
+        lengths (torch.Tensor): lengths of the sequences
+        max_length (int or None): length of the padded sequences. If not provided, the longest sequence length
+            is used.
+
+    Returns:
+        torch.Tensor: bool mask of shape (batch_size, max_length) which is ``True`` at the valid positions
+    """
+    if max_length is None:
+        max_length = int(lengths.max()) if len(lengths) > 0 else 0
+    return torch.arange(max_length, device=lengths.device).unsqueeze(0) < lengths.unsqueeze(1)
+
+
+class PaddedBatchCollate:
+    def __init__(self, pad_fields=None, padding_value=0, return_mask=True, dtype=None):
+        """Collate function padding the variable length sequence fields of the examples
+
+        Each padded field is returned as the padded tensor followed by the lengths of the sequences and (optionally)
+        the padding mask. All the other fields are collated with the PyTorch default collate function. Combined with
+        the :class:`~aitoolbox.torchtrain.data.samplers.LengthBucketBatchSampler` which puts the examples of similar
+        length into the same batch, only a small part of the padded batch is wasted on the padding.
+
+        Examples:
+            .. code-block:: python
+
+                # Dataset examples are tuples: (token_ids, label)
+                collate_fn = PaddedBatchCollate(pad_fields=[0])
+                token_ids_padded, token_lengths, token_mask, labels = collate_fn(examples)
+
+        Args:
+            pad_fields (list or None): indices of the example tuple fields to be padded. If not provided, all
+                the fields are padded. When the examples are not tuples, each example is treated as a single
+                sequence field.
+            padding_value (int or float): value of the padding elements
+            return_mask (bool): return the padding mask after the lengths of each padded field
+            dtype (torch.dtype or None): data type of the padded tensors. If not provided, the data type of
+                the sequences is used.
+        """
+        self.pad_fields = pad_fields
+        self.padding_value = padding_value
+        self.return_mask = return_mask
+        self.dtype = dtype
+
+    def __call__(self, data):
+        if not isinstance(data[0], tuple):
+            data = [(example,) for example in data]
+
+        batch = []
+        for field_idx, field in enumerate(zip(*data)):
+            if self.pad_fields is None or field_idx in self.pad_fields:
+                batch += self.pad_field(field)
+            else:
+                batch.append(default_collate(field))
+        return tuple(batch)
+
+    def pad_field(self, sequences):
+        """Pad the sequences of a single field
+
+        Args:
+            sequences (tuple): sequences of the field from all the examples in the batch
+
+        Returns:
+            list: padded tensor, lengths and optionally the padding mask
+        """
+        padded, lengths = pad_sequences(sequences, self.padding_value, self.dtype)
+        if self.return_mask:
+            return [padded, lengths, get_padding_mask(lengths, padded.shape[1])]
+        return [padded, lengths]
@@ -1,12 +1,23 @@
-from aitoolbox.torchtrain.model import TTModel, MultiGPUModelWrap, ModelWrap
-from aitoolbox.torchtrain.parallel import TTDataParallel
-from aitoolbox.torchtrain.train_loop.train_loop import TrainLoop
-from aitoolbox.torchtrain.train_loop.train_loop_tracking import (
-    TrainLoopCheckpoint,
-    TrainLoopEndSave,
-    TrainLoopCheckpointEndSave
-)
-from aitoolbox.torchtrain.data.batch_model_feed_defs import AbstractModelFeedDefinition
-from aitoolbox.torchtrain.multi_loss_optim import MultiLoss, MultiOptimizer
+from aitoolbox.utils.lazy_import import lazy_module_attributes
 
-from aitoolbox.torchtrain.data.dataset import BasicDataset
+# Public API is imported lazily on first access to keep ``import aitoolbox.torchtrain`` cheap
+_LAZY_ATTRIBUTES = {
+    'TTModel': 'aitoolbox.torchtrain.model',
+    'MultiGPUModelWrap': 'aitoolbox.torchtrain.model',
+    'ModelWrap': 'aitoolbox.torchtrain.model',
+    'TTDataParallel': 'aitoolbox.torchtrain.parallel',
+    'TrainLoop': 'aitoolbox.torchtrain.train_loop.train_loop',
+    'TrainLoopCheckpoint': 'aitoolbox.torchtrain.train_loop.train_loop_tracking',
+    'TrainLoopEndSave': 'aitoolbox.torchtrain.train_loop.train_loop_tracking',
+    'TrainLoopCheckpointEndSave': 'aitoolbox.torchtrain.train_loop.train_loop_tracking',
+    'AbstractModelFeedDefinition': 'aitoolbox.torchtrain.data.batch_model_feed_defs',
+    'BasicModelFeedDefinition': 'aitoolbox.torchtrain.data.batch_model_feed_defs',
+    'MultiLoss': 'aitoolbox.torchtrain.multi_loss_optim',
+    'MultiOptimizer': 'aitoolbox.torchtrain.multi_loss_optim',
+
+    'BasicDataset': 'aitoolbox.torchtrain.data.dataset',
+    'ColumnarDataset': 'aitoolbox.torchtrain.data.columnar'
+}
+
+__all__ = list(_LAZY_ATTRIBUTES)
+__getattr__, __dir__ = lazy_module_attributes(__name__, _LAZY_ATTRIBUTES)
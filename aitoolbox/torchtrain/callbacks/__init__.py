@@ -1,14 +1,30 @@
-from aitoolbox.torchtrain.callbacks.abstract import AbstractCallback, AbstractExperimentCallback
-from aitoolbox.torchtrain.callbacks.basic import (
-    EarlyStopping, ThresholdEarlyStopping, EmailNotification, TerminateOnNaN, AllPredictionsSame, LogUpload
-)
-from aitoolbox.torchtrain.callbacks.performance_eval import (
-    ModelPerformanceEvaluation, ModelPerformancePrintReport, ModelTrainHistoryFileWriter, ModelTrainHistoryPlot
-)
-from aitoolbox.torchtrain.callbacks.gradient import GradNormClip, GradValueClip
-from aitoolbox.torchtrain.callbacks.tensorboard import TensorboardFullTracking, TensorboardTrainHistoryMetric
-from aitoolbox.torchtrain.callbacks.wandb import WandBTracking
+from aitoolbox.utils.lazy_import import lazy_module_attributes
 
-# For back-compatibility
-from aitoolbox.torchtrain.schedulers.warmup import LinearWithWarmupScheduler
-from aitoolbox.torchtrain.schedulers.basic import ReduceLROnPlateauScheduler, ReduceLROnPlateauMetricScheduler
+# Callbacks are imported lazily on first access so that e.g. wandb is only imported when WandBTracking is used
+_LAZY_ATTRIBUTES = {
+    'AbstractCallback': 'aitoolbox.torchtrain.callbacks.abstract',
+    'AbstractExperimentCallback': 'aitoolbox.torchtrain.callbacks.abstract',
+    'EarlyStopping': 'aitoolbox.torchtrain.callbacks.basic',
+    'ThresholdEarlyStopping': 'aitoolbox.torchtrain.callbacks.basic',
+    'EmailNotification': 'aitoolbox.torchtrain.callbacks.basic',
+    'TerminateOnNaN': 'aitoolbox.torchtrain.callbacks.basic',
+    'AllPredictionsSame': 'aitoolbox.torchtrain.callbacks.basic',
+    'LogUpload': 'aitoolbox.torchtrain.callbacks.basic',
+    'ModelPerformanceEvaluation': 'aitoolbox.torchtrain.callbacks.performance_eval',
+    'ModelPerformancePrintReport': 'aitoolbox.torchtrain.callbacks.performance_eval',
+    'ModelTrainHistoryFileWriter': 'aitoolbox.torchtrain.callbacks.performance_eval',
+    'ModelTrainHistoryPlot': 'aitoolbox.torchtrain.callbacks.performance_eval',
+    'GradNormClip': 'aitoolbox.torchtrain.callbacks.gradient',
+    'GradValueClip': 'aitoolbox.torchtrain.callbacks.gradient',
+    'TensorboardFullTracking': 'aitoolbox.torchtrain.callbacks.tensorboard',
+    'TensorboardTrainHistoryMetric': 'aitoolbox.torchtrain.callbacks.tensorboard',
+    'WandBTracking': 'aitoolbox.torchtrain.callbacks.wandb',
+
+    # For back-compatibility
+    'LinearWithWarmupScheduler': 'aitoolbox.torchtrain.schedulers.warmup',
+    'ReduceLROnPlateauScheduler': 'aitoolbox.torchtrain.schedulers.basic',
+    'ReduceLROnPlateauMetricScheduler': 'aitoolbox.torchtrain.schedulers.basic'
+}
+
+__all__ = list(_LAZY_ATTRIBUTES)
+__getattr__, __dir__ = lazy_module_attributes(__name__, _LAZY_ATTRIBUTES)
@@ -24,6 +24,28 @@ class AbstractCallback:
         self.train_loop_obj: Optional[TrainLoop] = None
         self.message_service: Optional[MessageService] = None
         self.device_idx_execution = device_idx_execution
+        self.execution_budget = None
+
+    def set_execution_budget(self, every_n_steps=1, max_step_time_fraction=None):
+        """Limit how often the callback's per-step stages get executed by the TrainLoop
+
+        Useful for expensive per-batch callbacks (e.g. logging or check-pointing) which would otherwise eat into
+        the training throughput. The budget applies to the ``on_batch_begin``, ``on_batch_end``,
+        ``on_after_gradient_update`` and ``on_after_optimizer_step`` stages.
+
+        Args:
+            every_n_steps (int): execute the callback at most every N training steps
+            max_step_time_fraction (float or None): maximum fraction of the training step time the callback may use
+                on average. More expensive callback is automatically executed less frequently.
+
+        Returns:
+            AbstractCallback: return the reference to the callback to enable setting the budget directly when
+            listing the callbacks
+        """
+        from aitoolbox.torchtrain.train_loop.components.callback_budget import CallbackExecutionBudget
+
+        self.execution_budget = CallbackExecutionBudget(every_n_steps, max_step_time_fraction)
+        return self
 
     def register_train_loop_object(self, train_loop_obj):
         """Introduce the reference to the encapsulating trainloop
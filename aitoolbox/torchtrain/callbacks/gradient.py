@@ -183,15 +183,15 @@ class GradDistributionPlot(AbstractExperimentCallback):
 
     def save_to_cloud(self, saved_plot_paths):
         experiment_cloud_path = \
-            self.cloud_results_saver.create_experiment_cloud_storage_folder_structure(self.project_name,
-                                                                                      self.experiment_name,
-                                                                                      self.train_loop_obj.experiment_timestamp)
+            self.cloud_results_saver.create_experiment_cloud_storage_folder_structure(
+                self.project_name, self.experiment_name, self.train_loop_obj.experiment_timestamp
+            )
         grad_plots_dir_path = os.path.join(experiment_cloud_path, self.grad_plots_dir_name)
 
-        for file_path_in_cloud_grad_results_dir, local_file_path in saved_plot_paths:
-            plot_file_cloud_path = os.path.join(grad_plots_dir_path, file_path_in_cloud_grad_results_dir)
-            self.cloud_results_saver.save_file(local_file_path=local_file_path,
-                                               cloud_file_path=plot_file_cloud_path)
+        self.cloud_results_saver.save_files([
+            (local_file_path, os.path.join(grad_plots_dir_path, file_path_in_cloud_grad_results_dir))
+            for file_path_in_cloud_grad_results_dir, local_file_path in saved_plot_paths
+        ])
 
     def create_plot_dirs(self):
         experiment_results_local_path = \
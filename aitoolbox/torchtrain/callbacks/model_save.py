@@ -1,3 +1,4 @@
+import copy
 import os
 
 from aitoolbox.cloud.AWS.model_save import PyTorchS3ModelSaver
@@ -9,6 +10,7 @@ from aitoolbox.experiment.local_save.local_model_save import LocalSubOptimalMode
 from aitoolbox.experiment.result_package.abstract_result_packages import AbstractResultPackage
 from aitoolbox.experiment.result_reporting.hyperparam_reporter import HyperParamSourceReporter
 from aitoolbox.torchtrain.callbacks.abstract import AbstractCallback
+from aitoolbox.torchtrain.train_loop.components.async_checkpoint import AsyncCheckpointWriter
 from aitoolbox.utils import util
 
 
@@ -16,7 +18,8 @@ class ModelCheckpoint(AbstractCallback):
     def __init__(self, project_name, experiment_name, local_model_result_folder_path,
                  hyperparams,
                  cloud_save_mode='s3', bucket_name='model-result', cloud_dir_prefix='',
-                 rm_subopt_local_models=False, num_best_checkpoints_kept=2):
+                 rm_subopt_local_models=False, num_best_checkpoints_kept=2,
+                 async_save=False, max_pending_checkpoints=1):
         """Check-point save the model during training to disk or also to S3 / GCS cloud storage
 
         Args:
@@ -38,6 +41,11 @@ class ModelCheckpoint(AbstractCallback):
                 the metric minimization is done otherwise metric maximization is done
             num_best_checkpoints_kept (int): number of best performing models which are kept when removing suboptimal
                 model checkpoints
+            async_save (bool): if True, only the snapshot of the training state is taken on the training thread while
+                the serialization, the cloud upload and the suboptimal model removal run on the background thread.
+                See :class:`~aitoolbox.torchtrain.train_loop.components.async_checkpoint.AsyncCheckpointWriter`.
+            max_pending_checkpoints (int): maximum number of checkpoints waiting to be saved in the background when
+                ``async_save`` is used. Further checkpointing blocks the training until a pending checkpoint is saved.
         """
         # execution_order=100 to make sure that this callback is the very last one to be executed when all the
         # evaluations are already stored in the train_history and especially also when schedulers have the updated state
@@ -59,8 +67,24 @@ class ModelCheckpoint(AbstractCallback):
         self.bucket_name = bucket_name
         self.cloud_dir_prefix = cloud_dir_prefix
 
+        self.async_save = async_save
+        self.max_pending_checkpoints = max_pending_checkpoints
+        self.checkpoint_writer = None
+
     def on_epoch_end(self):
         self.save_hyperparams()
+        self.save_checkpoint(self.build_model_checkpoint(), rm_subopt_models=self.rm_subopt_local_models is not False)
+
+    def on_train_end(self):
+        if self.checkpoint_writer is not None:
+            self.checkpoint_writer.close()
+
+    def build_model_checkpoint(self):
+        """Build the checkpoint dict of the current training state
+
+        Returns:
+            dict: model, optimizer, schedulers and AMP state together with the training progress info
+        """
         model_checkpoint = {
             'model_state_dict': self.train_loop_obj.model.state_dict(),
             'optimizer_state_dict': self.train_loop_obj.optimizer.state_dict(),
@@ -73,17 +97,44 @@ class ModelCheckpoint(AbstractCallback):
         if self.train_loop_obj.use_amp:
             model_checkpoint['amp'] = self.train_loop_obj.amp_scaler.state_dict()
 
-        model_paths = self.model_checkpointer.save_model(model=model_checkpoint,
-                                                         project_name=self.project_name,
-                                                         experiment_name=self.experiment_name,
-                                                         experiment_timestamp=self.train_loop_obj.experiment_timestamp,
-                                                         epoch=self.train_loop_obj.epoch,
-                                                         protect_existing_folder=True)
+        return model_checkpoint
 
-        if self.rm_subopt_local_models is not False:
-            *_, model_local_path = model_paths
-            self.subopt_model_remover.decide_if_remove_suboptimal_model(self.train_loop_obj.train_history,
-                                                                        [model_local_path])
+    def save_checkpoint(self, model_checkpoint, iteration_idx=None, rm_subopt_models=False):
+        """Save the checkpoint either directly or via the background checkpoint writer
+
+        Args:
+            model_checkpoint (dict): checkpoint dict
+            iteration_idx (int or None): training iteration index added to the checkpoint file name
+            rm_subopt_models (bool): should the suboptimal checkpoints be removed after the checkpoint is saved
+
+        Returns:
+            None
+        """
+        save_kwargs = {
+            'project_name': self.project_name,
+            'experiment_name': self.experiment_name,
+            'experiment_timestamp': self.train_loop_obj.experiment_timestamp,
+            'epoch': self.train_loop_obj.epoch,
+            'iteration_idx': iteration_idx,
+            'protect_existing_folder': True
+        }
+
+        remove_subopt_models = None
+        if rm_subopt_models:
+            # The background save can finish only after the training history has already changed
+            train_history = copy.deepcopy(self.train_loop_obj.train_history) if self.checkpoint_writer is not None \
+                else self.train_loop_obj.train_history
+
+            def remove_subopt_models(model_paths):
+                *_, model_local_path = model_paths
+                self.subopt_model_remover.decide_if_remove_suboptimal_model(train_history, [model_local_path])
+
+        if self.checkpoint_writer is not None:
+            self.checkpoint_writer.submit(model_checkpoint, save_kwargs, on_saved=remove_subopt_models)
+        else:
+            model_paths = self.model_checkpointer.save_model(model=model_checkpoint, **save_kwargs)
+            if remove_subopt_models is not None:
+                remove_subopt_models(model_paths)
 
     def on_train_loop_registration(self):
         if not util.function_exists(self.train_loop_obj.optimizer, 'state_dict'):
@@ -107,6 +158,10 @@ class ModelCheckpoint(AbstractCallback):
                 local_model_result_folder_path=self.local_model_result_folder_path, checkpoint_model=True
             )
 
+        if self.async_save:
+            self.checkpoint_writer = AsyncCheckpointWriter(self.model_checkpointer,
+                                                           max_queue_size=self.max_pending_checkpoints)
+
         if not self.train_loop_obj.lazy_experiment_save:
             self.save_hyperparams()
 
@@ -142,7 +197,8 @@ class ModelIterationCheckpoint(ModelCheckpoint):
                  project_name, experiment_name, local_model_result_folder_path,
                  hyperparams,
                  cloud_save_mode='s3', bucket_name='model-result', cloud_dir_prefix='',
-                 rm_subopt_local_models=False, num_best_checkpoints_kept=2):
+                 rm_subopt_local_models=False, num_best_checkpoints_kept=2,
+                 async_save=False, max_pending_checkpoints=1):
         """Check-point save the model during training to disk or also to S3 / GCS cloud storage
 
         Args:
@@ -165,12 +221,18 @@ class ModelIterationCheckpoint(ModelCheckpoint):
                 the metric minimization is done otherwise metric maximization is done
             num_best_checkpoints_kept (int): number of best performing models which are kept when removing suboptimal
                 model checkpoints
+            async_save (bool): if True, only the snapshot of the training state is taken on the training thread while
+                the serialization, the cloud upload and the suboptimal model removal run on the background thread.
+                See :class:`~aitoolbox.torchtrain.train_loop.components.async_checkpoint.AsyncCheckpointWriter`.
+            max_pending_checkpoints (int): maximum number of checkpoints waiting to be saved in the background when
+                ``async_save`` is used. Further checkpointing blocks the training until a pending checkpoint is saved.
         """
         super().__init__(
             project_name, experiment_name, local_model_result_folder_path,
             hyperparams,
             cloud_save_mode, bucket_name, cloud_dir_prefix,
-            rm_subopt_local_models, num_best_checkpoints_kept
+            rm_subopt_local_models, num_best_checkpoints_kept,
+            async_save, max_pending_checkpoints
         )
         self.save_frequency = save_frequency
 
@@ -182,29 +244,7 @@ class ModelIterationCheckpoint(ModelCheckpoint):
                 self.train_loop_obj.total_iteration_idx > 0:
             print(f'--> Saving model checkpoint at the training iteration: {self.train_loop_obj.total_iteration_idx}')
             self.save_hyperparams()
-
-            model_checkpoint = {
-                'model_state_dict': self.train_loop_obj.model.state_dict(),
-                'optimizer_state_dict': self.train_loop_obj.optimizer.state_dict(),
-                'schedulers_state_dict': [scheduler.state_dict() for scheduler in
-                                          self.train_loop_obj.get_schedulers()],
-                'epoch': self.train_loop_obj.epoch,
-                'iteration_idx': self.train_loop_obj.total_iteration_idx,
-                'hyperparams': self.hyperparams
-            }
-            # If AMP is used
-            if self.train_loop_obj.use_amp:
-                model_checkpoint['amp'] = self.train_loop_obj.amp_scaler.state_dict()
-
-            model_paths = self.model_checkpointer.save_model(
-                model=model_checkpoint,
-                project_name=self.project_name,
-                experiment_name=self.experiment_name,
-                experiment_timestamp=self.train_loop_obj.experiment_timestamp,
-                epoch=self.train_loop_obj.epoch,
-                iteration_idx=self.train_loop_obj.total_iteration_idx,
-                protect_existing_folder=True
-            )
+            self.save_checkpoint(self.build_model_checkpoint(), iteration_idx=self.train_loop_obj.total_iteration_idx)
 
 
 class ModelTrainEndSave(AbstractCallback):
@@ -266,20 +306,26 @@ class ModelTrainEndSave(AbstractCallback):
             model_final_state['amp'] = self.train_loop_obj.amp_scaler.state_dict()
 
         if self.val_result_package is not None:
-            y_pred, y_test, additional_results = self.train_loop_obj.predict_on_validation_set()
-            self.val_result_package.pkg_name += '_VAL'
             if self.val_result_package.requires_loss:
-                additional_results['loss'] = self.train_loop_obj.evaluate_loss_on_validation_set(float_dict_format=True)
+                loss, (y_pred, y_test, additional_results) = \
+                    self.train_loop_obj.evaluate_loss_and_predict_on_validation_set(float_dict_format=True)
+                additional_results['loss'] = loss
+            else:
+                y_pred, y_test, additional_results = self.train_loop_obj.predict_on_validation_set()
+            self.val_result_package.pkg_name += '_VAL'
             self.val_result_package.prepare_result_package(y_test, y_pred,
                                                            hyperparameters=self.hyperparams,
                                                            additional_results=additional_results)
             self.result_package = self.val_result_package
 
         if self.test_result_package is not None:
-            y_pred_test, y_test_test, additional_results_test = self.train_loop_obj.predict_on_test_set()
-            self.test_result_package.pkg_name += '_TEST'
             if self.test_result_package.requires_loss:
-                additional_results_test['loss'] = self.train_loop_obj.evaluate_loss_on_test_set(float_dict_format=True)
+                loss_test, (y_pred_test, y_test_test, additional_results_test) = \
+                    self.train_loop_obj.evaluate_loss_and_predict_on_test_set(float_dict_format=True)
+                additional_results_test['loss'] = loss_test
+            else:
+                y_pred_test, y_test_test, additional_results_test = self.train_loop_obj.predict_on_test_set()
+            self.test_result_package.pkg_name += '_TEST'
             self.test_result_package.prepare_result_package(y_test_test, y_pred_test,
                                                             hyperparameters=self.hyperparams,
                                                             additional_results=additional_results_test)
@@ -14,7 +14,7 @@ from aitoolbox.experiment.result_package.torch_metrics_packages import TorchMetr
 class ModelPerformanceEvaluation(AbstractCallback):
     def __init__(self, result_package, args,
                  on_each_epoch=True, on_train_data=False, on_val_data=True, eval_frequency=None,
-                 if_available_output_to_project_dir=True):
+                 if_available_output_to_project_dir=True, sharded_ddp_eval=False):
         """Track performance metrics from result_package and store them into TrainLoop's history
 
         This callback is different from those for model and experiment saving where performance evaluations are also
@@ -41,6 +41,10 @@ class ModelPerformanceEvaluation(AbstractCallback):
                 If such a functionality should to be prevented and manual full additional metadata results dump folder
                 is needed potentially outside the project folder, then set this argument to False and
                 specify a full folder path.
+            sharded_ddp_eval (bool): in the DDP training, if the result package supports sharded evaluation, the metrics
+                are evaluated on the local prediction shard of each process and only the metrics' sufficient
+                statistics are reduced across the processes instead of gathering the full predictions. As the result
+                package then holds only the local prediction shard, this is disabled by default.
         """
         AbstractCallback.__init__(self, 'Model performance calculator - evaluator')
         self.result_package = result_package
@@ -50,6 +54,7 @@ class ModelPerformanceEvaluation(AbstractCallback):
         self.on_val_data = on_val_data
         self.eval_frequency = eval_frequency
         self.if_available_output_to_project_dir = if_available_output_to_project_dir
+        self.sharded_ddp_eval = sharded_ddp_eval
 
         if not on_train_data and not on_val_data:
             raise ValueError('Both on_train_data and on_val_data are set to False. At least one of them has to be True')
@@ -86,23 +91,64 @@ class ModelPerformanceEvaluation(AbstractCallback):
             None
         """
         if self.on_train_data:
-            y_pred, y_test, additional_results = self.train_loop_obj.predict_on_train_set()
+            stats_reduce_fn = None
             if self.train_result_package.requires_loss:
-                additional_results['loss'] = self.train_loop_obj.evaluate_loss_on_train_set()
+                loss, (y_pred, y_test, additional_results) = \
+                    self.train_loop_obj.evaluate_loss_and_predict_on_train_set()
+                additional_results['loss'] = loss
+            else:
+                stats_reduce_fn = self.get_sharded_eval_reduce_fn(self.train_result_package)
+                y_pred, y_test, additional_results = \
+                    self.train_loop_obj.predict_on_train_set(ddp_gather=stats_reduce_fn is None)
             self.train_result_package.prepare_result_package(y_test, y_pred,
                                                              hyperparameters=self.args,
+                                                             stats_reduce_fn=stats_reduce_fn,
                                                              additional_results=additional_results)
 
         if self.on_val_data:
-            y_pred, y_test, additional_results = self.train_loop_obj.predict_on_validation_set()
+            stats_reduce_fn = None
             if self.result_package.requires_loss:
-                additional_results['loss'] = self.train_loop_obj.evaluate_loss_on_validation_set(float_dict_format=True)
+                loss, (y_pred, y_test, additional_results) = \
+                    self.train_loop_obj.evaluate_loss_and_predict_on_validation_set(float_dict_format=True)
+                additional_results['loss'] = loss
+            else:
+                stats_reduce_fn = self.get_sharded_eval_reduce_fn(self.result_package)
+                y_pred, y_test, additional_results = \
+                    self.train_loop_obj.predict_on_validation_set(ddp_gather=stats_reduce_fn is None)
             self.result_package.prepare_result_package(y_test, y_pred,
                                                        hyperparameters=self.args,
+                                                       stats_reduce_fn=stats_reduce_fn,
                                                        additional_results=additional_results)
 
         self.store_evaluated_metrics_to_history(prefix=prefix)
 
+    def get_sharded_eval_reduce_fn(self, result_package):
+        """Get the function reducing the metric sufficient statistics if the sharded evaluation can be used
+
+        Args:
+            result_package (aitoolbox.experiment.result_package.abstract_result_packages.AbstractResultPackage):
+                evaluated result package
+
+        Returns:
+            callable or None: sufficient statistics reduce function or ``None`` if the predictions should be gathered
+        """
+        if self.sharded_ddp_eval and self.train_loop_obj.ddp_training_mode and \
+                result_package.supports_sharded_evaluation():
+            return self.train_loop_obj.ddp_handler.mp_sum_dict
+        return None
+
+    def uses_gathered_predictions(self, result_package):
+        """Check if the result package is evaluated on the full gathered predictions instead of the sharded ones
+
+        Args:
+            result_package (aitoolbox.experiment.result_package.abstract_result_packages.AbstractResultPackage):
+                evaluated result package
+
+        Returns:
+            bool: if the full predictions are made for the evaluation of the result package
+        """
+        return result_package.requires_loss or self.get_sharded_eval_reduce_fn(result_package) is None
+
     def store_evaluated_metrics_to_history(self, prefix=''):
         """Save the calculated performance results into the training history
 
@@ -130,13 +176,23 @@ class ModelPerformanceEvaluation(AbstractCallback):
                                                                       self.result_package.get_results()[m_name])
 
     def on_train_loop_registration(self):
+        if self.on_each_epoch and self.eval_frequency is None:
+            # Predictions are needed at the end of every epoch, so they can be made in the same pass through
+            # the model as the TrainLoop's automatic end of epoch loss evaluation.
+            # With the sharded DDP evaluation the predictions aren't gathered, so the fused pass would only add
+            # the unneeded gathering of the full predictions on top of the sharded prediction pass.
+            if self.on_train_data and self.uses_gathered_predictions(self.train_result_package):
+                self.train_loop_obj.fused_eval_datasets.add('train')
+            if self.on_val_data and self.uses_gathered_predictions(self.result_package):
+                self.train_loop_obj.fused_eval_datasets.add('validation')
+
         if self.if_available_output_to_project_dir and \
             hasattr(self.train_loop_obj, 'project_name') and hasattr(self.train_loop_obj, 'experiment_name') and \
                 hasattr(self.train_loop_obj, 'local_model_result_folder_path'):
-            self.result_package.set_experiment_dir_path_for_additional_results(self.train_loop_obj.project_name,
-                                                                               self.train_loop_obj.experiment_name,
-                                                                               self.train_loop_obj.experiment_timestamp,
-                                                                               self.train_loop_obj.local_model_result_folder_path)
+            self.result_package.set_experiment_dir_path_for_additional_results(
+                self.train_loop_obj.project_name, self.train_loop_obj.experiment_name,
+                self.train_loop_obj.experiment_timestamp, self.train_loop_obj.local_model_result_folder_path
+            )
 
         if isinstance(self.result_package, TorchMetricsPackage):
             if self.on_train_data:
@@ -440,14 +496,14 @@ class ModelTrainHistoryPlot(ModelTrainHistoryBaseCB):
 
         if self.cloud_results_saver is not None:
             experiment_cloud_path = \
-                self.cloud_results_saver.create_experiment_cloud_storage_folder_structure(self.project_name,
-                                                                                          self.experiment_name,
-                                                                                          self.train_loop_obj.experiment_timestamp)
+                self.cloud_results_saver.create_experiment_cloud_storage_folder_structure(
+                    self.project_name, self.experiment_name, self.train_loop_obj.experiment_timestamp
+                )
 
-            for results_file_path_in_cloud_results_dir, results_file_local_path in saved_local_results_details:
-                results_file_s3_path = os.path.join(experiment_cloud_path, results_file_path_in_cloud_results_dir)
-                self.cloud_results_saver.save_file(local_file_path=results_file_local_path,
-                                                   cloud_file_path=results_file_s3_path)
+            self.cloud_results_saver.save_files([
+                (results_file_local_path, os.path.join(experiment_cloud_path, results_file_path_in_cloud_results_dir))
+                for results_file_path_in_cloud_results_dir, results_file_local_path in saved_local_results_details
+            ])
 
 
 class ModelTrainHistoryFileWriter(ModelTrainHistoryBaseCB):
@@ -524,10 +580,9 @@ class ModelTrainHistoryFileWriter(ModelTrainHistoryBaseCB):
 
         if self.cloud_results_saver is not None:
             experiment_cloud_path = \
-                self.cloud_results_saver.create_experiment_cloud_storage_folder_structure(self.project_name,
-                                                                                          self.experiment_name,
-                                                                                          self.train_loop_obj.experiment_timestamp)
+                self.cloud_results_saver.create_experiment_cloud_storage_folder_structure(
+                    self.project_name, self.experiment_name, self.train_loop_obj.experiment_timestamp
+                )
 
             results_file_s3_path = os.path.join(experiment_cloud_path, results_file_path_in_cloud_results_dir)
-            self.cloud_results_saver.save_file(local_file_path=results_file_local_path,
-                                               cloud_file_path=results_file_s3_path)
+            self.cloud_results_saver.save_files([(results_file_local_path, results_file_s3_path)])
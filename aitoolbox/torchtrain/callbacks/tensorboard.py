@@ -1,8 +1,8 @@
 import os
-from torch.utils.tensorboard import SummaryWriter
 
 from aitoolbox.torchtrain.callbacks.abstract import AbstractExperimentCallback
 from aitoolbox.torchtrain.multi_loss_optim import MultiLoss
+from aitoolbox.torchtrain.train_loop.components.metric_logger import AsyncMetricLogger, TensorboardLogBackend
 from aitoolbox.experiment.local_save.folder_create import ExperimentFolder as FolderCreator
 from aitoolbox.cloud import s3_available_options, gcs_available_options
 from aitoolbox.cloud.AWS.results_save import BaseResultsSaver as BaseResultsS3Saver
@@ -12,7 +12,7 @@ from aitoolbox.cloud.GoogleCloud.results_save import BaseResultsGoogleStorageSav
 class TensorboardReporterBaseCB(AbstractExperimentCallback):
     def __init__(self, callback_name, log_dir=None, is_project=True,
                  project_name=None, experiment_name=None, local_model_result_folder_path=None,
-                 cloud_save_mode=None, bucket_name=None, cloud_dir_prefix=None,
+                 cloud_save_mode=None, bucket_name=None, cloud_dir_prefix=None, async_logging=True,
                  **kwargs):
         """Base Tensorboard callback wrapping SummaryWriter
 
@@ -34,6 +34,10 @@ class TensorboardReporterBaseCB(AbstractExperimentCallback):
                 Everything else results just in local storage to disk
             bucket_name (str): name of the bucket in the cloud storage
             cloud_dir_prefix (str): path to the folder inside the bucket where the experiments are going to be saved
+            async_logging (bool): log via the TrainLoop's shared
+                :class:`~aitoolbox.torchtrain.train_loop.components.metric_logger.AsyncMetricLogger` which resolves
+                the loss tensors in batches on the background thread instead of syncing the device at every logged
+                batch. The logged values are flushed at the end of every epoch and at the end of training.
             **kwargs: additional arguments for ``torch.utils.tensorboard.SummaryWriter`` wrapped inside this callback
         """
         AbstractExperimentCallback.__init__(self, callback_name,
@@ -46,8 +50,11 @@ class TensorboardReporterBaseCB(AbstractExperimentCallback):
             self.log_dir = os.path.expanduser(log_dir)
 
         self.is_project = is_project
+        self.async_logging = async_logging
         self.tb_writer_kwargs = kwargs
         self.tb_writer = None
+        self.metric_logger = None
+        self.log_backend = None
 
         self.global_step = 0
 
@@ -61,22 +68,19 @@ class TensorboardReporterBaseCB(AbstractExperimentCallback):
         Returns:
             None
         """
-        last_batch_loss = self.train_loop_obj.parse_loss(self.train_loop_obj.loss_batch_accum[-1:])
-        accum_mean_batch_loss = self.train_loop_obj.parse_loss(self.train_loop_obj.loss_batch_accum)
+        last_batch_loss = self.train_loop_obj.loss_batch_accum.get_last_loss()
+        accum_mean_batch_loss = self.train_loop_obj.loss_batch_accum.get_mean_loss()
 
         if not isinstance(last_batch_loss, MultiLoss) and not isinstance(accum_mean_batch_loss, MultiLoss):
             last_batch_loss = {'loss': last_batch_loss}
             accum_mean_batch_loss = {'loss': accum_mean_batch_loss}
 
+        loss_logging = {}
         for loss_name in last_batch_loss.keys():
-            self.tb_writer.add_scalar(
-                f'train_loss/last_batch_{loss_name}', last_batch_loss[loss_name],
-                self.global_step
-            )
-            self.tb_writer.add_scalar(
-                f'train_loss/accumulated_batch_{loss_name}', accum_mean_batch_loss[loss_name],
-                self.global_step
-            )
+            loss_logging[f'train_loss/last_batch_{loss_name}'] = last_batch_loss[loss_name]
+            loss_logging[f'train_loss/accumulated_batch_{loss_name}'] = accum_mean_batch_loss[loss_name]
+
+        self.metric_logger.log_scalars(loss_logging, self.global_step, backends=[self.log_backend])
 
     def log_train_history_metrics(self, metric_names):
         """Log the train history metrics at the end of the epoch
@@ -87,6 +91,7 @@ class TensorboardReporterBaseCB(AbstractExperimentCallback):
         Returns:
             None
         """
+        metrics_log = {}
         for metric_name in metric_names:
             prefix_name = 'metrics'
             if 'loss' in metric_name:
@@ -94,10 +99,12 @@ class TensorboardReporterBaseCB(AbstractExperimentCallback):
 
             metric_results = self.train_loop_obj.train_history[metric_name]
             if len(metric_results) > 0:
-                self.tb_writer.add_scalar(f'{prefix_name}/{metric_name}', metric_results[-1],
-                                          self.train_loop_obj.epoch)
+                metrics_log[f'{prefix_name}/{metric_name}'] = metric_results[-1]
+
+        self.metric_logger.log_scalars(metrics_log, self.train_loop_obj.epoch, backends=[self.log_backend])
 
     def on_train_end(self):
+        self.metric_logger.remove_backend(self.log_backend)
         self.tb_writer.close()
         self.upload_to_cloud()
 
@@ -111,7 +118,12 @@ class TensorboardReporterBaseCB(AbstractExperimentCallback):
         if 'filename_suffix' not in self.tb_writer_kwargs and not self.is_project:
             self.tb_writer_kwargs['filename_suffix'] = f'_{self.train_loop_obj.experiment_timestamp}'
 
+        from torch.utils.tensorboard import SummaryWriter
         self.tb_writer = SummaryWriter(log_dir=self.log_dir, **self.tb_writer_kwargs)
+        self.log_backend = TensorboardLogBackend(self.tb_writer)
+        self.metric_logger = self.train_loop_obj.get_metric_logger() if self.async_logging \
+            else AsyncMetricLogger(background=False)
+        self.metric_logger.add_backend(self.log_backend)
 
     def create_log_dir(self):
         full_log_dir_path = self.log_dir
@@ -164,19 +176,18 @@ class TensorboardReporterBaseCB(AbstractExperimentCallback):
                 os.path.dirname(experiment_results_cloud_path),
                 tb_dir_sub_path
             )
-            for root, _, files in os.walk(self.log_dir):
-                for file_name in files:
-                    local_file_path = os.path.join(root, file_name)
-                    cloud_file_path = os.path.join(experiment_cloud_path, file_name)
-                    self.cloud_results_saver.save_file(local_file_path=local_file_path,
-                                                       cloud_file_path=cloud_file_path)
+            file_paths = [
+                (os.path.join(root, file_name), os.path.join(experiment_cloud_path, file_name))
+                for root, _, files in os.walk(self.log_dir) for file_name in files
+            ]
+            self.cloud_results_saver.save_files(file_paths)
 
 
 class TensorboardTrainBatchLoss(TensorboardReporterBaseCB):
     def __init__(self, batch_log_frequency=1,
                  log_dir=None, is_project=True,
                  project_name=None, experiment_name=None, local_model_result_folder_path=None,
-                 cloud_save_mode=None, bucket_name=None, cloud_dir_prefix=None,
+                 cloud_save_mode=None, bucket_name=None, cloud_dir_prefix=None, async_logging=True,
                  **kwargs):
         """Tensorboard training loss logger
 
@@ -195,12 +206,16 @@ class TensorboardTrainBatchLoss(TensorboardReporterBaseCB):
                 Everything else results just in local storage to disk
             bucket_name (str): name of the bucket in the cloud storage
             cloud_dir_prefix (str): path to the folder inside the bucket where the experiments are going to be saved
+            async_logging (bool): log via the TrainLoop's shared
+                :class:`~aitoolbox.torchtrain.train_loop.components.metric_logger.AsyncMetricLogger` which resolves
+                the loss tensors in batches on the background thread instead of syncing the device at every logged
+                batch. The logged values are flushed at the end of every epoch and at the end of training.
             **kwargs: additional arguments for ``torch.utils.tensorboard.SummaryWriter`` wrapped inside this callback
         """
         TensorboardReporterBaseCB.__init__(self, 'Tensorboard end of batch report of batch loss',
                                            log_dir, is_project,
                                            project_name, experiment_name, local_model_result_folder_path,
-                                           cloud_save_mode, bucket_name, cloud_dir_prefix,
+                                           cloud_save_mode, bucket_name, cloud_dir_prefix, async_logging,
                                            **kwargs)
         self.batch_log_frequency = batch_log_frequency
 
@@ -211,6 +226,7 @@ class TensorboardTrainBatchLoss(TensorboardReporterBaseCB):
         self.global_step += 1
 
     def on_epoch_end(self):
+        self.metric_logger.flush()
         self.upload_to_cloud()
 
 
@@ -218,7 +234,7 @@ class TensorboardTrainHistoryMetric(TensorboardReporterBaseCB):
     def __init__(self, metric_names=None,
                  log_dir=None, is_project=True,
                  project_name=None, experiment_name=None, local_model_result_folder_path=None,
-                 cloud_save_mode=None, bucket_name=None, cloud_dir_prefix=None,
+                 cloud_save_mode=None, bucket_name=None, cloud_dir_prefix=None, async_logging=True,
                  **kwargs):
         """Tensorboard training history values logger
 
@@ -240,12 +256,16 @@ class TensorboardTrainHistoryMetric(TensorboardReporterBaseCB):
                 Everything else results just in local storage to disk
             bucket_name (str): name of the bucket in the cloud storage
             cloud_dir_prefix (str): path to the folder inside the bucket where the experiments are going to be saved
+            async_logging (bool): log via the TrainLoop's shared
+                :class:`~aitoolbox.torchtrain.train_loop.components.metric_logger.AsyncMetricLogger` which resolves
+                the loss tensors in batches on the background thread instead of syncing the device at every logged
+                batch. The logged values are flushed at the end of every epoch and at the end of training.
             **kwargs: additional arguments for ``torch.utils.tensorboard.SummaryWriter`` wrapped inside this callback
         """
         TensorboardReporterBaseCB.__init__(self, 'Tensorboard end of batch report of batch loss',
                                            log_dir, is_project,
                                            project_name, experiment_name, local_model_result_folder_path,
-                                           cloud_save_mode, bucket_name, cloud_dir_prefix,
+                                           cloud_save_mode, bucket_name, cloud_dir_prefix, async_logging,
                                            **kwargs)
         self.metric_names = metric_names
 
@@ -253,7 +273,7 @@ class TensorboardTrainHistoryMetric(TensorboardReporterBaseCB):
         metric_names = self.metric_names if self.metric_names is not None else self.train_loop_obj.train_history.keys()
         self.log_train_history_metrics(metric_names)
 
-        self.tb_writer.flush()
+        self.metric_logger.flush()
         self.upload_to_cloud()
 
 
@@ -261,7 +281,7 @@ class TensorboardFullTracking(TensorboardReporterBaseCB):
     def __init__(self, metric_names=None, batch_log_frequency=1,
                  log_dir=None, is_project=True,
                  project_name=None, experiment_name=None, local_model_result_folder_path=None,
-                 cloud_save_mode=None, bucket_name=None, cloud_dir_prefix=None,
+                 cloud_save_mode=None, bucket_name=None, cloud_dir_prefix=None, async_logging=True,
                  **kwargs):
         """Full Tensorboard logger
 
@@ -285,12 +305,16 @@ class TensorboardFullTracking(TensorboardReporterBaseCB):
                 Everything else results just in local storage to disk
             bucket_name (str): name of the bucket in the cloud storage
             cloud_dir_prefix (str): path to the folder inside the bucket where the experiments are going to be saved
+            async_logging (bool): log via the TrainLoop's shared
+                :class:`~aitoolbox.torchtrain.train_loop.components.metric_logger.AsyncMetricLogger` which resolves
+                the loss tensors in batches on the background thread instead of syncing the device at every logged
+                batch. The logged values are flushed at the end of every epoch and at the end of training.
             **kwargs: additional arguments for ``torch.utils.tensorboard.SummaryWriter`` wrapped inside this callback
         """
         TensorboardReporterBaseCB.__init__(self, 'Tensorboard full tracking',
                                            log_dir, is_project,
                                            project_name, experiment_name, local_model_result_folder_path,
-                                           cloud_save_mode, bucket_name, cloud_dir_prefix,
+                                           cloud_save_mode, bucket_name, cloud_dir_prefix, async_logging,
                                            **kwargs)
         self.metric_names = metric_names
         self.batch_log_frequency = batch_log_frequency
@@ -305,5 +329,5 @@ class TensorboardFullTracking(TensorboardReporterBaseCB):
         metric_names = self.metric_names if self.metric_names is not None else self.train_loop_obj.train_history.keys()
         self.log_train_history_metrics(metric_names)
 
-        self.tb_writer.flush()
+        self.metric_logger.flush()
         self.upload_to_cloud()
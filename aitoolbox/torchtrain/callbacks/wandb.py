@@ -1,10 +1,9 @@
 import os
 from dataclasses import dataclass
 
-import wandb
-
 from aitoolbox.torchtrain.callbacks.abstract import AbstractExperimentCallback
 from aitoolbox.torchtrain.multi_loss_optim import MultiLoss
+from aitoolbox.torchtrain.train_loop.components.metric_logger import AsyncMetricLogger, WandBLogBackend
 from aitoolbox.experiment.local_save.folder_create import ExperimentFolder as FolderCreator
 
 
@@ -13,13 +12,13 @@ class AlertConfig:
     metric_name: str
     threshold_value: float
     objective: str = "maximize"
-    wandb_alert_level: wandb.AlertLevel = None
+    wandb_alert_level: 'wandb.AlertLevel' = None
 
 
 class WandBTracking(AbstractExperimentCallback):
     def __init__(self, metric_names=None, batch_log_frequency=None, hyperparams=None, tags=None, alerts=None,
                  wandb_pre_initialized=False, source_dirs=(), log_dir=None, is_project=True,
-                 project_name=None, experiment_name=None, local_model_result_folder_path=None,
+                 project_name=None, experiment_name=None, local_model_result_folder_path=None, async_logging=True,
                  **kwargs):
         """Weights And Biases Logger
 
@@ -57,6 +56,10 @@ class WandBTracking(AbstractExperimentCallback):
             project_name (str or None): root name of the project
             experiment_name (str or None): name of the particular experiment
             local_model_result_folder_path (str or None): root local path where project folder will be created
+            async_logging (bool): log via the TrainLoop's shared
+                :class:`~aitoolbox.torchtrain.train_loop.components.metric_logger.AsyncMetricLogger` which resolves
+                the loss tensors in batches on the background thread instead of syncing the device at every logged
+                batch. The logged values are flushed at the end of every epoch and at the end of training.
             **kwargs: additional arguments for ``wandb.init()`` wrapped inside this callback
         """
         AbstractExperimentCallback.__init__(self, 'WeightsAndBiases Experiment Tracking',
@@ -77,13 +80,21 @@ class WandBTracking(AbstractExperimentCallback):
         self.log_dir = log_dir if log_dir is None else os.path.expanduser(log_dir)
         self.is_project = is_project
 
+        self.async_logging = async_logging
+        self.metric_logger = None
+        self.log_backend = None
+
     def on_epoch_end(self):
         metric_names = self.metric_names if self.metric_names is not None else self.train_loop_obj.train_history.keys()
         metrics_log = self.log_train_history_metrics(metric_names)
+        self.metric_logger.flush()
 
         if self.alerts is not None:
             self.send_configured_alerts(self.alerts, metrics_log)
 
+    def on_train_end(self):
+        self.metric_logger.remove_backend(self.log_backend)
+
     def on_batch_end(self):
         if self.batch_log_frequency is not None and \
                 self.train_loop_obj.total_iteration_idx % self.batch_log_frequency == 0:
@@ -97,8 +108,8 @@ class WandBTracking(AbstractExperimentCallback):
         Returns:
             None
         """
-        last_batch_loss = self.train_loop_obj.parse_loss(self.train_loop_obj.loss_batch_accum[-1:])
-        accum_mean_batch_loss = self.train_loop_obj.parse_loss(self.train_loop_obj.loss_batch_accum)
+        last_batch_loss = self.train_loop_obj.loss_batch_accum.get_last_loss()
+        accum_mean_batch_loss = self.train_loop_obj.loss_batch_accum.get_mean_loss()
 
         if not isinstance(last_batch_loss, MultiLoss) and not isinstance(accum_mean_batch_loss, MultiLoss):
             last_batch_loss = {'loss': last_batch_loss}
@@ -112,7 +123,8 @@ class WandBTracking(AbstractExperimentCallback):
             loss_logging[f'train_loss/last_batch_{loss_name}'] = last_batch_loss[loss_name]
             loss_logging[f'train_loss/accumulated_batch_{loss_name}'] = accum_mean_batch_loss[loss_name]
 
-        wandb.run.log(loss_logging, step=self.train_loop_obj.total_iteration_idx)
+        self.metric_logger.log_scalars(loss_logging, step=self.train_loop_obj.total_iteration_idx,
+                                       backends=[self.log_backend])
 
     def log_train_history_metrics(self, metric_names):
         """Log the train history metrics at the end of the epoch
@@ -121,7 +133,7 @@ class WandBTracking(AbstractExperimentCallback):
             metric_names (list): list of train history tracked metrics to be logged
 
         Returns:
-            None
+            dict: logged metrics
         """
         metrics_log = {'epoch': self.train_loop_obj.epoch}
 
@@ -134,7 +146,8 @@ class WandBTracking(AbstractExperimentCallback):
             if len(metric_results) > 0:
                 metrics_log[f'{prefix_name}/{metric_name}'] = metric_results[-1]
 
-        wandb.run.log(metrics_log, step=self.train_loop_obj.total_iteration_idx, commit=True)
+        self.metric_logger.log_scalars(metrics_log, step=self.train_loop_obj.total_iteration_idx, commit=True,
+                                       backends=[self.log_backend])
 
         return metrics_log
 
@@ -155,6 +168,8 @@ class WandBTracking(AbstractExperimentCallback):
         Returns:
             None
         """
+        import wandb
+
         for alert_config in alerts:
             metric_result = metrics_log[alert_config.metric_name]
 
@@ -175,6 +190,8 @@ class WandBTracking(AbstractExperimentCallback):
                 )
 
     def on_train_loop_registration(self):
+        import wandb
+
         self.try_infer_experiment_details(infer_cloud_details=False)
         self.try_infer_additional_logging_details()
 
@@ -199,6 +216,11 @@ class WandBTracking(AbstractExperimentCallback):
                 source_code_path, name=os.path.basename(source_code_path), include_fn=lambda _: True
             )
 
+        self.log_backend = WandBLogBackend()
+        self.metric_logger = self.train_loop_obj.get_metric_logger() if self.async_logging \
+            else AsyncMetricLogger(background=False)
+        self.metric_logger.add_backend(self.log_backend)
+
     def try_infer_additional_logging_details(self):
         try:
             if self.hyperparams is None:
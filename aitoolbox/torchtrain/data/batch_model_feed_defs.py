@@ -73,3 +73,67 @@ class AbstractModelFeedDefinition(ABC):
             (torch.Tensor, torch.Tensor, dict or None): y_pred, y_test, metadata
         """
         pass
+
+    def get_loss_and_predictions(self, model, batch_data, criterion, device):
+        """Get loss and predictions during evaluation stage in a single pass through the model
+
+        Called from evaluate_loss_and_predict_with_model() in TrainLoop.
+
+        By default get_loss_eval() and get_predictions() are called one after the other, which still results in two
+        forward passes through the model and thus gives no speedup. Override this method to calculate both from
+        a single forward pass through the model, as done in :class:`BasicModelFeedDefinition`.
+
+        Args:
+            model (torch.nn.Module): neural network model
+            batch_data (torch.Tensor): model input data batch
+            criterion: loss criterion
+            device (torch.device): device on which the model is being trained
+
+        Returns:
+            (PyTorch loss, torch.Tensor, torch.Tensor, dict or None): loss, y_pred, y_test, metadata
+        """
+        loss = self.get_loss_eval(model, batch_data, criterion, device)
+        y_pred, y_test, metadata = self.get_predictions(model, batch_data, device)
+        return loss, y_pred, y_test, metadata
+
+
+class BasicModelFeedDefinition(AbstractModelFeedDefinition):
+    """Model feed definition with already implemented simple loss and prediction calculation functions
+
+    Feed definition counterpart of the :class:`aitoolbox.torchtrain.model.TTBasicModel`. All the provided data sources
+    from the data loader except the last one are given as an input to the model. The last data source from the data
+    loader is treated as the target variable. (*batch_input_data, targets = batch_data)
+
+    In the evaluation stage the loss and the predictions are calculated from a single forward pass through the model.
+    """
+    def get_loss(self, model, batch_data, criterion, device):
+        *batch_input_data, targets = [data.to(device) for data in batch_data]
+
+        predictions = model(*batch_input_data)
+        loss = criterion(predictions, targets)
+
+        return loss
+
+    def get_predictions(self, model, batch_data, device):
+        *batch_input_data, targets = batch_data
+        batch_input_data = [data.to(device) for data in batch_input_data]
+
+        predictions = model(*batch_input_data)
+
+        return predictions, targets, {}
+
+    def get_loss_and_predictions(self, model, batch_data, criterion, device):
+        # Imported here as the model module itself depends on the feed definitions
+        from aitoolbox.torchtrain.model import has_default_eval_methods
+
+        # Only fuse when the user hasn't customized the loss or the predictions calculation
+        if not has_default_eval_methods(self, BasicModelFeedDefinition):
+            return AbstractModelFeedDefinition.get_loss_and_predictions(self, model, batch_data, criterion, device)
+
+        *batch_input_data, targets = batch_data
+        batch_input_data = [data.to(device) for data in batch_input_data]
+
+        predictions = model(*batch_input_data)
+        loss = criterion(predictions, targets.to(device))
+
+        return loss, predictions, targets, {}
@@ -0,0 +1,435 @@
+import os
+import json
+import pickle
+import numpy as np
+import torch
+from torch.utils.data import Dataset
+
+from aitoolbox.torchtrain.data.dataset import BasicDataset, ListDataset
+
+METADATA_FILE_NAME = 'columnar_dataset.json'
+# Storage kinds of the dataset columns
+FIXED, RAGGED, STRING, OBJECT = 'fixed', 'ragged', 'string', 'object'
+COLUMN_KINDS = (FIXED, RAGGED, STRING, OBJECT)
+
+
+class ColumnarDatasetWriter:
+    def __init__(self, data_dir, column_names, column_kinds=None):
+        """Writer of the columnar dataset stored as the chunks of ``.npy`` files
+
+        The dataset is written in chunks of rows. Each call of :meth:`write_chunk` appends the new chunk of rows to
+        all the columns, so the datasets larger than the available memory can be written incrementally. Depending on
+        the data, each column is stored as one of the following kinds:
+
+        * ``'fixed'``: numeric arrays with the same shape for each row stored as a single array per chunk
+        * ``'ragged'``: numeric sequences of varying length stored as the flat values array and the row offsets
+        * ``'string'``: strings stored as the UTF-8 encoded bytes and the row offsets
+        * ``'object'``: arbitrary python objects stored pickled with the row offsets
+
+        Unless specified in ``column_kinds``, the kind is inferred from the first chunk. When the inferred fixed
+        column of 1D rows gets a later chunk with the rows of a different length, the column is promoted to
+        the ragged kind and the already written chunks are rewritten.
+
+        Args:
+            data_dir (str): folder where the dataset is written
+            column_names (list or tuple): names of the dataset columns
+            column_kinds (dict or None): explicit storage kinds of the selected columns. Column name to one of
+                ``'fixed'``, ``'ragged'``, ``'string'`` or ``'object'``.
+        """
+        if len(column_names) == 0:
+            raise ValueError('At least one column has to be provided')
+        column_kinds = column_kinds if column_kinds is not None else {}
+        for column_name, kind in column_kinds.items():
+            if column_name not in column_names:
+                raise ValueError(f"Column '{column_name}' with the specified kind is not among the column names")
+            if kind not in COLUMN_KINDS:
+                raise ValueError(f"Column kind '{kind}' is not supported. Select from: {COLUMN_KINDS}")
+
+        self.data_dir = os.path.expanduser(data_dir)
+        self.column_names = list(column_names)
+        self.explicit_kinds = dict(column_kinds)
+        self.columns = {column_name: self.explicit_kinds.get(column_name) for column_name in self.column_names}
+        # Shapes of the rows in the fixed kind columns
+        self.row_shapes = {}
+        self.chunk_sizes = []
+
+        os.makedirs(self.data_dir, exist_ok=True)
+
+    def write_chunk(self, *column_chunks):
+        """Append the chunk of rows to the dataset
+
+        Args:
+            *column_chunks (list or numpy.ndarray or torch.Tensor): data of each column for the rows in the chunk.
+                Provided in the same order as the ``column_names``.
+
+        Returns:
+            None
+        """
+        if len(column_chunks) != len(self.column_names):
+            raise ValueError(f'Expected data for {len(self.column_names)} columns, got {len(column_chunks)}')
+        chunk_size = len(column_chunks[0])
+        if any(len(column_chunk) != chunk_size for column_chunk in column_chunks):
+            raise ValueError('All the column chunks have to have the same number of rows')
+
+        chunk_idx = len(self.chunk_sizes)
+        for column_name, column_chunk in zip(self.column_names, column_chunks):
+            if isinstance(column_chunk, torch.Tensor):
+                column_chunk = column_chunk.detach().cpu().numpy()
+            if self.columns[column_name] == FIXED and column_name not in self.explicit_kinds:
+                self._check_fixed_chunk(column_name, column_chunk)
+
+            kind, arrays = encode_column_chunk(column_chunk, self.columns[column_name])
+            if kind == FIXED:
+                row_shape = arrays['values'].shape[1:]
+                if self.row_shapes.setdefault(column_name, row_shape) != row_shape:
+                    raise ValueError(f"Column '{column_name}' chunk has rows of shape {row_shape} while the previous "
+                                     f"chunks have rows of shape {self.row_shapes[column_name]}")
+            self.columns[column_name] = kind
+
+            for array_name, array in arrays.items():
+                np.save(os.path.join(self.data_dir, get_chunk_file_name(column_name, chunk_idx, array_name)), array)
+
+        self.chunk_sizes.append(chunk_size)
+
+    def _check_fixed_chunk(self, column_name, column_chunk):
+        """Promote the inferred fixed column to the ragged kind if the new chunk's rows don't match the shape
+
+        Args:
+            column_name (str): name of the column
+            column_chunk (list or numpy.ndarray): column data of the new chunk
+
+        Returns:
+            None
+        """
+        chunk_kind = infer_column_kind(column_chunk)
+        row_shape = self.row_shapes[column_name]
+        if chunk_kind == FIXED and np.shape(column_chunk)[1:] == row_shape:
+            return
+
+        if len(row_shape) != 1 or not (chunk_kind == RAGGED or (chunk_kind == FIXED and np.ndim(column_chunk) == 2)):
+            raise ValueError(f"Column '{column_name}' chunk of kind '{chunk_kind}' can't be stored together with "
+                             f"the previous chunks of the fixed kind with rows of shape {row_shape}. "
+                             f"Specify the column kind explicitly via column_kinds.")
+
+        for chunk_idx, chunk_size in enumerate(self.chunk_sizes):
+            values_path = os.path.join(self.data_dir, get_chunk_file_name(column_name, chunk_idx, 'values'))
+            values = np.load(values_path)
+            np.save(values_path, values.reshape(-1))
+            np.save(os.path.join(self.data_dir, get_chunk_file_name(column_name, chunk_idx, 'offsets')),
+                    get_offsets([row_shape[0]] * chunk_size))
+
+        self.columns[column_name] = RAGGED
+        del self.row_shapes[column_name]
+
+    def close(self):
+        """Finalize the dataset by writing its metadata
+
+        Returns:
+            ColumnarDataset: the written dataset opened for reading
+        """
+        with open(os.path.join(self.data_dir, METADATA_FILE_NAME), 'w') as f:
+            json.dump({
+                'columns': [{'name': column_name, 'kind': self.columns[column_name]}
+                            for column_name in self.column_names],
+                'chunk_sizes': self.chunk_sizes
+            }, f, indent=2)
+
+        return ColumnarDataset(self.data_dir)
+
+
+class ColumnarDataset(Dataset):
+    def __init__(self, data_dir, columns=None):
+        """Dataset memory-mapping the columnar ``.npy`` chunks written by the :class:`ColumnarDatasetWriter`
+
+        Opening the dataset only memory-maps the files without reading them, so the startup is instant and
+        the datasets larger than the available memory can be used. The whole batch of samples is fetched at once
+        via the ``__getitems__()`` which the PyTorch DataLoader uses when available. The rows of the fixed shape
+        columns are then gathered with a single vectorised read per chunk instead of sample by sample.
+
+        As with the :class:`~aitoolbox.torchtrain.data.dataset.ListDataset`, the sample is a tuple of the column
+        values. When the dataset has a single column, the sample is just the column value as in
+        the :class:`~aitoolbox.torchtrain.data.dataset.BasicDataset`.
+
+        When pickled, e.g. when passed to the DDP spawned processes or to the DataLoader workers, only
+        the dataset location is serialized and the files are memory-mapped again in the receiving process.
+
+        Args:
+            data_dir (str): folder with the written columnar dataset
+            columns (list or None): names of the columns to be read. If not provided, all the columns are read.
+        """
+        self.data_dir = os.path.expanduser(data_dir)
+        self.columns = columns
+
+        with open(os.path.join(self.data_dir, METADATA_FILE_NAME)) as f:
+            self.metadata = json.load(f)
+
+        column_kinds = {column['name']: column['kind'] for column in self.metadata['columns']}
+        self.column_names = list(columns) if columns is not None else list(column_kinds)
+        for column_name in self.column_names:
+            if column_name not in column_kinds:
+                raise ValueError(f"Column '{column_name}' not found in the dataset. "
+                                 f"Available columns: {list(column_kinds)}")
+        self.column_kinds = [column_kinds[column_name] for column_name in self.column_names]
+
+        self.chunk_bounds = np.concatenate([[0], np.cumsum(self.metadata['chunk_sizes'], dtype=np.int64)])
+        self.column_chunks = self._open_chunks()
+
+        # Fixed columns are gathered into a single array, so all their chunks need the same row shape
+        self.column_dtypes = []
+        for column_name, kind, chunks in zip(self.column_names, self.column_kinds, self.column_chunks):
+            dtype = None
+            if kind == FIXED and len(chunks) > 0:
+                row_shapes = {chunk['values'].shape[1:] for chunk in chunks}
+                if len(row_shapes) > 1:
+                    raise ValueError(f"Chunks of the fixed column '{column_name}' have rows of different shapes: "
+                                     f"{sorted(row_shapes)}")
+                dtype = np.result_type(*[chunk['values'].dtype for chunk in chunks])
+            self.column_dtypes.append(dtype)
+
+    def _open_chunks(self):
+        column_chunks = []
+        for column_name, kind in zip(self.column_names, self.column_kinds):
+            array_names = ['values'] if kind == FIXED else ['values', 'offsets']
+            column_chunks.append([
+                {
+                    array_name: np.load(
+                        os.path.join(self.data_dir, get_chunk_file_name(column_name, chunk_idx, array_name)),
+                        mmap_mode='r'
+                    )
+                    for array_name in array_names
+                }
+                for chunk_idx in range(len(self.metadata['chunk_sizes']))
+            ])
+        return column_chunks
+
+    def __getstate__(self):
+        return {'data_dir': self.data_dir, 'columns': self.columns}
+
+    def __setstate__(self, state):
+        self.__init__(state['data_dir'], state['columns'])
+
+    def __len__(self):
+        return int(self.chunk_bounds[-1])
+
+    def __getitem__(self, idx):
+        if idx < 0:
+            idx += len(self)
+        if not 0 <= idx < len(self):
+            raise IndexError(f'Index {idx} out of range for the dataset of length {len(self)}')
+
+        chunk_idx = int(np.searchsorted(self.chunk_bounds, idx, side='right')) - 1
+        local_idx = idx - int(self.chunk_bounds[chunk_idx])
+
+        sample = tuple(
+            decode_row(kind, chunks[chunk_idx], local_idx)
+            for kind, chunks in zip(self.column_kinds, self.column_chunks)
+        )
+        return sample if len(sample) > 1 else sample[0]
+
+    def __getitems__(self, indices):
+        """Fetch the whole batch of samples at once
+
+        Args:
+            indices (list): indices of the samples in the batch
+
+        Returns:
+            list: samples in the order of the provided indices
+        """
+        columns = self.get_columns(indices)
+        if len(columns) == 1:
+            return list(columns[0])
+        return list(zip(*columns))
+
+    def get_columns(self, indices):
+        """Fetch the column values of the selected samples
+
+        Args:
+            indices (list or numpy.ndarray): indices of the samples
+
+        Returns:
+            list: for each column the array of the fixed shape rows or the list of the variable size rows
+        """
+        indices = np.asarray(indices, dtype=np.int64)
+        indices = np.where(indices < 0, indices + len(self), indices)
+        if len(indices) > 0 and (indices.min() < 0 or indices.max() >= len(self)):
+            raise IndexError(f'Indices out of range for the dataset of length {len(self)}')
+
+        chunk_ids = np.searchsorted(self.chunk_bounds, indices, side='right') - 1
+        local_indices = indices - self.chunk_bounds[chunk_ids]
+        unique_chunk_ids = np.unique(chunk_ids)
+
+        columns = []
+        for kind, chunks, dtype in zip(self.column_kinds, self.column_chunks, self.column_dtypes):
+            if kind == FIXED:
+                column = np.empty((len(indices),) + chunks[0]['values'].shape[1:], dtype=dtype)
+                for chunk_id in unique_chunk_ids:
+                    chunk_mask = chunk_ids == chunk_id
+                    column[chunk_mask] = chunks[chunk_id]['values'][local_indices[chunk_mask]]
+            else:
+                column = [decode_row(kind, chunks[chunk_id], local_idx)
+                          for chunk_id, local_idx in zip(chunk_ids.tolist(), local_indices.tolist())]
+            columns.append(column)
+        return columns
+
+    @classmethod
+    def from_dataset(cls, dataset, data_dir, column_names=None, chunk_size=100000, column_kinds=None):
+        """Convert the in-memory dataset into the columnar dataset
+
+        Args:
+            dataset (BasicDataset or ListDataset or torch.utils.data.TensorDataset): in-memory dataset
+            data_dir (str): folder where the columnar dataset is written
+            column_names (list or None): names of the columns. If not provided, the columns are named
+                ``column_0``, ``column_1``, etc.
+            chunk_size (int): number of rows in each of the written chunks
+            column_kinds (dict or None): explicit storage kinds of the selected columns. If not provided, the kinds
+                are inferred from the data.
+
+        Returns:
+            ColumnarDataset: converted dataset
+        """
+        if isinstance(dataset, BasicDataset):
+            data_columns = [dataset.data]
+        elif isinstance(dataset, ListDataset):
+            data_columns = list(dataset.data_lists)
+        elif isinstance(dataset, torch.utils.data.TensorDataset):
+            data_columns = list(dataset.tensors)
+        else:
+            raise TypeError(f'Dataset of type {type(dataset)} is not supported. Supported datasets are: '
+                            f'BasicDataset, ListDataset and TensorDataset.')
+
+        return cls.from_data(data_dir, *data_columns, column_names=column_names, chunk_size=chunk_size,
+                             column_kinds=column_kinds)
+
+    @classmethod
+    def from_data(cls, data_dir, *data_columns, column_names=None, chunk_size=100000, column_kinds=None):
+        """Convert the in-memory lists, arrays and tensors into the columnar dataset
+
+        Args:
+            data_dir (str): folder where the columnar dataset is written
+            *data_columns (list or numpy.ndarray or torch.Tensor): data columns with the same number of rows
+            column_names (list or None): names of the columns. If not provided, the columns are named
+                ``column_0``, ``column_1``, etc.
+            chunk_size (int): number of rows in each of the written chunks
+            column_kinds (dict or None): explicit storage kinds of the selected columns. If not provided, the kinds
+                are inferred from the data.
+
+        Returns:
+            ColumnarDataset: converted dataset
+        """
+        if column_names is None:
+            column_names = [f'column_{i}' for i in range(len(data_columns))]
+
+        writer = ColumnarDatasetWriter(data_dir, column_names, column_kinds)
+        for chunk_start in range(0, len(data_columns[0]), chunk_size):
+            writer.write_chunk(*[data[chunk_start:chunk_start + chunk_size] for data in data_columns])
+        return writer.close()
+
+
+def encode_column_chunk(column_chunk, kind=None):
+    """Encode the column chunk into the arrays stored in the ``.npy`` files
+
+    Args:
+        column_chunk (list or numpy.ndarray or torch.Tensor): column data of the chunk rows
+        kind (str or None): storage kind of the column. If not provided, the kind is inferred from the data.
+
+    Returns:
+        (str, dict): column storage kind, arrays to be stored
+    """
+    if isinstance(column_chunk, torch.Tensor):
+        column_chunk = column_chunk.detach().cpu().numpy()
+    if kind is None:
+        kind = infer_column_kind(column_chunk)
+
+    if kind == FIXED:
+        return kind, {'values': np.asarray(column_chunk)}
+    elif kind == RAGGED:
+        rows = [np.asarray(row) for row in column_chunk]
+        if any(row.ndim != 1 for row in rows):
+            raise ValueError('Rows of the ragged column have to be 1D sequences')
+        values = np.concatenate(rows) if len(rows) > 0 else np.zeros(0)
+        return kind, {'values': values, 'offsets': get_offsets([len(row) for row in rows])}
+    elif kind == STRING:
+        rows = [row.encode('utf-8') for row in column_chunk]
+    else:
+        rows = [pickle.dumps(row, protocol=pickle.HIGHEST_PROTOCOL) for row in column_chunk]
+
+    return kind, {'values': np.frombuffer(b''.join(rows), dtype=np.uint8),
+                  'offsets': get_offsets([len(row) for row in rows])}
+
+
+def infer_column_kind(column_chunk):
+    """Infer the storage kind of the column from its data
+
+    Args:
+        column_chunk (list or numpy.ndarray): column data
+
+    Returns:
+        str: column storage kind
+    """
+    if isinstance(column_chunk, np.ndarray) and column_chunk.dtype != object:
+        return FIXED
+    if len(column_chunk) > 0 and all(isinstance(row, str) for row in column_chunk):
+        return STRING
+
+    try:
+        rows = [np.asarray(row) for row in column_chunk]
+    except (ValueError, TypeError):
+        return OBJECT
+    if len(rows) == 0 or any(row.dtype.kind not in 'biuf' for row in rows):
+        return OBJECT
+    if all(row.shape == rows[0].shape for row in rows):
+        return FIXED
+    if all(row.ndim == 1 for row in rows):
+        return RAGGED
+    return OBJECT
+
+
+def decode_row(kind, chunk, local_idx):
+    """Read the single row from the column chunk
+
+    Args:
+        kind (str): column storage kind
+        chunk (dict): memory-mapped arrays of the column chunk
+        local_idx (int): index of the row inside the chunk
+
+    Returns:
+        row value
+    """
+    if kind == FIXED:
+        row = chunk['values'][local_idx]
+        # Copy the multidimensional rows out of the read-only memory-mapped file, scalars are already copied
+        return np.array(row) if isinstance(row, np.ndarray) else row
+
+    start, end = int(chunk['offsets'][local_idx]), int(chunk['offsets'][local_idx + 1])
+    row = chunk['values'][start:end]
+    if kind == RAGGED:
+        return np.array(row)
+    elif kind == STRING:
+        return row.tobytes().decode('utf-8')
+    return pickle.loads(row.tobytes())
+
+
+def get_offsets(row_lengths):
+    """Get the row start offsets in the flat values array
+
+    Args:
+        row_lengths (list): lengths of the rows
+
+    Returns:
+        numpy.ndarray: ``len + 1`` offsets of the rows
+    """
+    return np.concatenate([[0], np.cumsum(row_lengths, dtype=np.int64)]).astype(np.int64)
+
+
+def get_chunk_file_name(column_name, chunk_idx, array_name):
+    """Get the name of the ``.npy`` file storing the column chunk array
+
+    Args:
+        column_name (str): name of the column
+        chunk_idx (int): index of the chunk
+        array_name (str): name of the stored array, ``'values'`` or ``'offsets'``
+
+    Returns:
+        str: file name
+    """
+    return f'{column_name}.{chunk_idx:05d}.{array_name}.npy'
@@ -0,0 +1,183 @@
+import numpy as np
+from torch.utils.data import Sampler
+
+
+class LengthBucketBatchSampler(Sampler):
+    def __init__(self, lengths, batch_size=None, max_tokens=None, bucket_size_multiplier=100, shuffle=True,
+                 drop_last=False, num_replicas=None, rank=None, seed=0):
+        """Batch sampler grouping the examples of similar length into the same batches
+
+        When sequences of very different lengths are batched together, most of the padded batch tensor is wasted on
+        the padding. The sampler instead splits the (shuffled) dataset into the buckets of
+        ``bucket_size_multiplier`` batches, sorts the examples in each bucket by their length and splits the bucket
+        into batches. The order of the batches is shuffled again, so the training still sees the randomly ordered
+        batches of varying lengths.
+
+        The batch size is either the fixed number of examples or the token budget where the batch grows as long as
+        its padded size (number of examples times the longest example length) fits into the ``max_tokens``.
+
+        Same as the :class:`torch.utils.data.distributed.DistributedSampler`, the sampler shards the batches among
+        the distributed processes when ``num_replicas`` and ``rank`` are set. Each process gets the same number of
+        batches and the shuffling is seeded with the ``seed`` and the current epoch, so it is the same in all
+        the processes. Call :meth:`set_epoch` at the start of every epoch (as done automatically by
+        the TrainLoop DDP training) to reshuffle. Otherwise, the epoch is advanced after every complete pass through
+        the sampler. When the TrainLoop prepares the DDP training, the sampler is automatically sharded.
+        Unless ``drop_last`` is set, the batches which can't be evenly distributed among the processes are padded
+        with the repeated batches. These are marked in :meth:`get_sample_indices`, so the duplicated predictions can
+        be dropped when the predictions are gathered from all the processes.
+
+        Args:
+            lengths (list or numpy.ndarray): length of each example in the dataset
+            batch_size (int or None): number of examples in each batch
+            max_tokens (int or None): maximum padded size of the batch measured in tokens. Used instead of
+                the ``batch_size``.
+            bucket_size_multiplier (int): number of batches sorted together as a single bucket. The larger
+                the bucket the less padding, but also the less randomness in the batch composition.
+            shuffle (bool): shuffle the examples before bucketing and the batches after the bucketing
+            drop_last (bool): drop the last incomplete batch of each bucket when using the ``batch_size``.
+                In the distributed setting also drop the tail batches which can't be evenly distributed among
+                the processes instead of repeating the first batches.
+            num_replicas (int or None): number of processes participating in the distributed training
+            rank (int or None): rank of the current process
+            seed (int): random seed used for shuffling. Has to be the same in all the processes.
+        """
+        if (batch_size is None) == (max_tokens is None):
+            raise ValueError('Exactly one of batch_size or max_tokens has to be provided')
+        if batch_size is not None and batch_size < 1:
+            raise ValueError(f'batch_size has to be at least 1. Provided: {batch_size}')
+        if max_tokens is not None and max_tokens < 1:
+            raise ValueError(f'max_tokens has to be at least 1. Provided: {max_tokens}')
+        if (num_replicas is None) != (rank is None):
+            raise ValueError('Both num_replicas and rank have to be provided for the distributed sampling')
+        if num_replicas is not None and not 0 <= rank < num_replicas:
+            raise ValueError(f'Invalid rank {rank}, rank should be in the interval [0, {num_replicas - 1}]')
+
+        self.lengths = np.asarray(lengths, dtype=np.int64)
+        self.batch_size = batch_size
+        self.max_tokens = max_tokens
+        self.bucket_size_multiplier = bucket_size_multiplier
+        self.shuffle = shuffle
+        self.drop_last = drop_last
+        self.num_replicas = num_replicas
+        self.rank = rank
+        self.seed = seed
+
+        self.epoch = 0
+        self.iterated_epoch = None
+        self.cached_batches = None
+
+    def set_epoch(self, epoch):
+        """Set the epoch used to seed the shuffling
+
+        Args:
+            epoch (int): epoch index
+
+        Returns:
+            None
+        """
+        self.epoch = epoch
+
+    def distributed(self, num_replicas, rank):
+        """Create the copy of the sampler sharding the batches among the distributed processes
+
+        Args:
+            num_replicas (int): number of processes participating in the distributed training
+            rank (int): rank of the current process
+
+        Returns:
+            LengthBucketBatchSampler: distributed sampler
+        """
+        distributed_sampler = LengthBucketBatchSampler(
+            self.lengths, self.batch_size, self.max_tokens, self.bucket_size_multiplier,
+            self.shuffle, self.drop_last, num_replicas, rank, self.seed
+        )
+        distributed_sampler.set_epoch(self.epoch)
+        return distributed_sampler
+
+    def __iter__(self):
+        batches = self.get_batches()
+        self.iterated_epoch = self.epoch
+        yield from batches
+        self.epoch += 1
+
+    def __len__(self):
+        return len(self.get_batches())
+
+    def get_batches(self):
+        """Get the batches of the current epoch assigned to the current process
+
+        Returns:
+            list: batches as lists of dataset indices
+        """
+        return self._get_epoch_batches(self.epoch)[0]
+
+    def get_sample_indices(self):
+        """Get the dataset indices of the samples assigned to the current process in the last iterated epoch
+
+        Returns:
+            (numpy.ndarray, numpy.ndarray): dataset indices of the samples in the order of the batches and the boolean
+            mask of the samples from the padding batches which repeat the batches already assigned to the processes
+        """
+        epoch = self.iterated_epoch if self.iterated_epoch is not None else self.epoch
+        batches, is_padding_batch = self._get_epoch_batches(epoch)
+
+        batch_sizes = [len(batch) for batch in batches]
+        sample_indices = np.fromiter((idx for batch in batches for idx in batch), dtype=np.int64,
+                                     count=sum(batch_sizes))
+        return sample_indices, np.repeat(np.array(is_padding_batch, dtype=bool), batch_sizes)
+
+    def _get_epoch_batches(self, epoch):
+        if self.cached_batches is None or self.cached_batches[0] != epoch:
+            self.cached_batches = epoch, *self._build_batches(epoch)
+        return self.cached_batches[1:]
+
+    def _build_batches(self, epoch):
+        rng = np.random.default_rng([self.seed, epoch])
+        indices = rng.permutation(len(self.lengths)) if self.shuffle else np.arange(len(self.lengths))
+
+        bucket_size = self.bucket_size_multiplier * (
+            self.batch_size if self.batch_size is not None else max(self.max_tokens // max(self.lengths.mean(), 1), 1)
+        )
+        bucket_size = max(int(bucket_size), 1)
+
+        batches = []
+        for bucket_start in range(0, len(indices), bucket_size):
+            bucket = indices[bucket_start:bucket_start + bucket_size]
+            bucket = bucket[np.argsort(self.lengths[bucket], kind='stable')]
+            batches += self._split_bucket(bucket)
+
+        if self.shuffle:
+            batches = [batches[i] for i in rng.permutation(len(batches))]
+
+        num_unique_batches = len(batches)
+        if self.num_replicas is not None:
+            if self.drop_last:
+                num_unique_batches = len(batches) - len(batches) % self.num_replicas
+                batches = batches[:num_unique_batches]
+            elif len(batches) % self.num_replicas != 0:
+                num_padding = self.num_replicas - len(batches) % self.num_replicas
+                batches += (batches * int(np.ceil(num_padding / max(len(batches), 1))))[:num_padding]
+            batches = batches[self.rank::self.num_replicas]
+
+        rank = self.rank if self.rank is not None else 0
+        num_replicas = self.num_replicas if self.num_replicas is not None else 1
+        is_padding_batch = [rank + i * num_replicas >= num_unique_batches for i in range(len(batches))]
+        return batches, is_padding_batch
+
+    def _split_bucket(self, bucket):
+        if self.batch_size is not None:
+            batches = [bucket[i:i + self.batch_size].tolist() for i in range(0, len(bucket), self.batch_size)]
+            if self.drop_last and len(batches) > 0 and len(batches[-1]) < self.batch_size:
+                batches = batches[:-1]
+            return batches
+
+        # Lengths are sorted ascending, so the padded batch size is the last example length times the batch size
+        batches = []
+        batch_start = 0
+        for i, length in enumerate(self.lengths[bucket].tolist()):
+            if i > batch_start and (i - batch_start + 1) * length > self.max_tokens:
+                batches.append(bucket[batch_start:i].tolist())
+                batch_start = i
+        if batch_start < len(bucket):
+            batches.append(bucket[batch_start:].tolist())
+        return batches
@@ -0,0 +1,240 @@
+import os
+import shutil
+import pickle
+import tempfile
+from collections.abc import Sequence
+import numpy as np
+import torch
+from torch.utils.data import TensorDataset, RandomSampler, SequentialSampler, BatchSampler
+
+from aitoolbox.torchtrain.data.dataset import BasicDataset, ListDataset
+from aitoolbox.torchtrain.data.columnar import ColumnarDataset
+from aitoolbox.torchtrain.train_loop.components.loader_builder import get_data_loader_args, build_data_loader
+
+
+class SharedArray:
+    def __init__(self, file_path, dtype, shape):
+        """NumPy array backed by the memory-mapped file which is shared among the processes
+
+        When pickled (e.g. when passed to the spawned process) only the file location is serialized. The unpickled
+        array attaches to the same file and thus to the same physical memory pages. The array is opened in
+        the copy-on-write mode so the processes can't modify each other's data.
+
+        Args:
+            file_path (str): path to the file with the array data
+            dtype (numpy.dtype or str): array data type
+            shape (tuple): array shape
+        """
+        self.file_path = file_path
+        self.dtype = np.dtype(dtype)
+        self.shape = tuple(shape)
+        self.array = self._attach()
+
+    @classmethod
+    def from_array(cls, array, file_path):
+        """Copy the array into the new shared memory-mapped file
+
+        Args:
+            array (numpy.ndarray): array to be shared
+            file_path (str): path of the newly created file
+
+        Returns:
+            SharedArray: shared array
+        """
+        array = np.ascontiguousarray(array)
+        if array.size > 0:
+            shared_array = np.memmap(file_path, dtype=array.dtype, mode='w+', shape=array.shape)
+            shared_array[...] = array
+            shared_array.flush()
+            del shared_array
+        else:
+            open(file_path, 'wb').close()
+        return cls(file_path, array.dtype, array.shape)
+
+    def _attach(self):
+        if int(np.prod(self.shape)) == 0:
+            return np.zeros(self.shape, dtype=self.dtype)
+        return np.memmap(self.file_path, dtype=self.dtype, mode='c', shape=self.shape)
+
+    def __getstate__(self):
+        return {'file_path': self.file_path, 'dtype': self.dtype.str, 'shape': self.shape}
+
+    def __setstate__(self, state):
+        self.file_path = state['file_path']
+        self.dtype = np.dtype(state['dtype'])
+        self.shape = state['shape']
+        self.array = self._attach()
+
+    def __array__(self, dtype=None, copy=None):
+        return np.asarray(self.array, dtype=dtype)
+
+    def __len__(self):
+        return self.shape[0]
+
+    def __getitem__(self, idx):
+        return np.asarray(self.array[idx])
+
+
+class SharedObjectList(Sequence):
+    def __init__(self, data_path, offsets):
+        """List of arbitrary python objects stored in the memory-mapped file which is shared among the processes
+
+        Each element is stored pickled in the shared data file and is only unpickled when accessed. This way
+        the list takes up the memory only once regardless of the number of processes using it.
+
+        Args:
+            data_path (str): path to the file with the pickled elements
+            offsets (SharedArray): shared array of the ``len + 1`` byte offsets of the elements in the data file
+        """
+        self.data_path = data_path
+        self.offsets = offsets
+        self.data = self._attach()
+
+    @classmethod
+    def from_list(cls, data_list, file_path):
+        """Pickle the list elements into the new shared memory-mapped file
+
+        Args:
+            data_list (list or tuple or numpy.ndarray): list of elements to be shared
+            file_path (str): path of the newly created file. Element offsets are stored in the same path with
+                the ``.offsets`` suffix.
+
+        Returns:
+            SharedObjectList: shared list
+        """
+        offsets = np.zeros(len(data_list) + 1, dtype=np.int64)
+        with open(file_path, 'wb') as f:
+            for i, element in enumerate(data_list):
+                offsets[i + 1] = offsets[i] + f.write(pickle.dumps(element, protocol=pickle.HIGHEST_PROTOCOL))
+        return cls(file_path, SharedArray.from_array(offsets, f'{file_path}.offsets'))
+
+    def _attach(self):
+        if self.offsets[-1] == 0:
+            return b''
+        return np.memmap(self.data_path, dtype=np.uint8, mode='r')
+
+    def __getstate__(self):
+        return {'data_path': self.data_path, 'offsets': self.offsets}
+
+    def __setstate__(self, state):
+        self.data_path = state['data_path']
+        self.offsets = state['offsets']
+        self.data = self._attach()
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [self[i] for i in range(*idx.indices(len(self)))]
+        if idx < 0:
+            idx += len(self)
+        if not 0 <= idx < len(self):
+            raise IndexError(f'Index {idx} out of range for the list of length {len(self)}')
+
+        start, end = int(self.offsets.array[idx]), int(self.offsets.array[idx + 1])
+        return pickle.loads(memoryview(self.data)[start:end])
+
+
+class SharedMemoryDatasetStore:
+    def __init__(self, storage_dir=None):
+        """Storage of the datasets shared among the distributed training processes
+
+        Each spawned DDP training process normally receives its own copy of the dataset which multiplies the host
+        memory use by the number of processes. The store instead places the dataset backing storage into the shared
+        memory once in the parent process and the spawned processes attach to it without copying:
+
+        * torch tensors are moved into the shared memory managed by ``torch.multiprocessing``
+        * numeric NumPy arrays are copied into the memory-mapped :class:`SharedArray` files
+        * lists and object arrays are pickled element-wise into the memory-mapped :class:`SharedObjectList` files
+
+        Supported datasets are the :class:`~aitoolbox.torchtrain.data.dataset.BasicDataset`,
+        :class:`~aitoolbox.torchtrain.data.dataset.ListDataset` and :class:`torch.utils.data.TensorDataset`.
+        The :class:`~aitoolbox.torchtrain.data.columnar.ColumnarDataset` is already memory-mapped from the disk
+        and is shared as it is.
+
+        Args:
+            storage_dir (str or None): folder where the memory-mapped files are created. If not provided,
+                the files are created in the RAM-backed ``/dev/shm`` when available or in the system temp folder
+                otherwise.
+        """
+        if storage_dir is None and os.path.isdir('/dev/shm'):
+            storage_dir = '/dev/shm'
+        self.storage_dir = tempfile.mkdtemp(prefix='aitoolbox_shared_data_', dir=storage_dir)
+        self.num_files = 0
+
+    def share(self, data):
+        """Move the data into the shared memory
+
+        Args:
+            data (torch.Tensor or numpy.ndarray or list or tuple): data to be shared
+
+        Returns:
+            torch.Tensor or SharedArray or SharedObjectList: data in the shared memory
+        """
+        if isinstance(data, torch.Tensor):
+            return data.share_memory_() if data.device.type == 'cpu' else data
+        elif isinstance(data, (SharedArray, SharedObjectList)):
+            return data
+        elif isinstance(data, np.ndarray) and data.dtype != object:
+            return SharedArray.from_array(data, self._new_file_path())
+        elif isinstance(data, (list, tuple, np.ndarray)):
+            return SharedObjectList.from_list(data, self._new_file_path())
+        raise TypeError(f'Data of type {type(data)} can not be shared')
+
+    def share_dataset(self, dataset):
+        """Create the dataset with its backing storage in the shared memory
+
+        Args:
+            dataset (BasicDataset or ListDataset or torch.utils.data.TensorDataset or ColumnarDataset): dataset to be
+                shared
+
+        Returns:
+            BasicDataset or ListDataset or torch.utils.data.TensorDataset or ColumnarDataset: dataset of the same
+            type backed by the shared memory
+        """
+        if isinstance(dataset, BasicDataset):
+            return type(dataset)(self.share(dataset.data))
+        elif isinstance(dataset, ListDataset):
+            return type(dataset)(*[self.share(data_list) for data_list in dataset.data_lists])
+        elif isinstance(dataset, TensorDataset):
+            return TensorDataset(*[self.share(tensor) for tensor in dataset.tensors])
+        elif isinstance(dataset, ColumnarDataset):
+            # Already memory-mapped from the disk and only its location is pickled
+            return dataset
+        raise TypeError(f'Dataset of type {type(dataset)} is not supported. Supported datasets are: '
+                        f'BasicDataset, ListDataset, TensorDataset and ColumnarDataset.')
+
+    def share_data_loader(self, data_loader):
+        """Replicate the data loader with its dataset moved into the shared memory
+
+        Args:
+            data_loader (torch.utils.data.DataLoader): data loader to be shared
+
+        Returns:
+            torch.utils.data.DataLoader: data loader with the same settings using the shared dataset
+        """
+        data_loader_args = get_data_loader_args(data_loader)
+        data_loader_args['dataset'] = self.share_dataset(data_loader.dataset)
+
+        if type(data_loader.batch_sampler) is not BatchSampler and data_loader.batch_sampler is not None:
+            data_loader_args['batch_sampler'] = data_loader.batch_sampler
+            del data_loader_args['batch_size'], data_loader_args['drop_last']
+        elif isinstance(data_loader.sampler, RandomSampler):
+            data_loader_args['shuffle'] = True
+        elif not isinstance(data_loader.sampler, SequentialSampler):
+            data_loader_args['sampler'] = data_loader.sampler
+
+        return build_data_loader(data_loader_args)
+
+    def cleanup(self):
+        """Delete the shared memory files once the processes using them finished
+
+        Returns:
+            None
+        """
+        shutil.rmtree(self.storage_dir, ignore_errors=True)
+
+    def _new_file_path(self):
+        self.num_files += 1
+        return os.path.join(self.storage_dir, f'shared_data_{self.num_files}.bin')
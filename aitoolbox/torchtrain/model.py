@@ -1,5 +1,6 @@
 from abc import ABC, abstractmethod
 import torch.nn as nn
+from torch.nn.parallel import DistributedDataParallel
 
 from aitoolbox.torchtrain.data.batch_model_feed_defs import AbstractModelFeedDefinition
 
@@ -78,6 +79,30 @@ class TTModel(nn.Module, ABC):
         """
         pass
 
+    def get_loss_and_predictions(self, batch_data, criterion, device):
+        """Get loss and predictions during evaluation stage in a single pass through the model
+
+        Called from evaluate_loss_and_predict_with_model() in TrainLoop.
+
+        The default implementation simply calls :meth:`~aitoolbox.torchtrain.model.TTModel.get_loss_eval` and
+        :meth:`~aitoolbox.torchtrain.model.TTModel.get_predictions` which still results in two forward passes through
+        the model and thus gives no speedup. Override this method and calculate both the loss and the predictions
+        from the same model output to evaluate the model in a single pass. :class:`TTBasicModel` and
+        :class:`TTBasicMultiGPUModel` already implement such a single pass version.
+
+        Args:
+            batch_data (torch.Tensor or list or tuple or dict): model input data batch
+            criterion (torch.nn.Module): loss criterion
+            device (torch.device): device on which the model is making the prediction
+
+        Returns:
+            (torch.Tensor or MultiLoss, torch.Tensor, torch.Tensor, dict or None): loss, y_pred, y_test, metadata
+            in the form of dict of lists/torch.Tensors/np.arrays
+        """
+        loss = self.get_loss_eval(batch_data, criterion, device)
+        y_pred, y_test, metadata = self.get_predictions(batch_data, device)
+        return loss, y_pred, y_test, metadata
+
 
 class TTBasicModel(TTModel):
     """Extension of the TTModel abstract class with already implemented simple loss and prediction calculation functions
@@ -105,6 +130,19 @@ class TTBasicModel(TTModel):
 
         return predictions, targets, {}
 
+    def get_loss_and_predictions(self, batch_data, criterion, device):
+        # Only fuse when the user hasn't customized the loss or the predictions calculation
+        if not has_default_eval_methods(self, TTBasicModel):
+            return TTModel.get_loss_and_predictions(self, batch_data, criterion, device)
+
+        *batch_input_data, targets = batch_data
+        batch_input_data = [data.to(device) for data in batch_input_data]
+
+        predictions = self(*batch_input_data)
+        loss = criterion(predictions, targets.to(device))
+
+        return loss, predictions, targets, {}
+
 
 class TTBasicMultiGPUModel(TTBasicModel):
     """Extension of the TTModel abstract class with already implemented simple loss and prediction calculation functions
@@ -137,6 +175,20 @@ class TTBasicMultiGPUModel(TTBasicModel):
         loss = self(*batch_input_data, targets=targets, criterion=criterion)
         return loss
 
+    def get_loss_and_predictions(self, batch_data, criterion, device):
+        # Only fuse when the user hasn't customized the loss or the predictions calculation
+        if not has_default_eval_methods(self, TTBasicMultiGPUModel):
+            return TTModel.get_loss_and_predictions(self, batch_data, criterion, device)
+
+        *batch_input_data, targets = batch_data
+        batch_input_data = [data.to(device) for data in batch_input_data]
+
+        # Predictions are gathered on the main device where the loss is then calculated from them
+        predictions = self(*batch_input_data)
+        loss = criterion(predictions, targets.to(device))
+
+        return loss, predictions, targets, {}
+
 
 class MultiGPUModelWrap(TTBasicMultiGPUModel):
     def __init__(self, model):
@@ -196,3 +248,21 @@ class ModelWrap:
 
         self.model = model
         self.batch_model_feed_def = batch_model_feed_def
+
+
+def has_default_eval_methods(model, model_cls):
+    """Check if the model uses the loss and predictions calculation methods as implemented in the given model class
+
+    Args:
+        model (TTModel or aitoolbox.torchtrain.parallel.TTParallelBase or AbstractModelFeedDefinition): model,
+            possibly wrapped for DP/DDP, or the model feed definition
+        model_cls (type): TTModel or AbstractModelFeedDefinition class implementing the reference methods
+
+    Returns:
+        bool: if none of the ``get_loss()``, ``get_loss_eval()`` and ``get_predictions()`` is overridden
+    """
+    if isinstance(model, (nn.DataParallel, DistributedDataParallel)):
+        model = model.module
+
+    return all(getattr(type(model), method_name) is getattr(model_cls, method_name)
+               for method_name in ['get_loss', 'get_loss_eval', 'get_predictions'])
@@ -9,7 +9,8 @@ from aitoolbox.utils.util import copy_function
 
 class TTParallelBase:
     def __init__(self, module,
-                 default_model_methods=('get_loss', 'get_loss_eval', 'get_predictions')):
+                 default_model_methods=('get_loss', 'get_loss_eval', 'get_predictions',
+                                        'get_loss_and_predictions')):
         """torchtrain parallel base class used for transferring TTModel functions to the PyTorch Parallel wrappers level
 
         Args:
@@ -20,6 +21,7 @@ class TTParallelBase:
         self.get_loss_fn = copy_function(module.get_loss)
         self.get_loss_eval_fn = copy_function(module.get_loss_eval)
         self.get_predictions_fn = copy_function(module.get_predictions)
+        self.get_loss_and_predictions_fn = copy_function(module.get_loss_and_predictions)
 
         # Transfer any additional sub-methods from TTModel to TTDataParallel
         methods = list(set(dir(module))
@@ -44,10 +46,14 @@ class TTParallelBase:
     def get_predictions(self, batch_data, device):
         return self.get_predictions_fn(self, batch_data, device)
 
+    def get_loss_and_predictions(self, batch_data, criterion, device):
+        return self.get_loss_and_predictions_fn(self, batch_data, criterion, device)
+
 
 class TTDataParallel(nn.DataParallel, TTParallelBase):
     def __init__(self, module,
-                 default_model_methods=('get_loss', 'get_loss_eval', 'get_predictions'), **kwargs):
+                 default_model_methods=('get_loss', 'get_loss_eval', 'get_predictions',
+                                        'get_loss_and_predictions'), **kwargs):
         """torchtrain-enabled DataParallel
 
         This DataParallel wrapper works in the same way as the original PyTorch :class:`torch.nn.DataParallel`.
@@ -65,7 +71,8 @@ class TTDataParallel(nn.DataParallel, TTParallelBase):
 
 class TTDistributedDataParallel(TTParallelBase, DistributedDataParallel):
     def __init__(self, module,
-                 default_model_methods=('get_loss', 'get_loss_eval', 'get_predictions'), **kwargs):
+                 default_model_methods=('get_loss', 'get_loss_eval', 'get_predictions',
+                                        'get_loss_and_predictions'), **kwargs):
         """torchtrain-enabled DistributedDataParallel
 
         This DistributedDataParallel wrapper works in the same way as the original PyTorch
@@ -0,0 +1,176 @@
+import os
+import queue
+import threading
+import torch
+
+
+class AsyncCheckpointWriter:
+    def __init__(self, model_saver, max_queue_size=1, pin_memory=True, fsync=True):
+        """Background writer saving the model checkpoints without blocking the training
+
+        On the training thread only a fast snapshot of the checkpoint is made by copying all its tensors (model,
+        optimizer, scheduler and AMP state) into the (pinned) CPU memory. Serialization, fsync, the potential cloud
+        upload done by the model saver and the post-save actions (e.g. suboptimal checkpoint removal) then run on
+        the background worker thread while the training continues.
+
+        The number of checkpoints waiting to be saved is bounded by ``max_queue_size``. When the queue is full,
+        the submission of the new checkpoint blocks until the oldest pending checkpoint is saved. This limits
+        the amount of host memory taken by the snapshots.
+
+        Args:
+            model_saver (aitoolbox.experiment.local_save.local_model_save.PyTorchLocalModelSaver or
+                aitoolbox.cloud.AWS.model_save.PyTorchS3ModelSaver or
+                aitoolbox.cloud.GoogleCloud.model_save.PyTorchGoogleStorageModelSaver): model saver executed on
+                the background thread
+            max_queue_size (int): maximum number of checkpoint snapshots waiting to be saved
+            pin_memory (bool): should the GPU tensors be copied into the pinned CPU memory which enables the
+                asynchronous device to host copy
+            fsync (bool): should the saved local checkpoint file be flushed to the disk with ``os.fsync``
+        """
+        if max_queue_size < 1:
+            raise ValueError(f'max_queue_size has to be at least 1. Provided: {max_queue_size}')
+
+        self.model_saver = model_saver
+        self.max_queue_size = max_queue_size
+        self.pin_memory = pin_memory and torch.cuda.is_available()
+        self.fsync = fsync
+
+        self.save_queue = queue.Queue(maxsize=max_queue_size)
+        self.worker = None
+        self.error = None
+
+    def submit(self, model_checkpoint, save_kwargs, on_saved=None):
+        """Snapshot the checkpoint and queue it for saving on the background thread
+
+        Args:
+            model_checkpoint (dict): checkpoint dict as expected by the model saver
+            save_kwargs (dict): additional arguments of the model saver's ``save_model()``
+            on_saved (callable or None): function called on the background thread with the paths returned by
+                the model saver after the checkpoint has been saved
+
+        Returns:
+            None
+        """
+        self.raise_worker_error()
+        self._start_worker()
+
+        snapshot = snapshot_to_cpu(model_checkpoint, self.pin_memory)
+        self.save_queue.put((snapshot, save_kwargs, on_saved))
+
+    def wait(self):
+        """Block until all the queued checkpoints have been saved
+
+        Returns:
+            None
+        """
+        self.save_queue.join()
+        self.raise_worker_error()
+
+    def close(self):
+        """Save all the queued checkpoints and stop the background worker thread
+
+        Returns:
+            None
+        """
+        if self.worker is not None:
+            self.save_queue.put(None)
+            self.worker.join()
+            self.worker = None
+        self.raise_worker_error()
+
+    def raise_worker_error(self):
+        """Re-raise the error which happened on the background thread in the training thread
+
+        Raises:
+            RuntimeError
+
+        Returns:
+            None
+        """
+        if self.error is not None:
+            error, self.error = self.error, None
+            raise RuntimeError('Saving of the model checkpoint on the background thread failed') from error
+
+    def _start_worker(self):
+        if self.worker is None:
+            self.worker = threading.Thread(target=self._save_loop, name='AsyncCheckpointWriter', daemon=True)
+            self.worker.start()
+
+    def _save_loop(self):
+        while True:
+            save_job = self.save_queue.get()
+            try:
+                if save_job is None:
+                    return
+
+                snapshot, save_kwargs, on_saved = save_job
+                model_paths = self.model_saver.save_model(model=snapshot, **save_kwargs)
+                if self.fsync:
+                    *_, model_local_path = model_paths
+                    fsync_file(model_local_path)
+                if on_saved is not None:
+                    on_saved(model_paths)
+            except Exception as e:
+                self.error = e
+            finally:
+                self.save_queue.task_done()
+
+
+def snapshot_to_cpu(data, pin_memory=False):
+    """Copy all the tensors inside the (nested) checkpoint structure into the CPU memory
+
+    CPU tensors are cloned so that the snapshot isn't changed by the subsequent in-place training updates.
+    GPU tensors are copied asynchronously into the pinned memory when ``pin_memory`` is enabled and the device is
+    synchronized only once after all the copies have been issued. Tensors shared in multiple places of the checkpoint
+    (e.g. tied weights) stay shared in the snapshot.
+
+    Args:
+        data (dict or list or tuple or torch.Tensor): checkpoint data
+        pin_memory (bool): copy the GPU tensors into the pinned CPU memory
+
+    Returns:
+        dict or list or tuple or torch.Tensor: checkpoint snapshot
+    """
+    copied_tensors = {}
+    snapshot = _copy_to_cpu(data, pin_memory, copied_tensors)
+
+    if any(t.is_pinned() for t in copied_tensors.values()):
+        torch.cuda.synchronize()
+    return snapshot
+
+
+def _copy_to_cpu(data, pin_memory, copied_tensors):
+    if isinstance(data, torch.Tensor):
+        if id(data) not in copied_tensors:
+            tensor = data.detach()
+            if tensor.is_cuda and pin_memory:
+                cpu_tensor = torch.empty(tensor.shape, dtype=tensor.dtype, pin_memory=True)
+                cpu_tensor.copy_(tensor, non_blocking=True)
+            else:
+                cpu_tensor = tensor.to('cpu', copy=True)
+            copied_tensors[id(data)] = cpu_tensor
+        return copied_tensors[id(data)]
+    elif isinstance(data, dict):
+        copied_dict = type(data)((k, _copy_to_cpu(v, pin_memory, copied_tensors)) for k, v in data.items())
+        # Model state_dict keeps the module version info needed by load_state_dict()
+        if hasattr(data, '_metadata'):
+            copied_dict._metadata = data._metadata
+        return copied_dict
+    elif isinstance(data, list):
+        return [_copy_to_cpu(el, pin_memory, copied_tensors) for el in data]
+    elif isinstance(data, tuple) and not hasattr(data, '_fields'):
+        return tuple(_copy_to_cpu(el, pin_memory, copied_tensors) for el in data)
+    return data
+
+
+def fsync_file(file_path):
+    """Flush the file contents to the disk
+
+    Args:
+        file_path (str): path to the file
+
+    Returns:
+        None
+    """
+    with open(file_path, 'rb') as f:
+        os.fsync(f.fileno())
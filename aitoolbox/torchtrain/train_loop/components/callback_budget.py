@@ -0,0 +1,202 @@
+import math
+
+# Callback stages executed at every training step to which the execution budgets apply
+STEP_STAGES = ('on_batch_begin', 'on_batch_end', 'on_after_gradient_update', 'on_after_optimizer_step')
+
+
+class CallbackExecutionBudget:
+    def __init__(self, every_n_steps=1, max_step_time_fraction=None):
+        """Declarative execution budget limiting how often the callback's per-step stages are executed
+
+        The budget applies only to the stages executed at every training step (``on_batch_begin``,
+        ``on_batch_end``, ``on_after_gradient_update`` and ``on_after_optimizer_step``). Epoch and training level
+        stages are always executed.
+
+        Note:
+            With the ``max_step_time_fraction`` the execution decision depends on the measured timings, which can
+            differ between the DDP processes. Callbacks which run the collective operations across the processes
+            should only be throttled with the ``every_n_steps``.
+
+        Args:
+            every_n_steps (int): execute the callback at most every N training steps
+            max_step_time_fraction (float or None): maximum fraction of the training step time the callback may use
+                on average. When the measured cost of the callback execution exceeds this fraction of the average step
+                time, the callback is executed only every as many steps as are needed to amortize its cost within
+                the budget.
+        """
+        if every_n_steps < 1:
+            raise ValueError(f'every_n_steps has to be at least 1. Provided: {every_n_steps}')
+        if max_step_time_fraction is not None and max_step_time_fraction <= 0:
+            raise ValueError(f'max_step_time_fraction has to be positive. Provided: {max_step_time_fraction}')
+
+        self.every_n_steps = every_n_steps
+        self.max_step_time_fraction = max_step_time_fraction
+
+        self.last_executed_step = {}
+        self.step_decisions = {}
+
+    def get_execution_interval(self, mean_cost=None, mean_step_time=None):
+        """Get the number of steps between the two consecutive callback executions
+
+        Args:
+            mean_cost (float or None): average cost of the callback stage execution in seconds
+            mean_step_time (float or None): average duration of the training step in seconds
+
+        Returns:
+            int: execution interval in steps
+        """
+        interval = self.every_n_steps
+        if self.max_step_time_fraction is not None and mean_cost is not None and mean_step_time:
+            interval = max(interval, int(math.ceil(mean_cost / (self.max_step_time_fraction * mean_step_time))))
+        return interval
+
+    def should_execute(self, stage_name, step_idx, mean_cost=None, mean_step_time=None):
+        """Decide if the callback stage should be executed at the current training step
+
+        The first execution of each stage always happens so that its cost can be measured. When the stage is
+        executed multiple times within the same training step, e.g. the ``on_after_gradient_update`` once for each
+        of the multiple optimizers, the same decision is made for all its executions at that step.
+
+        Args:
+            stage_name (str): name of the callback stage, e.g. ``'on_batch_end'``
+            step_idx (int): index of the current training step
+            mean_cost (float or None): average cost of the callback stage execution in seconds
+            mean_step_time (float or None): average duration of the training step in seconds
+
+        Returns:
+            bool: if the stage should be executed
+        """
+        if stage_name not in STEP_STAGES:
+            return True
+
+        decision_step, decision = self.step_decisions.get(stage_name, (None, None))
+        if decision_step == step_idx:
+            return decision
+
+        last_step = self.last_executed_step.get(stage_name)
+        decision = last_step is None or step_idx - last_step >= self.get_execution_interval(mean_cost, mean_step_time)
+        if decision:
+            self.last_executed_step[stage_name] = step_idx
+
+        self.step_decisions[stage_name] = (step_idx, decision)
+        return decision
+
+
+class CallbackCostTracker:
+    def __init__(self, ema_decay=0.9):
+        """Accounting of the time spent executing the individual callbacks
+
+        For every callback and its stage the number of executions, skipped executions due to the execution budget,
+        the total execution time and the exponential moving average of the execution cost are tracked. The average
+        training step time is tracked as well, so that the callback cost can be related to the step time.
+
+        Args:
+            ema_decay (float): decay of the exponential moving averages of the callback costs and the step time
+        """
+        self.ema_decay = ema_decay
+
+        self.callback_costs = {}
+        self.num_steps = 0
+        self.mean_step_time = None
+        self.last_step_end_time = None
+
+    def record(self, callback, stage_name, duration):
+        """Record the execution of the callback stage
+
+        Args:
+            callback (aitoolbox.torchtrain.callbacks.abstract.AbstractCallback): executed callback
+            stage_name (str): name of the executed callback stage
+            duration (float): execution time in seconds
+
+        Returns:
+            None
+        """
+        stats = self._get_stats(callback, stage_name)
+        stats['calls'] += 1
+        stats['total_time'] += duration
+        stats['mean_cost'] = duration if stats['mean_cost'] is None \
+            else self.ema_decay * stats['mean_cost'] + (1 - self.ema_decay) * duration
+
+    def record_skip(self, callback, stage_name):
+        """Record the callback stage execution skipped because of the execution budget
+
+        Args:
+            callback (aitoolbox.torchtrain.callbacks.abstract.AbstractCallback): skipped callback
+            stage_name (str): name of the skipped callback stage
+
+        Returns:
+            None
+        """
+        self._get_stats(callback, stage_name)['skipped'] += 1
+
+    def record_step_end(self, step_end_time):
+        """Record the end of the training step to track the average step time
+
+        Args:
+            step_end_time (float): ``time.perf_counter()`` at the end of the step
+
+        Returns:
+            None
+        """
+        if self.last_step_end_time is not None:
+            step_time = step_end_time - self.last_step_end_time
+            self.mean_step_time = step_time if self.mean_step_time is None \
+                else self.ema_decay * self.mean_step_time + (1 - self.ema_decay) * step_time
+        self.last_step_end_time = step_end_time
+        self.num_steps += 1
+
+    def get_mean_cost(self, callback, stage_name):
+        """Get the average execution cost of the callback stage
+
+        Args:
+            callback (aitoolbox.torchtrain.callbacks.abstract.AbstractCallback): callback
+            stage_name (str): name of the callback stage
+
+        Returns:
+            float or None: moving average of the execution time in seconds or ``None`` if not executed yet
+        """
+        stats = self.callback_costs.get((id(callback), stage_name))
+        return stats['mean_cost'] if stats is not None else None
+
+    def get_summary(self):
+        """Summarize the cost of every callback stage
+
+        Returns:
+            dict: for each callback name the dict of its stages with the number of calls and skips, the total and
+            mean execution time in milliseconds and the execution time in milliseconds per training step
+        """
+        summary = {}
+        for stats in self.callback_costs.values():
+            stage_summary = summary.setdefault(stats['callback_name'], {}).setdefault(stats['stage'], {
+                'calls': 0, 'skipped': 0, 'total_ms': 0.
+            })
+            stage_summary['calls'] += stats['calls']
+            stage_summary['skipped'] += stats['skipped']
+            stage_summary['total_ms'] += stats['total_time'] * 1000.
+
+        for callback_summary in summary.values():
+            for stage_summary in callback_summary.values():
+                stage_summary['mean_ms'] = stage_summary['total_ms'] / stage_summary['calls'] \
+                    if stage_summary['calls'] > 0 else 0.
+                stage_summary['ms_per_step'] = stage_summary['total_ms'] / self.num_steps if self.num_steps > 0 else 0.
+        return summary
+
+    def reset(self):
+        """Reset all the tracked costs
+
+        Returns:
+            None
+        """
+        self.callback_costs = {}
+        self.num_steps = 0
+        self.mean_step_time = None
+        self.last_step_end_time = None
+
+    def _get_stats(self, callback, stage_name):
+        key = (id(callback), stage_name)
+        if key not in self.callback_costs:
+            self.callback_costs[key] = {
+                'callback_name': callback.callback_name, 'stage': stage_name,
+                'calls': 0, 'skipped': 0, 'total_time': 0., 'mean_cost': None
+            }
+        return self.callback_costs[key]
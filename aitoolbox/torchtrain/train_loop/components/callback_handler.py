@@ -1,6 +1,9 @@
+import time
+from contextlib import nullcontext
 import torch
 
 from aitoolbox.torchtrain.callbacks.abstract import AbstractCallback
+from aitoolbox.torchtrain.train_loop.components.callback_budget import CallbackCostTracker
 from aitoolbox.utils.util import is_empty_function
 
 
@@ -17,12 +20,18 @@ class CallbacksHandler:
         Thus, `CallbacksHandler` doesn't unnecessarily execute callbacks at stages they are not implemented at -
         their respective callback methods are left as ``pass`` and aren't overridden with some desired code logic.
 
+        The handler measures the execution time of every callback stage. The summary of the callback costs is
+        available via :meth:`get_callback_cost_summary`. The per-step callback stages are executed in accordance with
+        the callback's execution budget set via
+        :meth:`~aitoolbox.torchtrain.callbacks.abstract.AbstractCallback.set_execution_budget`.
+
         Args:
             train_loop_obj (aitoolbox.torchtrain.train_loop.train_loop.TrainLoop): reference to the encapsulating
                 TrainLoop
         """
         self.train_loop_obj = train_loop_obj
         self.callbacks_cache = []
+        self.cost_tracker = CallbackCostTracker()
 
         self.cbs_on_epoch_begin = []
         self.cbs_on_epoch_end = []
@@ -119,44 +128,106 @@ class CallbacksHandler:
             )
 
     def execute_epoch_begin(self):
-        for callback in self.cbs_on_epoch_begin:
-            callback.on_epoch_begin()
+        self._execute_callbacks(self.cbs_on_epoch_begin, 'on_epoch_begin')
 
     def execute_epoch_end(self):
-        for callback in self.cbs_on_epoch_end:
-            callback.on_epoch_end()
+        self._execute_callbacks(self.cbs_on_epoch_end, 'on_epoch_end')
 
     def execute_train_begin(self):
-        for callback in self.cbs_on_train_begin:
-            callback.on_train_begin()
+        self._execute_callbacks(self.cbs_on_train_begin, 'on_train_begin')
 
     def execute_train_end(self):
-        for callback in self.cbs_on_train_end:
-            callback.on_train_end()
+        self._execute_callbacks(self.cbs_on_train_end, 'on_train_end')
 
     def execute_batch_begin(self):
-        for callback in self.cbs_on_batch_begin:
-            callback.on_batch_begin()
+        self._execute_callbacks(self.cbs_on_batch_begin, 'on_batch_begin')
 
     def execute_batch_end(self):
-        for callback in self.cbs_on_batch_end:
-            callback.on_batch_end()
+        self._execute_callbacks(self.cbs_on_batch_end, 'on_batch_end')
+        self.cost_tracker.record_step_end(time.perf_counter())
 
     def execute_gradient_update(self, optimizer_idx=0):
-        for callback in self.cbs_on_after_gradient_update:
-            callback.on_after_gradient_update(optimizer_idx)
+        self._execute_callbacks(self.cbs_on_after_gradient_update, 'on_after_gradient_update', optimizer_idx)
 
     def execute_optimizer_step(self):
-        for callback in self.cbs_on_after_optimizer_step:
-            callback.on_after_optimizer_step()
+        self._execute_callbacks(self.cbs_on_after_optimizer_step, 'on_after_optimizer_step')
 
     def execute_multiprocess_start(self):
-        for callback in self.cbs_on_multiprocess_start:
-            callback.on_multiprocess_start()
+        self._execute_callbacks(self.cbs_on_multiprocess_start, 'on_multiprocess_start')
 
     def execute_after_batch_prediction(self, y_pred_batch, y_test_batch, metadata_batch, dataset_info):
-        for callback in self.cbs_on_after_batch_prediction:
-            callback.on_after_batch_prediction(y_pred_batch, y_test_batch, metadata_batch, dataset_info)
+        self._execute_callbacks(self.cbs_on_after_batch_prediction, 'on_after_batch_prediction',
+                                y_pred_batch, y_test_batch, metadata_batch, dataset_info)
+
+    def _execute_callbacks(self, callbacks, stage_name, *args):
+        """Execute the given stage method of all the callbacks registered at this stage
+
+        The execution time of each callback is recorded and the callbacks exceeding their execution budget are
+        skipped. When the TrainLoop profiler is enabled, the timings are also recorded by the profiler.
+
+        Args:
+            callbacks (list): callbacks registered at the stage
+            stage_name (str): name of the executed callback method, e.g. ``'on_batch_end'``
+            *args: arguments of the executed callback method
+
+        Returns:
+            None
+        """
+        if len(callbacks) == 0:
+            return
+
+        profiler = getattr(self.train_loop_obj, 'profiler', None)
+        profiler = profiler if profiler is not None and profiler.enabled else None
+        step_idx = getattr(self.train_loop_obj, 'total_iteration_idx', 0)
+
+        with profiler.phase(f'callbacks/{stage_name}') if profiler is not None else nullcontext():
+            for callback in callbacks:
+                execution_budget = getattr(callback, 'execution_budget', None)
+                if execution_budget is not None and not execution_budget.should_execute(
+                        stage_name, step_idx,
+                        self.cost_tracker.get_mean_cost(callback, stage_name), self.cost_tracker.mean_step_time):
+                    self.cost_tracker.record_skip(callback, stage_name)
+                    continue
+
+                if profiler is not None:
+                    profiler.synchronize()
+                start_time = time.perf_counter()
+
+                getattr(callback, stage_name)(*args)
+
+                if profiler is not None:
+                    profiler.synchronize()
+                duration = time.perf_counter() - start_time
+
+                self.cost_tracker.record(callback, stage_name, duration)
+                if profiler is not None:
+                    profiler.record_callback(callback, stage_name, duration)
+
+    def get_callback_cost_summary(self):
+        """Get the summary of the time spent executing each of the callbacks
+
+        Returns:
+            dict: for each callback name the dict of its executed stages with the number of calls and skips,
+            the total and mean execution time in milliseconds and the execution time in milliseconds per training step
+        """
+        return self.cost_tracker.get_summary()
+
+    def print_callback_cost_summary(self):
+        """Print the callback costs ordered from the most expensive callback stage
+
+        Returns:
+            None
+        """
+        stage_costs = [
+            (callback_name, stage_name, stage_summary)
+            for callback_name, callback_summary in self.get_callback_cost_summary().items()
+            for stage_name, stage_summary in callback_summary.items()
+        ]
+        print('CALLBACK COSTS')
+        for callback_name, stage_name, stage_summary in sorted(stage_costs, key=lambda el: -el[2]['total_ms']):
+            print(f'\t{callback_name} ({stage_name}): {stage_summary["ms_per_step"]:.3f} ms/step, '
+                  f'{stage_summary["mean_ms"]:.3f} ms/call, calls: {stage_summary["calls"]}, '
+                  f'skipped: {stage_summary["skipped"]}')
 
     def split_on_execution_position(self, callbacks, register_train_loop=False):
         if callbacks is not None and len(callbacks) > 0:
@@ -0,0 +1,271 @@
+import math
+import torch
+import torch.distributed as dist
+from torch.utils.data.distributed import DistributedSampler
+
+from aitoolbox.torchtrain.data.samplers import LengthBucketBatchSampler
+
+# Byte alignment of the individual tensors inside the flat gather buffer
+GATHER_ALIGNMENT = 16
+# Dtypes which can be gathered in the flat buffer. Their position is the dtype code exchanged among the processes.
+GATHER_DTYPES = (
+    torch.bool, torch.uint8, torch.int8, torch.int16, torch.int32, torch.int64,
+    torch.float16, torch.bfloat16, torch.float32, torch.float64, torch.complex64, torch.complex128
+)
+
+
+def all_gather_tensors(tensors, pad_value=0, trim_trailing_dims=True):
+    """Gather the list of tensors with possibly different shapes across the processes in a single flat collective
+
+    The shapes of the tensors are exchanged first. Every tensor is then padded to the largest shape across
+    the processes and all the tensors are packed into a single flat byte buffer which is gathered with only one
+    ``all_gather`` call. Gathered tensors are finally trimmed back to their original shapes.
+
+    All the processes have to provide the same number of tensors with matching number of dimensions and dtypes.
+    The tensors are expected to be on the device supported by the used distributed backend.
+
+    Args:
+        tensors (list): list of torch.Tensors to be gathered
+        pad_value (int or float): value used to pad the tensors
+        trim_trailing_dims (bool): if ``True``, the gathered tensors are trimmed back to their exact original shapes.
+            Otherwise, only the leading dimension is trimmed and the trailing dimensions are kept padded to
+            the largest size across the processes, which enables the direct concatenation of the gathered tensors.
+
+    Returns:
+        list: for each of the input tensors the list of corresponding tensors gathered from all the processes
+        ordered by the process rank
+    """
+    world_size = dist.get_world_size()
+    device = tensors[0].device
+
+    # Exchange the tensor shapes
+    local_shapes = torch.tensor([d for t in tensors for d in t.shape], dtype=torch.int64, device=device)
+    # Make sure the gathered shapes tensor is never empty (e.g. in the case of all 0-dim tensors)
+    local_shapes = torch.cat([torch.tensor([len(tensors)], dtype=torch.int64, device=device), local_shapes])
+    rank_shapes = [torch.zeros_like(local_shapes) for _ in range(world_size)]
+    dist.all_gather(rank_shapes, local_shapes)
+    rank_shapes = [split_shapes(shapes.tolist()[1:], tensors) for shapes in rank_shapes]
+
+    max_shapes = [
+        [max(rank_shape[i][dim] for rank_shape in rank_shapes) for dim in range(t.dim())]
+        for i, t in enumerate(tensors)
+    ]
+
+    # Pack all the padded tensors into the single flat byte buffer
+    flat_buffer = torch.cat([
+        pad_flat_bytes(pad_tensor(t, max_shape, pad_value).reshape(-1).view(torch.uint8))
+        for t, max_shape in zip(tensors, max_shapes)
+    ])
+    rank_buffers = [torch.empty_like(flat_buffer) for _ in range(world_size)]
+    dist.all_gather(rank_buffers, flat_buffer)
+
+    gathered = [[] for _ in tensors]
+    for rank_idx, rank_buffer in enumerate(rank_buffers):
+        offset = 0
+        for i, (t, max_shape) in enumerate(zip(tensors, max_shapes)):
+            num_bytes = math.prod(max_shape) * t.element_size()
+            rank_tensor = rank_buffer[offset:offset + num_bytes].view(t.dtype).reshape(max_shape)
+            offset += get_aligned_size(num_bytes)
+
+            rank_shape = rank_shapes[rank_idx][i]
+            if trim_trailing_dims:
+                rank_tensor = rank_tensor[tuple(slice(0, d) for d in rank_shape)]
+            elif len(rank_shape) > 0:
+                rank_tensor = rank_tensor[:rank_shape[0]]
+            gathered[i].append(rank_tensor)
+
+    return gathered
+
+
+def agree_on_tensor_elements(tensors, device):
+    """Agree among the processes which of the elements are gathered as tensors
+
+    Every process has to enter the same collective operations with the matching dtypes and number of dimensions.
+    Processes might however disagree on their own, e.g. when the outputs of one dataset shard are ragged or empty.
+    The element is therefore gathered as a tensor only if it is a tensor in all the processes and its dtype and number
+    of dimensions match across the processes. The decision is made with a single ``all_reduce`` call.
+
+    Args:
+        tensors (list): element tensors of the current process or ``None`` for the elements which can't be
+            represented as tensors
+        device (torch.device): device used for the collective operation
+
+    Returns:
+        list: for each of the elements the bool whether all the processes gather it as a tensor
+    """
+    local_schema = []
+    for t in tensors:
+        if t is not None and t.dtype in GATHER_DTYPES:
+            dtype_code = GATHER_DTYPES.index(t.dtype)
+            local_schema += [1, dtype_code, -dtype_code, t.dim(), -t.dim()]
+        else:
+            local_schema += [0, 0, 0, 0, 0]
+
+    # The minimum of the value and of its negation match only when the value is the same in all the processes
+    schema = torch.tensor(local_schema, dtype=torch.int64, device=device)
+    dist.all_reduce(schema, op=dist.ReduceOp.MIN)
+    schema = schema.tolist()
+
+    return [schema[i] == 1 and schema[i + 1] == -schema[i + 2] and schema[i + 3] == -schema[i + 4]
+            for i in range(0, len(schema), 5)]
+
+
+def split_shapes(flat_shapes, tensors):
+    """Split the flat list of tensor dimensions into the shapes of the individual tensors
+
+    Args:
+        flat_shapes (list): concatenated shapes of all the tensors
+        tensors (list): tensors whose number of dimensions determines the split
+
+    Returns:
+        list: list of shapes
+    """
+    shapes = []
+    offset = 0
+    for t in tensors:
+        shapes.append(flat_shapes[offset:offset + t.dim()])
+        offset += t.dim()
+    return shapes
+
+
+def pad_tensor(tensor, shape, pad_value=0):
+    """Pad the tensor at the end of each dimension to the given shape
+
+    Args:
+        tensor (torch.Tensor): tensor to be padded
+        shape (list): target shape
+        pad_value (int or float): padding value
+
+    Returns:
+        torch.Tensor: contiguous padded tensor
+    """
+    if list(tensor.shape) == list(shape):
+        return tensor.contiguous()
+
+    padded_tensor = tensor.new_full(shape, pad_value)
+    padded_tensor[tuple(slice(0, d) for d in tensor.shape)] = tensor
+    return padded_tensor
+
+
+def pad_flat_bytes(byte_tensor):
+    """Pad the flat byte tensor to the gather alignment
+
+    Args:
+        byte_tensor (torch.Tensor): 1D uint8 tensor
+
+    Returns:
+        torch.Tensor: padded 1D uint8 tensor
+    """
+    num_padding = get_aligned_size(len(byte_tensor)) - len(byte_tensor)
+    if num_padding == 0:
+        return byte_tensor
+    return torch.cat([byte_tensor, byte_tensor.new_zeros(num_padding)])
+
+
+def get_aligned_size(num_bytes):
+    """Round the number of bytes up to the gather alignment
+
+    Args:
+        num_bytes (int): number of bytes
+
+    Returns:
+        int: aligned number of bytes
+    """
+    return int(math.ceil(num_bytes / GATHER_ALIGNMENT)) * GATHER_ALIGNMENT
+
+
+def get_sample_order_index(rank_sample_indices):
+    """Get the index which restores the original dataset order of the samples gathered from all the processes
+
+    The DistributedSampler pads the dataset with the duplicated samples so that every process gets the same number of
+    samples. Duplicates are dropped and only the first occurrence of every dataset sample is kept.
+
+    Args:
+        rank_sample_indices (list): for each process the torch.Tensor of dataset indices of its samples in the order
+            in which they were processed
+
+    Returns:
+        torch.Tensor: index into the concatenation of the gathered samples which results in the deduplicated samples
+        sorted in the original dataset order
+    """
+    sample_indices = torch.cat(rank_sample_indices)
+    sorted_sample_indices, order_index = torch.sort(sample_indices, stable=True)
+
+    is_first_occurrence = torch.ones_like(sorted_sample_indices, dtype=torch.bool)
+    is_first_occurrence[1:] = sorted_sample_indices[1:] != sorted_sample_indices[:-1]
+
+    return order_index[is_first_occurrence]
+
+
+def get_shard_sampler(data_loader):
+    """Get the sampler which shards the dataset of the data loader among the distributed processes
+
+    Args:
+        data_loader (torch.utils.data.DataLoader): data loader of the local dataset shard
+
+    Returns:
+        torch.utils.data.distributed.DistributedSampler or LengthBucketBatchSampler or None: sampler of the data
+        loader. The batch sampler is returned when the data loader uses the
+        :class:`~aitoolbox.torchtrain.data.samplers.LengthBucketBatchSampler`.
+    """
+    batch_sampler = getattr(data_loader, 'batch_sampler', None)
+    if isinstance(batch_sampler, LengthBucketBatchSampler):
+        return batch_sampler
+    return getattr(data_loader, 'sampler', None)
+
+
+def get_shard_sample_indices(sampler, num_rows):
+    """Get the dataset indices of the local dataset shard samples in the order in which they were processed
+
+    Args:
+        sampler (torch.utils.data.distributed.DistributedSampler or LengthBucketBatchSampler): distributed sampler
+            of the local dataset shard
+        num_rows (int): number of the predicted rows in the local shard
+
+    Returns:
+        torch.Tensor or None: dataset indices of the predicted rows. ``None`` when the sampler isn't distributed
+        or when the number of rows doesn't match the number of the shard samples (e.g. the per-batch outputs or
+        the dropped last batch), in which case the rows can't be matched to the dataset samples.
+    """
+    if isinstance(sampler, DistributedSampler):
+        sample_indices = torch.tensor(list(iter(sampler)), dtype=torch.int64)
+        return sample_indices if num_rows == len(sample_indices) else None
+    elif isinstance(sampler, LengthBucketBatchSampler) and sampler.num_replicas is not None:
+        sample_indices, _ = sampler.get_sample_indices()
+        return torch.from_numpy(sample_indices) if num_rows == len(sample_indices) else None
+    return None
+
+
+def get_shard_unique_mask(sampler, num_rows):
+    """Get the mask of the local dataset shard samples which aren't the padding duplicates of the distributed sampler
+
+    The DistributedSampler pads the shuffled dataset indices at the end so that they can be evenly split among
+    the processes. The process with rank ``r`` then takes every ``num_replicas``-th index starting at ``r``. Samples at
+    the positions beyond the dataset size are the padding duplicates. The distributed
+    :class:`~aitoolbox.torchtrain.data.samplers.LengthBucketBatchSampler` instead pads with the repeated batches
+    which it marks itself.
+
+    Args:
+        sampler (torch.utils.data.distributed.DistributedSampler or LengthBucketBatchSampler): distributed sampler
+            of the local dataset shard
+        num_rows (int): number of the predicted rows in the local shard
+
+    Returns:
+        torch.Tensor or None: boolean mask of the unique rows. ``None`` when there is no padding or when the rows
+        don't correspond to the dataset samples.
+    """
+    if isinstance(sampler, DistributedSampler):
+        if sampler.drop_last or num_rows != sampler.num_samples:
+            return None
+
+        sample_positions = sampler.rank + torch.arange(num_rows) * sampler.num_replicas
+        unique_mask = sample_positions < len(sampler.dataset)
+    elif isinstance(sampler, LengthBucketBatchSampler) and sampler.num_replicas is not None:
+        _, padding_mask = sampler.get_sample_indices()
+        if num_rows != len(padding_mask):
+            return None
+        unique_mask = torch.from_numpy(~padding_mask)
+    else:
+        return None
+
+    return None if bool(unique_mask.all()) else unique_mask
@@ -1,10 +1,17 @@
 import numpy as np
 import torch
 import torch.distributed as dist
-from torch.utils.data import DataLoader
 from torch.utils.data.distributed import DistributedSampler
 
 from aitoolbox.torchtrain.callbacks.ddp import DistributedSamplerSetEpoch
+from aitoolbox.torchtrain.data.samplers import LengthBucketBatchSampler
+from aitoolbox.torchtrain.train_loop.components.ddp_gather import (
+    all_gather_tensors, agree_on_tensor_elements, get_sample_order_index, get_shard_sample_indices,
+    get_shard_unique_mask
+)
+from aitoolbox.torchtrain.train_loop.components.loader_builder import (
+    get_data_loader_args, build_data_loader, describe_data_loader, DataLoaderAutoTuner
+)
 
 
 class DDPHandler:
@@ -16,6 +23,7 @@ class DDPHandler:
                 TrainLoop
         """
         self.train_loop_obj = train_loop_obj
+        self.loader_configs = {}
 
         from torch.utils.data import SequentialSampler, RandomSampler
         if (self.train_loop_obj.train_loader is not None and
@@ -28,75 +36,115 @@ class DDPHandler:
                   'DDP required DistributedSampler only supports sequential data reading or randomly shuffled '
                   'data reading.')
 
-    def add_distributed_samplers(self, world_size, rank):
+    def add_distributed_samplers(self, world_size, rank, loader_tuner=None, num_local_processes=None, on_gpu=True):
         """Add Distributed Samplers needed for DDP to the normal single process DataLoader provided to the TrainLoop
 
+        All the performance settings of the original data loaders are preserved in the rebuilt data loaders.
+        Optionally, the number of workers, their prefetch depth and the memory pinning are instead selected for
+        each process by the provided loader tuner. The resulting data loader configurations are stored in
+        the ``loader_configs`` and in the training history metadata.
+
         Args:
             world_size (int): world size of for the distributed training
             rank (int): rank of the current process
+            loader_tuner (DataLoaderAutoTuner or None): optional tuner selecting the per-process data loader
+                performance settings
+            num_local_processes (int or None): number of training processes on the current node used by
+                the loader tuner. If not provided, all the processes are assumed to run on the same node.
+            on_gpu (bool): if the DDP training is executed on the GPU or on the CPU
         """
         from torch.utils.data import RandomSampler
         train_sampler = val_sampler = test_sampler = None
 
+        loader_settings = None
+        if loader_tuner is not None:
+            if not isinstance(loader_tuner, DataLoaderAutoTuner):
+                raise TypeError('Provided loader_tuner is not inherited from DataLoaderAutoTuner')
+            loader_settings = loader_tuner.get_loader_settings(
+                num_local_processes if num_local_processes is not None else world_size, on_gpu
+            )
+
         if self.train_loop_obj.train_loader is not None:
             self.train_loop_obj.train_loader, train_sampler = \
                 self.build_loader_sampler(
                     self.train_loop_obj.train_loader,
                     shuffle=isinstance(self.train_loop_obj.train_loader.sampler, RandomSampler),
-                    world_size=world_size, rank=rank
+                    world_size=world_size, rank=rank, loader_settings=loader_settings
                 )
+            self.loader_configs['train'] = describe_data_loader(self.train_loop_obj.train_loader)
 
         if self.train_loop_obj.validation_loader is not None:
             self.train_loop_obj.validation_loader, val_sampler = \
                 self.build_loader_sampler(
                     self.train_loop_obj.validation_loader,
                     shuffle=isinstance(self.train_loop_obj.validation_loader.sampler, RandomSampler),
-                    world_size=world_size, rank=rank
+                    world_size=world_size, rank=rank, loader_settings=loader_settings
                 )
+            self.loader_configs['validation'] = describe_data_loader(self.train_loop_obj.validation_loader)
 
         if self.train_loop_obj.test_loader is not None:
             self.train_loop_obj.test_loader, test_sampler = \
                 self.build_loader_sampler(
                     self.train_loop_obj.test_loader,
                     shuffle=isinstance(self.train_loop_obj.test_loader.sampler, RandomSampler),
-                    world_size=world_size, rank=rank
+                    world_size=world_size, rank=rank, loader_settings=loader_settings
                 )
+            self.loader_configs['test'] = describe_data_loader(self.train_loop_obj.test_loader)
 
         self.train_loop_obj.callbacks_handler.register_callbacks([
             DistributedSamplerSetEpoch(train_sampler, val_sampler, test_sampler)
         ])
 
+        self.train_loop_obj.train_history.insert_metadata('ddp_data_loaders', self.loader_configs)
+        if loader_tuner is not None and rank == 0:
+            self.print_loader_configs()
+
+    def print_loader_configs(self):
+        """Print the performance settings of the data loaders rebuilt for the distributed training
+
+        Returns:
+            None
+        """
+        print('DDP data loader configuration per process:')
+        for loader_name, loader_config in self.loader_configs.items():
+            config_str = ', '.join(f'{setting_name}={setting}' for setting_name, setting in loader_config.items())
+            print(f'\t{loader_name}: {config_str}')
+
     @staticmethod
-    def build_loader_sampler(data_loader, shuffle, world_size, rank):
+    def build_loader_sampler(data_loader, shuffle, world_size, rank, loader_settings=None):
         """Replicate given data loader with added distributed sampler
 
+        All the original data loader settings, including the ``persistent_workers``, ``prefetch_factor``,
+        ``generator`` and ``multiprocessing_context``, are carried over to the new data loader.
+        When the data loader uses the
+        :class:`~aitoolbox.torchtrain.data.samplers.LengthBucketBatchSampler`, its distributed copy is used instead
+        of the DistributedSampler.
+
         Args:
             data_loader (torch.utils.data.DataLoader): original single process data loader without
                 the distributed sampler
             shuffle (bool): should the added sampler be returning examples in the shuffled order
             world_size (int): world size of for the distributed training
             rank (int): rank of the current process
+            loader_settings (dict or None): data loader settings overriding the ones of the original data loader
 
         Returns:
             DataLoader, DistributedSampler: new data loader with the sampler, reference to the distributed sampler
                 included in the new data loader
         """
-        data_loader_args = {
-            'dataset': data_loader.dataset,
-            'batch_size': data_loader.batch_size,
-            'shuffle': False,
-            'num_workers': data_loader.num_workers,
-            'collate_fn': data_loader.collate_fn,
-            'pin_memory': data_loader.pin_memory,
-            'drop_last': data_loader.drop_last,
-            'timeout': data_loader.timeout,
-            'worker_init_fn': data_loader.worker_init_fn
-        }
+        data_loader_args = get_data_loader_args(data_loader)
+
+        if isinstance(data_loader.batch_sampler, LengthBucketBatchSampler):
+            ddp_batch_sampler = data_loader.batch_sampler.distributed(world_size, rank)
+            for batching_arg in ['batch_size', 'shuffle', 'drop_last']:
+                del data_loader_args[batching_arg]
+            data_loader_args['batch_sampler'] = ddp_batch_sampler
+            return build_data_loader(data_loader_args, loader_settings), ddp_batch_sampler
 
         ddp_sampler = DistributedSampler(dataset=data_loader.dataset, shuffle=shuffle,
                                          num_replicas=world_size, rank=rank)
         data_loader_args['sampler'] = ddp_sampler
-        data_loader_sampler = DataLoader(**data_loader_args)
+        data_loader_sampler = build_data_loader(data_loader_args, loader_settings)
         return data_loader_sampler, ddp_sampler
 
     def mp_sync(self, data, double_precision=False, concat_mp_data=True, return_tensor=True):
@@ -134,23 +182,25 @@ class DDPHandler:
                 data = data.double()
 
         data_tensor_wrap = data.to(self.train_loop_obj.device)
-        mp_data = [torch.zeros_like(data_tensor_wrap) for _ in range(dist.get_world_size())]
-        dist.all_gather(mp_data, data_tensor_wrap)
-        
+        mp_data = all_gather_tensors([data_tensor_wrap], trim_trailing_dims=not concat_mp_data)[0]
+
         if concat_mp_data:
             mp_data = torch.cat(mp_data)
         # at this point all the data in mp_data still on the GPUs, optionally move back to CPU
         if input_data_device == 'cpu':
-            mp_data = mp_data.cpu()
+            mp_data = mp_data.cpu() if concat_mp_data else [d.cpu() for d in mp_data]
         if not return_tensor:
-            mp_data = mp_data.cpu().numpy() if is_input_np_array else mp_data.tolist()
+            if concat_mp_data:
+                mp_data = mp_data.cpu().numpy() if is_input_np_array else mp_data.tolist()
+            else:
+                mp_data = [d.cpu().numpy() if is_input_np_array else d.tolist() for d in mp_data]
 
         return mp_data
 
     def mp_sync_dict(self, dict_data):
         """Multiprocess sync of a dict
 
-        Convenience wrapper around the ``mp_sync()`` for the specific case of dict syncing.
+        All the dict values are synced together in a single collective operation.
 
         Args:
             dict_data (dict): dict to be synchronized across the processes
@@ -158,4 +208,222 @@ class DDPHandler:
         Returns:
             dict: synchronized dict of tensors with combined values gathered from all the active processes
         """
-        return {k: self.mp_sync(data) for k, data in dict_data.items()}
+        if len(dict_data) == 0:
+            return {}
+
+        keys = list(dict_data.keys())
+        tensors = [
+            (data if isinstance(data, torch.Tensor) else torch.tensor(data)).to(self.train_loop_obj.device)
+            for data in dict_data.values()
+        ]
+        gathered = all_gather_tensors(tensors, trim_trailing_dims=False)
+
+        return {
+            k: torch.cat(rank_data).to(data.device if isinstance(data, torch.Tensor) else 'cpu')
+            for k, data, rank_data in zip(keys, dict_data.values(), gathered)
+        }
+
+    def mp_sum_dict(self, dict_data):
+        """Multiprocess sum of a dict of numbers and arrays
+
+        Used to reduce the sufficient statistics of the metrics evaluated on the local data shards. All the values are
+        summed up in double precision in a single ``all_reduce`` collective. All the processes have to provide
+        the same keys with values of matching shapes.
+
+        Args:
+            dict_data (dict): dict of numbers or numpy arrays to be summed up across the processes
+
+        Returns:
+            dict: dict of summed values as floats or numpy arrays
+        """
+        keys = sorted(dict_data.keys())
+        values = [np.asarray(dict_data[k], dtype=np.float64) for k in keys]
+
+        flat_values = torch.from_numpy(np.concatenate([v.reshape(-1) for v in values] + [np.zeros(0)]))
+        flat_values = flat_values.to(self.train_loop_obj.device)
+        dist.all_reduce(flat_values, op=dist.ReduceOp.SUM)
+        flat_values = flat_values.cpu().numpy()
+
+        summed_dict = {}
+        offset = 0
+        for k, v in zip(keys, values):
+            summed_value = flat_values[offset:offset + v.size].reshape(v.shape)
+            summed_dict[k] = float(summed_value) if v.ndim == 0 else summed_value
+            offset += v.size
+        return summed_dict
+
+    def mp_sync_predictions(self, y_pred, y_test, metadata, sampler=None):
+        """Multiprocess sync of the predictions made on the distributed dataset
+
+        Predictions, targets and all the metadata elements are synced together in a single collective operation.
+        The outputs can differ in size across the processes (e.g. due to the uneven last dataset shard or due to the
+        variable length sequence outputs). In the latter case, the gathered outputs are padded with zeros to the longest
+        sequence before the concatenation.
+
+        When the ``sampler`` is provided, the duplicate samples which the DistributedSampler or the distributed
+        LengthBucketBatchSampler add to even out the dataset shards are dropped and the predictions are returned
+        in the original dataset order. This is only possible when the model outputs one prediction row per dataset
+        sample. Otherwise, the gathered predictions are just concatenated in the order of the process ranks.
+
+        All the processes first agree which elements are gathered as tensors and whether the sample order is restored.
+        Elements which can't be gathered as tensors in any of the processes are gathered as objects by all of them.
+
+        Args:
+            y_pred (torch.Tensor): predictions made in the current process
+            y_test (torch.Tensor): targets of the current process
+            metadata (dict): metadata of the current process. Values can be torch.Tensors, numpy arrays or lists.
+            sampler (torch.utils.data.distributed.DistributedSampler or LengthBucketBatchSampler or None):
+                distributed sampler used to shard the dataset among the processes
+
+        Returns:
+            (torch.Tensor, torch.Tensor, dict): y_pred, y_true, metadata synced across all the active processes
+        """
+        device = self.train_loop_obj.device
+        elements = {'y_pred': y_pred, 'y_test': y_test, **{('meta', k): v for k, v in metadata.items()}}
+
+        local_tensors = {el_name: to_gather_tensor(el_data) for el_name, el_data in elements.items()}
+        num_rows = get_num_rows(y_pred)
+        sample_indices = get_shard_sample_indices(sampler, num_rows) if num_rows is not None else None
+
+        *is_tensor_element, use_sample_order = agree_on_tensor_elements(
+            list(local_tensors.values()) + [sample_indices], device
+        )
+        tensor_names = [el_name for el_name, is_tensor in zip(elements, is_tensor_element) if is_tensor]
+        object_elements = {el_name: el_data.cpu() if isinstance(el_data, torch.Tensor) else el_data
+                           for el_name, el_data in elements.items() if el_name not in tensor_names}
+
+        tensors = [local_tensors[el_name].to(device) for el_name in tensor_names]
+        if use_sample_order:
+            tensors.append(sample_indices.to(device))
+
+        gathered = all_gather_tensors(tensors, trim_trailing_dims=False) if len(tensors) > 0 else []
+        gathered_elements = dict(zip(tensor_names, gathered))
+
+        if len(object_elements) > 0:
+            rank_objects = [None] * dist.get_world_size()
+            dist.all_gather_object(rank_objects, object_elements)
+            for el_name in object_elements:
+                gathered_elements[el_name] = [rank_obj[el_name] for rank_obj in rank_objects]
+
+        rank_num_rows = None
+        order_index = None
+        if use_sample_order:
+            rank_num_rows = [len(rank_indices) for rank_indices in gathered[-1]]
+            order_index = get_sample_order_index(gathered[-1])
+
+        synced_elements = {}
+        for el_name, el_data in elements.items():
+            rank_data = gathered_elements[el_name]
+            # Only the elements with one row per dataset sample can be reordered
+            el_order_index = order_index if [get_num_rows(d) for d in rank_data] == rank_num_rows else None
+
+            combined = concat_rank_tensors(rank_data)
+            if combined is not None:
+                if el_order_index is not None:
+                    combined = combined[el_order_index.to(combined.device)]
+
+                if isinstance(el_data, torch.Tensor):
+                    combined = combined.to(el_data.device)
+                elif isinstance(el_data, np.ndarray):
+                    combined = combined.cpu().numpy()
+                else:
+                    combined = combined.cpu().tolist()
+            else:
+                combined = [el for d in rank_data for el in d]
+                if el_order_index is not None:
+                    combined = [combined[idx] for idx in el_order_index.tolist()]
+
+            synced_elements[el_name] = combined
+
+        metadata_synced = {k: synced_elements[('meta', k)] for k in metadata}
+        return synced_elements['y_pred'], synced_elements['y_test'], metadata_synced
+
+    @staticmethod
+    def drop_padded_samples(y_pred, y_test, metadata, sampler=None):
+        """Drop the duplicate samples which the distributed sampler added to the local dataset shard predictions
+
+        Without the duplicates, the dataset shards of all the processes don't overlap which is required for
+        the sharded metric evaluation. Elements which don't have one row per dataset sample are left as they are.
+
+        Args:
+            y_pred (torch.Tensor): predictions made in the current process
+            y_test (torch.Tensor): targets of the current process
+            metadata (dict): metadata of the current process. Values can be torch.Tensors, numpy arrays or lists.
+            sampler (torch.utils.data.distributed.DistributedSampler or LengthBucketBatchSampler or None):
+                distributed sampler used to shard the dataset among the processes
+
+        Returns:
+            (torch.Tensor, torch.Tensor, dict): y_pred, y_true, metadata of the local dataset shard
+        """
+        num_rows = get_num_rows(y_pred)
+        if num_rows is None:
+            return y_pred, y_test, metadata
+
+        unique_mask = get_shard_unique_mask(sampler, num_rows)
+        if unique_mask is None:
+            return y_pred, y_test, metadata
+
+        def apply_mask(data):
+            if get_num_rows(data) != num_rows:
+                return data
+            elif isinstance(data, torch.Tensor):
+                return data[unique_mask.to(data.device)]
+            elif isinstance(data, np.ndarray):
+                return data[unique_mask.numpy()]
+            return [el for el, is_unique in zip(data, unique_mask.tolist()) if is_unique]
+
+        return apply_mask(y_pred), apply_mask(y_test), {k: apply_mask(v) for k, v in metadata.items()}
+
+
+def to_gather_tensor(data):
+    """Represent the data as the tensor which can be gathered across the processes
+
+    Args:
+        data (torch.Tensor or numpy.ndarray or list): data
+
+    Returns:
+        torch.Tensor or None: data tensor or ``None`` if the data can't be represented as a tensor
+        (e.g. ragged lists or strings)
+    """
+    if isinstance(data, torch.Tensor):
+        return data
+    try:
+        if isinstance(data, np.ndarray):
+            return torch.from_numpy(data) if data.dtype != object else None
+        return torch.tensor(data)
+    except (TypeError, ValueError, RuntimeError):
+        return None
+
+
+def concat_rank_tensors(rank_data):
+    """Concatenate the tensors gathered from all the processes
+
+    Args:
+        rank_data (list): data gathered from each of the processes
+
+    Returns:
+        torch.Tensor or None: concatenated tensor or ``None`` if the gathered data aren't the tensors which can be
+        concatenated
+    """
+    if not all(isinstance(d, torch.Tensor) for d in rank_data):
+        return None
+    try:
+        return torch.cat(rank_data) if rank_data[0].dim() > 0 else torch.stack(rank_data)
+    except RuntimeError:
+        return None
+
+
+def get_num_rows(data):
+    """Get the size of the leading dimension of the data
+
+    Args:
+        data (torch.Tensor or numpy.ndarray or list): data
+
+    Returns:
+        int or None: number of rows or ``None`` if the data has no leading dimension
+    """
+    if isinstance(data, (torch.Tensor, np.ndarray)):
+        return len(data) if data.ndim > 0 else None
+    elif isinstance(data, list):
+        return len(data)
+    return None
@@ -0,0 +1,163 @@
+import queue
+import threading
+from collections import deque
+import torch
+
+
+class DevicePrefetchLoader:
+    def __init__(self, data_loader, device, num_prefetch=2, pin_memory=True, use_thread=None):
+        """Data loader wrapper prefetching the next batches onto the target device ahead of the training step
+
+        Normally, the batch is moved to the device inside the model's ``get_loss()`` or ``get_predictions()`` which
+        serializes the host to device copy with the computation. Instead, the wrapper issues the copies of the next
+        ``num_prefetch`` batches ahead of time so that the transfer overlaps with the computation of the current
+        batch. The model then receives the batches with tensors already resident on the device and the ``.to(device)``
+        calls inside the model become no-ops.
+
+        On the CUDA device the copies are issued on the side CUDA stream from the (optionally) pinned memory.
+        On other devices the batches are loaded and moved to the device by the background thread.
+
+        Args:
+            data_loader (torch.utils.data.DataLoader or collections.abc.Iterable): wrapped data loader
+            device (torch.device): target device onto which the batches are prefetched
+            num_prefetch (int): number of batches prefetched ahead of the one currently being used
+            pin_memory (bool): pin the CPU tensors before the copy to the CUDA device if the data loader didn't already
+                produce the pinned batches. Only the copies from the pinned memory are asynchronous.
+            use_thread (bool or None): prefetch via the background thread instead of the side CUDA stream.
+                If left to ``None``, the thread is used for all the non-CUDA devices.
+        """
+        if num_prefetch < 1:
+            raise ValueError(f'num_prefetch has to be at least 1. Provided: {num_prefetch}')
+
+        self.data_loader = data_loader
+        self.device = torch.device(device)
+        self.num_prefetch = num_prefetch
+        self.pin_memory = pin_memory
+        self.use_thread = use_thread if use_thread is not None else self.device.type != 'cuda'
+
+    def __len__(self):
+        return len(self.data_loader)
+
+    def __getattr__(self, item):
+        # Only called when the attribute isn't found on the wrapper itself, e.g. for the dataset or the batch_size
+        if item == 'data_loader':
+            raise AttributeError(item)
+        return getattr(self.data_loader, item)
+
+    def __iter__(self):
+        if self.use_thread:
+            return self._iter_thread()
+        else:
+            return self._iter_cuda_stream()
+
+    def _iter_cuda_stream(self):
+        stream = torch.cuda.Stream(device=self.device)
+        prefetched_batches = deque()
+
+        for batch_data in self.data_loader:
+            with torch.cuda.stream(stream):
+                prefetched_batches.append(
+                    transfer_batch_to_device(batch_data, self.device, pin_memory=self.pin_memory, non_blocking=True)
+                )
+
+            if len(prefetched_batches) > self.num_prefetch:
+                yield self._consume_stream_batch(prefetched_batches.popleft(), stream)
+
+        while len(prefetched_batches) > 0:
+            yield self._consume_stream_batch(prefetched_batches.popleft(), stream)
+
+    def _consume_stream_batch(self, batch_data, stream):
+        torch.cuda.current_stream(self.device).wait_stream(stream)
+        # Prevent the caching allocator from reusing the batch memory while the main stream still uses it
+        apply_to_tensors(batch_data, lambda tensor: tensor.record_stream(torch.cuda.current_stream(self.device)))
+        return batch_data
+
+    def _iter_thread(self):
+        batch_queue = queue.Queue(maxsize=self.num_prefetch)
+        stop_event = threading.Event()
+        worker = threading.Thread(target=self._prefetch_loop, args=(batch_queue, stop_event),
+                                  name='DevicePrefetchLoader', daemon=True)
+        worker.start()
+
+        try:
+            while True:
+                is_error, batch_data = batch_queue.get()
+                if is_error:
+                    if batch_data is None:
+                        return
+                    raise batch_data
+                yield batch_data
+        finally:
+            # Stop the worker also when the consumer stops the iteration early
+            stop_event.set()
+            while worker.is_alive():
+                try:
+                    batch_queue.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+            worker.join()
+
+    def _prefetch_loop(self, batch_queue, stop_event):
+        def put(item):
+            while not stop_event.is_set():
+                try:
+                    batch_queue.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    pass
+            return False
+
+        try:
+            for batch_data in self.data_loader:
+                batch_data = transfer_batch_to_device(batch_data, self.device,
+                                                      pin_memory=self.pin_memory, non_blocking=False)
+                if not put((False, batch_data)):
+                    return
+        except Exception as e:
+            put((True, e))
+            return
+        put((True, None))
+
+
+def transfer_batch_to_device(batch_data, device, pin_memory=False, non_blocking=False):
+    """Move all the tensors in the (nested) batch to the device
+
+    Args:
+        batch_data: batch as produced by the data loader. Tensors can be nested inside the lists, tuples (including
+            the named tuples) and dicts. All other objects are left unchanged.
+        device (torch.device): target device
+        pin_memory (bool): pin the CPU tensors before copying them to the CUDA device
+        non_blocking (bool): copy asynchronously with respect to the host
+
+    Returns:
+        batch with the tensors moved to the device
+    """
+    pin_memory = pin_memory and device.type == 'cuda'
+
+    def to_device(tensor):
+        if pin_memory and tensor.device.type == 'cpu' and not tensor.is_pinned():
+            tensor = tensor.pin_memory()
+        return tensor.to(device, non_blocking=non_blocking)
+
+    return apply_to_tensors(batch_data, to_device)
+
+
+def apply_to_tensors(batch_data, fn):
+    """Apply the function to all the tensors in the (nested) batch
+
+    Args:
+        batch_data: batch as produced by the data loader
+        fn (callable): function applied to each tensor
+
+    Returns:
+        batch of the same structure with the function outputs in place of the tensors
+    """
+    if isinstance(batch_data, torch.Tensor):
+        return fn(batch_data)
+    if isinstance(batch_data, dict):
+        return {k: apply_to_tensors(v, fn) for k, v in batch_data.items()}
+    if isinstance(batch_data, tuple) and hasattr(batch_data, '_fields'):
+        return type(batch_data)(*[apply_to_tensors(el, fn) for el in batch_data])
+    if isinstance(batch_data, (list, tuple)):
+        return type(batch_data)(apply_to_tensors(el, fn) for el in batch_data)
+    return batch_data
@@ -0,0 +1,150 @@
+import os
+import math
+from torch.utils.data import DataLoader
+
+# DataLoader settings which only apply when the batches are loaded by the worker processes
+MULTIPROCESSING_SETTINGS = ('multiprocessing_context', 'prefetch_factor', 'persistent_workers')
+# DataLoader settings reported when describing the data loader configuration
+REPORTED_SETTINGS = ('batch_size', 'num_workers', 'prefetch_factor', 'persistent_workers', 'pin_memory',
+                     'multiprocessing_context')
+
+
+def get_data_loader_args(data_loader):
+    """Get the DataLoader constructor arguments needed to replicate the given data loader
+
+    All the performance related settings (worker processes, their persistence and prefetch depth, memory pinning,
+    multiprocessing context and the random generator) are copied so that the replicated data loader behaves the same
+    as the original one. The sampler is left out as it is expected to be replaced.
+
+    Args:
+        data_loader (torch.utils.data.DataLoader): original data loader
+
+    Returns:
+        dict: DataLoader constructor arguments
+    """
+    data_loader_args = {
+        'dataset': data_loader.dataset,
+        'batch_size': data_loader.batch_size,
+        'shuffle': False,
+        'num_workers': data_loader.num_workers,
+        'collate_fn': data_loader.collate_fn,
+        'pin_memory': data_loader.pin_memory,
+        'drop_last': data_loader.drop_last,
+        'timeout': data_loader.timeout,
+        'worker_init_fn': data_loader.worker_init_fn,
+        'multiprocessing_context': data_loader.multiprocessing_context,
+        'generator': data_loader.generator,
+        'prefetch_factor': data_loader.prefetch_factor,
+        'persistent_workers': data_loader.persistent_workers
+    }
+    # Settings only available in the more recent PyTorch versions
+    for optional_arg in ['pin_memory_device', 'in_order']:
+        if hasattr(data_loader, optional_arg):
+            data_loader_args[optional_arg] = getattr(data_loader, optional_arg)
+
+    return data_loader_args
+
+
+def build_data_loader(data_loader_args, loader_settings=None):
+    """Build the DataLoader from the constructor arguments with the optionally overridden settings
+
+    The settings which the DataLoader only accepts when using the worker processes are dropped when the data is
+    loaded in the main process.
+
+    Args:
+        data_loader_args (dict): DataLoader constructor arguments
+        loader_settings (dict or None): settings overriding the constructor arguments, e.g. the auto-tuned
+            ``num_workers``
+
+    Returns:
+        torch.utils.data.DataLoader: new data loader
+    """
+    data_loader_args = {**data_loader_args, **(loader_settings if loader_settings is not None else {})}
+
+    if data_loader_args['num_workers'] == 0:
+        for mp_setting in MULTIPROCESSING_SETTINGS:
+            data_loader_args.pop(mp_setting, None)
+
+    return DataLoader(**data_loader_args)
+
+
+def describe_data_loader(data_loader):
+    """Summarize the performance related settings of the data loader
+
+    Args:
+        data_loader (torch.utils.data.DataLoader): data loader
+
+    Returns:
+        dict: data loader settings
+    """
+    description = {}
+    for setting_name in REPORTED_SETTINGS:
+        setting = getattr(data_loader, setting_name, None)
+        if setting_name == 'multiprocessing_context' and setting is not None:
+            setting = setting.get_start_method()
+        description[setting_name] = setting
+    return description
+
+
+class DataLoaderAutoTuner:
+    def __init__(self, max_workers_per_process=8, reserved_cpus_per_process=1, target_prefetch_batches=8,
+                 cpu_count=None):
+        """Per-process DataLoader performance settings selection based on the available CPUs
+
+        The CPUs available on the node are split evenly between the training processes running on the node. Each
+        process keeps ``reserved_cpus_per_process`` CPUs for its own training loop and uses the rest for the data
+        loading worker processes. The prefetch depth of each worker is selected so that together the workers keep
+        around ``target_prefetch_batches`` batches ready in advance. Workers are kept alive between the epochs and
+        the batches are loaded into the pinned memory when training on the GPU.
+
+        Args:
+            max_workers_per_process (int): maximum number of data loading workers per training process
+            reserved_cpus_per_process (int): number of CPUs reserved for the training process itself
+            target_prefetch_batches (int): targeted total number of prefetched batches across all the workers of
+                the training process
+            cpu_count (int or None): number of CPUs available on the node. If not provided, the number of CPUs
+                the current process is allowed to run on is used.
+        """
+        if max_workers_per_process < 0:
+            raise ValueError(f'max_workers_per_process has to be non-negative. Provided: {max_workers_per_process}')
+        if target_prefetch_batches < 1:
+            raise ValueError(f'target_prefetch_batches has to be at least 1. Provided: {target_prefetch_batches}')
+
+        self.max_workers_per_process = max_workers_per_process
+        self.reserved_cpus_per_process = reserved_cpus_per_process
+        self.target_prefetch_batches = target_prefetch_batches
+        self.cpu_count = cpu_count if cpu_count is not None else get_available_cpu_count()
+
+    def get_loader_settings(self, num_local_processes=1, on_gpu=True):
+        """Select the DataLoader performance settings for each of the training processes
+
+        Args:
+            num_local_processes (int): number of training processes running on the same node
+            on_gpu (bool): if the training is executed on the GPU
+
+        Returns:
+            dict: DataLoader settings to be used in each of the training processes
+        """
+        cpus_per_process = self.cpu_count // max(num_local_processes, 1)
+        num_workers = min(self.max_workers_per_process, max(cpus_per_process - self.reserved_cpus_per_process, 0))
+
+        loader_settings = {
+            'num_workers': num_workers,
+            'pin_memory': on_gpu
+        }
+        if num_workers > 0:
+            loader_settings['prefetch_factor'] = max(2, int(math.ceil(self.target_prefetch_batches / num_workers)))
+            loader_settings['persistent_workers'] = True
+
+        return loader_settings
+
+
+def get_available_cpu_count():
+    """Get the number of CPUs the current process is allowed to run on
+
+    Returns:
+        int: number of available CPUs
+    """
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
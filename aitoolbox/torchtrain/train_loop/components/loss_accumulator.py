@@ -0,0 +1,107 @@
+import torch
+
+from aitoolbox.torchtrain.multi_loss_optim import MultiLoss
+
+
+class LossAccumulator:
+    def __init__(self):
+        """Streaming accumulator of the batch losses calculated during the training epoch
+
+        Instead of keeping the list of all the batch losses, only the running sum and the batch count are tracked.
+        The running sum is kept on the same device as the provided losses (e.g. a GPU), so accumulating a new batch
+        loss doesn't require any device sync. The current mean loss is available in O(1) at any point of the epoch.
+
+        In the case of multiple losses wrapped in :class:`~aitoolbox.torchtrain.multi_loss_optim.MultiLoss`,
+        the running sum is tracked separately for each of the losses.
+        """
+        self.loss_sum = None
+        self.last_loss = None
+        self.loss_names = None
+        self.num_batches = 0
+
+    def append(self, loss_batch):
+        """Add new batch loss into the accumulator
+
+        Args:
+            loss_batch (torch.Tensor or MultiLoss): detached loss calculated on the current batch
+
+        Returns:
+            None
+        """
+        if isinstance(loss_batch, MultiLoss):
+            if self.loss_names is None:
+                self.loss_names = sorted(loss_batch.keys())
+            loss_values = torch.stack([loss_batch[loss_name] for loss_name in self.loss_names])
+        else:
+            loss_values = loss_batch
+
+        # Accumulate in double precision on the original device (e.g. GPU)
+        loss_values = loss_values.double()
+
+        if self.loss_sum is None:
+            self.loss_sum = loss_values.clone()
+        else:
+            self.loss_sum += loss_values
+
+        self.last_loss = loss_values
+        self.num_batches += 1
+
+    def get_mean_loss(self, ddp_handler=None):
+        """Get the mean of all the batch losses accumulated so far
+
+        Args:
+            ddp_handler (aitoolbox.torchtrain.train_loop.components.ddp_handler.DDPHandler or None): when provided,
+                the accumulated loss sums and batch counts are synced across all the DDP processes before calculating
+                the mean. Otherwise, only the losses accumulated in the current process are considered.
+
+        Returns:
+            torch.DoubleTensor or MultiLoss: in the case of single loss torch Tensor is returned, otherwise
+            the MultiLoss with the mean of each of the losses is returned. The returned loss tensors are left on
+            the original device.
+        """
+        if self.num_batches == 0:
+            raise ValueError('No batch losses have been accumulated yet')
+
+        if ddp_handler is not None:
+            loss_stats = torch.cat([
+                self.loss_sum.reshape(-1),
+                torch.tensor([self.num_batches], dtype=torch.float64, device=self.loss_sum.device)
+            ])
+            # Sync [loss_sum, num_batches] from all the processes and add them together
+            loss_stats = ddp_handler.mp_sync(loss_stats.unsqueeze(0)).sum(dim=0)
+            loss_avg = loss_stats[:-1].reshape(self.loss_sum.shape) / loss_stats[-1]
+        else:
+            loss_avg = self.loss_sum / self.num_batches
+
+        return self._format_loss(loss_avg)
+
+    def get_last_loss(self):
+        """Get the last accumulated batch loss
+
+        Returns:
+            torch.DoubleTensor or MultiLoss: loss of the last batch added into the accumulator
+        """
+        if self.last_loss is None:
+            raise ValueError('No batch losses have been accumulated yet')
+
+        return self._format_loss(self.last_loss)
+
+    def reset(self):
+        """Reset the accumulator before the start of the new epoch
+
+        Returns:
+            None
+        """
+        self.loss_sum = None
+        self.last_loss = None
+        self.loss_names = None
+        self.num_batches = 0
+
+    def _format_loss(self, loss_values):
+        if self.loss_names is None:
+            return loss_values
+        else:
+            return MultiLoss(dict(zip(self.loss_names, loss_values)))
+
+    def __len__(self):
+        return self.num_batches
@@ -0,0 +1,299 @@
+import os
+import csv
+import queue
+import threading
+from abc import ABC, abstractmethod
+import torch
+
+
+class AbstractMetricLogBackend(ABC):
+    """Destination of the metrics logged via the :class:`AsyncMetricLogger`"""
+
+    @abstractmethod
+    def log_scalars(self, metrics, step, commit=False):
+        """Log the resolved scalar metrics
+
+        Args:
+            metrics (dict): metric names and their values. Single element tensors are already resolved into floats.
+            step (int): step (e.g. iteration or epoch index) at which the metrics were logged
+            commit (bool): marks the last metrics logged at the step
+
+        Returns:
+            None
+        """
+        pass
+
+    def flush(self):
+        """Flush the logged metrics to the storage
+
+        Returns:
+            None
+        """
+        pass
+
+    def close(self):
+        """Release the backend resources at the end of logging
+
+        Returns:
+            None
+        """
+        pass
+
+
+class TensorboardLogBackend(AbstractMetricLogBackend):
+    def __init__(self, tb_writer):
+        """TensorBoard metric logging backend
+
+        The lifecycle of the SummaryWriter is left to its owner, the backend doesn't close it.
+
+        Args:
+            tb_writer (torch.utils.tensorboard.SummaryWriter): TensorBoard writer
+        """
+        self.tb_writer = tb_writer
+
+    def log_scalars(self, metrics, step, commit=False):
+        for metric_name, metric_value in metrics.items():
+            self.tb_writer.add_scalar(metric_name, metric_value, step)
+
+    def flush(self):
+        self.tb_writer.flush()
+
+
+class WandBLogBackend(AbstractMetricLogBackend):
+    """Weights And Biases metric logging backend logging into the currently active wandb run"""
+
+    def log_scalars(self, metrics, step, commit=False):
+        import wandb
+
+        wandb.run.log(metrics, step=step, commit=True if commit else None)
+
+
+class CSVLogBackend(AbstractMetricLogBackend):
+    def __init__(self, file_path):
+        """CSV file metric logging backend
+
+        Every logged metric is appended as the ``step, metric_name, value`` row.
+
+        Args:
+            file_path (str): path to the CSV file
+        """
+        self.file_path = os.path.expanduser(file_path)
+        self.file = None
+        self.writer = None
+
+    def log_scalars(self, metrics, step, commit=False):
+        if self.file is None:
+            write_header = not os.path.exists(self.file_path) or os.path.getsize(self.file_path) == 0
+            self.file = open(self.file_path, 'a', newline='')
+            self.writer = csv.writer(self.file)
+            if write_header:
+                self.writer.writerow(['step', 'metric_name', 'value'])
+
+        for metric_name, metric_value in metrics.items():
+            self.writer.writerow([step, metric_name, metric_value])
+
+    def flush(self):
+        if self.file is not None:
+            self.file.flush()
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+            self.writer = None
+
+
+class AsyncMetricLogger:
+    def __init__(self, backends=(), max_buffer_size=256, max_pending_batches=4, background=True):
+        """Metric logging sink resolving the device tensors in batches on the background thread
+
+        Converting each logged loss tensor to the python float on the training thread forces the device to host sync
+        at every training step. Instead, the sink only buffers the detached tensors. Once the buffer is full or when
+        it is flushed, the whole buffer is handed to the background worker thread which converts all the buffered
+        tensors with a single device to host transfer per device and fans out the resolved metrics to the registered
+        backends.
+
+        The TrainLoop owns a single logger shared by all the metric logging callbacks (see
+        :meth:`aitoolbox.torchtrain.train_loop.train_loop.TrainLoop.get_metric_logger`). Each callback registers its
+        own backend and logs its metrics only into that backend. This way all the callbacks share the same worker
+        thread and the tensors logged by the different callbacks are resolved together.
+
+        The memory is bounded: at most ``max_buffer_size`` logging calls are buffered and at most
+        ``max_pending_batches`` buffers wait for the worker. When the worker falls behind, logging blocks until
+        the oldest buffer is processed.
+
+        Args:
+            backends (list or tuple): metric logging backends inheriting from :class:`AbstractMetricLogBackend`
+            max_buffer_size (int): number of logging calls buffered before they are handed to the worker
+            max_pending_batches (int): maximum number of buffers waiting to be processed by the worker
+            background (bool): if ``False``, the metrics are resolved and logged on the calling thread at each
+                logging call
+        """
+        if max_buffer_size < 1:
+            raise ValueError(f'max_buffer_size has to be at least 1. Provided: {max_buffer_size}')
+        if max_pending_batches < 1:
+            raise ValueError(f'max_pending_batches has to be at least 1. Provided: {max_pending_batches}')
+
+        self.backends = []
+        for backend in backends:
+            self.add_backend(backend)
+
+        self.max_buffer_size = max_buffer_size
+        self.background = background
+
+        self.buffer = []
+        self.log_queue = queue.Queue(maxsize=max_pending_batches)
+        self.worker = None
+        self.error = None
+
+    def add_backend(self, backend):
+        """Register additional metric logging backend
+
+        Args:
+            backend (AbstractMetricLogBackend): metric logging backend
+
+        Returns:
+            None
+        """
+        if not isinstance(backend, AbstractMetricLogBackend):
+            raise TypeError(f'Backend {backend} is not inherited from the AbstractMetricLogBackend')
+        self.backends.append(backend)
+
+    def remove_backend(self, backend):
+        """Log all the metrics buffered so far, then unregister and close the backend
+
+        Args:
+            backend (AbstractMetricLogBackend): registered metric logging backend
+
+        Returns:
+            None
+        """
+        self.flush()
+        self.backends.remove(backend)
+        backend.close()
+
+    def log_scalars(self, metrics, step, commit=False, backends=None):
+        """Log the scalar metrics without forcing the device sync
+
+        Args:
+            metrics (dict): metric names and their values. Values can be the scalar tensors on any device, numbers
+                or any other values supported by the backends, which are passed to the backends unchanged.
+            step (int): step at which the metrics were logged
+            commit (bool): marks the last metrics logged at the step
+            backends (list or None): backends into which the metrics are logged. If not provided, the metrics are
+                logged into all the registered backends.
+
+        Returns:
+            None
+        """
+        metrics = {
+            metric_name: metric_value.detach() if isinstance(metric_value, torch.Tensor) else metric_value
+            for metric_name, metric_value in metrics.items()
+        }
+        self.buffer.append((metrics, step, commit, backends))
+
+        if not self.background or len(self.buffer) >= self.max_buffer_size:
+            self._submit_buffer()
+
+    def flush(self):
+        """Log all the buffered metrics, wait for the worker to process them and flush the backends
+
+        Returns:
+            None
+        """
+        self._submit_buffer()
+        if self.worker is not None:
+            self.log_queue.join()
+        self.raise_worker_error()
+
+        for backend in self.backends:
+            backend.flush()
+
+    def close(self):
+        """Flush all the buffered metrics, stop the worker thread and close the backends
+
+        Returns:
+            None
+        """
+        self.flush()
+        if self.worker is not None:
+            self.log_queue.put(None)
+            self.worker.join()
+            self.worker = None
+
+        for backend in self.backends:
+            backend.close()
+
+    def raise_worker_error(self):
+        """Re-raise the error which happened on the background thread in the training thread
+
+        Raises:
+            RuntimeError
+
+        Returns:
+            None
+        """
+        if self.error is not None:
+            error, self.error = self.error, None
+            raise RuntimeError('Metric logging on the background thread failed') from error
+
+    def _submit_buffer(self):
+        if len(self.buffer) == 0:
+            return
+
+        log_batch, self.buffer = self.buffer, []
+        if not self.background:
+            self._log_batch(log_batch)
+        else:
+            self.raise_worker_error()
+            if self.worker is None:
+                self.worker = threading.Thread(target=self._log_loop, name='AsyncMetricLogger', daemon=True)
+                self.worker.start()
+            self.log_queue.put(log_batch)
+
+    def _log_loop(self):
+        while True:
+            log_batch = self.log_queue.get()
+            try:
+                if log_batch is None:
+                    return
+                self._log_batch(log_batch)
+            except Exception as e:
+                self.error = e
+            finally:
+                self.log_queue.task_done()
+
+    def _log_batch(self, log_batch):
+        resolved_values = iter(resolve_scalar_values(
+            [metric_value for metrics, _, _, _ in log_batch for metric_value in metrics.values()]
+        ))
+        for metrics, step, commit, backends in log_batch:
+            resolved_metrics = {metric_name: next(resolved_values) for metric_name in metrics}
+            for backend in backends if backends is not None else self.backends:
+                backend.log_scalars(resolved_metrics, step, commit)
+
+
+def resolve_scalar_values(values):
+    """Convert the single element tensors into python floats
+
+    All the single element tensors on the same device are stacked and transferred to the host together. All the other
+    values (numbers, multi-element tensors or any other objects the backend knows how to log) are returned unchanged.
+
+    Args:
+        values (list): list of logged values
+
+    Returns:
+        list: logged values with the single element tensors converted to floats
+    """
+    resolved = list(values)
+    device_value_idx = {}
+    for i, value in enumerate(values):
+        if isinstance(value, torch.Tensor) and value.numel() == 1:
+            device_value_idx.setdefault(value.device, []).append(i)
+
+    for value_idx in device_value_idx.values():
+        stacked_values = torch.stack([values[i].reshape(()).to(torch.float64) for i in value_idx])
+        for i, value in zip(value_idx, stacked_values.cpu().tolist()):
+            resolved[i] = value
+
+    return resolved
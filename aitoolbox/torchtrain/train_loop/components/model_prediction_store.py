@@ -1,18 +1,282 @@
+from collections import OrderedDict
+from collections.abc import Mapping
+import os
+import re
+import shutil
+import tempfile
+import weakref
+import numpy as np
+import torch
+
+from aitoolbox.experiment.local_save.folder_create import ExperimentFolder
+
+
+class DiskPredictionStorage:
+    def __init__(self, storage_dir=None):
+        """Storage backend of the ModelPredictionStore spilling the cached predictions to the disk
+
+        Tensor and numpy array predictions are kept in the memory-mapped ``.npy`` files. Instead of the in-memory
+        arrays, the prediction store returns lazy views into these files which only load the actually accessed parts
+        of the predictions. When used together with the
+        :class:`~aitoolbox.torchtrain.train_loop.components.pred_collate_fns.PreallocatedPredictionCollator`,
+        the predictions are streamed into the files already as the batches come out of the model.
+
+        The files are deleted when the cached predictions get overwritten or when the prediction store gets purged
+        at the start of the new iteration.
+
+        Args:
+            storage_dir (str or None): folder where the prediction files are stored. If ``None``, the folder is
+                created when the first file is stored: as the ``prediction_cache`` subfolder of the experiment folder
+                when the storage belongs to the TrainLoop tracking the experiment or as a new temporary folder
+                otherwise. Such a folder created by the storage is deleted on the
+                :meth:`~aitoolbox.torchtrain.train_loop.components.model_prediction_store.DiskPredictionStorage.cleanup`
+                or when the storage gets garbage collected.
+        """
+        self.storage_dir = os.path.expanduser(storage_dir) if storage_dir is not None else None
+        if self.storage_dir is not None:
+            os.makedirs(self.storage_dir, exist_ok=True)
+        self.train_loop_obj = None
+        self.dir_finalizer = None
+
+        self.file_ctr = 0
+        # Files of each of the cached prediction entries
+        self.source_files = {}
+        # Files which were streamed into but are not yet part of the cache: {data pointer: (file path, array)}
+        # Arrays are referenced to prevent the reuse of their memory address while the file is pending.
+        self.pending_files = {}
+
+    def register_train_loop(self, train_loop_obj):
+        """Connect the storage with the TrainLoop whose predictions it stores
+
+        Args:
+            train_loop_obj (aitoolbox.torchtrain.train_loop.train_loop.TrainLoop): reference to the encapsulating
+                TrainLoop
+
+        Returns:
+            None
+        """
+        self.train_loop_obj = train_loop_obj
+
+    def get_storage_dir(self):
+        """Get the folder where the prediction files are stored and create it if it doesn't exist yet
+
+        Returns:
+            str: storage folder path
+        """
+        if self.storage_dir is None:
+            train_loop = self.train_loop_obj
+            if train_loop is not None and all(hasattr(train_loop, attr) for attr in
+                                              ['project_name', 'experiment_name', 'local_model_result_folder_path']):
+                experiment_path = ExperimentFolder.create_base_folder(train_loop.project_name,
+                                                                      train_loop.experiment_name,
+                                                                      train_loop.experiment_timestamp,
+                                                                      train_loop.local_model_result_folder_path)
+                storage_dir = os.path.join(experiment_path, 'prediction_cache')
+                os.makedirs(storage_dir, exist_ok=True)
+            else:
+                storage_dir = tempfile.mkdtemp(prefix='aitoolbox_predictions_')
+
+            self.storage_dir = storage_dir
+            self.dir_finalizer = weakref.finalize(self, shutil.rmtree, storage_dir, ignore_errors=True)
+
+        return self.storage_dir
+
+    def cleanup(self):
+        """Delete all the prediction files and the storage folder if it was created by the storage
+
+        Returns:
+            None
+        """
+        self.evict()
+        if self.dir_finalizer is not None:
+            self.dir_finalizer()
+            self.dir_finalizer = None
+            self.storage_dir = None
+
+    def create_array(self, source_name, element_name, shape, dtype):
+        """Create new memory-mapped array backed by the file in the storage folder
+
+        Args:
+            source_name (str): prediction source name (e.g. ``val_pred``)
+            element_name (str): name of the prediction element (e.g. ``y_pred``)
+            shape (tuple): shape of the array
+            dtype (numpy.dtype): data type of the array
+
+        Returns:
+            numpy.memmap: memory-mapped array
+        """
+        element_name = re.sub(r'\W', '_', str(element_name))
+        file_path = os.path.join(self.get_storage_dir(), f'{source_name}_{element_name}_{self.file_ctr}.npy')
+        self.file_ctr += 1
+
+        array = np.lib.format.open_memmap(file_path, mode='w+', dtype=dtype, shape=shape)
+        if array.size > 0:
+            self.pending_files[self._get_data_pointer(array)] = (file_path, array)
+        return array
+
+    def release_array(self, array):
+        """Delete the file of the streamed array which was created by the storage but is no longer needed
+
+        Args:
+            array (numpy.memmap or torch.Tensor): array returned by the ``create_array()`` or its torch tensor view
+
+        Returns:
+            None
+        """
+        pending_file = self.pending_files.pop(self._get_data_pointer(array), None)
+        if pending_file is not None:
+            self._delete_files([pending_file[0]])
+
+    def spill(self, source_name, predictions, entry_key=None):
+        """Move the predictions to the disk
+
+        Args:
+            source_name (str): prediction source name (e.g. ``val_pred``)
+            predictions (tuple): y_pred, y_true, metadata predictions tuple
+            entry_key (collections.abc.Hashable or None): cache entry under which the files are tracked.
+                If ``None``, the ``source_name`` is used. Files of the previous predictions under the same entry
+                are deleted.
+
+        Returns:
+            tuple: predictions where tensors and numpy arrays are replaced with the memory-mapped views
+        """
+        if not isinstance(predictions, tuple) or len(predictions) != 3:
+            return predictions
+
+        y_pred, y_test, metadata = predictions
+        source_files = []
+
+        y_pred = self._spill_element(source_name, 'y_pred', y_pred, source_files)
+        y_test = self._spill_element(source_name, 'y_test', y_test, source_files)
+        if isinstance(metadata, dict):
+            metadata = {meta_el: self._spill_element(source_name, f'meta_{meta_el}', meta_val, source_files)
+                        for meta_el, meta_val in metadata.items()}
+
+        entry_key = source_name if entry_key is None else entry_key
+        self.evict(entry_key, keep_files=source_files)
+        self.source_files[entry_key] = source_files
+
+        return y_pred, y_test, metadata
+
+    def evict(self, entry_key=None, keep_files=()):
+        """Delete the prediction files
+
+        Args:
+            entry_key (collections.abc.Hashable or None): cache entry (by default the prediction source name) whose
+                files are deleted. If ``None``, the files of all the entries together with all the pending streamed
+                files are deleted.
+            keep_files (list or tuple): files which should not be deleted
+
+        Returns:
+            None
+        """
+        if entry_key is None:
+            entry_keys = list(self.source_files.keys())
+            self.evict_pending()
+        else:
+            entry_keys = [entry_key] if entry_key in self.source_files else []
+
+        files_to_delete = []
+        for key in entry_keys:
+            files_to_delete += self.source_files.pop(key)
+
+        self._delete_files(files_to_delete, keep_files)
+
+    def evict_pending(self):
+        """Delete the streamed files which never made it into the cache
+
+        Returns:
+            None
+        """
+        self._delete_files([file_path for file_path, _ in self.pending_files.values()])
+        self.pending_files = {}
+
+    @staticmethod
+    def _delete_files(files_to_delete, keep_files=()):
+        for file_path in files_to_delete:
+            if file_path not in keep_files and os.path.exists(file_path):
+                # On POSIX systems already mapped arrays remain valid after the file is deleted
+                os.remove(file_path)
+
+    def _spill_element(self, source_name, element_name, value, source_files):
+        if not isinstance(value, (torch.Tensor, np.ndarray)) or value.ndim == 0 or 0 in value.shape:
+            return value
+
+        data_pointer = self._get_data_pointer(value)
+        if data_pointer in self.pending_files:
+            # Predictions were already streamed into the memory-mapped file
+            source_files.append(self.pending_files.pop(data_pointer)[0])
+            return value
+
+        if isinstance(value, torch.Tensor):
+            try:
+                value_np = value.detach().cpu().numpy()
+            except TypeError:
+                # dtypes not supported by numpy (e.g. bfloat16) are kept in memory
+                return value
+        else:
+            value_np = value
+
+        array = self.create_array(source_name, element_name, value_np.shape, value_np.dtype)
+        array[:] = value_np
+        array.flush()
+        source_files.append(self.pending_files.pop(self._get_data_pointer(array))[0])
+
+        return torch.from_numpy(array) if isinstance(value, torch.Tensor) else array
+
+    @staticmethod
+    def _get_data_pointer(value):
+        if isinstance(value, torch.Tensor):
+            return value.data_ptr()
+        return value.__array_interface__['data'][0]
+
+    def __getstate__(self):
+        # Only the original storage (e.g. not its copies in the spawned DDP processes) deletes the created folder
+        return {**self.__dict__, 'dir_finalizer': None}
+
 
 class ModelPredictionStore:
-    def __init__(self, auto_purge=False):
+    def __init__(self, auto_purge=False, storage=None, keep_iterations=1, max_bytes=None, state_key_fn=None):
         """Service for TrainLoop enabling the prediction caching
 
         Prediction calculation can be costly and it can have severe performance implications if the same predictions
-        would be calculated repeatedly. This store caches already made predictions in the current iteration of
-        the TrainLoop which takes the cached values if they are available instead of recalculating.
+        would be calculated repeatedly. This store caches already made predictions of the TrainLoop which takes
+        the cached values if they are available instead of recalculating.
+
+        The store is an LRU cache where the entries are keyed by the data source (e.g. validation set predictions),
+        the TrainLoop iteration and the state key provided by the ``state_key_fn`` (e.g. the model state and the batch
+        feed definition). Cache hits and misses are tracked and available via
+        :meth:`~aitoolbox.torchtrain.train_loop.components.model_prediction_store.ModelPredictionStore.get_cache_stats`.
 
         Args:
-            auto_purge (bool): should the prediction service cache be automatically purged at the end of each iteration
+            auto_purge (bool): should the cache entries of the old iterations be automatically purged when
+                the iteration moves on
+            storage (DiskPredictionStorage or None): optional storage backend spilling the cached predictions
+                to the disk. By default, the predictions are kept in memory.
+            keep_iterations (int): number of the most recent iterations whose entries are kept in the cache when
+                the ``auto_purge`` is enabled
+            max_bytes (int or None): size budget of the cache. When exceeded, the least recently used entries are
+                evicted. The most recently inserted entry is always kept, even if it alone exceeds the budget.
+                If ``None``, the size of the cache is not limited.
+            state_key_fn (callable or None): function returning the hashable key of the current model state which
+                becomes part of the cache entry key. Consequently, the predictions made with different model weights
+                are never mixed up.
         """
         self.do_auto_purge = auto_purge
+        self.storage = storage
+        self.keep_iterations = keep_iterations
+        self.max_bytes = max_bytes
+        self.state_key_fn = state_key_fn
 
-        self.prediction_store = {'iteration_idx': -1}
+        if keep_iterations < 1:
+            raise ValueError(f'keep_iterations has to be at least 1. Provided: {keep_iterations}')
+
+        self.cache = OrderedDict()
+        self.cache_bytes = {}
+        self.latest_iteration_idx = -1
+
+        self.source_stats = {}
+        self.num_evictions = 0
 
     def insert_train_predictions(self, predictions, iteration_idx, force_prediction=False):
         """Insert training dataset predictions into the cache
@@ -122,6 +386,48 @@ class ModelPredictionStore:
         """
         return self._has_data('test_pred', iteration_idx)
 
+    def insert_shard_predictions(self, source_type, predictions, iteration_idx, force_prediction=False):
+        """Insert the predictions made only on the local dataset shard of the process into the cache
+
+        Used in the DDP training for the sharded evaluation where the predictions aren't gathered from all
+        the processes.
+
+        Args:
+            source_type (str): dataset type: ``train``, ``val`` or ``test``
+            predictions (tuple): model predictions on the local dataset shard
+            iteration_idx (int): current iteration index of the TrainLoop
+            force_prediction (bool): insert the predictions even if they are available in the cache.
+                This causes the old cached predictions to be overwritten.
+
+        Returns:
+            None
+        """
+        self._insert_data(f'{source_type}_pred_shard', predictions, iteration_idx, force_prediction)
+
+    def get_shard_predictions(self, source_type, iteration_idx):
+        """Get local dataset shard predictions from the cache
+
+        Args:
+            source_type (str): dataset type: ``train``, ``val`` or ``test``
+            iteration_idx (int): current iteration index of the TrainLoop
+
+        Returns:
+            tuple: cached model predictions on the local dataset shard
+        """
+        return self._get_data(f'{source_type}_pred_shard', iteration_idx)
+
+    def has_shard_predictions(self, source_type, iteration_idx):
+        """Are there local dataset shard predictions in the cache
+
+        Args:
+            source_type (str): dataset type: ``train``, ``val`` or ``test``
+            iteration_idx (int): current iteration index of the TrainLoop
+
+        Returns:
+            bool: if predictions are in the cache
+        """
+        return self._has_data(f'{source_type}_pred_shard', iteration_idx)
+
     def insert_train_loss(self, loss, iteration_idx, force_prediction=False):
         """Insert training dataset loss into the cache
 
@@ -230,6 +536,54 @@ class ModelPredictionStore:
         """
         return self._has_data('test_loss', iteration_idx)
 
+    def insert_train_loss_and_predictions(self, loss, predictions, iteration_idx, force_prediction=False):
+        """Insert training dataset loss and predictions calculated in the same pass into the cache
+
+        Args:
+            loss (float or aitoolbox.torchtrain.multi_loss_optim.MultiLoss): model train dataset loss
+            predictions (tuple): model training dataset predictions
+            iteration_idx (int): current iteration index of the TrainLoop
+            force_prediction (bool): insert the values even if they are available in the cache.
+                This causes the old cached values to be overwritten.
+
+        Returns:
+            None
+        """
+        self._insert_data('train_loss', loss, iteration_idx, force_prediction)
+        self._insert_data('train_pred', predictions, iteration_idx, force_prediction)
+
+    def insert_val_loss_and_predictions(self, loss, predictions, iteration_idx, force_prediction=False):
+        """Insert validation dataset loss and predictions calculated in the same pass into the cache
+
+        Args:
+            loss (float or aitoolbox.torchtrain.multi_loss_optim.MultiLoss): model validation dataset loss
+            predictions (tuple): model validation dataset predictions
+            iteration_idx (int): current iteration index of the TrainLoop
+            force_prediction (bool): insert the values even if they are available in the cache.
+                This causes the old cached values to be overwritten.
+
+        Returns:
+            None
+        """
+        self._insert_data('val_loss', loss, iteration_idx, force_prediction)
+        self._insert_data('val_pred', predictions, iteration_idx, force_prediction)
+
+    def insert_test_loss_and_predictions(self, loss, predictions, iteration_idx, force_prediction=False):
+        """Insert test dataset loss and predictions calculated in the same pass into the cache
+
+        Args:
+            loss (float or aitoolbox.torchtrain.multi_loss_optim.MultiLoss): model test dataset loss
+            predictions (tuple): model test dataset predictions
+            iteration_idx (int): current iteration index of the TrainLoop
+            force_prediction (bool): insert the values even if they are available in the cache.
+                This causes the old cached values to be overwritten.
+
+        Returns:
+            None
+        """
+        self._insert_data('test_loss', loss, iteration_idx, force_prediction)
+        self._insert_data('test_pred', predictions, iteration_idx, force_prediction)
+
     def _insert_data(self, source_name, data, iteration_idx, force_prediction=False):
         """Insert a general value into the prediction / loss cache
 
@@ -244,9 +598,21 @@ class ModelPredictionStore:
             None
         """
         self.auto_purge(iteration_idx)
+        if not self.do_auto_purge:
+            # Without the auto purging the store doesn't move on to the new iterations and the data is always
+            # cached under the store's current iteration
+            iteration_idx = self.latest_iteration_idx
+        cache_key = self._get_cache_key(source_name, iteration_idx)
 
-        if not self._has_data(source_name, iteration_idx) or force_prediction:
-            self.prediction_store[source_name] = data
+        if cache_key not in self.cache or force_prediction:
+            if self.storage is not None and source_name.endswith('_pred'):
+                data = self.storage.spill(source_name, data, entry_key=cache_key)
+
+            self.cache[cache_key] = data
+            self.cache.move_to_end(cache_key)
+            self.cache_bytes[cache_key] = get_data_size(data)
+
+            self._enforce_size_limit(keep_key=cache_key)
         else:
             raise ValueError
 
@@ -260,15 +626,20 @@ class ModelPredictionStore:
         Returns:
             tuple or float or dict: cached data
         """
-        if self._has_data(source_name, iteration_idx):
-            print(f'Getting {source_name} predictions/loss from store')
-            return self.prediction_store[source_name]
+        cache_key = self._get_cache_key(source_name, iteration_idx)
+
+        if cache_key in self.cache:
+            self.cache.move_to_end(cache_key)
+            self._update_stats(source_name, 'hits')
+            return self.cache[cache_key]
         else:
             raise ValueError
 
     def _has_data(self, source_name, iteration_idx):
         """Check if data under the specified source name is currently available in the cache
 
+        Unsuccessful check is counted as the cache miss.
+
         Args:
             source_name (str): data source name
             iteration_idx (int): current iteration index of the TrainLoop
@@ -276,10 +647,15 @@ class ModelPredictionStore:
         Returns:
             bool: if the requested data is available in the cache
         """
-        return source_name in self.prediction_store and iteration_idx == self.prediction_store['iteration_idx']
+        is_cached = self._get_cache_key(source_name, iteration_idx) in self.cache
+        if not is_cached:
+            self._update_stats(source_name, 'misses')
+        return is_cached
 
     def auto_purge(self, iteration_idx):
-        """Automatically purge the current cache if the given iteration index had moved past the last cached iteration
+        """Automatically purge the cache entries of the iterations which are too far behind the given iteration index
+
+        Only the entries of the last ``keep_iterations`` iterations are kept in the cache.
 
         Args:
             iteration_idx (int): current iteration index of the TrainLoop
@@ -287,6 +663,108 @@ class ModelPredictionStore:
         Returns:
             None
         """
-        if self.do_auto_purge and iteration_idx > self.prediction_store['iteration_idx']:
-            print(f'Auto purging prediction store at iteration {iteration_idx + 1}')
-            self.prediction_store = {'iteration_idx': iteration_idx}
+        if self.do_auto_purge and iteration_idx > self.latest_iteration_idx:
+            self.latest_iteration_idx = iteration_idx
+
+            for cache_key in [k for k in self.cache if k[1] <= iteration_idx - self.keep_iterations]:
+                self._evict_entry(cache_key)
+            if self.storage is not None:
+                self.storage.evict_pending()
+
+    def reset(self):
+        """Remove all the cache entries and clean up the files of the storage backend
+
+        Returns:
+            None
+        """
+        self.cache = OrderedDict()
+        self.cache_bytes = {}
+        if self.storage is not None:
+            self.storage.cleanup()
+
+    def get_cache_stats(self):
+        """Get the cache usage statistics
+
+        Returns:
+            dict: number of the cache hits and misses (overall and for each of the data sources), number of evicted
+            entries and the current size of the cache
+        """
+        hits = sum(source_stats['hits'] for source_stats in self.source_stats.values())
+        misses = sum(source_stats['misses'] for source_stats in self.source_stats.values())
+
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': hits / (hits + misses) if hits + misses > 0 else 0.,
+            'evictions': self.num_evictions,
+            'num_entries': len(self.cache),
+            'size_bytes': sum(self.cache_bytes.values()),
+            'sources': {source_name: dict(source_stats) for source_name, source_stats in self.source_stats.items()}
+        }
+
+    def reset_cache_stats(self):
+        """Reset the cache usage statistics
+
+        Returns:
+            None
+        """
+        self.source_stats = {}
+        self.num_evictions = 0
+
+    @property
+    def prediction_store(self):
+        """Cached data of the latest iteration
+
+        Returns:
+            dict: cached data under their source names together with the ``iteration_idx``
+        """
+        state_key = self.state_key_fn() if self.state_key_fn is not None else None
+        latest_data = {source_name: data for (source_name, iteration_idx, key_state), data in self.cache.items()
+                       if iteration_idx == self.latest_iteration_idx and key_state == state_key}
+        return {'iteration_idx': self.latest_iteration_idx, **latest_data}
+
+    def _get_cache_key(self, source_name, iteration_idx):
+        return source_name, iteration_idx, self.state_key_fn() if self.state_key_fn is not None else None
+
+    def _enforce_size_limit(self, keep_key):
+        if self.max_bytes is None:
+            return
+
+        for cache_key in list(self.cache.keys()):
+            if sum(self.cache_bytes.values()) <= self.max_bytes:
+                break
+            if cache_key != keep_key:
+                self._evict_entry(cache_key)
+
+    def _evict_entry(self, cache_key):
+        del self.cache[cache_key]
+        del self.cache_bytes[cache_key]
+        self.num_evictions += 1
+
+        if self.storage is not None:
+            self.storage.evict(cache_key)
+
+    def _update_stats(self, source_name, stat_name):
+        if source_name not in self.source_stats:
+            self.source_stats[source_name] = {'hits': 0, 'misses': 0}
+        self.source_stats[source_name][stat_name] += 1
+
+
+def get_data_size(data):
+    """Get the number of bytes taken by the tensors and numpy arrays in the cached data
+
+    Args:
+        data: cached data. Tensors and numpy arrays nested inside tuples and dicts are considered.
+
+    Returns:
+        int: size in bytes
+    """
+    if isinstance(data, torch.Tensor):
+        return data.element_size() * data.nelement()
+    elif isinstance(data, np.ndarray):
+        return data.nbytes
+    elif isinstance(data, tuple):
+        return sum(get_data_size(el) for el in data)
+    elif isinstance(data, Mapping):
+        return sum(get_data_size(el) for el in data.values())
+    return 0
@@ -1,4 +1,8 @@
+import numpy as np
 import torch
+from torch.utils.data import DataLoader, IterableDataset
+
+from aitoolbox.utils import dict_util
 
 
 def append_predictions(y_batch, predictions):
@@ -55,3 +59,265 @@ def keep_list_transf(predictions):
         list: returns unaltered list of predictions
     """
     return predictions
+
+
+def get_num_dataset_examples(data_loader):
+    """Get the number of examples which the data loader will produce in a single pass over the dataset
+
+    Args:
+        data_loader (torch.utils.data.DataLoader or list): data loader
+
+    Returns:
+        int or None: number of examples or ``None`` if it can't be determined upfront
+    """
+    if isinstance(data_loader, DataLoader) and not isinstance(data_loader.dataset, IterableDataset) and \
+            data_loader.batch_size is not None:
+        try:
+            return len(data_loader.sampler)
+        except TypeError:
+            return None
+    return None
+
+
+class PredictionBuffer:
+    def __init__(self, capacity=None, pin_memory=False, concat_fn=torch_cat_transf, array_factory=None,
+                 array_release=None):
+        """Buffer collecting the batch predictions into a single preallocated array
+
+        The output buffer is allocated when the first batch arrives, based on its trailing dimensions and dtype.
+        All the subsequent batches are then written into their slice of the buffer which removes the need for
+        the final concatenation of the batches. If a batch arrives which doesn't fit the buffer (different trailing
+        shape, dtype or device) or if the capacity is not known, the buffer falls back to collecting the batches
+        in a list and concatenating them at the end with the ``concat_fn``. When fewer examples than the buffer
+        capacity are collected, the returned predictions are trimmed into the new array of the exact size so that
+        the unused part of the buffer isn't kept alive.
+
+        Args:
+            capacity (int or None): expected number of collected examples. If ``None``, the buffer isn't
+                preallocated and the batches are concatenated at the end.
+            pin_memory (bool): allocate torch tensor buffers in the pinned CPU memory and copy the batches into them
+                with the non-blocking copies
+            concat_fn (callable): function concatenating the list of batches when the buffer can't be preallocated
+            array_factory (callable or None): function with the ``(shape, dtype)`` signature returning the numpy array
+                (e.g. memory-mapped file) into which the predictions are written. The torch tensor buffers are in this
+                case created as the CPU views of the returned array.
+            array_release (callable or None): function called with the array created by the ``array_factory`` once
+                the array is replaced by the larger or the trimmed one (e.g. to delete its backing file)
+        """
+        self.capacity = capacity
+        self.pin_memory = pin_memory
+        self.concat_fn = concat_fn
+        self.array_factory = array_factory
+        self.array_release = array_release
+        # Buffer is in the host memory irrespective of the batches device
+        self.host_buffer = pin_memory or array_factory is not None
+
+        self.buffer = None
+        self.num_filled = 0
+        self.batches = None
+
+    def append(self, y_batch):
+        """Add the new batch into the buffer
+
+        Args:
+            y_batch (torch.Tensor or np.ndarray or list): batch predictions
+
+        Returns:
+            None
+        """
+        if self.batches is not None:
+            self.batches.append(y_batch)
+        elif self.buffer is None:
+            if self.capacity is not None and isinstance(y_batch, (torch.Tensor, np.ndarray)) and y_batch.ndim > 0:
+                self.buffer = self._allocate(y_batch, max(self.capacity, len(y_batch)))
+                self._write(y_batch)
+            else:
+                self.batches = [y_batch]
+        elif self._is_compatible(y_batch):
+            if self.num_filled + len(y_batch) > len(self.buffer):
+                self._grow(self.num_filled + len(y_batch))
+            self._write(y_batch)
+        else:
+            self.batches = [self.buffer[:self.num_filled], y_batch]
+            self.buffer = None
+
+    def get_predictions(self):
+        """Get all the collected predictions
+
+        Returns:
+            torch.Tensor or np.ndarray or list: combined predictions
+        """
+        if self.buffer is None:
+            return self.concat_fn(self.batches if self.batches is not None else [])
+
+        if self.pin_memory and isinstance(self.buffer, torch.Tensor) and self.buffer.is_pinned():
+            # Wait for the non-blocking device to host copies to finish
+            torch.cuda.current_stream().synchronize()
+
+        if self.num_filled < len(self.buffer):
+            self._resize(self.num_filled)
+        return self.buffer
+
+    def _allocate(self, y_batch, capacity):
+        shape = (capacity, *y_batch.shape[1:])
+
+        if self.array_factory is not None:
+            if isinstance(y_batch, np.ndarray):
+                return self.array_factory(shape, y_batch.dtype)
+            try:
+                np_dtype = torch.empty(0, dtype=y_batch.dtype).numpy().dtype
+                return torch.from_numpy(self.array_factory(shape, np_dtype))
+            except TypeError:
+                # dtypes not supported by numpy (e.g. bfloat16) are kept in memory
+                pass
+
+        if isinstance(y_batch, np.ndarray):
+            return np.empty(shape, dtype=y_batch.dtype)
+
+        if self.pin_memory:
+            return torch.empty(shape, dtype=y_batch.dtype, device='cpu', pin_memory=torch.cuda.is_available())
+        return torch.empty(shape, dtype=y_batch.dtype, device=y_batch.device)
+
+    def _write(self, y_batch):
+        batch_end = self.num_filled + len(y_batch)
+        if isinstance(self.buffer, np.ndarray):
+            self.buffer[self.num_filled:batch_end] = y_batch
+        else:
+            self.buffer[self.num_filled:batch_end].copy_(y_batch, non_blocking=self.buffer.is_pinned())
+        self.num_filled = batch_end
+
+    def _grow(self, min_capacity):
+        self._resize(max(min_capacity, int(len(self.buffer) * 1.5)))
+
+    def _resize(self, capacity):
+        new_buffer = self._allocate(self.buffer, capacity)
+        new_buffer[:self.num_filled] = self.buffer[:self.num_filled]
+        if self.array_factory is not None and self.array_release is not None:
+            self.array_release(self.buffer)
+        self.buffer = new_buffer
+
+    def _is_compatible(self, y_batch):
+        if type(y_batch) != type(self.buffer) or y_batch.ndim == 0 or \
+                y_batch.shape[1:] != self.buffer.shape[1:] or y_batch.dtype != self.buffer.dtype:
+            return False
+        return isinstance(y_batch, np.ndarray) or self.host_buffer or y_batch.device == self.buffer.device
+
+    def __len__(self):
+        if self.buffer is not None:
+            return self.num_filled
+        return sum(len(b) for b in self.batches) if self.batches is not None else 0
+
+
+class PreallocatedPredictionCollator:
+    def __init__(self, pin_memory=False):
+        """Prediction collation engine writing the batch predictions directly into the preallocated output buffers
+
+        Used by the TrainLoop instead of the ``collate_batch_pred_fn`` and ``pred_transform_fn`` pair. When the number
+        of examples in the dataset is known upfront, the buffers for the y_pred, y_test and each of the metadata
+        elements are allocated after the first batch. Consequently, the predictions are never held twice in memory
+        as is the case when the list of batches is concatenated at the end of the prediction.
+
+        Returned predictions are equivalent to the ones produced by the
+        :func:`~aitoolbox.torchtrain.train_loop.components.pred_collate_fns.append_predictions` and
+        :func:`~aitoolbox.torchtrain.train_loop.components.pred_collate_fns.torch_cat_transf` combination with
+        the metadata combined via :func:`~aitoolbox.utils.dict_util.combine_prediction_metadata_batches`.
+
+        Args:
+            pin_memory (bool): collect the predictions in the pinned CPU memory buffers via the non-blocking copies.
+                The returned predictions are consequently already on the CPU. Not applied in the DDP training where
+                the predictions have to stay on the device for the gathering across the processes.
+        """
+        self.pin_memory = pin_memory
+
+        self.y_pred = None
+        self.y_test = None
+        self.metadata = None
+        self.num_examples = None
+        self.pin_memory_current = pin_memory
+        self.storage = None
+        self.source_name = None
+
+    def reset(self, num_examples, pin_memory=None, storage=None, source_name=None):
+        """Prepare the collator for the new pass over the dataset
+
+        Args:
+            num_examples (int or None): number of examples in the dataset. If ``None``, the buffers aren't
+                preallocated and the batches get concatenated at the end.
+            pin_memory (bool or None): override of the ``pin_memory`` setting just for this pass over the dataset
+            storage (aitoolbox.torchtrain.train_loop.components.model_prediction_store.DiskPredictionStorage or None):
+                when provided, the buffers are allocated as the memory-mapped files in the prediction storage and
+                the predictions are streamed directly to the disk
+            source_name (str or None): prediction source name under which the files are created in the ``storage``
+
+        Returns:
+            None
+        """
+        self.num_examples = num_examples
+        self.pin_memory_current = self.pin_memory if pin_memory is None else pin_memory
+        self.storage = storage
+        self.source_name = source_name
+
+        self.y_pred = PredictionBuffer(num_examples, self.pin_memory_current,
+                                       array_factory=self._get_array_factory('y_pred'), array_release=self._release)
+        self.y_test = PredictionBuffer(num_examples, self.pin_memory_current,
+                                       array_factory=self._get_array_factory('y_test'), array_release=self._release)
+        self.metadata = {}
+
+    def append(self, y_pred_batch, y_test_batch, metadata_batch=None):
+        """Collect the predictions of the new batch
+
+        Args:
+            y_pred_batch (torch.Tensor): batch predictions
+            y_test_batch (torch.Tensor): batch targets
+            metadata_batch (dict or None): batch metadata
+
+        Returns:
+            None
+        """
+        if self.y_pred is None:
+            self.reset(None)
+
+        self.y_pred.append(y_pred_batch)
+        self.y_test.append(y_test_batch)
+
+        if metadata_batch is not None:
+            for meta_el, meta_batch in metadata_batch.items():
+                if meta_el not in self.metadata:
+                    self.metadata[meta_el] = PredictionBuffer(
+                        self.num_examples if not isinstance(meta_batch, list) else None,
+                        self.pin_memory_current, concat_fn=_combine_metadata_element,
+                        array_factory=self._get_array_factory(f'meta_{meta_el}'), array_release=self._release
+                    )
+                self.metadata[meta_el].append(meta_batch)
+
+    def get_predictions(self):
+        """Get all the collected predictions and release the buffers
+
+        Returns:
+            (torch.Tensor, torch.Tensor, dict): y_pred, y_true, metadata
+        """
+        if self.y_pred is None:
+            self.reset(None)
+
+        y_pred = self.y_pred.get_predictions()
+        y_test = self.y_test.get_predictions()
+        metadata = {meta_el: buffer.get_predictions() for meta_el, buffer in self.metadata.items()}
+
+        self.y_pred, self.y_test, self.metadata = None, None, None
+        self.storage = None
+
+        return y_pred, y_test, metadata
+
+    def _get_array_factory(self, element_name):
+        storage, source_name = self.storage, self.source_name
+        if storage is None:
+            return None
+        return lambda shape, dtype: storage.create_array(source_name, element_name, shape, dtype)
+
+    def _release(self, array):
+        if self.storage is not None:
+            self.storage.release_array(array)
+
+
+def _combine_metadata_element(metadata_batches):
+    return dict_util.combine_prediction_metadata_batches([{'el': el} for el in metadata_batches])['el']
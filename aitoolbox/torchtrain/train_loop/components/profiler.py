@@ -0,0 +1,380 @@
+import os
+import csv
+import json
+import time
+from contextlib import nullcontext
+import torch
+
+from aitoolbox.experiment.local_save.folder_create import ExperimentFolder
+
+# Top-level TrainLoop phases which are tracked in the TrainingHistory every epoch
+HISTORY_PHASES = ['data_loading', 'forward', 'backward', 'optimizer_step', 'amp_update', 'callbacks',
+                  'end_of_epoch_eval']
+
+
+class PhaseTimer:
+    def __init__(self, profiler, phase_name):
+        """Context manager timing a single execution of the profiled phase
+
+        Args:
+            profiler (TrainLoopProfiler): profiler recording the measured timing
+            phase_name (str): name of the profiled phase
+        """
+        self.profiler = profiler
+        self.phase_name = phase_name
+        self.start_time = None
+
+    def __enter__(self):
+        self.profiler.synchronize()
+        self.start_time = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.profiler.synchronize()
+        self.profiler.record(self.phase_name, time.perf_counter() - self.start_time)
+        return False
+
+
+class TrainLoopProfiler:
+    def __init__(self, sync_device=True, profile_callbacks=True, trace_dir=None, trace_formats=('json', 'csv')):
+        """Opt-in per-phase profiler of the TrainLoop
+
+        Records the wall-clock timings of the individual training phases: data loading (the wait for the next batch
+        from the data loader), forward pass with the loss calculation, backward pass, optimizer step, AMP scaler
+        update, callbacks execution and end of epoch evaluation. Callbacks are additionally timed individually per
+        callback and per callback stage. Timings of the nested phases are included in their encapsulating phase
+        (e.g. the ``on_after_optimizer_step`` callbacks are included in the ``optimizer_step`` phase).
+
+        At the end of every epoch the total time of the main phases and the training throughput in samples/sec are
+        inserted into the TrainingHistory under the ``profile_`` prefixed names. The full per-epoch report is
+        also written as the JSON and/or CSV trace into the ``trace_dir`` or, when the TrainLoop is tracking
+        the experiment, into the experiment folder.
+
+        Args:
+            sync_device (bool): synchronize the CUDA device at the start and end of each phase so that the timings
+                reflect the actual device execution time instead of just the asynchronous kernel launch time.
+                The synchronization itself slows down the training.
+            profile_callbacks (bool): time each of the executed callbacks individually
+            trace_dir (str or None): folder where the trace files are saved. If not provided, the traces are saved
+                into the experiment folder when using the experiment tracking TrainLoop and not saved at all when
+                using the basic TrainLoop.
+            trace_formats (tuple or list): trace file formats to be saved. Supported formats are ``'json'`` and
+                ``'csv'``.
+        """
+        for trace_format in trace_formats:
+            if trace_format not in ['json', 'csv']:
+                raise ValueError(f"Trace format {trace_format} is not supported. Select from: 'json' or 'csv'.")
+
+        self.enabled = True
+        self.sync_device = sync_device
+        self.profile_callbacks = profile_callbacks
+        self.trace_dir = os.path.expanduser(trace_dir) if trace_dir is not None else None
+        self.trace_formats = trace_formats
+
+        self.train_loop_obj = None
+        self.device = None
+
+        self.phase_stats = {}
+        self.num_samples = 0
+        self.epoch_start_time = None
+        self.epoch_reports = []
+
+    def register_train_loop(self, train_loop_obj):
+        """Connect the profiler with the TrainLoop it profiles
+
+        Args:
+            train_loop_obj (aitoolbox.torchtrain.train_loop.train_loop.TrainLoop): reference to the encapsulating
+                TrainLoop
+
+        Returns:
+            None
+        """
+        self.train_loop_obj = train_loop_obj
+
+    def phase(self, phase_name):
+        """Context manager timing the execution of the enclosed code as the given phase
+
+        Args:
+            phase_name (str): name of the profiled phase
+
+        Returns:
+            PhaseTimer: phase timing context manager
+        """
+        return PhaseTimer(self, phase_name)
+
+    def record_callback(self, callback, stage_name, duration):
+        """Record the timing of the single callback stage execution
+
+        Args:
+            callback (aitoolbox.torchtrain.callbacks.abstract.AbstractCallback): executed callback
+            stage_name (str): name of the executed callback method, e.g. ``'on_batch_end'``
+            duration (float): execution time in seconds
+
+        Returns:
+            None
+        """
+        if self.profile_callbacks:
+            self.record(f'callback/{callback.callback_name}/{stage_name}', duration)
+
+    def time_data_loading(self, batch_iterator):
+        """Wrap the batch iterator to time the wait for each of the produced batches
+
+        Args:
+            batch_iterator (collections.abc.Iterable): iterable producing the data batches, e.g. the DataLoader
+
+        Returns:
+            collections.abc.Iterator: iterator producing the same batches
+        """
+        iterator = iter(batch_iterator)
+        while True:
+            start_time = time.perf_counter()
+            try:
+                batch_data = next(iterator)
+            except StopIteration:
+                return
+            self.record('data_loading', time.perf_counter() - start_time)
+            yield batch_data
+
+    def record(self, phase_name, duration):
+        """Record the single timing of the phase
+
+        Args:
+            phase_name (str): name of the profiled phase
+            duration (float): duration of the phase in seconds
+
+        Returns:
+            None
+        """
+        if phase_name not in self.phase_stats:
+            self.phase_stats[phase_name] = {'count': 0, 'total': 0., 'max': 0.}
+        stats = self.phase_stats[phase_name]
+        stats['count'] += 1
+        stats['total'] += duration
+        stats['max'] = max(stats['max'], duration)
+
+    def record_samples(self, batch_data):
+        """Count the training samples in the batch for the throughput calculation
+
+        Args:
+            batch_data: training batch as produced by the data loader
+
+        Returns:
+            None
+        """
+        self.num_samples += get_batch_size(batch_data)
+
+    def start_epoch(self):
+        """Reset the timings at the start of the new epoch
+
+        Returns:
+            None
+        """
+        if self.train_loop_obj is not None:
+            self.device = self.train_loop_obj.device
+        self.phase_stats = {}
+        self.num_samples = 0
+        self.epoch_start_time = time.perf_counter()
+
+    def end_epoch(self):
+        """Summarize the epoch timings and insert them into the TrainingHistory
+
+        Called before the epoch end callbacks are executed so that they can already report the profile values of
+        the just finished epoch. Consequently, the timings of the ``on_epoch_end`` callbacks are not part of
+        the ``profile_callbacks_time`` in the TrainingHistory. They are added into the epoch's trace report
+        afterwards by :meth:`finalize_epoch`.
+
+        Returns:
+            dict: epoch profiling report
+        """
+        epoch_report = self.get_epoch_report()
+        self.epoch_reports.append(epoch_report)
+
+        if self.train_loop_obj is not None:
+            for phase_name in HISTORY_PHASES:
+                self.train_loop_obj.insert_metric_result_into_history(
+                    f'profile_{phase_name}_time', epoch_report['phases'].get(phase_name, {}).get('total', 0.)
+                )
+            self.train_loop_obj.insert_metric_result_into_history('profile_samples_per_sec',
+                                                                  epoch_report['samples_per_sec'])
+        return epoch_report
+
+    def finalize_epoch(self):
+        """Update the epoch report with the timings of the epoch end callbacks, save the trace and reset the timings
+
+        Returns:
+            dict: final epoch profiling report
+        """
+        epoch_report = self.get_epoch_report()
+        self.epoch_reports[-1] = epoch_report
+
+        self.save_trace()
+        self.start_epoch()
+        return epoch_report
+
+    def end_training(self):
+        """Add the timings recorded after the last epoch (e.g. the end of training evaluation) into the trace
+
+        Returns:
+            dict or None: end of training profiling report or ``None`` if nothing was recorded after the last epoch
+        """
+        if len(self.phase_stats) == 0:
+            return None
+
+        training_end_report = {**self.get_epoch_report(), 'epoch': 'end_of_training'}
+        self.epoch_reports.append(training_end_report)
+        self.save_trace()
+        return training_end_report
+
+    def get_epoch_report(self):
+        """Get the profiling report of the current epoch
+
+        Returns:
+            dict: epoch wall-clock time, number of samples, training throughput and the per-phase timing statistics
+        """
+        phases = {
+            phase_name: {**stats, 'mean': stats['total'] / stats['count']}
+            for phase_name, stats in self.phase_stats.items()
+        }
+        callback_phases = [stats for phase_name, stats in phases.items() if phase_name.startswith('callbacks/')]
+        if len(callback_phases) > 0:
+            phases['callbacks'] = {
+                'count': sum(stats['count'] for stats in callback_phases),
+                'total': sum(stats['total'] for stats in callback_phases),
+                'max': max(stats['max'] for stats in callback_phases)
+            }
+            phases['callbacks']['mean'] = phases['callbacks']['total'] / phases['callbacks']['count']
+
+        train_time = phases.get('data_loading', {}).get('total', 0.) + phases.get('iteration', {}).get('total', 0.)
+        epoch_time = time.perf_counter() - self.epoch_start_time if self.epoch_start_time is not None else 0.
+
+        return {
+            'epoch': self.train_loop_obj.epoch if self.train_loop_obj is not None else len(self.epoch_reports),
+            'epoch_time': epoch_time,
+            'num_samples': self.num_samples,
+            'samples_per_sec': self.num_samples / train_time if train_time > 0 else 0.,
+            'phases': phases
+        }
+
+    def save_trace(self):
+        """Save all the epoch reports collected so far into the trace files
+
+        Returns:
+            list: paths of the saved trace files
+        """
+        trace_dir = self.get_trace_dir()
+        if trace_dir is None:
+            return []
+
+        os.makedirs(trace_dir, exist_ok=True)
+        file_name = 'profiler_trace'
+        if self.train_loop_obj is not None and self.train_loop_obj.ddp_training_mode:
+            file_name += f'_rank{self.train_loop_obj.ddp_rank}'
+
+        trace_paths = []
+        if 'json' in self.trace_formats:
+            trace_path = os.path.join(trace_dir, f'{file_name}.json')
+            with open(trace_path, 'w') as f:
+                json.dump(self.epoch_reports, f, indent=2)
+            trace_paths.append(trace_path)
+
+        if 'csv' in self.trace_formats:
+            trace_path = os.path.join(trace_dir, f'{file_name}.csv')
+            with open(trace_path, 'w', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(['epoch', 'phase', 'count', 'total', 'mean', 'max'])
+                for epoch_report in self.epoch_reports:
+                    for phase_name, stats in epoch_report['phases'].items():
+                        writer.writerow([epoch_report['epoch'], phase_name,
+                                         stats['count'], stats['total'], stats['mean'], stats['max']])
+            trace_paths.append(trace_path)
+
+        return trace_paths
+
+    def get_trace_dir(self):
+        """Get the folder where the trace files should be saved
+
+        Returns:
+            str or None: trace folder path or ``None`` if the traces shouldn't be saved
+        """
+        if self.trace_dir is not None:
+            return self.trace_dir
+
+        train_loop = self.train_loop_obj
+        if train_loop is not None and all(hasattr(train_loop, attr) for attr in
+                                          ['project_name', 'experiment_name', 'local_model_result_folder_path']):
+            return ExperimentFolder.create_base_folder(train_loop.project_name, train_loop.experiment_name,
+                                                       train_loop.experiment_timestamp,
+                                                       train_loop.local_model_result_folder_path)
+        return None
+
+    def synchronize(self):
+        """Wait for all the queued device work to finish to get the accurate phase timing
+
+        Returns:
+            None
+        """
+        if self.sync_device and self.device is not None and self.device.type == 'cuda':
+            torch.cuda.synchronize(self.device)
+
+
+class DisabledProfiler(TrainLoopProfiler):
+    def __init__(self):
+        """Profiler used by the TrainLoop when the profiling is not enabled
+
+        All the profiling operations are no-ops so the instrumented TrainLoop doesn't pay any measurable overhead.
+        """
+        TrainLoopProfiler.__init__(self, sync_device=False, profile_callbacks=False, trace_formats=())
+        self.enabled = False
+        self.null_phase = nullcontext()
+
+    def phase(self, phase_name):
+        return self.null_phase
+
+    def record_callback(self, callback, stage_name, duration):
+        pass
+
+    def time_data_loading(self, batch_iterator):
+        return batch_iterator
+
+    def record(self, phase_name, duration):
+        pass
+
+    def record_samples(self, batch_data):
+        pass
+
+    def start_epoch(self):
+        pass
+
+    def end_epoch(self):
+        return None
+
+    def finalize_epoch(self):
+        return None
+
+    def end_training(self):
+        return None
+
+    def save_trace(self):
+        return []
+
+
+def get_batch_size(batch_data):
+    """Infer the number of samples in the data batch
+
+    Args:
+        batch_data: batch as produced by the data loader. Either a tensor, a list or tuple of tensors or a dict of
+            tensors. Otherwise, the batch is counted as a single sample.
+
+    Returns:
+        int: number of samples in the batch
+    """
+    if isinstance(batch_data, torch.Tensor):
+        return batch_data.shape[0] if batch_data.dim() > 0 else 1
+    if isinstance(batch_data, dict) and len(batch_data) > 0:
+        return get_batch_size(next(iter(batch_data.values())))
+    if isinstance(batch_data, (list, tuple)) and len(batch_data) > 0:
+        first_element = batch_data[0]
+        if isinstance(first_element, (torch.Tensor, list, tuple, dict)):
+            return get_batch_size(first_element)
+        return len(batch_data)
+    return 1
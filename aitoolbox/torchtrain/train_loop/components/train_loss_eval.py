@@ -0,0 +1,254 @@
+from abc import ABC, abstractmethod
+import math
+from statistics import NormalDist
+import numpy as np
+import torch
+from torch.utils.data import DataLoader, IterableDataset
+
+from aitoolbox.torchtrain.multi_loss_optim import MultiLoss
+from aitoolbox.torchtrain.train_loop.components.loader_builder import get_data_loader_args, build_data_loader
+
+
+class AbstractTrainLossEvaluation(ABC):
+    def __init__(self, strategy_name):
+        """Strategy for the end of epoch train set loss evaluation in the TrainLoop
+
+        Evaluating the loss on the whole train set at the end of every epoch can add almost another full epoch worth
+        of compute. The strategies inheriting from this class define how the reported end of epoch train loss
+        is obtained.
+
+        Args:
+            strategy_name (str): name of the strategy which gets recorded into the TrainingHistory metadata
+        """
+        self.strategy_name = strategy_name
+
+    @abstractmethod
+    def evaluate_loss(self, train_loop_obj, accumulated_loss):
+        """Evaluate the train set loss
+
+        Args:
+            train_loop_obj (aitoolbox.torchtrain.train_loop.train_loop.TrainLoop): reference to the encapsulating
+                TrainLoop
+            accumulated_loss (torch.Tensor or MultiLoss): average of the batch losses accumulated during the training
+                in the just finished epoch
+
+        Returns:
+            (torch.Tensor or MultiLoss, torch.Tensor or MultiLoss or None): train loss and the half-width of its
+            confidence interval. If the strategy doesn't estimate the confidence interval ``None`` is returned instead.
+        """
+        pass
+
+    def get_strategy_info(self):
+        """Get the description of the strategy which gets recorded into the TrainingHistory metadata
+
+        Returns:
+            dict: strategy name and its settings
+        """
+        return {'strategy': self.strategy_name}
+
+
+class FullTrainLossEvaluation(AbstractTrainLossEvaluation):
+    def __init__(self):
+        """Evaluate the loss on the whole train set
+
+        This is the default TrainLoop behaviour.
+        """
+        AbstractTrainLossEvaluation.__init__(self, 'full')
+
+    def evaluate_loss(self, train_loop_obj, accumulated_loss):
+        return train_loop_obj.evaluate_loss_on_train_set(), None
+
+
+class AccumulatedTrainLossEvaluation(AbstractTrainLossEvaluation):
+    def __init__(self):
+        """Reuse the batch losses accumulated during the epoch as the train loss
+
+        No additional pass over the train set is made. Bear in mind that the accumulated loss is calculated with
+        the model weights changing throughout the epoch and with the model in the train mode (e.g. with dropout).
+        """
+        AbstractTrainLossEvaluation.__init__(self, 'accumulated')
+
+    def evaluate_loss(self, train_loop_obj, accumulated_loss):
+        return accumulated_loss, None
+
+
+class AbstractSubsetTrainLossEvaluation(AbstractTrainLossEvaluation):
+    def __init__(self, strategy_name, confidence=0.95):
+        """Evaluate the train loss only on a subset of the train set batches
+
+        Together with the loss, the confidence interval of the estimated full train set loss is calculated based on
+        the variance of the evaluated batch losses.
+
+        Args:
+            strategy_name (str): name of the strategy which gets recorded into the TrainingHistory metadata
+            confidence (float): confidence level of the calculated confidence interval
+        """
+        AbstractTrainLossEvaluation.__init__(self, strategy_name)
+        self.confidence = confidence
+        self.subset_loader = None
+
+        if not 0. < confidence < 1.:
+            raise ValueError(f'confidence has to be between 0 and 1. Provided: {confidence}')
+
+    @abstractmethod
+    def select_batches(self, num_batches, epoch):
+        """Select which of the train set batches are used for the loss evaluation
+
+        Args:
+            num_batches (int): number of batches in the train set
+            epoch (int): current epoch
+
+        Returns:
+            list: sorted indices of the selected batches
+        """
+        pass
+
+    def evaluate_loss(self, train_loop_obj, accumulated_loss):
+        num_batches = len(train_loop_obj.train_loader)
+        # Subset loader is reused between the evaluations so that the persistent workers aren't forked every time
+        subset_loader = self.subset_loader = build_batch_subset_loader(
+            train_loop_obj.train_loader, self.select_batches(num_batches, train_loop_obj.epoch), self.subset_loader
+        )
+        loss, batch_losses = train_loop_obj.evaluate_model_loss(subset_loader, move_to_cpu=True,
+                                                                dataset_info={'type': 'train'},
+                                                                return_batch_losses=True)
+        # In the case of DDP the batch losses are gathered from all the processes
+        num_processes = batch_losses.shape[0] // len(subset_loader)
+        loss_ci = self.calculate_confidence_interval(batch_losses, num_batches * num_processes)
+        if isinstance(loss, MultiLoss):
+            loss_ci = MultiLoss(dict(zip(loss.keys(), loss_ci)))
+
+        return loss, loss_ci
+
+    def calculate_confidence_interval(self, batch_losses, population_size):
+        """Calculate the half-width of the confidence interval for the mean loss
+
+        Normal approximation with the finite population correction is used as the batches are sampled from the finite
+        train set without replacement.
+
+        Args:
+            batch_losses (torch.DoubleTensor): losses of the evaluated batches
+            population_size (int): number of all the batches in the train set (across all the processes)
+
+        Returns:
+            torch.DoubleTensor: half-width of the confidence interval
+        """
+        sample_size = batch_losses.shape[0]
+        if sample_size < 2:
+            return torch.full_like(batch_losses[0], float('nan'))
+
+        z = NormalDist().inv_cdf((1. + self.confidence) / 2.)
+        finite_population_correction = math.sqrt(max(population_size - sample_size, 0) /
+                                                 max(population_size - 1, 1))
+        std_error = torch.std(batch_losses, dim=0) / math.sqrt(sample_size)
+
+        return z * std_error * finite_population_correction
+
+
+class RandomSubsetTrainLossEvaluation(AbstractSubsetTrainLossEvaluation):
+    def __init__(self, num_batches, seed=0, resample_each_epoch=True, confidence=0.95):
+        """Evaluate the train loss on a fixed-size random subset of the train set batches
+
+        Args:
+            num_batches (int): number of randomly selected batches on which the loss is evaluated
+            seed (int): random seed for the batch selection
+            resample_each_epoch (bool): if true, a different random subset of batches is selected at each epoch.
+                Otherwise, the same subset of batches is used throughout the training.
+            confidence (float): confidence level of the calculated confidence interval
+        """
+        AbstractSubsetTrainLossEvaluation.__init__(self, 'random_subset', confidence)
+        self.num_batches = num_batches
+        self.seed = seed
+        self.resample_each_epoch = resample_each_epoch
+
+        if num_batches < 1:
+            raise ValueError(f'num_batches has to be at least 1. Provided: {num_batches}')
+
+    def select_batches(self, num_batches, epoch):
+        rng = np.random.default_rng(self.seed + epoch if self.resample_each_epoch else self.seed)
+        return sorted(rng.choice(num_batches, size=min(self.num_batches, num_batches), replace=False).tolist())
+
+    def get_strategy_info(self):
+        return {'strategy': self.strategy_name, 'num_batches': self.num_batches, 'seed': self.seed,
+                'resample_each_epoch': self.resample_each_epoch, 'confidence': self.confidence}
+
+
+class StridedSubsetTrainLossEvaluation(AbstractSubsetTrainLossEvaluation):
+    def __init__(self, stride, offset=0, confidence=0.95):
+        """Evaluate the train loss on every n-th batch of the train set
+
+        Args:
+            stride (int): step between the consecutive evaluated batches
+            offset (int): index of the first evaluated batch
+            confidence (float): confidence level of the calculated confidence interval
+        """
+        AbstractSubsetTrainLossEvaluation.__init__(self, 'strided', confidence)
+        self.stride = stride
+        self.offset = offset
+
+        if stride < 1:
+            raise ValueError(f'stride has to be at least 1. Provided: {stride}')
+
+    def select_batches(self, num_batches, epoch):
+        return list(range(min(self.offset, num_batches - 1), num_batches, self.stride))
+
+    def get_strategy_info(self):
+        return {'strategy': self.strategy_name, 'stride': self.stride, 'offset': self.offset,
+                'confidence': self.confidence}
+
+
+def build_batch_subset_loader(data_loader, batch_idx, subset_loader=None):
+    """Build the data loader returning only the selected batches of the provided data loader
+
+    In the case of the standard PyTorch DataLoader the selected batches are retrieved directly from the dataset
+    so that the data of the skipped batches isn't loaded at all. The DataLoader's sampler (e.g. DistributedSampler
+    in the case of DDP training) is respected and all the other DataLoader settings (e.g. persistent workers and
+    prefetching) are copied from the original data loader.
+
+    Args:
+        data_loader (torch.utils.data.DataLoader or list): original data loader
+        batch_idx (list): indices of the selected batches
+        subset_loader (torch.utils.data.DataLoader or list or None): subset loader previously built from the same
+            data loader. If provided, only its selected batches are replaced instead of building the new DataLoader,
+            which keeps its persistent worker processes alive.
+
+    Returns:
+        torch.utils.data.DataLoader or list: data loader returning only the selected batches
+    """
+    if isinstance(data_loader, DataLoader) and not isinstance(data_loader.dataset, IterableDataset):
+        sample_batches = list(data_loader.batch_sampler)
+        selected_batches = [sample_batches[i] for i in batch_idx]
+
+        if isinstance(subset_loader, DataLoader) and isinstance(subset_loader.batch_sampler, BatchSubsetSampler) \
+                and subset_loader.dataset is data_loader.dataset:
+            subset_loader.batch_sampler.batches = selected_batches
+            return subset_loader
+
+        data_loader_args = get_data_loader_args(data_loader)
+        for batching_arg in ['batch_size', 'shuffle', 'drop_last']:
+            del data_loader_args[batching_arg]
+        data_loader_args['batch_sampler'] = BatchSubsetSampler(selected_batches)
+        return build_data_loader(data_loader_args)
+    elif hasattr(data_loader, '__getitem__'):
+        return [data_loader[i] for i in batch_idx]
+    else:
+        batch_idx = set(batch_idx)
+        return [batch for i, batch in enumerate(data_loader) if i in batch_idx]
+
+
+class BatchSubsetSampler:
+    def __init__(self, batches):
+        """Batch sampler returning the predefined batches of sample indices
+
+        The batches can be replaced between the iterations without rebuilding the DataLoader.
+
+        Args:
+            batches (list): list of batches where each batch is a list of sample indices
+        """
+        self.batches = batches
+
+    def __iter__(self):
+        return iter(self.batches)
+
+    def __len__(self):
+        return len(self.batches)
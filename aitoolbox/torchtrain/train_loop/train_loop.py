@@ -1,5 +1,6 @@
 from tqdm import tqdm
 import os
+import itertools
 import time
 import math
 import datetime
@@ -20,11 +21,22 @@ from aitoolbox.torchtrain.multi_loss_optim import MultiLoss, MultiOptimizer
 from aitoolbox.torchtrain.data.batch_model_feed_defs import AbstractModelFeedDefinition
 from aitoolbox.torchtrain.train_loop.components.callback_handler import CallbacksHandler
 from aitoolbox.torchtrain.train_loop.components.ddp_handler import DDPHandler
+from aitoolbox.torchtrain.train_loop.components.ddp_gather import get_shard_sampler
 from aitoolbox.torchtrain.schedulers.basic import AbstractScheduler
 from aitoolbox.experiment.training_history import TrainingHistory
 from aitoolbox.torchtrain.train_loop.components.model_prediction_store import ModelPredictionStore
 from aitoolbox.torchtrain.train_loop.components.message_passing import MessageService
-from aitoolbox.torchtrain.train_loop.components.pred_collate_fns import append_predictions, torch_cat_transf
+from aitoolbox.torchtrain.train_loop.components.loss_accumulator import LossAccumulator
+from aitoolbox.torchtrain.train_loop.components.profiler import TrainLoopProfiler, DisabledProfiler
+from aitoolbox.torchtrain.train_loop.components.metric_logger import AsyncMetricLogger
+from aitoolbox.torchtrain.train_loop.components.device_prefetch import DevicePrefetchLoader
+from aitoolbox.torchtrain.train_loop.components.loader_builder import DataLoaderAutoTuner
+from aitoolbox.torchtrain.train_loop.components.train_loss_eval import (
+    AbstractTrainLossEvaluation, FullTrainLossEvaluation
+)
+from aitoolbox.torchtrain.train_loop.components.pred_collate_fns import (
+    append_predictions, torch_cat_transf, PreallocatedPredictionCollator, get_num_dataset_examples
+)
 
 
 class TrainLoop:
@@ -33,7 +45,9 @@ class TrainLoop:
                  optimizer, criterion,
                  collate_batch_pred_fn=append_predictions, pred_transform_fn=torch_cat_transf,
                  end_auto_eval=True, lazy_experiment_save=False, print_callbacks=False,
-                 gpu_mode='single', cuda_device_idx=None, use_amp=False):
+                 gpu_mode='single', cuda_device_idx=None, use_amp=False, train_loss_eval=None,
+                 prediction_storage=None, prediction_keep_iterations=1, prediction_max_bytes=None,
+                 profiler=None, device_prefetch=0):
         """Core PyTorch TrainLoop supporting the model training and target prediction
 
         Implements core training procedures: batch feeding into the network as part of (multi)epoch train loop,
@@ -47,8 +61,11 @@ class TrainLoop:
             test_loader (torch.utils.data.DataLoader or None): data loader for test data set
             optimizer (torch.optim.Optimizer or MultiOptimizer): optimizer algorithm.
             criterion (torch.nn.Module or MultiLoss or None): criterion during the training procedure
-            collate_batch_pred_fn (callable): collate function transforming batch predictions as they come out from the
-                model
+            collate_batch_pred_fn (callable or PreallocatedPredictionCollator): collate function transforming batch
+                predictions as they come out from the model. To instead collect the predictions directly into
+                the preallocated buffers (optionally in the pinned CPU memory) provide the
+                :class:`~aitoolbox.torchtrain.train_loop.components.pred_collate_fns.PreallocatedPredictionCollator`
+                object as this parameter. In this case the ``pred_transform_fn`` is not used.
             pred_transform_fn (callable): function transforming all the produced predictions after all the batches have
                 been run through the model
             end_auto_eval (bool or int): used to optionally disable otherwise automatic end of epoch/training val/test
@@ -76,6 +93,33 @@ class TrainLoop:
                   initialization params
                 * provide custom AMP :class:`~torch.cuda.amp.GradScaler` initialization parameters as a dict as
                   this parameter
+
+            train_loss_eval (AbstractTrainLossEvaluation or None): strategy for the automatic end of epoch
+                train loss evaluation. By default (``None``) the loss is evaluated on the whole train set via
+                :class:`~aitoolbox.torchtrain.train_loop.components.train_loss_eval.FullTrainLossEvaluation`.
+                To save compute, the loss can instead be evaluated only on the subset of the train set or the batch
+                losses accumulated during the epoch can be reused.
+            prediction_storage (DiskPredictionStorage or None): optional storage backend of the prediction cache.
+                By providing the
+                :class:`~aitoolbox.torchtrain.train_loop.components.model_prediction_store.DiskPredictionStorage`
+                the train, validation and test set predictions are kept in the memory-mapped files
+                (by default in the experiment folder when tracked) instead of in memory. Together with the
+                PreallocatedPredictionCollator given as the ``collate_batch_pred_fn``, the predictions are streamed
+                into the files already during the prediction.
+            prediction_keep_iterations (int): number of the most recent training iterations whose predictions and
+                losses are kept in the prediction cache. Increase it to allow the reuse of the cached predictions
+                across the iterations.
+            prediction_max_bytes (int or None): size budget of the prediction cache. When exceeded, the least
+                recently used cache entries are evicted. If ``None`` (default), the size of the cache is not limited.
+            profiler (TrainLoopProfiler or None): optional profiler recording the per-phase timings of the training.
+                By providing the :class:`~aitoolbox.torchtrain.train_loop.components.profiler.TrainLoopProfiler`
+                the data loading, forward, backward, optimizer step, callbacks and evaluation timings are recorded
+                into the training history and the trace files. By default (``None``) the profiling is disabled.
+            device_prefetch (int): number of batches prefetched onto the device ahead of the current training or
+                evaluation step via the
+                :class:`~aitoolbox.torchtrain.train_loop.components.device_prefetch.DevicePrefetchLoader`. This way
+                the host to device copies overlap with the computation and the model receives the batches already
+                resident on the device. Set to ``0`` (default) to disable the prefetching.
         """
         if isinstance(model, TTModel) or isinstance(model, TTDataParallel):
             self.model = model
@@ -94,7 +138,11 @@ class TrainLoop:
         self.criterion = criterion
         self.collate_batch_pred_fn = collate_batch_pred_fn
         self.pred_transform_fn = pred_transform_fn
+        self.pred_collator = None
+        if isinstance(collate_batch_pred_fn, PreallocatedPredictionCollator):
+            self.pred_collator = collate_batch_pred_fn
         self.end_auto_eval = end_auto_eval
+        self.train_loss_eval = train_loss_eval if train_loss_eval is not None else FullTrainLossEvaluation()
         self.lazy_experiment_save = lazy_experiment_save
         self.print_callbacks = print_callbacks
 
@@ -117,7 +165,7 @@ class TrainLoop:
         self.device = torch.device(f"cuda{cuda_suffix}" if USE_CUDA else "cpu")
 
         self.experiment_timestamp = datetime.datetime.fromtimestamp(time.time()).strftime('%Y-%m-%d_%H-%M-%S')
-        self.loss_batch_accum = []
+        self.loss_batch_accum = LossAccumulator()
         self.epoch = 0
         self.iteration = 0
         # Intentionally set to -1 because we do += 1 at the start of every iteration
@@ -128,8 +176,20 @@ class TrainLoop:
         self.grad_accumulation = 1
 
         self.train_history = TrainingHistory(has_validation=self.validation_loader is not None)
-        self.prediction_store = ModelPredictionStore(auto_purge=True)
+        self.prediction_store = ModelPredictionStore(auto_purge=True, storage=prediction_storage,
+                                                     keep_iterations=prediction_keep_iterations,
+                                                     max_bytes=prediction_max_bytes,
+                                                     state_key_fn=self._get_model_state_key)
+        if prediction_storage is not None:
+            prediction_storage.register_train_loop(self)
         self.message_service = MessageService()
+        # Metric logger shared by the logging callbacks. Created on the first use as it runs its own worker thread.
+        self.metric_logger = None
+        self.profiler = profiler if profiler is not None else DisabledProfiler()
+        self.device_prefetch = device_prefetch
+        # Dataset types ('train', 'validation', 'test') for which the automatic end of epoch loss evaluation also
+        # makes the predictions in the same pass through the model. Filled in by the callbacks which need predictions.
+        self.fused_eval_datasets = set()
 
         self.ddp_training_mode = False
         self.ddp_handler: Optional[DDPHandler] = None
@@ -150,6 +210,15 @@ class TrainLoop:
         if self.gpu_mode not in ['single', 'dp', 'ddp']:
             raise ValueError("gpu_mode parameter set to the non-supported value. Can use only the following values: "
                              "'single', 'dp' and 'ddp'")
+        if not isinstance(self.train_loss_eval, AbstractTrainLossEvaluation):
+            raise TypeError('Provided train_loss_eval is not inherited from AbstractTrainLossEvaluation')
+        if not isinstance(self.profiler, TrainLoopProfiler):
+            raise TypeError('Provided profiler is not inherited from TrainLoopProfiler')
+        if not isinstance(self.device_prefetch, int) or self.device_prefetch < 0:
+            raise ValueError(f'device_prefetch has to be a non-negative int. Provided: {self.device_prefetch}')
+        self.profiler.register_train_loop(self)
+
+        self.train_history.insert_metadata('train_loss_eval', self.train_loss_eval.get_strategy_info())
 
     def fit(self, num_epochs=0, num_iterations=0, callbacks=None, grad_accumulation=1, **kwargs):
         """Train the model using the train loop
@@ -231,41 +300,53 @@ class TrainLoop:
                 print('\n\n================================================================================')
                 print('================================================================================')
                 print(f'Epoch: {self.epoch}')
+            self.profiler.start_epoch()
             self.callbacks_handler.execute_epoch_begin()
 
-            for self.iteration, batch_data in enumerate(tqdm(self.train_loader,
-                                                             desc='Training', disable=not self.is_main_process())):
-                self.total_iteration_idx += 1
-                self.callbacks_handler.execute_batch_begin()
-
-                # Feed batch into the model
-                loss_batch = self._calculate_batch_loss(batch_data)
-
-                # Iterate over potentially multiple optimizers
-                for optimizer_idx in range(self.num_optimizers):
-                    # Backward pass through the model
-                    self._backward_pass(loss_batch, optimizer_idx)
-                    if self.grad_cb_used:
-                        self.callbacks_handler.execute_gradient_update(optimizer_idx)
-
-                    # Optimizer step
-                    self._optimizer_step(optimizer_idx)
-                    # Optimizer zero grad
-                    self._optimizer_zero_grad(optimizer_idx)
-
-                # Execute AMP scaler update only when optimizer is stepped and grads are zeroed out
-                # https://pytorch.org/docs/stable/notes/amp_examples.html#gradient-accumulation
-                if self.should_execute_optimizer_update():
-                    self.amp_scaler.update()
-
-                self.callbacks_handler.execute_batch_end()
+            train_batches = tqdm(self.prefetch_to_device(self.train_loader), desc='Training',
+                                 disable=not self.is_main_process())
+            for self.iteration, batch_data in enumerate(self.profiler.time_data_loading(train_batches)):
+                with self.profiler.phase('iteration'):
+                    self.total_iteration_idx += 1
+                    self.profiler.record_samples(batch_data)
+                    self.callbacks_handler.execute_batch_begin()
+
+                    # Feed batch into the model
+                    with self.profiler.phase('forward'):
+                        loss_batch = self._calculate_batch_loss(batch_data)
+
+                    # Iterate over potentially multiple optimizers
+                    for optimizer_idx in range(self.num_optimizers):
+                        # Backward pass through the model
+                        with self.profiler.phase('backward'):
+                            self._backward_pass(loss_batch, optimizer_idx)
+                        if self.grad_cb_used:
+                            self.callbacks_handler.execute_gradient_update(optimizer_idx)
+
+                        with self.profiler.phase('optimizer_step'):
+                            # Optimizer step
+                            self._optimizer_step(optimizer_idx)
+                            # Optimizer zero grad
+                            self._optimizer_zero_grad(optimizer_idx)
+
+                    # Execute AMP scaler update only when optimizer is stepped and grads are zeroed out
+                    # https://pytorch.org/docs/stable/notes/amp_examples.html#gradient-accumulation
+                    if self.should_execute_optimizer_update():
+                        with self.profiler.phase('amp_update'):
+                            self.amp_scaler.update()
+
+                    self.callbacks_handler.execute_batch_end()
 
                 if self.total_iteration_idx + 1 == num_iterations:
                     break
 
             # Automatic end of epoch code - reports the train and if available validation loss and executes callbacks
-            self.auto_execute_end_of_epoch()
+            with self.profiler.phase('end_of_epoch_eval'):
+                self.auto_execute_end_of_epoch()
+            # Profile values are inserted into the history before the callbacks so that they report the current epoch
+            self.profiler.end_epoch()
             self.callbacks_handler.execute_epoch_end()
+            self.profiler.finalize_epoch()
 
             self.message_service.end_of_epoch_trigger()
 
@@ -282,8 +363,12 @@ class TrainLoop:
                       f'Current iteration index: {self.total_iteration_idx}')
                 break
 
-        self.auto_execute_end_of_training()
+        with self.profiler.phase('end_of_training_eval'):
+            self.auto_execute_end_of_training()
         self.callbacks_handler.execute_train_end()
+        self.profiler.end_training()
+        if self.metric_logger is not None:
+            self.metric_logger.close()
 
         return self.model
 
@@ -406,19 +491,31 @@ class TrainLoop:
         Returns:
             None
         """
-        loss_parsed = self.parse_loss(self.loss_batch_accum)
+        loss_parsed = self.loss_batch_accum.get_mean_loss(
+            ddp_handler=self.ddp_handler if self.ddp_training_mode else None
+        )
         self._print_save_loss(loss_parsed,
                               loss_type_name='accumulated_loss',
                               loss_print_description='AVG BATCH ACCUMULATED TRAIN LOSS')
-        self.loss_batch_accum = []
+        self.loss_batch_accum.reset()
 
         if (type(self.end_auto_eval) is bool and self.end_auto_eval) or \
                 (type(self.end_auto_eval) is int and self.epoch % self.end_auto_eval == 0):
-            train_loss = self.evaluate_loss_on_train_set()
+            train_loss_ci = None
+            if 'train' in self.fused_eval_datasets and isinstance(self.train_loss_eval, FullTrainLossEvaluation):
+                train_loss, _ = self.evaluate_loss_and_predict_on_train_set()
+            else:
+                train_loss, train_loss_ci = self.train_loss_eval.evaluate_loss(self, loss_parsed)
             self._print_save_loss(train_loss, loss_type_name='loss', loss_print_description='TRAIN LOSS')
+            if train_loss_ci is not None:
+                self._print_save_loss(train_loss_ci, loss_type_name='loss_ci',
+                                      loss_print_description='TRAIN LOSS CONFIDENCE INTERVAL (+/-)')
 
             if self.validation_loader is not None:
-                val_loss = self.evaluate_loss_on_validation_set()
+                if 'validation' in self.fused_eval_datasets:
+                    val_loss, _ = self.evaluate_loss_and_predict_on_validation_set()
+                else:
+                    val_loss = self.evaluate_loss_on_validation_set()
                 self._print_save_loss(val_loss, loss_type_name='val_loss', loss_print_description='VAL LOSS')
 
     def auto_execute_end_of_training(self):
@@ -429,7 +526,10 @@ class TrainLoop:
         """
         if self.test_loader is not None and \
                 ((type(self.end_auto_eval) is bool and self.end_auto_eval) or type(self.end_auto_eval) is int):
-            test_loss = self.evaluate_loss_on_test_set()
+            if 'test' in self.fused_eval_datasets:
+                test_loss, _ = self.evaluate_loss_and_predict_on_test_set()
+            else:
+                test_loss = self.evaluate_loss_on_test_set()
             # To keep TrainingHistory from complaining due to the non-matching metric result lengths the checking
             # has been turned off
             self._print_save_loss(test_loss, loss_type_name='train_end_test_loss', loss_print_description='TEST LOSS')
@@ -458,6 +558,25 @@ class TrainLoop:
             Note:
                 **Important to note:** all the returned loss Tensors are left on the original device (e.g. a GPU).
         """
+        loss_record, loss_names = self._stack_loss_record(loss_record)
+        loss_avg = torch.mean(loss_record, dim=0)
+
+        if loss_names is None:
+            return loss_avg
+        else:
+            return MultiLoss(dict(zip(loss_names, loss_avg)))
+
+    def _stack_loss_record(self, loss_record):
+        """Stack the list of batch losses into a single tensor synced across all the processes
+
+        Args:
+            loss_record (list): list of Tensor or MultiLoss losses from each processed batch
+
+        Returns:
+            (torch.DoubleTensor, list or None): stacked batch losses with dimensions ``[num_batches]`` in the case of
+            single loss or ``[num_batches, num_losses]`` in the case of multi-loss and the list of loss names which
+            is ``None`` in the case of single loss
+        """
         loss_names = None
 
         if isinstance(loss_record[0], MultiLoss):
@@ -474,12 +593,7 @@ class TrainLoop:
         if self.ddp_training_mode:
             loss_record = self.ddp_handler.mp_sync(loss_record)
 
-        loss_avg = torch.mean(loss_record, dim=0)
-
-        if loss_names is None:
-            return loss_avg
-        else:
-            return MultiLoss(dict(zip(loss_names, loss_avg)))
+        return loss_record, loss_names
 
     def _print_save_loss(self, loss_parsed, loss_type_name, loss_print_description):
         """Helper function which prints information about parsed loss and saves the loss results into the history
@@ -594,7 +708,7 @@ class TrainLoop:
 
         return loss
 
-    def evaluate_model_loss(self, data_loader, move_to_cpu=False, dataset_info=None):
+    def evaluate_model_loss(self, data_loader, move_to_cpu=False, dataset_info=None, return_batch_losses=False):
         """Run given dataset through the network without updating the weights and return the loss
 
         Args:
@@ -606,10 +720,15 @@ class TrainLoop:
                 :meth:`~aitoolbox.torchtrain.train_loop.train_loop.TrainLoop.evaluate_loss_on_train_set`,
                 :meth:`~aitoolbox.torchtrain.train_loop.train_loop.TrainLoop.evaluate_loss_on_validation_set` and
                 :meth:`~aitoolbox.torchtrain.train_loop.train_loop.TrainLoop.evaluate_loss_on_test_set` methods.
+            return_batch_losses (bool): if true, the losses of the individual batches are returned together with
+                the average loss. These are stacked into a double tensor with dimensions ``[num_batches]`` or
+                ``[num_batches, num_losses]`` in the case of multi loss.
 
         Returns:
-            torch.Tensor or MultiLoss: Calculated average loss over all the batches. In the case of multi loss,
-            the MultiLoss wrapper gets returned.
+            torch.Tensor or MultiLoss or (torch.Tensor or MultiLoss, torch.DoubleTensor): Calculated average loss
+            over all the batches. In the case of multi loss, the MultiLoss wrapper gets returned.
+            If ``return_batch_losses`` is set, the tuple of the average loss and the individual batch losses
+            is returned.
 
             Note:
                 **Important to note:** by default the returned loss tensors are left on the same device as they are
@@ -627,7 +746,7 @@ class TrainLoop:
         loss_avg = []
 
         with torch.no_grad():
-            for batch_data in tqdm(data_loader, desc=desc, disable=not self.is_main_process()):
+            for batch_data in tqdm(self.prefetch_to_device(data_loader), desc=desc, disable=not self.is_main_process()):
                 with amp.autocast(enabled=self.use_amp):
                     if self.batch_model_feed_def is None:
                         loss_batch = self.model.get_loss_eval(batch_data, self.criterion, self.device)
@@ -637,15 +756,22 @@ class TrainLoop:
 
                 loss_avg.append(loss_batch.detach())
 
-            loss_avg = self.parse_loss(loss_avg)
+            batch_losses, loss_names = self._stack_loss_record(loss_avg)
+            loss_avg = torch.mean(batch_losses, dim=0)
+            if loss_names is not None:
+                loss_avg = MultiLoss(dict(zip(loss_names, loss_avg)))
+
             if move_to_cpu:
                 loss_avg = loss_avg.cpu()
+                batch_losses = batch_losses.cpu()
 
         self.model.train()
 
+        if return_batch_losses:
+            return loss_avg, batch_losses
         return loss_avg
 
-    def predict_on_train_set(self, force_prediction=False, execute_callbacks=False):
+    def predict_on_train_set(self, force_prediction=False, execute_callbacks=False, ddp_gather=True):
         """Run train dataset through the network and return true target values, target predictions and metadata
 
         Args:
@@ -653,11 +779,19 @@ class TrainLoop:
                 This causes the old cached predictions to be overwritten.
             execute_callbacks (bool): If true, prediction loop will execute provided callbacks after prediction for
                 each batch has been made. Otherwise, callbacks at this position are ignored.
+            ddp_gather (bool): in the DDP training, if false, the predictions aren't gathered from all the processes
+                and only the predictions on the local dataset shard of the current process are returned. Duplicate
+                samples added by the DistributedSampler are dropped so that the shards can be used for the sharded
+                metric evaluation. Ignored outside the DDP training.
 
         Returns:
             (torch.Tensor, torch.Tensor, dict): y_pred, y_true, metadata
             in the form of dict of lists/torch.Tensors/np.arrays
         """
+        if self.ddp_training_mode and not ddp_gather:
+            return self._predict_on_dataset_shard(self.train_loader, 'train', 'train',
+                                                  force_prediction, execute_callbacks)
+
         if not self.prediction_store.has_train_predictions(self.total_iteration_idx) or force_prediction:
             predictions = self.predict_with_model(self.train_loader, execute_callbacks,
                                                   move_to_cpu=True, dataset_info={'type': 'train'})
@@ -667,7 +801,7 @@ class TrainLoop:
 
         return predictions
 
-    def predict_on_validation_set(self, force_prediction=False, execute_callbacks=False):
+    def predict_on_validation_set(self, force_prediction=False, execute_callbacks=False, ddp_gather=True):
         """Run validation dataset through the network and return true target values, target predictions and metadata
 
         Args:
@@ -675,11 +809,19 @@ class TrainLoop:
                 This causes the old cached predictions to be overwritten.
             execute_callbacks (bool): If true, prediction loop will execute provided callbacks after prediction for
                 each batch has been made. Otherwise, callbacks at this position are ignored.
+            ddp_gather (bool): in the DDP training, if false, the predictions aren't gathered from all the processes
+                and only the predictions on the local dataset shard of the current process are returned. Duplicate
+                samples added by the DistributedSampler are dropped so that the shards can be used for the sharded
+                metric evaluation. Ignored outside the DDP training.
 
         Returns:
             (torch.Tensor, torch.Tensor, dict): y_pred, y_true, metadata
             in the form of dict of lists/torch.Tensors/np.arrays
         """
+        if self.ddp_training_mode and not ddp_gather:
+            return self._predict_on_dataset_shard(self.validation_loader, 'val', 'validation',
+                                                  force_prediction, execute_callbacks)
+
         if not self.prediction_store.has_val_predictions(self.total_iteration_idx) or force_prediction:
             predictions = self.predict_with_model(self.validation_loader, execute_callbacks,
                                                   move_to_cpu=True, dataset_info={'type': 'validation'})
@@ -689,7 +831,7 @@ class TrainLoop:
 
         return predictions
 
-    def predict_on_test_set(self, force_prediction=False, execute_callbacks=False):
+    def predict_on_test_set(self, force_prediction=False, execute_callbacks=False, ddp_gather=True):
         """Run test dataset through the network and return true target values, target predictions and metadata
 
         Args:
@@ -697,11 +839,18 @@ class TrainLoop:
                 This causes the old cached predictions to be overwritten.
             execute_callbacks (bool): If true, prediction loop will execute provided callbacks after prediction for
                 each batch has been made. Otherwise, callbacks at this position are ignored.
+            ddp_gather (bool): in the DDP training, if false, the predictions aren't gathered from all the processes
+                and only the predictions on the local dataset shard of the current process are returned. Duplicate
+                samples added by the DistributedSampler are dropped so that the shards can be used for the sharded
+                metric evaluation. Ignored outside the DDP training.
 
         Returns:
             (torch.Tensor, torch.Tensor, dict): y_pred, y_true, metadata
             in the form of dict of lists/torch.Tensors/np.arrays
         """
+        if self.ddp_training_mode and not ddp_gather:
+            return self._predict_on_dataset_shard(self.test_loader, 'test', 'test', force_prediction, execute_callbacks)
+
         if not self.prediction_store.has_test_predictions(self.total_iteration_idx) or force_prediction:
             predictions = self.predict_with_model(self.test_loader, execute_callbacks,
                                                   move_to_cpu=True, dataset_info={'type': 'test'})
@@ -711,7 +860,32 @@ class TrainLoop:
 
         return predictions
 
-    def predict_with_model(self, data_loader, execute_callbacks=False, move_to_cpu=False, dataset_info=None):
+    def _predict_on_dataset_shard(self, data_loader, source_type, dataset_type, force_prediction, execute_callbacks):
+        """Run the local dataset shard of the current DDP process through the network without gathering the predictions
+
+        Args:
+            data_loader (torch.utils.data.DataLoader): dataloader with the DistributedSampler
+            source_type (str): prediction cache source type: ``train``, ``val`` or ``test``
+            dataset_type (str): dataset type passed as the dataset info: ``train``, ``validation`` or ``test``
+            force_prediction (bool): recompute the output prediction even if it is available in the prediction cache
+            execute_callbacks (bool): If true, prediction loop will execute provided callbacks after prediction for
+                each batch has been made
+
+        Returns:
+            (torch.Tensor, torch.Tensor, dict): y_pred, y_true, metadata of the local dataset shard
+        """
+        if not self.prediction_store.has_shard_predictions(source_type, self.total_iteration_idx) or force_prediction:
+            predictions = self.predict_with_model(data_loader, execute_callbacks, move_to_cpu=True,
+                                                  dataset_info={'type': dataset_type}, ddp_gather=False)
+            self.prediction_store.insert_shard_predictions(source_type, predictions, self.total_iteration_idx,
+                                                           force_prediction)
+        else:
+            predictions = self.prediction_store.get_shard_predictions(source_type, self.total_iteration_idx)
+
+        return predictions
+
+    def predict_with_model(self, data_loader, execute_callbacks=False, move_to_cpu=False, dataset_info=None,
+                           ddp_gather=True):
         """Run given dataset through the network and return true target values, target predictions and metadata
 
         Args:
@@ -726,6 +900,9 @@ class TrainLoop:
                 :meth:`~aitoolbox.torchtrain.train_loop.train_loop.TrainLoop.predict_on_train_set`,
                 :meth:`~aitoolbox.torchtrain.train_loop.train_loop.TrainLoop.predict_on_validation_set` and
                 :meth:`~aitoolbox.torchtrain.train_loop.train_loop.TrainLoop.predict_on_test_set` methods.
+            ddp_gather (bool): in the DDP training, should the predictions be gathered from all the processes.
+                Otherwise, only the local dataset shard predictions without the DistributedSampler duplicates
+                are returned.
 
         Returns:
             (torch.Tensor, torch.Tensor, dict): y_pred, y_true, metadata
@@ -739,9 +916,10 @@ class TrainLoop:
         self.model.eval()
 
         y_pred, y_test, metadata_list = [], [], []
+        self._reset_prediction_collator(data_loader, dataset_info)
 
         with torch.no_grad():
-            for batch_data in tqdm(data_loader, desc=desc, disable=not self.is_main_process()):
+            for batch_data in tqdm(self.prefetch_to_device(data_loader), desc=desc, disable=not self.is_main_process()):
                 with amp.autocast(enabled=self.use_amp):
                     if self.batch_model_feed_def is None:
                         y_pred_batch, y_test_batch, metadata_batch = self.model.get_predictions(batch_data, self.device)
@@ -757,12 +935,273 @@ class TrainLoop:
                         dataset_info
                     )
 
-                y_pred = self.collate_batch_pred_fn(y_pred_batch, y_pred)
-                y_test = self.collate_batch_pred_fn(y_test_batch, y_test)
+                if self.pred_collator is not None:
+                    self.pred_collator.append(y_pred_batch, y_test_batch, metadata_batch)
+                else:
+                    y_pred = self.collate_batch_pred_fn(y_pred_batch, y_pred)
+                    y_test = self.collate_batch_pred_fn(y_test_batch, y_test)
+
+                    if metadata_batch is not None:
+                        metadata_list.append(metadata_batch)
+
+            y_pred, y_test, metadata = self._combine_predictions(y_pred, y_test, metadata_list, move_to_cpu,
+                                                                 data_loader, ddp_gather)
+
+        self.model.train()
+
+        return y_pred, y_test, metadata
+
+    def evaluate_loss_and_predict_on_train_set(self, force_prediction=False, execute_callbacks=False,
+                                               float_dict_format=False):
+        """Run train dataset through the network once and return both the loss and the predictions
+
+        Args:
+            force_prediction (bool): recompute the loss and the output predictions even if they are available in
+                the prediction cache. This causes the old cached values to be overwritten.
+            execute_callbacks (bool): If true, prediction loop will execute provided callbacks after prediction for
+                each batch has been made. Otherwise, callbacks at this position are ignored.
+            float_dict_format (bool): if true, simplified loss representation is returned. In case of single loss,
+                a float is returned, while in case of multi-loss a dict extracted from MultiLoss wrapper is returned.
+
+        Returns:
+            (torch.Tensor or MultiLoss or float or dict, (torch.Tensor, torch.Tensor, dict)): train set loss and
+            predictions tuple of y_pred, y_true, metadata
+        """
+        if force_prediction or \
+                (not self.prediction_store.has_train_loss(self.total_iteration_idx) and
+                 not self.prediction_store.has_train_predictions(self.total_iteration_idx)):
+            loss, predictions = self.evaluate_loss_and_predict_with_model(self.train_loader, execute_callbacks,
+                                                                          move_to_cpu=True,
+                                                                          dataset_info={'type': 'train'})
+            self.prediction_store.insert_train_loss_and_predictions(loss, predictions, self.total_iteration_idx,
+                                                                    force_prediction)
+        else:
+            # One of the two is already cached, so only the missing one gets calculated
+            loss = self.evaluate_loss_on_train_set()
+            predictions = self.predict_on_train_set(execute_callbacks=execute_callbacks)
+
+        if float_dict_format:
+            loss = self.convert_loss_to_float_dict_format(loss)
+
+        return loss, predictions
+
+    def evaluate_loss_and_predict_on_validation_set(self, force_prediction=False, execute_callbacks=False,
+                                                    float_dict_format=False):
+        """Run validation dataset through the network once and return both the loss and the predictions
+
+        Args:
+            force_prediction (bool): recompute the loss and the output predictions even if they are available in
+                the prediction cache. This causes the old cached values to be overwritten.
+            execute_callbacks (bool): If true, prediction loop will execute provided callbacks after prediction for
+                each batch has been made. Otherwise, callbacks at this position are ignored.
+            float_dict_format (bool): if true, simplified loss representation is returned. In case of single loss,
+                a float is returned, while in case of multi-loss a dict extracted from MultiLoss wrapper is returned.
+
+        Returns:
+            (torch.Tensor or MultiLoss or float or dict, (torch.Tensor, torch.Tensor, dict)): validation set loss and
+            predictions tuple of y_pred, y_true, metadata
+        """
+        if force_prediction or \
+                (not self.prediction_store.has_val_loss(self.total_iteration_idx) and
+                 not self.prediction_store.has_val_predictions(self.total_iteration_idx)):
+            loss, predictions = self.evaluate_loss_and_predict_with_model(self.validation_loader, execute_callbacks,
+                                                                          move_to_cpu=True,
+                                                                          dataset_info={'type': 'validation'})
+            self.prediction_store.insert_val_loss_and_predictions(loss, predictions, self.total_iteration_idx,
+                                                                  force_prediction)
+        else:
+            # One of the two is already cached, so only the missing one gets calculated
+            loss = self.evaluate_loss_on_validation_set()
+            predictions = self.predict_on_validation_set(execute_callbacks=execute_callbacks)
+
+        if float_dict_format:
+            loss = self.convert_loss_to_float_dict_format(loss)
+
+        return loss, predictions
+
+    def evaluate_loss_and_predict_on_test_set(self, force_prediction=False, execute_callbacks=False,
+                                              float_dict_format=False):
+        """Run test dataset through the network once and return both the loss and the predictions
+
+        Args:
+            force_prediction (bool): recompute the loss and the output predictions even if they are available in
+                the prediction cache. This causes the old cached values to be overwritten.
+            execute_callbacks (bool): If true, prediction loop will execute provided callbacks after prediction for
+                each batch has been made. Otherwise, callbacks at this position are ignored.
+            float_dict_format (bool): if true, simplified loss representation is returned. In case of single loss,
+                a float is returned, while in case of multi-loss a dict extracted from MultiLoss wrapper is returned.
+
+        Returns:
+            (torch.Tensor or MultiLoss or float or dict, (torch.Tensor, torch.Tensor, dict)): test set loss and
+            predictions tuple of y_pred, y_true, metadata
+        """
+        if force_prediction or \
+                (not self.prediction_store.has_test_loss(self.total_iteration_idx) and
+                 not self.prediction_store.has_test_predictions(self.total_iteration_idx)):
+            loss, predictions = self.evaluate_loss_and_predict_with_model(self.test_loader, execute_callbacks,
+                                                                          move_to_cpu=True,
+                                                                          dataset_info={'type': 'test'})
+            self.prediction_store.insert_test_loss_and_predictions(loss, predictions, self.total_iteration_idx,
+                                                                   force_prediction)
+        else:
+            # One of the two is already cached, so only the missing one gets calculated
+            loss = self.evaluate_loss_on_test_set()
+            predictions = self.predict_on_test_set(execute_callbacks=execute_callbacks)
+
+        if float_dict_format:
+            loss = self.convert_loss_to_float_dict_format(loss)
+
+        return loss, predictions
+
+    def evaluate_loss_and_predict_with_model(self, data_loader, execute_callbacks=False, move_to_cpu=False,
+                                             dataset_info=None):
+        """Run given dataset through the network once and return the loss together with the predictions
+
+        Fused version of
+        :meth:`~aitoolbox.torchtrain.train_loop.train_loop.TrainLoop.evaluate_model_loss` and
+        :meth:`~aitoolbox.torchtrain.train_loop.train_loop.TrainLoop.predict_with_model` which makes only a single
+        pass over the dataset. Batches are fed into the model via the ``get_loss_and_predictions()`` method.
+
+        Args:
+            data_loader (torch.utils.data.DataLoader): dataloader containing the data on which the loss and
+                the output predictions are calculated
+            execute_callbacks (bool): If true, prediction loop will execute provided callbacks after prediction for
+                each batch has been made. Otherwise, callbacks at this position are ignored.
+            move_to_cpu (bool): should the loss and the predicted results be moved to the CPU. Otherwise, the returned
+                results are kept on the original device (which can also be a GPU).
+            dataset_info (dict or None): additional information describing the dataset inside the provided dataloader.
+
+        Returns:
+            (torch.Tensor or MultiLoss, (torch.Tensor, torch.Tensor, dict)): average loss over all the batches and
+            predictions tuple of y_pred, y_true, metadata in the form of dict of lists/torch.Tensors/np.arrays
+        """
+        desc = "Loss evaluation and predictions"
+        if isinstance(dataset_info, dict) and 'type' in dataset_info:
+            desc = f"{desc} on {dataset_info['type']}"
+
+        self.model = self.model.to(self.device)
+        if self.criterion is not None:
+            self.criterion = self.criterion.to(self.device)
+
+        self.model.eval()
+
+        loss_avg = []
+        y_pred, y_test, metadata_list = [], [], []
+        self._reset_prediction_collator(data_loader, dataset_info)
+
+        with torch.no_grad():
+            for batch_data in tqdm(self.prefetch_to_device(data_loader), desc=desc, disable=not self.is_main_process()):
+                with amp.autocast(enabled=self.use_amp):
+                    if self.batch_model_feed_def is None:
+                        loss_batch, y_pred_batch, y_test_batch, metadata_batch = \
+                            self.model.get_loss_and_predictions(batch_data, self.criterion, self.device)
+                    else:
+                        loss_batch, y_pred_batch, y_test_batch, metadata_batch = \
+                            self.batch_model_feed_def.get_loss_and_predictions(self.model, batch_data,
+                                                                               self.criterion, self.device)
+
+                loss_avg.append(loss_batch.detach())
+
+                if execute_callbacks:
+                    self.callbacks_handler.execute_after_batch_prediction(
+                        y_pred_batch, y_test_batch, metadata_batch,
+                        dataset_info
+                    )
+
+                if self.pred_collator is not None:
+                    self.pred_collator.append(y_pred_batch, y_test_batch, metadata_batch)
+                else:
+                    y_pred = self.collate_batch_pred_fn(y_pred_batch, y_pred)
+                    y_test = self.collate_batch_pred_fn(y_test_batch, y_test)
+
+                    if metadata_batch is not None:
+                        metadata_list.append(metadata_batch)
+
+            loss_avg = self.parse_loss(loss_avg)
+            if move_to_cpu:
+                loss_avg = loss_avg.cpu()
+
+            y_pred, y_test, metadata = self._combine_predictions(y_pred, y_test, metadata_list, move_to_cpu,
+                                                                 data_loader)
+
+        self.model.train()
+
+        return loss_avg, (y_pred, y_test, metadata)
+
+    def _get_model_state_key(self):
+        """Get the key identifying the current model state used by the prediction cache
+
+        Any in-place update of the model parameters or buffers (e.g. the optimizer step or loading of the checkpoint)
+        increments their version counter and consequently changes the key. The batch feed definition in use is also
+        part of the key.
+
+        Returns:
+            tuple or None: model state key. In DDP training ``None`` is returned as the caching decisions have to be
+            identical across all the processes which otherwise wait for each other in the prediction gathering.
+        """
+        if self.ddp_training_mode:
+            return None
+
+        model_state = tuple((id(t), t._version) for t in itertools.chain(self.model.parameters(), self.model.buffers()))
+        return hash(model_state), id(self.batch_model_feed_def)
+
+    def _reset_prediction_collator(self, data_loader, dataset_info=None):
+        """Prepare the preallocated prediction collator (if used) for the new pass over the dataset
+
+        When the prediction store has the disk storage backend, the train, validation and test set predictions are
+        streamed directly into the storage files.
+
+        Args:
+            data_loader (torch.utils.data.DataLoader): dataloader on which the predictions will be made
+            dataset_info (dict or None): additional information describing the dataset inside the provided dataloader
+
+        Returns:
+            None
+        """
+        if self.pred_collator is not None:
+            source_name = None
+            if isinstance(dataset_info, dict):
+                source_name = {'train': 'train_pred', 'validation': 'val_pred', 'test': 'test_pred'}.get(
+                    dataset_info.get('type')
+                )
+
+            storage = None
+            # In DDP the predictions are gathered from the device buffers
+            if source_name is not None and not self.ddp_training_mode and self.prediction_store.storage is not None:
+                storage = self.prediction_store.storage
+                # Purge the files of the previous iteration before streaming the new predictions
+                self.prediction_store.auto_purge(self.total_iteration_idx)
+
+            self.pred_collator.reset(
+                get_num_dataset_examples(data_loader),
+                pin_memory=False if self.ddp_training_mode else None,
+                storage=storage, source_name=source_name
+            )
+
+    def _combine_predictions(self, y_pred, y_test, metadata_list, move_to_cpu=False, data_loader=None,
+                             ddp_gather=True):
+        """Combine the collected batch predictions into the final dataset predictions
+
+        When the preallocated prediction collator is used, the predictions are taken from its buffers and
+        the provided ``y_pred``, ``y_test`` and ``metadata_list`` are ignored.
 
-                if metadata_batch is not None:
-                    metadata_list.append(metadata_batch)
+        Args:
+            y_pred (list): collated batch output predictions
+            y_test (list): collated batch targets
+            metadata_list (list): list of batch metadata dicts
+            move_to_cpu (bool): should the combined results be moved to the CPU
+            data_loader (torch.utils.data.DataLoader or None): dataloader on which the predictions were made.
+                In DDP its DistributedSampler is used to restore the original dataset order of the predictions
+                gathered from all the processes.
+            ddp_gather (bool): in DDP, should the predictions be gathered from all the processes or should only
+                the local dataset shard predictions be kept
 
+        Returns:
+            (torch.Tensor, torch.Tensor, dict): y_pred, y_true, metadata
+        """
+        if self.pred_collator is not None:
+            y_pred, y_test, metadata = self.pred_collator.get_predictions()
+        else:
             y_pred = self.pred_transform_fn(y_pred)
             y_test = self.pred_transform_fn(y_test)
 
@@ -770,21 +1209,36 @@ class TrainLoop:
             if len(metadata_list) > 0:
                 metadata = dict_util.combine_prediction_metadata_batches(metadata_list)
 
-            if self.ddp_training_mode:
-                y_pred = self.ddp_handler.mp_sync(y_pred)
-                y_test = self.ddp_handler.mp_sync(y_test)
-                if len(metadata) > 0:
-                    metadata = self.ddp_handler.mp_sync_dict(metadata)
+        if self.ddp_training_mode and ddp_gather:
+            y_pred, y_test, metadata = self.ddp_handler.mp_sync_predictions(
+                y_pred, y_test, metadata, sampler=get_shard_sampler(data_loader)
+            )
+        elif self.ddp_training_mode:
+            y_pred, y_test, metadata = self.ddp_handler.drop_padded_samples(
+                y_pred, y_test, metadata, sampler=get_shard_sampler(data_loader)
+            )
 
-            if move_to_cpu:
-                y_pred = y_pred.cpu()
-                y_test = y_test.cpu()
-                metadata = {k: v.cpu() if isinstance(v, torch.Tensor) else v for k, v in metadata.items()}
-
-        self.model.train()
+        if move_to_cpu:
+            y_pred = y_pred.cpu()
+            y_test = y_test.cpu()
+            metadata = {k: v.cpu() if isinstance(v, torch.Tensor) else v for k, v in metadata.items()}
 
         return y_pred, y_test, metadata
 
+    def prefetch_to_device(self, data_loader):
+        """Wrap the data loader into the device prefetching loader if the prefetching is enabled
+
+        Args:
+            data_loader (torch.utils.data.DataLoader or collections.abc.Iterable): data loader to be iterated
+
+        Returns:
+            torch.utils.data.DataLoader or DevicePrefetchLoader: prefetching data loader or the original data loader
+            if the prefetching is disabled
+        """
+        if self.device_prefetch > 0 and not isinstance(data_loader, DevicePrefetchLoader):
+            return DevicePrefetchLoader(data_loader, self.device, num_prefetch=self.device_prefetch)
+        return data_loader
+
     def insert_metric_result_into_history(self, metric_name, metric_result):
         """Insert a metric result into the train history
 
@@ -796,6 +1250,19 @@ class TrainLoop:
         """
         self.train_history.insert_single_result_into_history(metric_name, metric_result)
 
+    def get_metric_logger(self):
+        """Get the asynchronous metric logger shared by all the metric logging callbacks
+
+        Callbacks register their own logging backend with the shared logger so that all of them use the same
+        background worker thread. The logger is closed by the TrainLoop at the end of training.
+
+        Returns:
+            aitoolbox.torchtrain.train_loop.components.metric_logger.AsyncMetricLogger: shared metric logger
+        """
+        if self.metric_logger is None:
+            self.metric_logger = AsyncMetricLogger()
+        return self.metric_logger
+
     def get_schedulers(self):
         """Get the registered schedulers
 
@@ -878,7 +1345,8 @@ class TrainLoop:
     def _train_ddp(self, num_epochs, num_iterations, callbacks=None, grad_accumulation=1,
                    ddp_model_args=None, in_process_data_load=None,
                    num_nodes=1, node_rank=0, num_gpus=torch.cuda.device_count(),
-                   backend='nccl', init_method='env://', on_gpu=True):
+                   backend='nccl', init_method='env://', on_gpu=True, loader_tuning=False,
+                   shared_memory_data=False):
         """Train the model using the train loop in the Distributed Data Parallel setting
 
         During the training, multiple processes will be spawned, one for each of the available GPUs.
@@ -896,6 +1364,7 @@ class TrainLoop:
                 the on_multiprocess_start() callback function.
                 When using this data loading option bear in mind that loaded dataset will be replicated in memory for
                 every spawned training process. This can in turn in cause extensive overall memory consumption.
+                To avoid the replication, consider using the ``shared_memory_data`` option instead.
             num_nodes (int): number of nodes in the cluster
             node_rank (int): rank of the current node
             num_gpus (int): number of GPUs in the node
@@ -904,7 +1373,35 @@ class TrainLoop:
             init_method (str): URL specifying how to initialize the process group. For more information look up
                 the documentation for :func:`torch.distributed.init_process_group`.
             on_gpu (bool): if the DDP training is executed on the GPU or on the CPU
+            loader_tuning (bool or DataLoaderAutoTuner): when the data loaders are rebuilt with the distributed
+                samplers, all their original settings are preserved. To instead select the number of workers,
+                their prefetch depth and the memory pinning for each process based on the available CPUs either:
+
+                * set this parameter to ``True`` to use the default
+                  :class:`~aitoolbox.torchtrain.train_loop.components.loader_builder.DataLoaderAutoTuner`
+                * provide the configured DataLoaderAutoTuner as this parameter
+
+            shared_memory_data (bool or SharedMemoryDatasetStore): instead of replicating the datasets of
+                the provided data loaders in every spawned process, place their backing storage into the shared memory
+                once and let all the processes attach to it without copying. Set to ``True`` to use the default
+                :class:`~aitoolbox.torchtrain.data.shared_memory.SharedMemoryDatasetStore` or provide
+                the configured store as this parameter. Supported are the BasicDataset, ListDataset and
+                TensorDataset datasets.
         """
+        if loader_tuning is True:
+            loader_tuning = DataLoaderAutoTuner()
+        elif loader_tuning is False:
+            loader_tuning = None
+        elif not isinstance(loader_tuning, DataLoaderAutoTuner):
+            raise TypeError('Provided loader_tuning is not bool or inherited from DataLoaderAutoTuner')
+        from aitoolbox.torchtrain.data.shared_memory import SharedMemoryDatasetStore
+        if shared_memory_data is True:
+            shared_memory_data = SharedMemoryDatasetStore()
+        elif shared_memory_data is False:
+            shared_memory_data = None
+        elif not isinstance(shared_memory_data, SharedMemoryDatasetStore):
+            raise TypeError('Provided shared_memory_data is not bool or inherited from SharedMemoryDatasetStore')
+
         self.ddp_training_mode = True
         os.environ['MASTER_ADDR'] = 'localhost'
         os.environ['MASTER_PORT'] = '8888'
@@ -919,20 +1416,33 @@ class TrainLoop:
             'backend': backend,
             'on_gpu': on_gpu,
             'init_method': init_method,
-            'ddp_model_args': ddp_model_args if ddp_model_args is not None else {}
+            'ddp_model_args': ddp_model_args if ddp_model_args is not None else {},
+            'loader_tuner': loader_tuning
         }
 
         from aitoolbox.torchtrain.callbacks.abstract import AbstractCallback
         if isinstance(in_process_data_load, AbstractCallback):
             in_process_data_load = [in_process_data_load]
 
-        mp.spawn(
-            self._spawn_fit,
-            args=(
-                ddp_args, num_epochs, num_iterations, callbacks, grad_accumulation, in_process_data_load
-            ),
-            nprocs=ddp_args['world_size']
-        )
+        original_loaders = self.train_loader, self.validation_loader, self.test_loader
+        if shared_memory_data is not None:
+            self.train_loader, self.validation_loader, self.test_loader = [
+                shared_memory_data.share_data_loader(data_loader) if data_loader is not None else None
+                for data_loader in original_loaders
+            ]
+
+        try:
+            mp.spawn(
+                self._spawn_fit,
+                args=(
+                    ddp_args, num_epochs, num_iterations, callbacks, grad_accumulation, in_process_data_load
+                ),
+                nprocs=ddp_args['world_size']
+            )
+        finally:
+            if shared_memory_data is not None:
+                self.train_loader, self.validation_loader, self.test_loader = original_loaders
+                shared_memory_data.cleanup()
 
     def _spawn_fit(self, gpu, ddp_args, num_epochs, num_iterations, callbacks, grad_accumulation, in_process_data_load):
         """Helper function that prepares the TrainLoop state inside each of the spawned processes and initiates training
@@ -977,7 +1487,10 @@ class TrainLoop:
         self.callbacks_handler.execute_multiprocess_start()
         # Add DistributedSampler to the data loaders
         self.ddp_handler = DDPHandler(self)
-        self.ddp_handler.add_distributed_samplers(ddp_args['world_size'], self.ddp_rank)
+        self.ddp_handler.add_distributed_samplers(ddp_args['world_size'], self.ddp_rank,
+                                                  loader_tuner=ddp_args['loader_tuner'],
+                                                  num_local_processes=ddp_args['num_gpus'],
+                                                  on_gpu=ddp_args['on_gpu'])
 
         # Move to the GPU belonging to the process
         self.model = self.model.to(self.device)
@@ -18,7 +18,8 @@ class TrainLoopCheckpoint(TrainLoop):
                  iteration_save_freq=0,
                  collate_batch_pred_fn=append_predictions, pred_transform_fn=torch_cat_transf,
                  end_auto_eval=True, lazy_experiment_save=False, print_callbacks=False,
-                 gpu_mode='single', cuda_device_idx=None, use_amp=False):
+                 gpu_mode='single', cuda_device_idx=None, use_amp=False, profiler=None,
+                 device_prefetch=0, prediction_storage=None):
         """TrainLoop with the automatic model check-pointing at the end of each epoch
 
         Args:
@@ -78,11 +79,19 @@ class TrainLoopCheckpoint(TrainLoop):
                   initialization params
                 * provide custom AMP :class:`~torch.cuda.amp.GradScaler` initialization parameters as a dict as
                   this parameter
+
+            profiler (TrainLoopProfiler or None): optional profiler recording the per-phase timings of the training.
+                The trace files are saved into the experiment folder.
+            device_prefetch (int): number of batches prefetched onto the device ahead of the current training or
+                evaluation step. Set to ``0`` (default) to disable the prefetching.
+            prediction_storage (DiskPredictionStorage or None): optional disk storage backend of the prediction
+                cache. If the storage isn't given the folder, the prediction files are kept in the experiment folder.
         """
         TrainLoop.__init__(self, model, train_loader, validation_loader, test_loader, optimizer, criterion,
                            collate_batch_pred_fn, pred_transform_fn,
                            end_auto_eval, lazy_experiment_save, print_callbacks,
-                           gpu_mode, cuda_device_idx, use_amp)
+                           gpu_mode, cuda_device_idx, use_amp, profiler=profiler, device_prefetch=device_prefetch,
+                           prediction_storage=prediction_storage)
         self.project_name = project_name
         self.experiment_name = experiment_name
         self.local_model_result_folder_path = os.path.expanduser(local_model_result_folder_path)
@@ -134,7 +143,8 @@ class TrainLoopEndSave(TrainLoop):
                  cloud_save_mode='s3', bucket_name='model-result', cloud_dir_prefix='', source_dirs=(),
                  collate_batch_pred_fn=append_predictions, pred_transform_fn=torch_cat_transf,
                  end_auto_eval=True, lazy_experiment_save=False, print_callbacks=False,
-                 gpu_mode='single', cuda_device_idx=None, use_amp=False):
+                 gpu_mode='single', cuda_device_idx=None, use_amp=False, profiler=None,
+                 device_prefetch=0, prediction_storage=None):
         """TrainLoop with the model performance evaluation and final model saving at the end of the training process
 
         Args:
@@ -191,11 +201,19 @@ class TrainLoopEndSave(TrainLoop):
                   initialization params
                 * provide custom AMP :class:`~torch.cuda.amp.GradScaler` initialization parameters as a dict as
                   this parameter
+
+            profiler (TrainLoopProfiler or None): optional profiler recording the per-phase timings of the training.
+                The trace files are saved into the experiment folder.
+            device_prefetch (int): number of batches prefetched onto the device ahead of the current training or
+                evaluation step. Set to ``0`` (default) to disable the prefetching.
+            prediction_storage (DiskPredictionStorage or None): optional disk storage backend of the prediction
+                cache. If the storage isn't given the folder, the prediction files are kept in the experiment folder.
         """
         TrainLoop.__init__(self, model, train_loader, validation_loader, test_loader, optimizer, criterion,
                            collate_batch_pred_fn, pred_transform_fn,
                            end_auto_eval, lazy_experiment_save, print_callbacks,
-                           gpu_mode, cuda_device_idx, use_amp)
+                           gpu_mode, cuda_device_idx, use_amp, profiler=profiler, device_prefetch=device_prefetch,
+                           prediction_storage=prediction_storage)
         self.project_name = project_name
         self.experiment_name = experiment_name
         self.local_model_result_folder_path = os.path.expanduser(local_model_result_folder_path)
@@ -251,7 +269,8 @@ class TrainLoopCheckpointEndSave(TrainLoopEndSave):
                  iteration_save_freq=0,
                  collate_batch_pred_fn=append_predictions, pred_transform_fn=torch_cat_transf,
                  end_auto_eval=True, lazy_experiment_save=False, print_callbacks=False,
-                 gpu_mode='single', cuda_device_idx=None, use_amp=False):
+                 gpu_mode='single', cuda_device_idx=None, use_amp=False, profiler=None,
+                 device_prefetch=0, prediction_storage=None):
         """TrainLoop both saving model check-pointing at the end of each epoch and model performance reporting
             and model saving at the end of the training process
 
@@ -316,6 +335,13 @@ class TrainLoopCheckpointEndSave(TrainLoopEndSave):
                   initialization params
                 * provide custom AMP :class:`~torch.cuda.amp.GradScaler` initialization parameters as a dict as
                   this parameter
+
+            profiler (TrainLoopProfiler or None): optional profiler recording the per-phase timings of the training.
+                The trace files are saved into the experiment folder.
+            device_prefetch (int): number of batches prefetched onto the device ahead of the current training or
+                evaluation step. Set to ``0`` (default) to disable the prefetching.
+            prediction_storage (DiskPredictionStorage or None): optional disk storage backend of the prediction
+                cache. If the storage isn't given the folder, the prediction files are kept in the experiment folder.
         """
         if 'experiment_file_path' not in hyperparams:
             hyperparams['experiment_file_path'] = inspect.getframeinfo(inspect.currentframe().f_back).filename
@@ -329,7 +355,9 @@ class TrainLoopCheckpointEndSave(TrainLoopEndSave):
                                   cloud_save_mode, bucket_name, cloud_dir_prefix, source_dirs,
                                   collate_batch_pred_fn, pred_transform_fn,
                                   end_auto_eval, lazy_experiment_save, print_callbacks,
-                                  gpu_mode, cuda_device_idx, use_amp)
+                                  gpu_mode, cuda_device_idx, use_amp,
+                                  profiler=profiler, device_prefetch=device_prefetch,
+                                  prediction_storage=prediction_storage)
         self.rm_subopt_local_models = rm_subopt_local_models
         self.iteration_save_freq = iteration_save_freq
 
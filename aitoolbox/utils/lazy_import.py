@@ -0,0 +1,40 @@
+import importlib
+import sys
+
+
+def lazy_module_attributes(module_name, attribute_modules):
+    """Build the module level ``__getattr__`` and ``__dir__`` which import the public attributes only on first access
+
+    Package ``__init__`` modules use this (PEP 562) to expose their public API without importing all the submodules
+    and with them the whole underlying ML ecosystem at the package import time. After the first access the imported
+    attribute is cached in the module globals so the ``__getattr__`` is not invoked anymore for that attribute.
+
+    Args:
+        module_name (str): ``__name__`` of the module exposing the lazy attributes
+        attribute_modules (dict): mapping of the exposed attribute name to the full name of the module where
+            the attribute is defined
+
+    Returns:
+        (callable, callable): module ``__getattr__`` and ``__dir__`` functions
+    """
+    def __getattr__(name):
+        if name in attribute_modules:
+            attribute = getattr(importlib.import_module(attribute_modules[name]), name)
+        elif name.startswith('__'):
+            raise AttributeError(f'module {module_name!r} has no attribute {name!r}')
+        else:
+            # Submodules used to be available as the package attributes once the package was imported
+            try:
+                attribute = importlib.import_module(f'{module_name}.{name}')
+            except ModuleNotFoundError as e:
+                if e.name != f'{module_name}.{name}':
+                    raise
+                raise AttributeError(f'module {module_name!r} has no attribute {name!r}') from None
+
+        setattr(sys.modules[module_name], name, attribute)
+        return attribute
+
+    def __dir__():
+        return sorted(set(vars(sys.modules[module_name])) | set(attribute_modules))
+
+    return __getattr__, __dir__
@@ -1,5 +1,7 @@
+import os
 import types
 import functools
+from concurrent.futures import ProcessPoolExecutor
 
 
 def function_exists(object_to_check, fn_name):
@@ -95,3 +97,32 @@ def flatten_list_of_lists(nested_list):
         return [item for sublist in nested_list for item in sublist]
     else:
         return None
+
+
+def map_in_process_chunks(fn, *sequences, num_workers=0, chunk_size=1000):
+    """Apply the function to the chunks of the sequences in parallel processes
+
+    When the parallel processing is enabled and the sequences are longer than a single chunk, the sequences are split
+    into the aligned chunks of ``chunk_size`` elements and the function is applied to each chunk in the process pool.
+    Otherwise, the function is applied to the whole sequences in the current process.
+
+    Args:
+        fn (callable): picklable function receiving the aligned chunk of each of the sequences
+        *sequences: sequences of the same length which are split into the chunks
+        num_workers (int or None): number of processes. When ``0`` or ``1`` the function is applied in the current
+            process. If ``None``, the number of CPUs is used.
+        chunk_size (int): number of sequence elements in a single chunk
+
+    Returns:
+        list: function results for each of the chunks in the order of the chunks
+    """
+    if num_workers is None:
+        num_workers = os.cpu_count()
+    num_elements = len(sequences[0])
+
+    if num_workers > 1 and num_elements > chunk_size:
+        chunk_starts = range(0, num_elements, chunk_size)
+        chunked_sequences = [[sequence[i:i + chunk_size] for i in chunk_starts] for sequence in sequences]
+        with ProcessPoolExecutor(max_workers=num_workers) as executor:
+            return list(executor.map(fn, *chunked_sequences))
+    return [fn(*sequences)]
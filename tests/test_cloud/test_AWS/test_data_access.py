@@ -1,11 +1,15 @@
 import unittest
 
 import os
+import shutil
 import boto3
+import botocore
 from moto import mock_s3
 
 from tests.setup_moto_env import setup_aws_for_test
-from aitoolbox.cloud.AWS.data_access import BaseDataSaver, BaseDataLoader
+from aitoolbox.cloud.AWS.data_access import BaseDataSaver, BaseDataLoader, is_retryable_s3_error, \
+    get_s3_transfer_config
+from aitoolbox.cloud.transfer import CloudTransferEngine
 
 setup_aws_for_test()
 BUCKET_NAME = 'test-bucket'
@@ -74,6 +78,46 @@ class TestBaseDataSaver(unittest.TestCase):
              'resources/upload_folder/some_file.txt', 'upload_folder/file_2.txt', 'upload_folder/some_file.txt']
         )
 
+    @mock_s3
+    def test_parallel_folder_upload_stats(self):
+        s3 = boto3.resource('s3', region_name='us-east-1')
+        s3.create_bucket(Bucket=BUCKET_NAME)
+
+        transfer_engine = CloudTransferEngine(max_concurrency=3, multipart_chunksize=5 * 2**20)
+        data_saver = BaseDataSaver(bucket_name=BUCKET_NAME, transfer_engine=transfer_engine)
+        self.assertEqual(data_saver.transfer_config.multipart_chunksize, 5 * 2**20)
+        self.assertEqual(data_saver.transfer_config.max_concurrency, 3)
+        # Files are already transferred in parallel so each of them gets a single connection
+        self.assertEqual(get_s3_transfer_config(transfer_engine, num_files=3).max_concurrency, 1)
+
+        data_saver.save_folder(os.path.join(THIS_DIR, 'resources'), 'resources')
+        stats = data_saver.transfer_engine.get_stats()
+        self.assertEqual(stats['num_files'], 3)
+        self.assertEqual(
+            stats['num_bytes'],
+            sum(os.path.getsize(local_path) for local_path in [
+                os.path.join(THIS_DIR, 'resources/file.txt'),
+                os.path.join(THIS_DIR, 'resources/upload_folder/file_2.txt'),
+                os.path.join(THIS_DIR, 'resources/upload_folder/some_file.txt')
+            ])
+        )
+
+    def test_is_retryable_s3_error(self):
+        def client_error(code, status_code):
+            return botocore.exceptions.ClientError(
+                {'Error': {'Code': code}, 'ResponseMetadata': {'HTTPStatusCode': status_code}}, 'GetObject'
+            )
+
+        self.assertFalse(is_retryable_s3_error(client_error('404', 404)))
+        self.assertFalse(is_retryable_s3_error(client_error('AccessDenied', 403)))
+        self.assertTrue(is_retryable_s3_error(client_error('SlowDown', 503)))
+        self.assertTrue(is_retryable_s3_error(client_error('Throttling', 429)))
+        self.assertFalse(is_retryable_s3_error(client_error('InvalidRequest', 400)))
+        self.assertTrue(is_retryable_s3_error(client_error('InternalError', None)))
+        self.assertFalse(is_retryable_s3_error(client_error('NoSuchKey', None)))
+        self.assertTrue(is_retryable_s3_error(ConnectionError()))
+        self.assertFalse(is_retryable_s3_error(FileNotFoundError()))
+
 
 class TestBaseDataLoader(unittest.TestCase):
     @mock_s3
@@ -107,3 +151,30 @@ class TestBaseDataLoader(unittest.TestCase):
             os.remove(dl_file_path)
         if os.path.exists(dl_some_folder_file_path):
             os.remove(dl_some_folder_file_path)
+
+    @mock_s3
+    def test_folder_download(self):
+        s3 = boto3.resource('s3', region_name='us-east-1')
+        s3.create_bucket(Bucket=BUCKET_NAME)
+        BaseDataSaver(bucket_name=BUCKET_NAME).save_folder(os.path.join(THIS_DIR, 'resources'), 'resources')
+        BaseDataSaver(bucket_name=BUCKET_NAME).save_file(os.path.join(THIS_DIR, 'resources/file.txt'),
+                                                         'resources_other/file.txt')
+
+        data_loader = BaseDataLoader(bucket_name=BUCKET_NAME, local_base_data_folder_path=THIS_DIR)
+        dl_folder_path = os.path.join(THIS_DIR, 'downloaded_folder')
+        data_loader.load_folder('resources', dl_folder_path)
+
+        downloaded_files = sorted(os.path.relpath(os.path.join(root, f), dl_folder_path)
+                                  for root, _, files in os.walk(dl_folder_path) for f in files)
+        self.assertEqual(downloaded_files, ['file.txt', 'upload_folder/file_2.txt', 'upload_folder/some_file.txt'])
+
+        with open(os.path.join(THIS_DIR, 'resources/upload_folder/some_file.txt')) as f_orig, \
+                open(os.path.join(dl_folder_path, 'upload_folder/some_file.txt')) as f_dl:
+            self.assertEqual(f_orig.read(), f_dl.read())
+        self.assertEqual(data_loader.transfer_engine.get_stats()['num_files'], 3)
+
+        # Already downloaded files are skipped
+        data_loader.load_folder('resources', dl_folder_path)
+        self.assertEqual(data_loader.transfer_engine.get_stats()['num_files'], 3)
+
+        shutil.rmtree(dl_folder_path)
@@ -0,0 +1,141 @@
+import unittest
+import os
+import shutil
+import tempfile
+import threading
+from types import SimpleNamespace
+
+from aitoolbox.cloud.transfer import CloudTransferEngine, list_folder_files, is_retryable_error
+
+
+class LocalObjectStore:
+    def __init__(self, num_failures=0):
+        """Local stand-in object store failing the first uploads of every object"""
+        self.objects = {}
+        self.num_failures = num_failures
+        self.upload_attempts = {}
+        self.lock = threading.Lock()
+
+    def upload(self, local_file_path, key):
+        with self.lock:
+            self.upload_attempts[key] = self.upload_attempts.get(key, 0) + 1
+            if self.upload_attempts[key] <= self.num_failures:
+                raise ConnectionError(f'Connection reset while uploading {key}')
+
+        with open(local_file_path, 'rb') as f:
+            data = f.read()
+        with self.lock:
+            self.objects[key] = data
+
+
+class TestCloudTransferEngine(unittest.TestCase):
+    def setUp(self):
+        self.local_folder = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.local_folder, 'sub'))
+        for i in range(20):
+            with open(os.path.join(self.local_folder, 'sub' if i % 2 else '', f'file_{i}.txt'), 'w') as f:
+                f.write('x' * i)
+
+    def tearDown(self):
+        shutil.rmtree(self.local_folder)
+
+    def get_upload_jobs(self, store, cloud_folder_path='run'):
+        return [
+            (lambda local_path=local_path, key=key: store.upload(local_path, key), os.path.getsize(local_path))
+            for local_path, key in list_folder_files(self.local_folder, cloud_folder_path)
+        ]
+
+    def test_list_folder_files(self):
+        file_paths = list_folder_files(self.local_folder, 'run')
+        self.assertEqual(len(file_paths), 20)
+        self.assertIn((os.path.join(self.local_folder, 'sub', 'file_1.txt'), 'run/sub/file_1.txt'), file_paths)
+        self.assertIn((os.path.join(self.local_folder, 'file_0.txt'), 'run/file_0.txt'), file_paths)
+
+    def test_transfer_many(self):
+        store = LocalObjectStore()
+        engine = CloudTransferEngine(max_concurrency=4)
+        engine.transfer_many(self.get_upload_jobs(store))
+
+        self.assertEqual(len(store.objects), 20)
+        self.assertEqual(store.objects['run/sub/file_19.txt'], b'x' * 19)
+
+        stats = engine.get_stats()
+        self.assertEqual(stats['num_files'], 20)
+        self.assertEqual(stats['num_bytes'], sum(range(20)))
+        self.assertEqual(stats['num_retries'], 0)
+        self.assertGreater(stats['transfer_time'], 0.)
+
+        engine.reset_stats()
+        self.assertEqual(engine.get_stats()['num_files'], 0)
+
+    def test_retry_with_backoff(self):
+        store = LocalObjectStore(num_failures=2)
+        engine = CloudTransferEngine(max_concurrency=8, num_retries=2, retry_backoff=0.001)
+        engine.transfer_many(self.get_upload_jobs(store))
+
+        self.assertEqual(len(store.objects), 20)
+        self.assertEqual(engine.get_stats()['num_retries'], 40)
+        self.assertEqual(engine.get_stats()['num_failed'], 0)
+
+    def test_failure_after_retries(self):
+        store = LocalObjectStore(num_failures=3)
+        engine = CloudTransferEngine(num_retries=1, retry_backoff=0.001)
+
+        with self.assertRaises(ConnectionError):
+            engine.transfer_many(self.get_upload_jobs(store))
+        self.assertEqual(len(store.objects), 0)
+        self.assertEqual(engine.get_stats()['num_failed'], 20)
+
+        # Missing local file is not retried
+        store = LocalObjectStore()
+        with self.assertRaises(FileNotFoundError):
+            engine.transfer(lambda: store.upload('missing_file.txt', 'missing'))
+        self.assertEqual(store.upload_attempts['missing'], 1)
+
+    def test_per_file_concurrency(self):
+        engine = CloudTransferEngine(max_concurrency=10)
+        self.assertEqual(engine.get_per_file_concurrency(), 10)
+        self.assertEqual(engine.get_per_file_concurrency(0), 10)
+        self.assertEqual(engine.get_per_file_concurrency(3), 3)
+        self.assertEqual(engine.get_per_file_concurrency(10), 1)
+        self.assertEqual(engine.get_per_file_concurrency(100), 1)
+
+        for num_files in range(1, 30):
+            concurrent_files = min(engine.max_concurrency, num_files)
+            self.assertLessEqual(concurrent_files * engine.get_per_file_concurrency(num_files), 10)
+
+    def test_is_retryable_error(self):
+        class HTTPError(Exception):
+            def __init__(self, code):
+                super().__init__()
+                self.code = code
+
+        class ResponseError(Exception):
+            def __init__(self, status_code):
+                super().__init__()
+                self.response = SimpleNamespace(status_code=status_code)
+
+        class ReadTimeout(OSError):
+            pass
+
+        self.assertTrue(is_retryable_error(ConnectionResetError()))
+        self.assertTrue(is_retryable_error(TimeoutError()))
+        self.assertTrue(is_retryable_error(ReadTimeout()))
+        self.assertTrue(is_retryable_error(HTTPError(503)))
+        self.assertTrue(is_retryable_error(HTTPError(429)))
+        self.assertTrue(is_retryable_error(ResponseError(500)))
+        self.assertFalse(is_retryable_error(HTTPError(400)))
+        self.assertFalse(is_retryable_error(HTTPError(403)))
+        self.assertFalse(is_retryable_error(ResponseError(404)))
+        self.assertFalse(is_retryable_error(FileNotFoundError()))
+        self.assertFalse(is_retryable_error(ValueError()))
+
+    def test_retry_wait(self):
+        engine = CloudTransferEngine(retry_backoff=0.5, max_retry_backoff=3.)
+        self.assertEqual([engine.get_retry_wait(i) for i in range(4)], [0.5, 1., 2., 3.])
+
+    def test_param_checks(self):
+        with self.assertRaises(ValueError):
+            CloudTransferEngine(max_concurrency=0)
+        with self.assertRaises(ValueError):
+            CloudTransferEngine(num_retries=-1)
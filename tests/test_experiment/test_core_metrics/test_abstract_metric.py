@@ -1,6 +1,10 @@
 import unittest
+import numpy as np
 
 from tests.utils import *
+from aitoolbox.experiment.core_metrics.classification import AccuracyMetric, ROCAUCMetric, F1ScoreMetric, \
+    PrecisionMetric, RecallMetric
+from aitoolbox.experiment.core_metrics.regression import MeanSquaredErrorMetric, MeanAbsoluteErrorMetric
 
 
 class TestAbstractBaseMetric(unittest.TestCase):
@@ -78,3 +82,62 @@ class TestAbstractBaseMetric(unittest.TestCase):
         self.assertEqual(metric_dict['bla'], 44)
         with self.assertRaises(KeyError):
             val = metric_dict['blaFAIL']
+
+
+class TestSufficientStatsMetrics(unittest.TestCase):
+    def test_supports_sufficient_stats(self):
+        self.assertFalse(DummyAbstractBaseMetric.supports_sufficient_stats())
+        self.assertFalse(ROCAUCMetric.supports_sufficient_stats())
+        self.assertTrue(AccuracyMetric.supports_sufficient_stats())
+        self.assertTrue(MeanSquaredErrorMetric.supports_sufficient_stats())
+
+    def test_merged_shard_stats_match_full_metric(self):
+        rng = np.random.RandomState(0)
+        y_true_bin = rng.randint(0, 2, size=101)
+        y_pred_prob = rng.rand(101, 1)
+        y_true_multi = rng.randint(0, 4, size=101)
+        y_pred_multi = rng.rand(101, 4)
+        y_true_reg = rng.randn(101)
+        y_pred_reg = rng.randn(101, 1)
+
+        metric_data = [
+            (lambda y_t, y_p: AccuracyMetric(y_t, y_p), y_true_bin, y_pred_prob),
+            (lambda y_t, y_p: AccuracyMetric(y_t, y_p, positive_class_thresh=None), y_true_multi, y_pred_multi),
+            (lambda y_t, y_p: F1ScoreMetric(y_t, y_p), y_true_bin, y_pred_prob),
+            (lambda y_t, y_p: PrecisionMetric(y_t, y_p), y_true_bin, y_pred_prob),
+            (lambda y_t, y_p: RecallMetric(y_t, y_p), y_true_bin, y_pred_prob),
+            (lambda y_t, y_p: MeanSquaredErrorMetric(y_t, y_p), y_true_reg, y_pred_reg),
+            (lambda y_t, y_p: MeanAbsoluteErrorMetric(y_t, y_p), y_true_reg, y_pred_reg)
+        ]
+        shards = [slice(0, 30), slice(30, 31), slice(31, 101)]
+
+        for metric_fn, y_true, y_pred in metric_data:
+            full_metric = metric_fn(y_true, y_pred)
+            shard_metrics = [metric_fn(y_true[s], y_pred[s]) for s in shards]
+            merged_stats = full_metric.merge_sufficient_stats([m.calculate_sufficient_stats() for m in shard_metrics])
+
+            self.assertAlmostEqual(full_metric.calculate_metric_from_stats(merged_stats), full_metric.get_metric())
+
+    def test_sufficient_stats_reduction(self):
+        shard_stats = {'num_correct': 3, 'num_samples': 5}
+        reduced_stats = []
+
+        def reduce_fn(stats):
+            reduced_stats.append(stats)
+            return AccuracyMetric.merge_sufficient_stats([stats, shard_stats])
+
+        accuracy = AccuracyMetric([1, 0, 1], [0.9, 0.2, 0.3], stats_reduce_fn=reduce_fn)
+
+        self.assertEqual(accuracy.get_metric(), (2 + 3) / (3 + 5))
+        self.assertEqual(reduced_stats, [{'num_correct': 2, 'num_samples': 3}])
+
+        # Without the reduce function the metric is calculated normally on the provided data
+        self.assertAlmostEqual(AccuracyMetric([1, 0, 1], [0.9, 0.2, 0.3]).get_metric(), 2 / 3)
+
+    def test_sufficient_stats_reduction_not_supported(self):
+        class NoStatsMetric(AbstractBaseMetric):
+            def calculate_metric(self):
+                return 0.
+
+        with self.assertRaises(ValueError):
+            NoStatsMetric([1, 0], [1, 1], 'no_stats', stats_reduce_fn=lambda stats: stats)
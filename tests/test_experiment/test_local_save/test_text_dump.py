@@ -0,0 +1,121 @@
+import unittest
+import os
+import gzip
+import json
+import shutil
+
+from aitoolbox.experiment.local_save.text_dump import *
+from aitoolbox.nlp.experiment_evaluation.NLP_metrics import ROUGEMetric, BLEUSentenceScoreMetric
+
+
+THIS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+class TestTextDumpWriter(unittest.TestCase):
+    def setUp(self):
+        self.dump_dir = os.path.join(THIS_DIR, 'text_dump_test')
+        self.records = [{'id': i, 'predicted': f'pred {i}\tsplit', 'true': f'true\n{i} \\ end'} for i in range(25)]
+
+    def tearDown(self):
+        if os.path.exists(self.dump_dir):
+            shutil.rmtree(self.dump_dir)
+
+    def write_dump(self, dump_format='jsonl', background=False):
+        dump_path = os.path.join(self.dump_dir, f'dump.{dump_format}')
+        with TextDumpWriter(dump_path, fields=('id', 'predicted', 'true'), dump_format=dump_format,
+                            block_size=10, background=background) as dump_writer:
+            dump_writer.write_records(self.records)
+        return dump_path
+
+    def test_jsonl_dump(self):
+        dump_path = self.write_dump()
+        data_path, index_path = get_text_dump_paths(dump_path)
+        self.assertEqual(sorted(os.listdir(self.dump_dir)), ['dump.jsonl.gz', 'dump.jsonl.gz.idx'])
+
+        # Concatenated gzip blocks are readable as a single standard gzip file
+        with gzip.open(data_path, 'rt', encoding='utf-8') as f:
+            self.assertEqual([json.loads(line) for line in f], self.records)
+
+        with open(index_path, encoding='utf-8') as f:
+            index = json.load(f)
+        self.assertEqual(index['num_records'], 25)
+        self.assertEqual([block[2:] for block in index['blocks']], [[0, 10], [10, 10], [20, 5]])
+
+    def test_tsv_dump(self):
+        dump_path = self.write_dump(dump_format='tsv')
+
+        with gzip.open(get_text_dump_paths(dump_path)[0], 'rt', encoding='utf-8') as f:
+            lines = f.read().split('\n')[:-1]
+        self.assertEqual(len(lines), 26)
+        self.assertEqual(lines[0], 'id\tpredicted\ttrue')
+        self.assertEqual(lines[1], '0\tpred 0\\tsplit\ttrue\\n0 \\\\ end')
+
+        records = list(TextDumpReader(dump_path))
+        self.assertEqual(records, [{k: str(v) for k, v in record.items()} for record in self.records])
+
+    def test_background_dump(self):
+        dump_path = self.write_dump(background=True)
+        self.assertEqual(list(TextDumpReader(dump_path)), self.records)
+
+    def test_background_error_raised(self):
+        dump_writer = TextDumpWriter(os.path.join(self.dump_dir, 'dump.jsonl'), fields=('id', 'text'),
+                                     block_size=2, background=True)
+        dump_writer.write_records([(1, 'a'), (2, 'b', 'extra')])
+        with self.assertRaises(RuntimeError):
+            dump_writer.close()
+
+    def test_invalid_args(self):
+        with self.assertRaises(ValueError):
+            TextDumpWriter(os.path.join(self.dump_dir, 'dump.csv'), fields=('id', ), dump_format='csv')
+        with self.assertRaises(ValueError):
+            TextDumpWriter(os.path.join(self.dump_dir, 'dump.jsonl'), fields=('id', ), block_size=0)
+
+    def test_reader_random_access(self):
+        reader = TextDumpReader(self.write_dump())
+
+        self.assertEqual(len(reader), 25)
+        self.assertEqual(reader.fields, ['id', 'predicted', 'true'])
+        for idx in [0, 9, 10, 24, 13, 3, -1]:
+            self.assertEqual(reader[idx], self.records[idx])
+
+        with self.assertRaises(IndexError):
+            reader[25]
+
+    def test_tsv_escape(self):
+        for text in ['plain', 'tab\tnew\nline', 'back\\slash\\t', '\r\\\n', '']:
+            self.assertEqual(unescape_tsv_value(escape_tsv_value(text)), text)
+            self.assertNotIn('\t', escape_tsv_value(text))
+            self.assertNotIn('\n', escape_tsv_value(text))
+
+
+class TestMetricTextDump(unittest.TestCase):
+    def setUp(self):
+        self.dump_dir = os.path.join(THIS_DIR, 'metric_text_dump_test')
+
+    def tearDown(self):
+        if os.path.exists(self.dump_dir):
+            shutil.rmtree(self.dump_dir)
+
+    def test_answer_text_dump(self):
+        data_path, index_path = ROUGEMetric.dump_answer_text_to_disk(
+            [['true', 'answer'], ['<b>second</b>', 'one']], [['pred', 'answer'], []],
+            self.dump_dir, (r'<.*?>', r'[^a-zA-Z0-9.?! ]+'), target_actual_text=False
+        )
+        self.assertEqual(data_path, os.path.join(self.dump_dir, 'answer_pred_true.jsonl.gz'))
+        self.assertTrue(os.path.exists(index_path))
+        self.assertEqual(
+            list(TextDumpReader(os.path.join(self.dump_dir, 'answer_pred_true.jsonl'))),
+            [{'id': 0, 'predicted': 'pred answer', 'true': 'true answer'},
+             {'id': 1, 'predicted': ' ', 'true': 'second one'}]
+        )
+
+    def test_translation_text_dump(self):
+        BLEUSentenceScoreMetric.dump_translation_text_to_disk(
+            ['izvorni stavek', ['token', 'source']], ['pred 1', 'pred 2'], ['true 1', 'true 2'], [0.5, 1.],
+            self.dump_dir, background=True
+        )
+        self.assertEqual(
+            list(TextDumpReader(os.path.join(self.dump_dir, 'translations.jsonl'))),
+            [{'id': 0, 'source': 'izvorni stavek', 'predicted': 'pred 1', 'true': 'true 1', 'bleu': 0.5},
+             {'id': 1, 'source': 'token source', 'predicted': 'pred 2', 'true': 'true 2', 'bleu': 1.}]
+        )
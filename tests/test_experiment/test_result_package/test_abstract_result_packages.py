@@ -1,7 +1,11 @@
 import unittest
+import numpy as np
 
 from tests.utils import *
 from aitoolbox.experiment.result_package.abstract_result_packages import MultipleResultPackageWrapper, PreCalculatedResultPackage
+from aitoolbox.experiment.result_package.basic_packages import GeneralResultPackage, \
+    BinaryClassificationResultPackage, ClassificationResultPackage, RegressionResultPackage
+from aitoolbox.experiment.core_metrics.classification import AccuracyMetric, ROCAUCMetric, F1ScoreMetric
 
 
 class TestAbstractResultPackage(unittest.TestCase):
@@ -291,3 +295,53 @@ class TestAbstractResultPackage(unittest.TestCase):
         self.assertEqual(pkg_1['metric2'], result_d_1['metric2'])
         with self.assertRaises(KeyError):
             res = pkg_1['metricMissing']
+
+
+class TestShardedResultPackageEvaluation(unittest.TestCase):
+    def test_supports_sharded_evaluation(self):
+        self.assertTrue(RegressionResultPackage().supports_sharded_evaluation())
+        self.assertTrue(ClassificationResultPackage().supports_sharded_evaluation())
+        self.assertFalse(BinaryClassificationResultPackage().supports_sharded_evaluation())
+        self.assertTrue(GeneralResultPackage([AccuracyMetric, F1ScoreMetric]).supports_sharded_evaluation())
+        self.assertFalse(GeneralResultPackage([AccuracyMetric, ROCAUCMetric]).supports_sharded_evaluation())
+        self.assertFalse(DummyResultPackage().supports_sharded_evaluation())
+
+    def test_prepare_general_result_package_from_shards(self):
+        shard_stats = {'num_correct': 3, 'num_samples': 5}
+        result_pkg = GeneralResultPackage([AccuracyMetric])
+        result_pkg.prepare_result_package(
+            [1, 0, 1], [0.9, 0.2, 0.3], hyperparameters={},
+            stats_reduce_fn=lambda stats: AbstractBaseMetric.merge_sufficient_stats([stats, shard_stats])
+        )
+        self.assertEqual(result_pkg.get_results(), {'Accuracy': (2 + 3) / (3 + 5)})
+
+    def test_prepare_not_supported_package_from_shards(self):
+        with self.assertRaises(ValueError):
+            BinaryClassificationResultPackage().prepare_result_package([1, 0, 1], [0.9, 0.2, 0.3],
+                                                                       stats_reduce_fn=lambda stats: stats)
+
+    def test_prepare_result_package_from_shards(self):
+        y_true = np.arange(10, dtype=float)
+        y_pred = y_true + np.array([1., -1., 2., 0., 0., 3., 0., -2., 0., 1.])
+
+        full_pkg = RegressionResultPackage()
+        full_pkg.prepare_result_package(y_true, y_pred)
+
+        # Simulate the reduction across two shards: first record the statistics of the first shard
+        shard_0_stats = []
+        RegressionResultPackage().prepare_result_package(
+            y_true[:6], y_pred[:6], stats_reduce_fn=lambda stats: shard_0_stats.append(stats) or stats
+        )
+        shard_0_stats = iter(shard_0_stats)
+
+        shard_1_pkg = RegressionResultPackage()
+        shard_1_pkg.prepare_result_package(
+            y_true[6:], y_pred[6:],
+            stats_reduce_fn=lambda stats: AbstractBaseMetric.merge_sufficient_stats([next(shard_0_stats), stats])
+        )
+
+        self.assertEqual(shard_1_pkg.get_results().keys(), full_pkg.get_results().keys())
+        for metric_name, metric_result in full_pkg.get_results().items():
+            self.assertAlmostEqual(shard_1_pkg.get_results()[metric_name], metric_result)
+        # The reduce function is not kept in the package after the evaluation
+        self.assertIsNone(shard_1_pkg.stats_reduce_fn)
@@ -93,6 +93,19 @@ class TestTrainingHistory(unittest.TestCase):
         self.assertEqual(th.train_history, {'loss': [123.4, 1223.4, 1224443.4],
                                             'accumulated_loss': [1224443.4, 1224443.4], 'val_loss': []})
 
+    def test_metadata(self):
+        history = TrainingHistory()
+        self.assertEqual(history.get_metadata(), {})
+
+        history.insert_metadata('train_loss_eval', {'strategy': 'full'})
+        history.insert_metadata('other', 123)
+        self.assertEqual(history.get_metadata(), {'train_loss_eval': {'strategy': 'full'}, 'other': 123})
+
+        history.insert_metadata('other', 456)
+        self.assertEqual(history.get_metadata()['other'], 456)
+        # Metadata is kept separate from the tracked results
+        self.assertEqual(history.get_train_history(), {'loss': [], 'accumulated_loss': [], 'val_loss': []})
+
     def test_get_train_history(self):
         th = TrainingHistory()
 
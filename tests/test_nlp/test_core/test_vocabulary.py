@@ -1,6 +1,13 @@
 import unittest
+import os
+import pickle
+
+import torch
+
 from aitoolbox.nlp.core.vocabulary import *
 
+THIS_DIR = os.path.dirname(os.path.abspath(__file__))
+
 
 class TestVocabulary(unittest.TestCase):
     def test_hard_coded_values(self):
@@ -140,3 +147,148 @@ class TestVocabulary(unittest.TestCase):
             vocab.convert_idx_sent2sent([2, 4, 1, 5, 6, 1, 1, 1, 9, 10, 15, 11, 16, 8, 3]),
             ['SOS'] + new_sent_back + ['EOS']
         )
+
+    def test_convert_idx_sent2sent_rm_default_tokens(self):
+        vocab = Vocabulary('testVocabulary', document_level=False)
+        vocab.add_sentence(['today', 'the', 'sun'])
+
+        self.assertEqual(vocab.convert_idx_sent2sent([2, 4, 1, 6, 3, 0, 0], rm_default_tokens=True),
+                         ['today', 'sun'])
+        with self.assertRaises(KeyError):
+            vocab.convert_idx_sent2sent([2, 100])
+
+    def test_trim(self):
+        vocab = Vocabulary('testVocabulary', document_level=False)
+        vocab.add_sentences([['a', 'b', 'c', 'a'], ['c', 'd', 'a']])
+        self.assertEqual(vocab.word2count, {'a': 3, 'b': 1, 'c': 2, 'd': 1})
+
+        vocab.trim(2)
+        self.assertEqual(vocab.word2index, {'a': 4, 'c': 5})
+        self.assertEqual(vocab.index2word, {0: 'PAD', 1: 'OOV', 2: 'SOS', 3: 'EOS', 4: 'a', 5: 'c'})
+        self.assertEqual(vocab.convert_sent2idx_sent(['a', 'b', 'c']), [2, 4, 1, 5, 3])
+
+
+class TestVocabularyBulkAPI(unittest.TestCase):
+    def setUp(self):
+        self.sentences = [['today', 'the', 'sun', 'shines', '.'],
+                          ['but', 'tomorrow', 'the', 'sun', 'will', 'be', 'gone', 'and', 'it', 'will', 'rain', '.'],
+                          []]
+
+    def test_add_sentences_matches_add_sentence(self):
+        vocab = Vocabulary('testVocabulary')
+        vocab.add_sentences(self.sentences)
+
+        vocab_single = Vocabulary('testVocabulary')
+        for sent in self.sentences:
+            vocab_single.add_sentence(sent)
+
+        self.assertEqual(vocab.word2index, vocab_single.word2index)
+        self.assertEqual(vocab.word2count, vocab_single.word2count)
+        self.assertEqual(vocab.index2word, vocab_single.index2word)
+
+    def test_add_corpus_shards(self):
+        vocab = Vocabulary('testVocabulary')
+        vocab.add_corpus_shards([self.sentences[:1], self.sentences[1:]], num_workers=2)
+
+        vocab_single = Vocabulary('testVocabulary')
+        vocab_single.add_sentences(self.sentences)
+
+        self.assertEqual(vocab.word2index, vocab_single.word2index)
+        self.assertEqual(vocab.word2count, vocab_single.word2count)
+
+    def test_encode_sentences(self):
+        vocab = Vocabulary('testVocabulary')
+        vocab.add_sentences(self.sentences[:2])
+        new_sent = ['today', 'actually', 'the', 'sun']
+
+        idx_sents, lengths = vocab.encode_sentences([self.sentences[0], new_sent, []])
+        self.assertEqual(idx_sents.tolist(), [[2, 4, 5, 6, 7, 8, 3],
+                                              [2, 4, 1, 5, 6, 3, 0],
+                                              [2, 3, 0, 0, 0, 0, 0]])
+        self.assertEqual(lengths.tolist(), [7, 6, 2])
+
+        for sent, idx_sent, length in zip([self.sentences[0], new_sent, []], idx_sents, lengths):
+            self.assertEqual(idx_sent[:length].tolist(), vocab.convert_sent2idx_sent(sent))
+
+        idx_sents, lengths = vocab.encode_sentences(self.sentences[:2], start_end_token=False, max_length=4,
+                                                    return_tensor=True)
+        self.assertIsInstance(idx_sents, torch.Tensor)
+        self.assertEqual(idx_sents.tolist(), [[4, 5, 6, 7], [9, 10, 5, 6]])
+        self.assertEqual(lengths.tolist(), [4, 4])
+
+        idx_sents, lengths = vocab.encode_sentences(self.sentences[:2], max_length=4)
+        self.assertEqual(idx_sents.tolist(), [[2, 4, 5, 3], [2, 9, 10, 3]])
+
+        with self.assertRaises(ValueError):
+            vocab.encode_sentences(self.sentences, max_length=1)
+
+    def test_decode_sentences(self):
+        vocab = Vocabulary('testVocabulary')
+        vocab.add_sentences(self.sentences)
+
+        idx_sents, lengths = vocab.encode_sentences(self.sentences)
+        self.assertEqual(vocab.decode_sentences(idx_sents, lengths, rm_default_tokens=True), self.sentences)
+        self.assertEqual(vocab.decode_sentences(torch.from_numpy(idx_sents), rm_default_tokens=True), self.sentences)
+        self.assertEqual(vocab.decode_sentences(idx_sents[:1]), [['SOS'] + self.sentences[0] + ['EOS'] + ['PAD'] * 7])
+
+        ragged_idx_sents = [vocab.convert_sent2idx_sent(sent) for sent in self.sentences]
+        self.assertEqual(vocab.decode_sentences(ragged_idx_sents),
+                         [vocab.convert_idx_sent2sent(sent) for sent in ragged_idx_sents])
+        self.assertEqual(vocab.decode_sentences([]), [])
+
+    def test_save_load(self):
+        vocab = Vocabulary('testVocabulary', document_level=True)
+        vocab.add_sentences(self.sentences + [['žabica', 'new\nline']])
+        vocab_file_path = os.path.join(THIS_DIR, 'vocab.npz')
+        try:
+            vocab.save(vocab_file_path)
+            loaded_vocab = Vocabulary.load(vocab_file_path)
+        finally:
+            os.remove(vocab_file_path)
+
+        self.assertEqual(loaded_vocab.name, 'testVocabulary')
+        self.assertTrue(loaded_vocab.document_level)
+        self.assertEqual(loaded_vocab.index2word, vocab.index2word)
+        self.assertEqual(loaded_vocab.word2index, vocab.word2index)
+        self.assertEqual(loaded_vocab.word2count, vocab.word2count)
+
+    def test_index2word_cached(self):
+        vocab = Vocabulary('testVocabulary')
+        vocab.add_sentence(['a', 'b'])
+        index2word = vocab.index2word
+        self.assertIs(vocab.index2word, index2word)
+
+        vocab.add_sentence(['c'])
+        self.assertEqual(vocab.index2word, {0: 'PAD', 1: 'OOV', 2: 'SOS', 3: 'EOS', 4: 'a', 5: 'b', 6: 'c'})
+
+    def test_index2word_setter(self):
+        vocab = Vocabulary('testVocabulary')
+        vocab.index2word = ['<unk>', '<pad>', 'a', 'b']
+        self.assertEqual(vocab.num_words, 4)
+        self.assertEqual(vocab.index2word, {0: '<unk>', 1: '<pad>', 2: 'a', 3: 'b'})
+        self.assertEqual(vocab.convert_idx_sent2sent([2, 3, 1]), ['a', 'b', '<pad>'])
+
+        vocab.index2word = {0: 'PAD', 1: 'x'}
+        self.assertEqual(vocab.words, ['PAD', 'x'])
+        self.assertEqual(vocab.convert_idx_sent2sent([1, 0]), ['x', 'PAD'])
+
+    def test_unpickle_old_format(self):
+        vocab = Vocabulary.__new__(Vocabulary)
+        vocab.__setstate__({
+            'PAD_token': 0, 'OOV_token': 1, 'SOS_token': 2, 'EOS_token': 3, 'SOD_token': 4, 'EOD_token': 5,
+            'name': 'testVocabulary', 'document_level': False, 'trimmed': False,
+            'word2index': {'a': 4, 'b': 5}, 'word2count': {'a': 2, 'b': 1},
+            'index2word': {0: 'PAD', 1: 'OOV', 2: 'SOS', 3: 'EOS', 4: 'a', 5: 'b'},
+            'default_tokens': [0, 1, 2, 3], 'num_words': 6
+        })
+
+        self.assertEqual(vocab.num_words, 6)
+        self.assertEqual(vocab.default_words, ['PAD', 'OOV', 'SOS', 'EOS'])
+        self.assertEqual(vocab.index2word, {0: 'PAD', 1: 'OOV', 2: 'SOS', 3: 'EOS', 4: 'a', 5: 'b'})
+        self.assertEqual(vocab.convert_idx_sent2sent([2, 5, 4, 3], rm_default_tokens=True), ['b', 'a'])
+
+        vocab.add_word('c')
+        self.assertEqual(vocab.word2index['c'], 6)
+
+        unpickled_vocab = pickle.loads(pickle.dumps(vocab))
+        self.assertEqual(unpickled_vocab.index2word, vocab.index2word)
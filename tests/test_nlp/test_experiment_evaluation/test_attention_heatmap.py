@@ -0,0 +1,87 @@
+import unittest
+import os
+import shutil
+import numpy as np
+import torch
+
+from aitoolbox.nlp.experiment_evaluation.attention_heatmap import *
+
+
+THIS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+class TestAttentionHeatMap(unittest.TestCase):
+    def setUp(self):
+        self.plot_dir = os.path.join(THIS_DIR, 'attention_heatmap_test')
+        rand = np.random.RandomState(0)
+        self.attention_matrices = [rand.rand(5, 4) for _ in range(6)]
+        self.source_sents = [[f'src_{i}_{j}' for j in range(4)] for i in range(6)]
+        self.target_sents = [[f'trg_{i}_{j}' for j in range(3 + i % 2)] for i in range(6)]
+
+    def tearDown(self):
+        if os.path.exists(self.plot_dir):
+            shutil.rmtree(self.plot_dir)
+
+    def test_plot_all_sentences(self):
+        plot_paths = AttentionHeatMap(self.attention_matrices, self.source_sents, self.target_sents,
+                                      self.plot_dir).get_metric()
+
+        heatmaps_dir = os.path.join(self.plot_dir, 'attention_heatmaps')
+        self.assertEqual(plot_paths, [os.path.join(heatmaps_dir, f'attn_plot_{i}.png') for i in range(6)])
+        self.assertEqual(sorted(os.listdir(heatmaps_dir)), [f'attn_plot_{i}.png' for i in range(6)])
+        self.assertFalse(os.path.exists(os.path.join(self.plot_dir, ATTENTION_MATRICES_FILE_NAME)))
+
+    def test_plot_selection(self):
+        def get_selection(**kwargs):
+            return AttentionHeatMap(self.attention_matrices, self.source_sents, self.target_sents,
+                                    self.plot_dir, **kwargs).select_plot_indices()
+
+        scores = [0.3, 0.9, 0.1, 0.5, 0.9, 0.]
+        self.assertEqual(get_selection(), list(range(6)))
+        self.assertEqual(get_selection(max_plots=10), list(range(6)))
+        self.assertEqual(get_selection(max_plots=2), [0, 1])
+        self.assertEqual(get_selection(max_plots=3, plot_selection='top_k', selection_scores=scores), [1, 3, 4])
+        self.assertEqual(get_selection(max_plots=2, plot_selection='bottom_k', selection_scores=scores), [2, 5])
+
+        random_selection = get_selection(max_plots=3, plot_selection='random', seed=5)
+        self.assertEqual(random_selection, get_selection(max_plots=3, plot_selection='random', seed=5))
+        self.assertEqual(len(set(random_selection)), 3)
+        self.assertTrue(all(0 <= idx < 6 for idx in random_selection))
+
+    def test_plot_selection_files(self):
+        plot_paths = AttentionHeatMap(self.attention_matrices, self.source_sents, self.target_sents, self.plot_dir,
+                                      max_plots=2, plot_selection='top_k',
+                                      selection_scores=[0., 1., 0., 0., 2., 0.]).get_metric()
+
+        self.assertEqual([os.path.basename(path) for path in plot_paths], ['attn_plot_1.png', 'attn_plot_4.png'])
+        self.assertEqual(sorted(os.listdir(os.path.join(self.plot_dir, 'attention_heatmaps'))),
+                         ['attn_plot_1.png', 'attn_plot_4.png'])
+
+    def test_invalid_plot_selection(self):
+        with self.assertRaises(ValueError):
+            AttentionHeatMap(self.attention_matrices, self.source_sents, self.target_sents, self.plot_dir,
+                             plot_selection='best')
+        with self.assertRaises(ValueError):
+            AttentionHeatMap(self.attention_matrices, self.source_sents, self.target_sents, self.plot_dir,
+                             plot_selection='top_k')
+
+    def test_save_attention_matrices(self):
+        attention_matrices = [torch.from_numpy(attn_matrix) for attn_matrix in self.attention_matrices]
+        AttentionHeatMap(attention_matrices, self.source_sents, self.target_sents, self.plot_dir,
+                         max_plots=1, save_attention_matrices=True).get_metric()
+
+        loaded_matrices, loaded_source, loaded_target = \
+            load_attention_matrices(os.path.join(self.plot_dir, ATTENTION_MATRICES_FILE_NAME))
+
+        self.assertEqual(loaded_source, self.source_sents)
+        self.assertEqual(loaded_target, self.target_sents)
+        self.assertEqual(len(loaded_matrices), 6)
+        for attn_matrix, loaded_matrix, target_sent in zip(self.attention_matrices, loaded_matrices,
+                                                           self.target_sents):
+            self.assertEqual(loaded_matrix.shape, (len(target_sent), 4))
+            self.assertTrue(np.allclose(loaded_matrix, attn_matrix[:len(target_sent)]))
+
+    def test_save_load_empty_attention_matrices(self):
+        os.mkdir(self.plot_dir)
+        file_path = save_attention_matrices(os.path.join(self.plot_dir, ATTENTION_MATRICES_FILE_NAME), [], [], [])
+        self.assertEqual(load_attention_matrices(file_path), ([], [], []))
@@ -0,0 +1,99 @@
+import unittest
+import warnings
+
+import numpy as np
+import torch
+from nltk.translate.bleu_score import sentence_bleu, corpus_bleu
+
+from aitoolbox.nlp.core.vocabulary import Vocabulary
+from aitoolbox.nlp.experiment_evaluation.NLP_metrics import BLEUSentenceScoreMetric, BLEUCorpusScoreMetric
+from aitoolbox.nlp.experiment_evaluation.NLP_result_package import MachineTranslationResultPackage
+from aitoolbox.nlp.experiment_evaluation.bleu_scoring import BLEUScorer, encode_token_ids
+
+
+class TestBLEUScorer(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.RandomState(0)
+        words = [f'w{i}' for i in range(6)]
+        self.references = [rng.choice(words, rng.randint(1, 12)).tolist() for _ in range(300)]
+        self.hypotheses = [rng.choice(words, rng.randint(0, 12)).tolist() for _ in range(300)]
+
+    def test_matches_nltk(self):
+        scorer = BLEUScorer()
+        stats = scorer.compute_statistics(self.references, self.hypotheses)
+        self.assertEqual(stats.shape, (300, 10))
+
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            nltk_sentence_scores = [sentence_bleu([ref], hyp) for ref, hyp in zip(self.references, self.hypotheses)]
+            nltk_corpus_score = corpus_bleu([[ref] for ref in self.references], self.hypotheses)
+
+        self.assertTrue(np.allclose(scorer.sentence_scores(stats), nltk_sentence_scores))
+        self.assertAlmostEqual(scorer.corpus_score(stats), nltk_corpus_score)
+
+    def test_statistics(self):
+        stats = BLEUScorer(max_order=2).compute_statistics([['a', 'b', 'a', 'b']], [['a', 'b', 'b', 'a', 'b']])
+        # Matches clipped by the reference counts, the hypothesis n-gram counts and the lengths
+        self.assertEqual(stats.tolist(), [[4, 3, 5, 4, 5, 4]])
+
+    def test_integer_token_ids(self):
+        scorer = BLEUScorer()
+        str_stats = scorer.compute_statistics(self.references, self.hypotheses)
+
+        token_ids = {f'w{i}': i for i in range(6)}
+        id_references = [np.array([token_ids[token] for token in sent]) for sent in self.references]
+        id_hypotheses = [torch.tensor([token_ids[token] for token in sent], dtype=torch.long)
+                         for sent in self.hypotheses]
+        self.assertTrue(np.array_equal(scorer.compute_statistics(id_references, id_hypotheses), str_stats))
+
+        references, hypotheses = encode_token_ids([[5, 7]], [[7]])
+        self.assertEqual([sent.tolist() for sent in references + hypotheses], [[5, 7], [7]])
+
+    def test_parallel_matches_serial(self):
+        serial_stats = BLEUScorer().compute_statistics(self.references, self.hypotheses)
+        parallel_stats = BLEUScorer(num_workers=2, chunk_size=70).compute_statistics(self.references, self.hypotheses)
+        self.assertTrue(np.array_equal(serial_stats, parallel_stats))
+
+    def test_param_checks(self):
+        with self.assertRaises(ValueError):
+            BLEUScorer(max_order=0)
+        with self.assertRaises(ValueError):
+            BLEUScorer().compute_statistics([['a']], [])
+
+
+class TestBLEUMetricsSharedStats(unittest.TestCase):
+    def test_shared_stats_and_sufficient_stats(self):
+        y_true = ['Today the sun does not shine'.split(), 'mjaw how how mjav mjaw'.split()]
+        y_predicted = ['Today the sun does shine'.split(), 'mjaw how how mjav mjaw'.split()]
+        bleu_stats = BLEUScorer().compute_statistics(y_true, y_predicted)
+
+        sentence_metric = BLEUSentenceScoreMetric(y_true, y_predicted, bleu_stats=bleu_stats)
+        corpus_metric = BLEUCorpusScoreMetric(y_true, y_predicted, bleu_stats=bleu_stats)
+        self.assertAlmostEqual(sentence_metric.get_metric(), BLEUSentenceScoreMetric(y_true, y_predicted).get_metric())
+        self.assertAlmostEqual(corpus_metric.get_metric(), corpus_bleu([[sent] for sent in y_true], y_predicted))
+
+        self.assertTrue(BLEUSentenceScoreMetric.supports_sufficient_stats())
+        self.assertTrue(BLEUCorpusScoreMetric.supports_sufficient_stats())
+        shard_stats = [BLEUCorpusScoreMetric(y_true[:1], y_predicted[:1]).calculate_sufficient_stats(),
+                       BLEUCorpusScoreMetric(y_true[1:], y_predicted[1:]).calculate_sufficient_stats()]
+        merged_stats = corpus_metric.merge_sufficient_stats(shard_stats)
+        self.assertAlmostEqual(corpus_metric.calculate_metric_from_stats(merged_stats), corpus_metric.get_metric())
+
+
+class TestMachineTranslationResultPackageBLEU(unittest.TestCase):
+    def test_bleu_from_vocabulary_indices(self):
+        vocab = Vocabulary('target')
+        true_sents = ['Today the sun does not shine'.split(), 'mjaw how how mjav mjaw'.split()]
+        pred_sents = ['Today the sun does shine'.split(), 'mjaw how mjav mjaw'.split()]
+        vocab.add_sentences(true_sents + pred_sents)
+
+        y_true, _ = vocab.encode_sentences(true_sents)
+        y_predicted = [vocab.convert_sent2idx_sent(sent) for sent in pred_sents]
+
+        result_pkg = MachineTranslationResultPackage(vocab)
+        result_pkg.prepare_result_package(y_true, y_predicted, additional_results={'loss': [1., 2.]})
+        results = result_pkg.get_results()
+
+        self.assertAlmostEqual(results['BLEU_corpus_score'], corpus_bleu([[sent] for sent in true_sents], pred_sents))
+        self.assertAlmostEqual(results['BLEU_sentence_score'],
+                               BLEUSentenceScoreMetric(true_sents, pred_sents).get_metric())
@@ -0,0 +1,79 @@
+import unittest
+
+import numpy as np
+
+from aitoolbox.nlp.experiment_evaluation.NLP_metrics import ExactMatchTextMetric, F1TextMetric
+from aitoolbox.nlp.experiment_evaluation.qa_scoring import QAScorer, normalize_answer, compute_token_f1
+
+
+class TestNormalizeAnswer(unittest.TestCase):
+    def test_normalize_answer(self):
+        self.assertEqual(normalize_answer('The  Sun, shines!'), 'sun shines')
+        self.assertEqual(normalize_answer('a cat and an apple'), 'cat and apple')
+        self.assertEqual(normalize_answer('theatre'), 'theatre')
+        self.assertEqual(normalize_answer('...'), '')
+
+    def test_compute_token_f1(self):
+        self.assertEqual(compute_token_f1(('a', 'b'), ('a', 'b')), 1.)
+        self.assertEqual(compute_token_f1(('a', 'b'), ('c',)), 0)
+        self.assertEqual(compute_token_f1((), ()), 1)
+        self.assertEqual(compute_token_f1(('a',), ()), 0)
+        self.assertAlmostEqual(compute_token_f1(('a', 'b', 'c'), ('a', 'd')), 0.4)
+
+
+class TestQAScorer(unittest.TestCase):
+    def test_score(self):
+        scorer = QAScorer()
+        em_scores, f1_scores = scorer.score(['The sun', 'blue sky', ''], ['sun.', 'blue sea', 'nothing'])
+
+        self.assertEqual(em_scores.tolist(), [1., 0., 0.])
+        self.assertEqual(f1_scores.tolist(), [1., 0.5, 0.])
+        self.assertEqual(scorer.normalized_cache['The sun'], ('sun',))
+
+        with self.assertRaises(ValueError):
+            scorer.score(['a'], [])
+
+    def test_score_cache(self):
+        scorer = QAScorer()
+        scorer.score(['x y'], ['y'])
+        self.assertEqual(scorer.score_cache, {('x y', 'y'): (0, 2 / 3)})
+
+        scorer.score_cache[('x y', 'y')] = (1, 1.)
+        em_scores, f1_scores = scorer.score(['x y'], ['y'])
+        self.assertEqual(em_scores.tolist(), [1.])
+
+        small_cache_scorer = QAScorer(max_cache_size=2)
+        em_scores, _ = small_cache_scorer.score(['a', 'b', 'c'], ['a', 'b', 'd'])
+        self.assertEqual(em_scores.tolist(), [1., 1., 0.])
+
+    def test_parallel_matches_serial(self):
+        rng = np.random.RandomState(0)
+        words = ['the', 'sun', 'shines', 'a', 'rain', 'Today', 'tomorrow!', 'sky']
+        true_texts = [' '.join(rng.choice(words, rng.randint(0, 5))) for _ in range(300)]
+        pred_texts = [' '.join(rng.choice(words, rng.randint(0, 5))) for _ in range(300)]
+
+        serial_scores = QAScorer().score(true_texts, pred_texts)
+        parallel_scores = QAScorer(num_workers=2, shard_size=50).score(true_texts, pred_texts)
+
+        self.assertEqual(serial_scores[0].tolist(), parallel_scores[0].tolist())
+        self.assertEqual(serial_scores[1].tolist(), parallel_scores[1].tolist())
+
+    def test_shared_scorer_metrics(self):
+        scorer = QAScorer()
+        y_true = ['bla bla bla'.split(), 'bla NON bla'.split()]
+        y_predicted = ['bla bla bla'.split(), 'bla bla bla'.split()]
+
+        em_metric = ExactMatchTextMetric(y_true, y_predicted, scorer=scorer)
+        self.assertEqual(len(scorer.score_cache), 2)
+        f1_metric = F1TextMetric(y_true, y_predicted, scorer=scorer)
+
+        self.assertEqual(em_metric.get_metric(), 50.)
+        self.assertEqual(f1_metric.get_metric(), 83.33333333333333)
+        self.assertEqual(len(scorer.score_cache), 2)
+
+    def test_metric_sufficient_stats(self):
+        em_metric = ExactMatchTextMetric(['a b', 'c'], ['a b'.split(), 'd'.split()], target_actual_text=True)
+        self.assertEqual(em_metric.calculate_sufficient_stats(), {'em_sum': 1., 'num_answers': 2})
+        self.assertEqual(em_metric.calculate_metric_from_stats({'em_sum': 3., 'num_answers': 4}), 75.)
+        self.assertTrue(ExactMatchTextMetric.supports_sufficient_stats())
+        self.assertTrue(F1TextMetric.supports_sufficient_stats())
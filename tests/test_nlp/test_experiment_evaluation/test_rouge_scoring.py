@@ -0,0 +1,143 @@
+import unittest
+
+import numpy as np
+from rouge import Rouge
+
+from aitoolbox.nlp.experiment_evaluation.NLP_metrics import ROUGEMetric, ROUGENativeMetric
+from aitoolbox.nlp.experiment_evaluation.rouge_scoring import RougeScorer, lcs_length, get_ngram_counts
+
+
+def lcs_length_dp(x, y):
+    table = [[0] * (len(y) + 1) for _ in range(len(x) + 1)]
+    for i in range(1, len(x) + 1):
+        for j in range(1, len(y) + 1):
+            table[i][j] = table[i - 1][j - 1] + 1 if x[i - 1] == y[j - 1] else max(table[i - 1][j], table[i][j - 1])
+    return table[-1][-1]
+
+
+class TestRougeScoringFunctions(unittest.TestCase):
+    def test_lcs_length(self):
+        self.assertEqual(lcs_length([1, 2, 3, 4], [1, 3, 4]), 3)
+        self.assertEqual(lcs_length([], [1, 2]), 0)
+        self.assertEqual(lcs_length([1, 1, 1], [1, 1]), 2)
+
+        rng = np.random.RandomState(0)
+        for _ in range(200):
+            x = rng.randint(0, 5, rng.randint(0, 80)).tolist()
+            y = rng.randint(0, 5, rng.randint(0, 80)).tolist()
+            self.assertEqual(lcs_length(x, y), lcs_length_dp(x, y))
+
+    def test_get_ngram_counts(self):
+        self.assertEqual(get_ngram_counts([1, 2, 1, 2], 1), {1: 2, 2: 2})
+        self.assertEqual(get_ngram_counts([1, 2, 1, 2], 2), {(1, 2): 2, (2, 1): 1})
+        self.assertEqual(get_ngram_counts([1], 2), {})
+
+
+class TestRougeScorer(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.RandomState(0)
+        words = [f'w{i}' for i in range(40)]
+        # Without the repeated words and full stops the rouge package semantics are the same
+        self.references = [' '.join(rng.choice(words, rng.randint(2, 15), replace=False)) for _ in range(100)]
+        self.hypotheses = [' '.join(rng.choice(words, rng.randint(2, 15), replace=False)) for _ in range(100)]
+
+    def test_matches_rouge_package(self):
+        scorer = RougeScorer()
+        native_scores = scorer.score_summary(scorer.score(self.references, self.hypotheses))
+        package_scores = Rouge().get_scores(self.hypotheses, self.references, avg=True)
+
+        for rouge_type in ['rouge-1', 'rouge-2', 'rouge-l']:
+            for score_type in ['p', 'r', 'f']:
+                self.assertAlmostEqual(native_scores[rouge_type][score_type], package_scores[rouge_type][score_type],
+                                       places=6)
+
+    def test_per_text_scores(self):
+        scorer = RougeScorer(rouge_n=(1, 2, 3))
+        scores = scorer.score(['the cat sat on the mat'], ['the cat on the mat'.split()])
+        self.assertEqual(scorer.score_names, ['rouge-1', 'rouge-2', 'rouge-3', 'rouge-l'])
+        self.assertEqual(scores.shape, (1, 4, 3))
+
+        # Clipped counts: "the" appears twice in both texts
+        self.assertEqual(scores[0, 0, :2].tolist(), [1., 5 / 6])
+        self.assertEqual(scores[0, 1, :2].tolist(), [3 / 4, 3 / 5])
+        self.assertEqual(scores[0, 2, :2].tolist(), [1 / 3, 1 / 4])
+        self.assertEqual(scores[0, 3, :2].tolist(), [1., 5 / 6])
+
+        self.assertEqual(scorer.score([''], ['a b']).tolist(), [[[0., 0., 0.]] * 4])
+
+    def test_repeated_words_differ_from_rouge_package(self):
+        reference, hypothesis = 'the cat sat on the mat', 'the cat the cat sat'
+        scorer = RougeScorer()
+        native_scores = scorer.score_summary(scorer.score([reference], [hypothesis]))
+        package_scores = Rouge().get_scores([hypothesis], [reference])[0]
+
+        # Clipped counts: "the" matches twice and "cat" once out of the 5 hypothesis and 6 reference words
+        self.assertAlmostEqual(native_scores['rouge-1']['p'], 4 / 5)
+        self.assertAlmostEqual(native_scores['rouge-1']['r'], 4 / 6)
+        self.assertAlmostEqual(native_scores['rouge-2']['p'], 2 / 4)
+        self.assertAlmostEqual(native_scores['rouge-2']['r'], 2 / 5)
+        # The rouge package counts only the distinct n-grams
+        self.assertAlmostEqual(package_scores['rouge-1']['p'], 3 / 3)
+        self.assertAlmostEqual(package_scores['rouge-1']['r'], 3 / 5)
+        self.assertAlmostEqual(package_scores['rouge-2']['p'], 2 / 3)
+        self.assertAlmostEqual(package_scores['rouge-2']['r'], 2 / 5)
+
+    def test_sentence_breaks_differ_from_rouge_package(self):
+        reference, hypothesis = 'a dog ran . the cat sat', 'the cat sat . a dog ran'
+        scorer = RougeScorer()
+        native_scores = scorer.score_summary(scorer.score([reference], [hypothesis]))
+        package_scores = Rouge().get_scores([hypothesis], [reference])[0]
+
+        # The full stop is a token of a single sequence: 4 of the 6 bigrams match and the LCS is 3 of the 7 tokens
+        self.assertAlmostEqual(native_scores['rouge-1']['f'], 1.)
+        self.assertAlmostEqual(native_scores['rouge-2']['f'], 4 / 6)
+        self.assertAlmostEqual(native_scores['rouge-l']['p'], 3 / 7)
+        self.assertAlmostEqual(native_scores['rouge-l']['r'], 3 / 7)
+        # The rouge package splits the sentences and takes the union LCS over them
+        self.assertAlmostEqual(package_scores['rouge-1']['f'], 1., places=6)
+        self.assertAlmostEqual(package_scores['rouge-2']['f'], 4 / 5, places=6)
+        self.assertAlmostEqual(package_scores['rouge-l']['p'], 1.)
+        self.assertAlmostEqual(package_scores['rouge-l']['r'], 1.)
+
+    def test_parallel_matches_serial(self):
+        serial_scores = RougeScorer().score(self.references, self.hypotheses)
+        parallel_scores = RougeScorer(num_workers=2, chunk_size=30).score(self.references, self.hypotheses)
+        self.assertTrue(np.array_equal(serial_scores, parallel_scores))
+
+    def test_param_checks(self):
+        with self.assertRaises(ValueError):
+            RougeScorer(rouge_n=(), rouge_l=False)
+        with self.assertRaises(ValueError):
+            RougeScorer(rouge_n=(0,))
+        with self.assertRaises(ValueError):
+            RougeScorer().score(['a'], [])
+
+
+class TestROUGENativeMetric(unittest.TestCase):
+    def test_matches_rouge_metric(self):
+        y_true = ['Today the sun shines not'.split(), 'today we go to university'.split()]
+        y_predicted = ['Today the sun does shine'.split(), 'yesterday we went to university'.split()]
+
+        native_result = ROUGENativeMetric(y_true, y_predicted).get_metric()
+        package_result = ROUGEMetric(y_true, y_predicted).get_metric()
+        for rouge_type in package_result:
+            for score_type in package_result[rouge_type]:
+                self.assertAlmostEqual(native_result[rouge_type][score_type], package_result[rouge_type][score_type])
+
+        actual_text_result = ROUGENativeMetric([' '.join(sent) for sent in y_true], y_predicted,
+                                               target_actual_text=True).get_metric()
+        self.assertEqual(actual_text_result, native_result)
+
+    def test_sufficient_stats(self):
+        y_true = ['a b c'.split(), 'd e'.split(), 'f g h i'.split()]
+        y_predicted = ['a b'.split(), 'd x'.split(), 'f h'.split()]
+        metric = ROUGENativeMetric(y_true, y_predicted)
+        self.assertTrue(ROUGENativeMetric.supports_sufficient_stats())
+
+        shard_stats = [ROUGENativeMetric(y_true[:1], y_predicted[:1]).calculate_sufficient_stats(),
+                       ROUGENativeMetric(y_true[1:], y_predicted[1:]).calculate_sufficient_stats()]
+        merged_result = metric.calculate_metric_from_stats(metric.merge_sufficient_stats(shard_stats))
+        result = metric.get_metric()
+        for rouge_type in result:
+            for score_type in result[rouge_type]:
+                self.assertAlmostEqual(merged_result[rouge_type][score_type], result[rouge_type][score_type])
@@ -0,0 +1,67 @@
+import unittest
+
+import numpy as np
+import torch
+
+from aitoolbox.nlp.torch_collate_fns import (
+    qa_concat_ctx_span_collate_fn, pad_sequences, get_padding_mask, PaddedBatchCollate
+)
+
+
+class TestPadSequences(unittest.TestCase):
+    def test_pad_sequences(self):
+        padded, lengths = pad_sequences([torch.tensor([1, 2, 3]), [4], np.array([5, 6])], padding_value=-1)
+        self.assertEqual(padded.tolist(), [[1, 2, 3], [4, -1, -1], [5, 6, -1]])
+        self.assertEqual(lengths.tolist(), [3, 1, 2])
+
+    def test_pad_sequences_trailing_dims_and_dtype(self):
+        padded, lengths = pad_sequences([torch.ones(2, 4), torch.ones(3, 4)], dtype=torch.float64)
+        self.assertEqual(padded.shape, (2, 3, 4))
+        self.assertEqual(padded.dtype, torch.float64)
+        self.assertEqual(padded[0, 2].tolist(), [0.] * 4)
+        self.assertEqual(lengths.tolist(), [2, 3])
+
+    def test_get_padding_mask(self):
+        mask = get_padding_mask(torch.tensor([2, 0, 3]))
+        self.assertEqual(mask.tolist(), [[True, True, False], [False, False, False], [True, True, True]])
+        self.assertEqual(get_padding_mask(torch.tensor([1]), max_length=3).tolist(), [[True, False, False]])
+
+
+class TestQACollateFn(unittest.TestCase):
+    def test_qa_concat_ctx_span_collate_fn(self):
+        data = [
+            (torch.tensor([1, 2, 3, 4]), torch.tensor([5, 6]), (0, 2)),
+            (torch.tensor([7, 8]), torch.tensor([9, 10, 11]), (1, 1))
+        ]
+        paragraph_pad, paragraph_lengths, question_pad, question_lengths, span = qa_concat_ctx_span_collate_fn(data)
+
+        self.assertEqual(paragraph_pad.tolist(), [[1, 2, 3, 4], [7, 8, 0, 0]])
+        self.assertEqual(paragraph_pad.dtype, torch.long)
+        self.assertEqual(paragraph_lengths.tolist(), [4, 2])
+        self.assertEqual(question_pad.tolist(), [[5, 6, 0], [9, 10, 11]])
+        self.assertEqual(question_lengths.tolist(), [2, 3])
+        self.assertEqual(span.tolist(), [[0, 2], [1, 1]])
+
+
+class TestPaddedBatchCollate(unittest.TestCase):
+    def test_selected_fields(self):
+        data = [([1, 2, 3], 0), ([4], 1)]
+        token_ids, lengths, mask, labels = PaddedBatchCollate(pad_fields=[0])(data)
+
+        self.assertEqual(token_ids.tolist(), [[1, 2, 3], [4, 0, 0]])
+        self.assertEqual(lengths.tolist(), [3, 1])
+        self.assertEqual(mask.tolist(), [[True, True, True], [True, False, False]])
+        self.assertEqual(labels.tolist(), [0, 1])
+
+    def test_all_fields_without_mask(self):
+        data = [(torch.tensor([1, 2]), torch.tensor([3])), (torch.tensor([4]), torch.tensor([5, 6]))]
+        batch = PaddedBatchCollate(return_mask=False, padding_value=9)(data)
+
+        self.assertEqual(len(batch), 4)
+        self.assertEqual(batch[0].tolist(), [[1, 2], [4, 9]])
+        self.assertEqual(batch[2].tolist(), [[3, 9], [5, 6]])
+
+    def test_single_sequence_examples(self):
+        padded, lengths, mask = PaddedBatchCollate()([[1, 2], [3, 4, 5]])
+        self.assertEqual(padded.tolist(), [[1, 2, 0], [3, 4, 5]])
+        self.assertEqual(lengths.tolist(), [2, 3])
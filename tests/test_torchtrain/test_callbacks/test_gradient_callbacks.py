@@ -2,6 +2,7 @@ import unittest
 import numpy as np
 import io
 import sys
+from types import SimpleNamespace
 import torch
 from torch.utils.data.dataset import TensorDataset
 
@@ -9,7 +10,7 @@ from tests.utils import *
 from torch.utils.data import DataLoader
 import torch.optim as optim
 
-from aitoolbox.torchtrain.callbacks.gradient import GradNormClip, GradientStatsPrint
+from aitoolbox.torchtrain.callbacks.gradient import GradNormClip, GradientStatsPrint, GradDistributionPlot
 from aitoolbox.torchtrain.train_loop import TrainLoop
 from aitoolbox.torchtrain.data.dataset import BasicDataset
 
@@ -76,3 +77,18 @@ Layer 1 grads: Mean: {np.mean(gradients_l2)}; Std {np.std(gradients_l2)}
         """.strip()
 
         self.assertEqual(expected_print, cb_output)
+
+
+class TestGradDistributionPlotCallback(unittest.TestCase):
+    def test_save_to_cloud_batched(self):
+        callback = GradDistributionPlot(lambda model: [], project_name='project', experiment_name='exp')
+        callback.train_loop_obj = SimpleNamespace(experiment_timestamp='ts')
+        callback.cloud_results_saver = RecordingResultsSaver()
+
+        callback.save_to_cloud([('epoch_0/layer_0.png', '/local/layer_0.png'),
+                                ('epoch_0/layer_1.png', '/local/layer_1.png')])
+        self.assertEqual(
+            callback.cloud_results_saver.saved_file_batches,
+            [[('/local/layer_0.png', 'project/exp_ts/results/grad_distribution/epoch_0/layer_0.png'),
+              ('/local/layer_1.png', 'project/exp_ts/results/grad_distribution/epoch_0/layer_1.png')]]
+        )
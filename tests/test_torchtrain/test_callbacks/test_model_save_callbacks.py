@@ -107,12 +107,18 @@ class TestModelCheckpointCallback(unittest.TestCase):
 
 class TestModelIterationCheckpoint(unittest.TestCase):
     def test_end_of_batch_model_saving_with_iteration_info(self):
+        self.check_end_of_batch_model_saving(async_save=False)
+
+    def test_async_end_of_batch_model_saving(self):
+        self.check_end_of_batch_model_saving(async_save=True)
+
+    def check_end_of_batch_model_saving(self, async_save):
         hyperparams = {'param_1': 100, 'param_A': 234, 'LR': 0.001, 'path': 'bla/bladddd'}
 
         callback = ModelIterationCheckpoint(
             2, 'project_name', 'experiment_name', THIS_DIR,
             hyperparams=hyperparams,
-            cloud_save_mode=None)
+            cloud_save_mode=None, async_save=async_save)
         train_loop = TrainLoop(NetUnifiedBatchFeed(), None, None, None, DummyOptimizer(), None)
         train_loop.callbacks_handler.register_callbacks([callback])
         train_loop.callbacks_handler.execute_train_begin()
@@ -125,6 +131,9 @@ class TestModelIterationCheckpoint(unittest.TestCase):
                 train_loop.callbacks_handler.execute_epoch_end()
                 train_loop.epoch += 1
 
+        self.assertEqual(callback.checkpoint_writer is not None, async_save)
+        train_loop.callbacks_handler.execute_train_end()
+
         experiment_dir_path = os.path.join(THIS_DIR, 'project_name',
                                            f'experiment_name_{train_loop.experiment_timestamp}')
 
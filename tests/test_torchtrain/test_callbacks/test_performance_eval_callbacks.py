@@ -2,13 +2,16 @@ import unittest
 import os
 import csv
 import shutil
+import numpy as np
+from types import SimpleNamespace
 from tests.utils import *
 
 from aitoolbox.torchtrain.callbacks.performance_eval import ModelPerformanceEvaluation, \
-    ModelTrainHistoryFileWriter, MetricHistoryRename
+    ModelTrainHistoryPlot, ModelTrainHistoryFileWriter, MetricHistoryRename
 from aitoolbox.torchtrain.train_loop import TrainLoop, TrainLoopCheckpoint
 from aitoolbox.experiment.training_history import TrainingHistory
 from aitoolbox.experiment.result_package.torch_metrics_packages import TorchMetricsPackage
+from aitoolbox.experiment.result_package.basic_packages import RegressionResultPackage
 
 
 THIS_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -59,6 +62,64 @@ class TestModelPerformanceEvaluationCallback(unittest.TestCase):
                                                    on_each_epoch=True, on_train_data=False, on_val_data=True)
         self.assertFalse(hasattr(callback_true, 'train_result_package'))
 
+    def test_sharded_eval_reduce_fn(self):
+        ddp_handler = SimpleNamespace(mp_sum_dict=lambda stats: stats)
+        callback = ModelPerformanceEvaluation(RegressionResultPackage(), {}, sharded_ddp_eval=True)
+
+        callback.train_loop_obj = SimpleNamespace(ddp_training_mode=False, ddp_handler=None)
+        self.assertIsNone(callback.get_sharded_eval_reduce_fn(callback.result_package))
+
+        callback.train_loop_obj = SimpleNamespace(ddp_training_mode=True, ddp_handler=ddp_handler)
+        self.assertIs(callback.get_sharded_eval_reduce_fn(callback.result_package), ddp_handler.mp_sum_dict)
+        self.assertIsNone(callback.get_sharded_eval_reduce_fn(DummyResultPackage()))
+
+        callback_no_sharding = ModelPerformanceEvaluation(RegressionResultPackage(), {})
+        self.assertFalse(callback_no_sharding.sharded_ddp_eval)
+        callback_no_sharding.train_loop_obj = callback.train_loop_obj
+        self.assertIsNone(callback_no_sharding.get_sharded_eval_reduce_fn(callback.result_package))
+
+    def test_fused_eval_registration_skipped_for_sharded_eval(self):
+        ddp_handler = SimpleNamespace(mp_sum_dict=lambda stats: stats)
+
+        for ddp_training_mode, sharded_ddp_eval, result_pkg, expected_fused in [
+            (False, True, RegressionResultPackage(), {'train', 'validation'}),
+            (True, True, RegressionResultPackage(), set()),
+            (True, False, RegressionResultPackage(), {'train', 'validation'}),
+            (True, True, DummyResultPackage(), {'train', 'validation'})
+        ]:
+            callback = ModelPerformanceEvaluation(result_pkg, {}, on_train_data=True, on_val_data=True,
+                                                  sharded_ddp_eval=sharded_ddp_eval)
+            callback.train_loop_obj = SimpleNamespace(ddp_training_mode=ddp_training_mode, ddp_handler=ddp_handler,
+                                                      fused_eval_datasets=set())
+            callback.on_train_loop_registration()
+            self.assertEqual(callback.train_loop_obj.fused_eval_datasets, expected_fused)
+
+    def test_sharded_eval_off_result_package_contents(self):
+        y_true = np.arange(10, dtype=float)
+        y_pred = y_true + np.array([1., -1., 2., 0., 0., 3., 0., -2., 0., 1.])
+        gather_requests = []
+
+        def predict_on_validation_set(ddp_gather=True):
+            gather_requests.append(ddp_gather)
+            # Without the gathering only the local shard of the process would be returned
+            return (y_pred, y_true, {}) if ddp_gather else (y_pred[:5], y_true[:5], {})
+
+        ref_pkg = RegressionResultPackage()
+        ref_pkg.prepare_result_package(y_true, y_pred, hyperparameters={})
+
+        callback = ModelPerformanceEvaluation(RegressionResultPackage(), {})
+        callback.train_loop_obj = SimpleNamespace(
+            ddp_training_mode=True, ddp_handler=SimpleNamespace(mp_sum_dict=lambda stats: stats),
+            predict_on_validation_set=predict_on_validation_set,
+            insert_metric_result_into_history=lambda metric_name, metric_result: None
+        )
+        callback.evaluate_model_performance()
+
+        self.assertEqual(gather_requests, [True])
+        self.assertEqual(callback.result_package.y_true.tolist(), y_true.tolist())
+        self.assertEqual(callback.result_package.y_predicted.tolist(), y_pred.tolist())
+        self.assertEqual(callback.result_package.get_results(), ref_pkg.get_results())
+
     def test_result_package_prepare(self):
         dummy_optimizer = DummyOptimizer()
         dummy_train_loader = list(range(4))
@@ -359,6 +420,33 @@ class TestModelTrainHistoryFileWriter(unittest.TestCase):
             shutil.rmtree(project_path)
 
 
+class TestModelTrainHistoryPlot(unittest.TestCase):
+    def test_cloud_upload_batched(self):
+        callback = ModelTrainHistoryPlot(project_name='dummyProject', experiment_name='exper',
+                                         local_model_result_folder_path=THIS_DIR, cloud_save_mode='local')
+        train_loop = TrainLoop(NetUnifiedBatchFeed(), list(range(4)), list(range(3)), None, DummyOptimizer(), None)
+        train_loop.callbacks_handler.register_callbacks([callback])
+        train_loop.train_history = TrainingHistory().wrap_pre_prepared_history({'loss': [1., 0.5], 'val_loss': [],
+                                                                                'acc': [0.5, 0.7]})
+        callback.cloud_results_saver = RecordingResultsSaver()
+
+        try:
+            callback.plot_current_train_history()
+        finally:
+            project_path = os.path.join(THIS_DIR, 'dummyProject')
+            if os.path.exists(project_path):
+                shutil.rmtree(project_path)
+
+        saved_file_batches = callback.cloud_results_saver.saved_file_batches
+        self.assertEqual(len(saved_file_batches), 1)
+        self.assertEqual(
+            sorted(os.path.basename(cloud_path) for _, cloud_path in saved_file_batches[0]), ['acc.png', 'loss.png']
+        )
+        for local_path, cloud_path in saved_file_batches[0]:
+            self.assertTrue(cloud_path.startswith(f'dummyProject/exper_{train_loop.experiment_timestamp}/results/'))
+            self.assertEqual(os.path.basename(local_path), os.path.basename(cloud_path))
+
+
 class TestMetricHistoryRename(unittest.TestCase):
     def test_rename_metric(self):
         dummy_optimizer = DummyOptimizer()
@@ -0,0 +1,55 @@
+import unittest
+import os
+import shutil
+
+import torch
+import torch.nn as nn
+from torch.utils.data import TensorDataset, DataLoader
+from torch.optim.adam import Adam
+
+from tests.utils import SmallFFNet
+from aitoolbox.torchtrain.train_loop import TrainLoop
+from aitoolbox.torchtrain.callbacks.tensorboard import TensorboardTrainBatchLoss, TensorboardTrainHistoryMetric
+
+THIS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+class TestTensorboardMetricLogging(unittest.TestCase):
+    def setUp(self):
+        self.log_dir = os.path.join(THIS_DIR, 'tensorboard_logs')
+
+    def tearDown(self):
+        if os.path.exists(self.log_dir):
+            shutil.rmtree(self.log_dir)
+
+    def test_shared_metric_logger(self):
+        dataset = TensorDataset(torch.randn(40, 10), torch.randint(low=0, high=2, size=(40,)).float())
+        model = SmallFFNet()
+        batch_loss_cb = TensorboardTrainBatchLoss(log_dir=os.path.join(self.log_dir, 'batch'), is_project=False)
+        history_cb = TensorboardTrainHistoryMetric(log_dir=os.path.join(self.log_dir, 'history'), is_project=False)
+        train_loop = TrainLoop(model, DataLoader(dataset, batch_size=10), None, None,
+                               Adam(model.parameters()), nn.BCELoss())
+        train_loop.fit(num_epochs=2, callbacks=[batch_loss_cb, history_cb])
+
+        # Both callbacks log via the single logger owned by the TrainLoop
+        self.assertIs(batch_loss_cb.metric_logger, train_loop.metric_logger)
+        self.assertIs(history_cb.metric_logger, train_loop.metric_logger)
+        self.assertIsNot(batch_loss_cb.log_backend, history_cb.log_backend)
+
+        # Callbacks unregister their backends and the TrainLoop stops the worker at the end of training
+        self.assertEqual(train_loop.metric_logger.backends, [])
+        self.assertIsNone(train_loop.metric_logger.worker)
+        self.assertGreater(len(os.listdir(os.path.join(self.log_dir, 'batch'))), 0)
+        self.assertGreater(len(os.listdir(os.path.join(self.log_dir, 'history'))), 0)
+
+    def test_synchronous_logging(self):
+        dataset = TensorDataset(torch.randn(20, 10), torch.randint(low=0, high=2, size=(20,)).float())
+        model = SmallFFNet()
+        callback = TensorboardTrainBatchLoss(log_dir=self.log_dir, is_project=False, async_logging=False)
+        train_loop = TrainLoop(model, DataLoader(dataset, batch_size=10), None, None,
+                               Adam(model.parameters()), nn.BCELoss())
+        train_loop.fit(num_epochs=1, callbacks=[callback])
+
+        self.assertIsNot(callback.metric_logger, train_loop.metric_logger)
+        self.assertFalse(callback.metric_logger.background)
+        self.assertIsNone(callback.metric_logger.worker)
@@ -0,0 +1,54 @@
+import unittest
+import torch
+import torch.nn as nn
+
+from aitoolbox.torchtrain.data.batch_model_feed_defs import AbstractModelFeedDefinition, BasicModelFeedDefinition
+
+
+class CountingModel(nn.Module):
+    def __init__(self):
+        super().__init__()
+        self.num_forward = 0
+
+    def forward(self, x):
+        self.num_forward += 1
+        return x * 2
+
+
+class TestBasicModelFeedDefinition(unittest.TestCase):
+    def test_inheritance(self):
+        self.assertIsInstance(BasicModelFeedDefinition(), AbstractModelFeedDefinition)
+
+    def test_get_loss_and_predictions(self):
+        feed_def = BasicModelFeedDefinition()
+        batch_data = [torch.Tensor([1., 2.]), torch.Tensor([3., 5.])]
+
+        self.assertEqual(feed_def.get_loss(CountingModel(), batch_data, nn.L1Loss(), 'cpu').item(), 1.)
+        predictions, targets, metadata = feed_def.get_predictions(CountingModel(), batch_data, 'cpu')
+        self.assertEqual(predictions.tolist(), [2., 4.])
+        self.assertEqual(targets.tolist(), [3., 5.])
+        self.assertEqual(metadata, {})
+
+    def test_get_loss_and_predictions_single_forward(self):
+        model = CountingModel()
+        loss, predictions, targets, metadata = BasicModelFeedDefinition().get_loss_and_predictions(
+            model, [torch.Tensor([1., 2.]), torch.Tensor([3., 5.])], nn.L1Loss(), 'cpu'
+        )
+        self.assertEqual(model.num_forward, 1)
+        self.assertEqual(loss.item(), 1.)
+        self.assertEqual(predictions.tolist(), [2., 4.])
+        self.assertEqual(targets.tolist(), [3., 5.])
+        self.assertEqual(metadata, {})
+
+    def test_custom_loss_not_fused(self):
+        class MyFeedDefinition(BasicModelFeedDefinition):
+            def get_loss_eval(self, model, batch_data, criterion, device):
+                return BasicModelFeedDefinition.get_loss(self, model, batch_data, criterion, device) * 10
+
+        model = CountingModel()
+        loss, predictions, _, _ = MyFeedDefinition().get_loss_and_predictions(
+            model, [torch.Tensor([1., 2.]), torch.Tensor([3., 5.])], nn.L1Loss(), 'cpu'
+        )
+        self.assertEqual(model.num_forward, 2)
+        self.assertEqual(loss.item(), 10.)
+        self.assertEqual(predictions.tolist(), [2., 4.])
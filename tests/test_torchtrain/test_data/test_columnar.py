@@ -0,0 +1,182 @@
+import unittest
+import os
+import pickle
+import shutil
+
+import numpy as np
+import torch
+from torch.utils.data import DataLoader, TensorDataset
+
+from aitoolbox.torchtrain.data.dataset import BasicDataset, ListDataset
+from aitoolbox.torchtrain.data.columnar import ColumnarDataset, ColumnarDatasetWriter, infer_column_kind
+
+THIS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+class TestColumnarDataset(unittest.TestCase):
+    def setUp(self):
+        self.data_dir = os.path.join(THIS_DIR, 'columnar_dataset')
+
+    def tearDown(self):
+        if os.path.exists(self.data_dir):
+            shutil.rmtree(self.data_dir)
+
+    def test_columns_roundtrip(self):
+        features = np.random.rand(25, 3).astype(np.float32)
+        labels = list(range(25))
+        texts = [f'text {i} ž' for i in range(25)]
+        tokens = [list(range(i % 4 + 1)) for i in range(25)]
+        metadata = [{'id': i} if i % 2 == 0 else None for i in range(25)]
+
+        dataset = ColumnarDataset.from_data(self.data_dir, features, labels, texts, tokens, metadata,
+                                            column_names=['features', 'label', 'text', 'tokens', 'meta'],
+                                            chunk_size=10)
+        self.assertEqual(len(dataset), 25)
+        self.assertEqual(dataset.metadata['chunk_sizes'], [10, 10, 5])
+        self.assertEqual(dataset.column_kinds, ['fixed', 'fixed', 'string', 'ragged', 'object'])
+
+        for idx in [0, 9, 10, 24, -1]:
+            x, y, text, token_ids, meta = dataset[idx]
+            self.assertEqual(x.tolist(), features[idx].tolist())
+            self.assertEqual(y, labels[idx])
+            self.assertEqual(text, texts[idx])
+            self.assertEqual(token_ids.tolist(), tokens[idx])
+            self.assertEqual(meta, metadata[idx])
+
+        with self.assertRaises(IndexError):
+            dataset[25]
+
+    def test_getitems_matches_getitem(self):
+        features = np.arange(60).reshape(30, 2)
+        dataset = ColumnarDataset.from_data(self.data_dir, features, [f'{i}' for i in range(30)], chunk_size=7)
+
+        indices = [29, 0, 15, 6, 7, 15, -2]
+        batch = dataset.__getitems__(indices)
+        self.assertEqual(len(batch), len(indices))
+        for sample, idx in zip(batch, indices):
+            self.assertEqual(sample[0].tolist(), dataset[idx][0].tolist())
+            self.assertEqual(sample[1], dataset[idx][1])
+
+        features_column, text_column = dataset.get_columns(indices)
+        self.assertEqual(features_column.tolist(), features[indices].tolist())
+        self.assertEqual(text_column, [f'{i % 30}' for i in indices])
+
+        with self.assertRaises(IndexError):
+            dataset.get_columns([0, 30])
+
+    def test_column_selection_and_pickling(self):
+        ColumnarDataset.from_data(self.data_dir, np.arange(10), np.ones(10), column_names=['a', 'b'])
+
+        dataset = ColumnarDataset(self.data_dir, columns=['b'])
+        self.assertEqual(dataset[3], 1.)
+
+        pickled_dataset = pickle.dumps(dataset)
+        self.assertLess(len(pickled_dataset), 500)
+        self.assertEqual(pickle.loads(pickled_dataset)[3], 1.)
+
+        with self.assertRaises(ValueError):
+            ColumnarDataset(self.data_dir, columns=['c'])
+
+    def test_data_loader(self):
+        x = torch.randn(50, 4)
+        y = torch.randint(0, 3, (50,))
+        dataset = ColumnarDataset.from_dataset(TensorDataset(x, y), self.data_dir, chunk_size=16)
+
+        batches = list(DataLoader(dataset, batch_size=8))
+        self.assertEqual(len(batches), 7)
+        self.assertTrue(torch.allclose(torch.cat([batch[0] for batch in batches]), x))
+        self.assertEqual(torch.cat([batch[1] for batch in batches]).tolist(), y.tolist())
+
+        batches = list(DataLoader(dataset, batch_size=8, shuffle=True, num_workers=2))
+        self.assertEqual(sorted(torch.cat([batch[1] for batch in batches]).tolist()), sorted(y.tolist()))
+
+    def test_from_dataset(self):
+        dataset = ColumnarDataset.from_dataset(BasicDataset(list(range(20))), self.data_dir)
+        self.assertEqual([dataset[i] for i in range(20)], list(range(20)))
+        shutil.rmtree(self.data_dir)
+
+        dataset = ColumnarDataset.from_dataset(ListDataset(['a', 'b'], [[1, 2], [3, 4]]), self.data_dir,
+                                               column_names=['text', 'ids'])
+        self.assertEqual(dataset[1][0], 'b')
+        self.assertEqual(dataset[1][1].tolist(), [3, 4])
+
+        with self.assertRaises(TypeError):
+            ColumnarDataset.from_dataset(list(range(5)), self.data_dir)
+
+
+class TestColumnarDatasetWriter(unittest.TestCase):
+    def setUp(self):
+        self.data_dir = os.path.join(THIS_DIR, 'columnar_dataset_writer')
+
+    def tearDown(self):
+        if os.path.exists(self.data_dir):
+            shutil.rmtree(self.data_dir)
+
+    def test_incremental_writing(self):
+        writer = ColumnarDatasetWriter(self.data_dir, ['tokens'])
+        writer.write_chunk([[1, 2], [3]])
+        # The chunk with the same length rows is still stored as the ragged column
+        writer.write_chunk([[4, 5], [6, 7]])
+        dataset = writer.close()
+
+        self.assertEqual(dataset.column_kinds, ['ragged'])
+        self.assertEqual([dataset[i].tolist() for i in range(4)], [[1, 2], [3], [4, 5], [6, 7]])
+
+    def test_fixed_column_promoted_to_ragged(self):
+        d = os.path.join(self.data_dir, 'ragged_chunk')
+        dataset = ColumnarDataset.from_data(d, [[1, 2], [3, 4], [5, 6, 7], [8]], chunk_size=2)
+        self.assertEqual(dataset.column_kinds, ['ragged'])
+        self.assertEqual([dataset[i].tolist() for i in range(4)], [[1, 2], [3, 4], [5, 6, 7], [8]])
+
+        # Later chunk is again of the fixed shape, but different from the one of the first chunk
+        d = os.path.join(self.data_dir, 'shape_mismatch')
+        dataset = ColumnarDataset.from_data(d, [[1, 2], [3, 4], [5, 6, 7]], chunk_size=2)
+        self.assertEqual(dataset.column_kinds, ['ragged'])
+        self.assertEqual([row.tolist() for row in dataset.__getitems__([0, 2])], [[1, 2], [5, 6, 7]])
+        self.assertEqual(ColumnarDataset(d)[1].tolist(), [3, 4])
+
+    def test_fixed_column_shape_validation(self):
+        writer = ColumnarDatasetWriter(os.path.join(self.data_dir, 'matrix'), ['x'])
+        writer.write_chunk(np.zeros((2, 2, 2)))
+        with self.assertRaises(ValueError):
+            writer.write_chunk(np.zeros((2, 3, 2)))
+
+        # Explicitly fixed column is never promoted
+        writer = ColumnarDatasetWriter(os.path.join(self.data_dir, 'explicit'), ['x'], column_kinds={'x': 'fixed'})
+        writer.write_chunk([[1, 2], [3, 4]])
+        with self.assertRaises(ValueError):
+            writer.write_chunk([[5, 6, 7]])
+
+        # Chunks of the same row shape but different dtypes are gathered without the loss of precision
+        dataset = ColumnarDataset.from_data(os.path.join(self.data_dir, 'dtypes'), [1, 2, 0.5], chunk_size=2)
+        self.assertEqual(dataset.get_columns([0, 2])[0].tolist(), [1., 0.5])
+
+    def test_explicit_column_kinds(self):
+        dataset = ColumnarDataset.from_data(self.data_dir, [[1, 2], [3, 4]], [[1, 'a'], [2, 'b']],
+                                            column_names=['tokens', 'meta'],
+                                            column_kinds={'tokens': 'ragged', 'meta': 'object'})
+        self.assertEqual(dataset.column_kinds, ['ragged', 'object'])
+        self.assertEqual(dataset[1][0].tolist(), [3, 4])
+        self.assertEqual(dataset[1][1], [2, 'b'])
+
+        with self.assertRaises(ValueError):
+            ColumnarDatasetWriter(self.data_dir, ['a'], column_kinds={'a': 'sparse'})
+        with self.assertRaises(ValueError):
+            ColumnarDatasetWriter(self.data_dir, ['a'], column_kinds={'b': 'fixed'})
+
+    def test_chunk_checks(self):
+        writer = ColumnarDatasetWriter(self.data_dir, ['a', 'b'])
+        with self.assertRaises(ValueError):
+            writer.write_chunk([1, 2])
+        with self.assertRaises(ValueError):
+            writer.write_chunk([1, 2], [1])
+        with self.assertRaises(ValueError):
+            ColumnarDatasetWriter(self.data_dir, [])
+
+    def test_infer_column_kind(self):
+        self.assertEqual(infer_column_kind(np.zeros((3, 2))), 'fixed')
+        self.assertEqual(infer_column_kind([1, 2.5]), 'fixed')
+        self.assertEqual(infer_column_kind([[1, 2], [3]]), 'ragged')
+        self.assertEqual(infer_column_kind(['a', 'b']), 'string')
+        self.assertEqual(infer_column_kind(['a', 1]), 'object')
+        self.assertEqual(infer_column_kind([{'a': 1}]), 'object')
@@ -0,0 +1,123 @@
+import unittest
+
+import numpy as np
+from torch.utils.data import DataLoader
+
+from aitoolbox.torchtrain.data.dataset import BasicDataset
+from aitoolbox.torchtrain.data.samplers import LengthBucketBatchSampler
+from aitoolbox.torchtrain.train_loop.components.ddp_handler import DDPHandler
+
+
+class TestLengthBucketBatchSampler(unittest.TestCase):
+    def setUp(self):
+        self.lengths = np.random.RandomState(0).randint(1, 100, size=1000)
+
+    def test_fixed_batch_size(self):
+        sampler = LengthBucketBatchSampler(self.lengths, batch_size=16, bucket_size_multiplier=10)
+        batches = list(sampler)
+
+        # 6 full buckets of 160 examples and the last bucket of 40 examples
+        self.assertEqual(len(batches), 6 * 10 + 3)
+        self.assertEqual(sorted(idx for batch in batches for idx in batch), list(range(1000)))
+        self.assertTrue(all(len(batch) <= 16 for batch in batches))
+
+        padded_size = sum(len(batch) * self.lengths[batch].max() for batch in batches)
+        random_batches = np.array_split(np.random.RandomState(1).permutation(1000), len(batches))
+        random_padded_size = sum(len(batch) * self.lengths[batch].max() for batch in random_batches)
+        self.assertLess(padded_size, random_padded_size * 0.7)
+
+    def test_drop_last(self):
+        sampler = LengthBucketBatchSampler(self.lengths, batch_size=16, bucket_size_multiplier=10, drop_last=True)
+        batches = sampler.get_batches()
+        self.assertTrue(all(len(batch) == 16 for batch in batches))
+        self.assertEqual(len(sampler), 6 * 10 + 2)
+
+    def test_token_budget(self):
+        sampler = LengthBucketBatchSampler(self.lengths, max_tokens=500)
+        batches = sampler.get_batches()
+
+        self.assertEqual(sorted(idx for batch in batches for idx in batch), list(range(1000)))
+        self.assertTrue(all(len(batch) * self.lengths[batch].max() <= 500 for batch in batches))
+
+    def test_epoch_reshuffling(self):
+        sampler = LengthBucketBatchSampler(self.lengths, batch_size=16)
+        self.assertEqual(len(sampler), len(list(sampler)))
+        epoch_0_batches = LengthBucketBatchSampler(self.lengths, batch_size=16).get_batches()
+
+        # Epoch advanced after the complete pass
+        self.assertEqual(sampler.epoch, 1)
+        self.assertNotEqual(sampler.get_batches(), epoch_0_batches)
+        sampler.set_epoch(0)
+        self.assertEqual(sampler.get_batches(), epoch_0_batches)
+
+        no_shuffle_sampler = LengthBucketBatchSampler(self.lengths, batch_size=16, shuffle=False)
+        self.assertEqual(list(no_shuffle_sampler), list(no_shuffle_sampler))
+
+    def test_distributed_sharding(self):
+        sampler = LengthBucketBatchSampler(self.lengths, max_tokens=700)
+        num_batches = len(sampler)
+
+        rank_samplers = [sampler.distributed(num_replicas=3, rank=rank) for rank in range(3)]
+        rank_batches = [rank_sampler.get_batches() for rank_sampler in rank_samplers]
+
+        self.assertEqual(len({len(batches) for batches in rank_batches}), 1)
+        self.assertEqual(len(rank_batches[0]), int(np.ceil(num_batches / 3)))
+        self.assertEqual({idx for batches in rank_batches for batch in batches for idx in batch}, set(range(1000)))
+
+        for rank_sampler in rank_samplers:
+            rank_sampler.set_epoch(3)
+        rank_batches_epoch_3 = [rank_sampler.get_batches() for rank_sampler in rank_samplers]
+        self.assertNotEqual(rank_batches_epoch_3, rank_batches)
+        self.assertEqual({idx for batches in rank_batches_epoch_3 for batch in batches for idx in batch},
+                         set(range(1000)))
+
+        drop_sampler = LengthBucketBatchSampler(self.lengths, max_tokens=700, drop_last=True, num_replicas=3, rank=0)
+        self.assertEqual(len(drop_sampler), num_batches // 3)
+
+    def test_sample_indices_padding(self):
+        sampler = LengthBucketBatchSampler(self.lengths, max_tokens=700)
+        num_batches = len(sampler)
+        self.assertNotEqual(num_batches % 3, 0)
+
+        rank_samplers = [sampler.distributed(num_replicas=3, rank=rank) for rank in range(3)]
+        rank_sample_indices = [rank_sampler.get_sample_indices() for rank_sampler in rank_samplers]
+        for rank_sampler, (sample_indices, padding_mask) in zip(rank_samplers, rank_sample_indices):
+            self.assertEqual(sample_indices.tolist(),
+                             [idx for batch in rank_sampler.get_batches() for idx in batch])
+            self.assertEqual(len(padding_mask), len(sample_indices))
+
+        # Only the unique samples are left after dropping the repeated padding batches
+        unique_indices = np.concatenate([sample_indices[~padding_mask]
+                                         for sample_indices, padding_mask in rank_sample_indices])
+        self.assertEqual(sorted(unique_indices.tolist()), list(range(1000)))
+        self.assertTrue(any(padding_mask.any() for _, padding_mask in rank_sample_indices))
+
+        # Indices of the last iterated epoch are reported even after the epoch advanced
+        rank_sampler = rank_samplers[0]
+        iterated_indices = [idx for batch in rank_sampler for idx in batch]
+        self.assertEqual(rank_sampler.epoch, 1)
+        self.assertEqual(rank_sampler.get_sample_indices()[0].tolist(), iterated_indices)
+
+        self.assertFalse(LengthBucketBatchSampler(self.lengths, batch_size=16).get_sample_indices()[1].any())
+
+    def test_param_checks(self):
+        with self.assertRaises(ValueError):
+            LengthBucketBatchSampler(self.lengths)
+        with self.assertRaises(ValueError):
+            LengthBucketBatchSampler(self.lengths, batch_size=4, max_tokens=100)
+        with self.assertRaises(ValueError):
+            LengthBucketBatchSampler(self.lengths, batch_size=4, num_replicas=2)
+        with self.assertRaises(ValueError):
+            LengthBucketBatchSampler(self.lengths, batch_size=4, num_replicas=2, rank=2)
+
+    def test_ddp_loader_rebuild(self):
+        dataset = BasicDataset(list(range(1000)))
+        data_loader = DataLoader(dataset, batch_sampler=LengthBucketBatchSampler(self.lengths, batch_size=10))
+
+        ddp_loader, ddp_sampler = DDPHandler.build_loader_sampler(data_loader, shuffle=True, world_size=2, rank=1)
+        self.assertIsInstance(ddp_sampler, LengthBucketBatchSampler)
+        self.assertIs(ddp_loader.batch_sampler, ddp_sampler)
+        self.assertEqual(ddp_sampler.num_replicas, 2)
+        self.assertEqual(ddp_sampler.rank, 1)
+        self.assertEqual(len(ddp_loader), int(np.ceil(len(data_loader) / 2)))
+        self.assertEqual(next(iter(ddp_loader)).tolist(), ddp_sampler.get_batches()[0])
@@ -0,0 +1,145 @@
+import unittest
+import os
+import pickle
+
+import numpy as np
+import torch
+import torch.multiprocessing as mp
+from torch.utils.data import DataLoader, TensorDataset, RandomSampler, SequentialSampler
+
+from aitoolbox.torchtrain.data.dataset import BasicDataset, ListDataset
+from aitoolbox.torchtrain.data.shared_memory import SharedArray, SharedObjectList, SharedMemoryDatasetStore
+
+THIS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def sum_shared_dataset(rank, data_loader, result_dir):
+    total = sum(float(batch.sum()) for batch in data_loader)
+    with open(os.path.join(result_dir, f'result_{rank}.txt'), 'w') as f:
+        f.write(str(total))
+
+
+class TestSharedArray(unittest.TestCase):
+    def setUp(self):
+        self.store = SharedMemoryDatasetStore()
+
+    def tearDown(self):
+        self.store.cleanup()
+
+    def test_share_array(self):
+        array = np.arange(12, dtype=np.float32).reshape(4, 3)
+        shared_array = self.store.share(array)
+
+        self.assertIsInstance(shared_array, SharedArray)
+        self.assertEqual(len(shared_array), 4)
+        self.assertEqual(shared_array[1].tolist(), [3., 4., 5.])
+        self.assertEqual(np.asarray(shared_array).tolist(), array.tolist())
+
+        # Only the file location is pickled
+        pickled_array = pickle.dumps(shared_array)
+        self.assertLess(len(pickled_array), 500)
+        self.assertEqual(pickle.loads(pickled_array)[3].tolist(), [9., 10., 11.])
+
+    def test_copy_on_write(self):
+        shared_array = self.store.share(np.zeros(5))
+        attached_array = pickle.loads(pickle.dumps(shared_array))
+        attached_array.array[0] = 10.
+        self.assertEqual(shared_array[0], 0.)
+
+    def test_empty_array(self):
+        shared_array = self.store.share(np.zeros((0, 3)))
+        self.assertEqual(len(shared_array), 0)
+        self.assertEqual(pickle.loads(pickle.dumps(shared_array)).shape, (0, 3))
+
+
+class TestSharedObjectList(unittest.TestCase):
+    def setUp(self):
+        self.store = SharedMemoryDatasetStore()
+
+    def tearDown(self):
+        self.store.cleanup()
+
+    def test_share_list(self):
+        data_list = ['text a', {'tokens': [1, 2, 3]}, (4, 'b'), None, 'last']
+        shared_list = self.store.share(data_list)
+
+        self.assertIsInstance(shared_list, SharedObjectList)
+        self.assertEqual(len(shared_list), 5)
+        self.assertEqual(list(shared_list), data_list)
+        self.assertEqual(shared_list[-1], 'last')
+        self.assertEqual(shared_list[1:3], data_list[1:3])
+        with self.assertRaises(IndexError):
+            shared_list[5]
+
+        attached_list = pickle.loads(pickle.dumps(shared_list))
+        self.assertEqual(list(attached_list), data_list)
+
+    def test_share_object_array_and_empty_list(self):
+        self.assertIsInstance(self.store.share(np.array(['a', None], dtype=object)), SharedObjectList)
+        self.assertEqual(list(self.store.share([])), [])
+
+    def test_unsupported_data(self):
+        with self.assertRaises(TypeError):
+            self.store.share({'a': 1})
+
+
+class TestSharedMemoryDatasetStore(unittest.TestCase):
+    def setUp(self):
+        self.store = SharedMemoryDatasetStore()
+
+    def tearDown(self):
+        self.store.cleanup()
+
+    def test_share_datasets(self):
+        tensor_dataset = self.store.share_dataset(TensorDataset(torch.arange(10.), torch.ones(10)))
+        self.assertIsInstance(tensor_dataset, TensorDataset)
+        self.assertTrue(all(tensor.is_shared() for tensor in tensor_dataset.tensors))
+        self.assertEqual(tensor_dataset[3][0].item(), 3.)
+
+        basic_dataset = self.store.share_dataset(BasicDataset(np.arange(6).reshape(3, 2)))
+        self.assertIsInstance(basic_dataset, BasicDataset)
+        self.assertIsInstance(basic_dataset.data, SharedArray)
+        self.assertEqual(basic_dataset[2].tolist(), [4, 5])
+
+        list_dataset = self.store.share_dataset(ListDataset(['a', 'b'], [[1, 2], [3]]))
+        self.assertIsInstance(list_dataset, ListDataset)
+        self.assertEqual(list_dataset[1], ('b', [3]))
+
+        with self.assertRaises(TypeError):
+            self.store.share_dataset(list(range(5)))
+
+    def test_share_data_loader(self):
+        dataset = BasicDataset(np.arange(20, dtype=np.float32).reshape(10, 2))
+        shuffled_loader = self.store.share_data_loader(DataLoader(dataset, batch_size=4, shuffle=True))
+        self.assertIsInstance(shuffled_loader.sampler, RandomSampler)
+        self.assertIsInstance(shuffled_loader.dataset.data, SharedArray)
+        self.assertEqual(shuffled_loader.batch_size, 4)
+
+        sequential_loader = self.store.share_data_loader(DataLoader(dataset, batch_size=4, drop_last=True))
+        self.assertIsInstance(sequential_loader.sampler, SequentialSampler)
+        batches = list(sequential_loader)
+        self.assertEqual(len(batches), 2)
+        self.assertEqual(batches[0].tolist(), np.arange(8, dtype=np.float32).reshape(4, 2).tolist())
+
+    def test_cleanup(self):
+        self.store.share(np.zeros(5))
+        self.assertEqual(len(os.listdir(self.store.storage_dir)), 1)
+        self.store.cleanup()
+        self.assertFalse(os.path.exists(self.store.storage_dir))
+
+    def test_spawned_processes_attach(self):
+        result_dir = os.path.join(THIS_DIR, 'shared_memory_results')
+        os.makedirs(result_dir, exist_ok=True)
+        try:
+            data_loader = self.store.share_data_loader(
+                DataLoader(BasicDataset(np.ones((100, 3), dtype=np.float32)), batch_size=10)
+            )
+            mp.spawn(sum_shared_dataset, args=(data_loader, result_dir), nprocs=2)
+
+            for rank in range(2):
+                with open(os.path.join(result_dir, f'result_{rank}.txt')) as f:
+                    self.assertEqual(float(f.read()), 300.)
+        finally:
+            for file_name in os.listdir(result_dir):
+                os.remove(os.path.join(result_dir, file_name))
+            os.rmdir(result_dir)
@@ -2,7 +2,9 @@ import unittest
 
 from tests.utils import *
 
-from aitoolbox.torchtrain.model import TTModel, TTBasicModel
+import torch
+
+from aitoolbox.torchtrain.model import TTModel, TTBasicModel, TTBasicMultiGPUModel, MultiGPUModelWrap
 from aitoolbox.utils.util import function_exists
 
 
@@ -11,6 +13,7 @@ class TestTTModel(unittest.TestCase):
         self.assertTrue(function_exists(TTModel, 'get_loss'))
         self.assertTrue(function_exists(TTModel, 'get_loss_eval'))
         self.assertTrue(function_exists(TTModel, 'get_predictions'))
+        self.assertTrue(function_exists(TTModel, 'get_loss_and_predictions'))
         self.assertTrue(function_exists(TTModel, 'forward'))
 
         class FailingModel(TTModel):
@@ -33,6 +36,56 @@ class TestTTModel(unittest.TestCase):
 
         self.assertTrue(isinstance(MyModel(), nn.Module))
 
+    def test_default_get_loss_and_predictions(self):
+        class MyModel(TTModel):
+            def __init__(self):
+                super().__init__()
+
+            def get_loss(self, batch_data, criterion, device):
+                return batch_data + 1
+
+            def get_predictions(self, batch_data, device):
+                return batch_data + 2, batch_data + 3, {'meta': batch_data}
+
+        self.assertEqual(MyModel().get_loss_and_predictions(10, None, 'cpu'), (11, 12, 13, {'meta': 10}))
+
+
+    def test_get_loss_and_predictions_single_forward(self):
+        model = CountingBasicModel()
+        loss, predictions, targets, metadata = model.get_loss_and_predictions(
+            [torch.Tensor([1., 2.]), torch.Tensor([3., 5.])], criterion=nn.L1Loss(), device='cpu'
+        )
+        self.assertEqual(model.num_forward, 1)
+        self.assertEqual(loss.item(), 1.)
+        self.assertEqual(predictions.tolist(), [2., 4.])
+        self.assertEqual(targets.tolist(), [3., 5.])
+        self.assertEqual(metadata, {})
+
+    def test_get_loss_and_predictions_custom_methods_not_fused(self):
+        class MyCustomPredModel(CountingBasicModel):
+            def get_predictions(self, batch_data, device):
+                predictions, targets, _ = TTBasicModel.get_predictions(self, batch_data, device)
+                return predictions, targets, {'custom': True}
+
+        model = MyCustomPredModel()
+        loss, predictions, targets, metadata = model.get_loss_and_predictions(
+            [torch.Tensor([1., 2.]), torch.Tensor([3., 5.])], criterion=nn.L1Loss(), device='cpu'
+        )
+        self.assertEqual(model.num_forward, 2)
+        self.assertEqual(loss.item(), 1.)
+        self.assertEqual(metadata, {'custom': True})
+
+    def test_multi_gpu_get_loss_and_predictions_single_forward(self):
+        model = MultiGPUModelWrap(CountingBasicModel())
+        loss, predictions, targets, metadata = model.get_loss_and_predictions(
+            [torch.Tensor([1., 2.]), torch.Tensor([3., 5.])], criterion=nn.L1Loss(), device='cpu'
+        )
+        self.assertEqual(model.model.num_forward, 1)
+        self.assertEqual(loss.item(), 1.)
+        self.assertEqual(predictions.tolist(), [2., 4.])
+        self.assertEqual(targets.tolist(), [3., 5.])
+        self.assertIsInstance(model, TTBasicMultiGPUModel)
+
 
 class MyBasicModel(TTBasicModel):
     def __init__(self):
@@ -62,6 +115,16 @@ class MyComplexModel(TTBasicModel):
         return pred
 
 
+class CountingBasicModel(TTBasicModel):
+    def __init__(self):
+        super().__init__()
+        self.num_forward = 0
+
+    def forward(self, x):
+        self.num_forward += 1
+        return x * 2
+
+
 class DummyData:
     def __init__(self, value, device='cpu'):
         self.value = value
@@ -0,0 +1,106 @@
+import unittest
+import os
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+
+import torch
+import torch.nn as nn
+
+from aitoolbox.experiment.local_save.local_model_save import PyTorchLocalModelSaver
+from aitoolbox.torchtrain.train_loop.components.async_checkpoint import AsyncCheckpointWriter, snapshot_to_cpu
+
+
+class BlockingModelSaver:
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.release_event = threading.Event()
+        self.saved_models = []
+
+    def save_model(self, model, **kwargs):
+        self.release_event.wait(timeout=10)
+        if self.fail:
+            raise IOError('Disk full')
+        self.saved_models.append((model, kwargs))
+        return 'model_name', None
+
+
+class TestSnapshotToCpu(unittest.TestCase):
+    def test_snapshot_independent_of_training_updates(self):
+        model = nn.Linear(3, 2)
+        checkpoint = {'model_state_dict': model.state_dict(), 'epoch': 3, 'steps': [torch.ones(2), (1, 2)]}
+        snapshot = snapshot_to_cpu(checkpoint)
+
+        with torch.no_grad():
+            model.weight.add_(1.)
+        checkpoint['steps'][0].add_(1.)
+
+        self.assertFalse(torch.equal(snapshot['model_state_dict']['weight'], model.weight))
+        self.assertEqual(snapshot['steps'][0].tolist(), [1., 1.])
+        self.assertEqual(snapshot['steps'][1], (1, 2))
+        self.assertEqual(snapshot['epoch'], 3)
+
+        self.assertIsInstance(snapshot['model_state_dict'], OrderedDict)
+        self.assertEqual(snapshot['model_state_dict']._metadata, checkpoint['model_state_dict']._metadata)
+        nn.Linear(3, 2).load_state_dict(snapshot['model_state_dict'])
+
+    def test_shared_tensors_stay_shared(self):
+        weight = torch.randn(4, 4)
+        snapshot = snapshot_to_cpu({'encoder': weight, 'decoder': weight})
+        self.assertIs(snapshot['encoder'], snapshot['decoder'])
+        self.assertIsNot(snapshot['encoder'], weight)
+
+
+class TestAsyncCheckpointWriter(unittest.TestCase):
+    def test_save_in_background(self):
+        model_saver = BlockingModelSaver()
+        writer = AsyncCheckpointWriter(model_saver, max_queue_size=2, fsync=False)
+        saved_paths = []
+
+        checkpoint = {'weight': torch.zeros(3)}
+        writer.submit(checkpoint, {'epoch': 0}, on_saved=saved_paths.append)
+        # Training continues and modifies the weights while the checkpoint is still being saved
+        checkpoint['weight'].add_(5.)
+        writer.submit(checkpoint, {'epoch': 1})
+        self.assertEqual(model_saver.saved_models, [])
+
+        model_saver.release_event.set()
+        writer.wait()
+        self.assertEqual([m['weight'].tolist() for m, _ in model_saver.saved_models], [[0.] * 3, [5.] * 3])
+        self.assertEqual([kwargs for _, kwargs in model_saver.saved_models], [{'epoch': 0}, {'epoch': 1}])
+        self.assertEqual(saved_paths, [('model_name', None)])
+
+        writer.close()
+        self.assertIsNone(writer.worker)
+
+    def test_background_error_raised(self):
+        model_saver = BlockingModelSaver(fail=True)
+        model_saver.release_event.set()
+        writer = AsyncCheckpointWriter(model_saver, fsync=False)
+
+        writer.submit({'weight': torch.zeros(3)}, {})
+        with self.assertRaises(RuntimeError):
+            writer.close()
+
+    def test_local_model_saver(self):
+        result_dir = tempfile.mkdtemp()
+        try:
+            writer = AsyncCheckpointWriter(PyTorchLocalModelSaver(result_dir, checkpoint_model=True))
+            model = nn.Linear(3, 2)
+            writer.submit(
+                {'model_state_dict': model.state_dict(), 'optimizer_state_dict': {}, 'epoch': 0, 'hyperparams': {}},
+                {'project_name': 'project', 'experiment_name': 'exp', 'experiment_timestamp': 'ts', 'epoch': 0}
+            )
+            writer.close()
+
+            model_path = os.path.join(result_dir, 'project', 'exp_ts', 'checkpoint_model', 'model_exp_ts_E0.pth')
+            loaded_model = nn.Linear(3, 2)
+            loaded_model.load_state_dict(torch.load(model_path)['model_state_dict'])
+            self.assertTrue(torch.equal(loaded_model.weight, model.weight))
+        finally:
+            shutil.rmtree(result_dir)
+
+    def test_queue_size_check(self):
+        with self.assertRaises(ValueError):
+            AsyncCheckpointWriter(BlockingModelSaver(), max_queue_size=0)
@@ -0,0 +1,125 @@
+import unittest
+
+import torch
+import torch.nn as nn
+from torch.utils.data import TensorDataset, DataLoader
+from torch.optim.adam import Adam
+
+from tests.utils import SmallFFNet, CallbackTracker, MultiLossModel, MultiLossDummy, DummyOptimizer, DummyLoss
+from aitoolbox.torchtrain.train_loop import TrainLoop
+from aitoolbox.torchtrain.multi_loss_optim import MultiOptimizer
+from aitoolbox.torchtrain.callbacks.abstract import AbstractCallback
+from aitoolbox.torchtrain.train_loop.components.callback_budget import CallbackExecutionBudget, CallbackCostTracker
+
+
+class TestCallbackExecutionBudget(unittest.TestCase):
+    def test_every_n_steps(self):
+        budget = CallbackExecutionBudget(every_n_steps=3)
+        executed_steps = [step for step in range(10) if budget.should_execute('on_batch_end', step)]
+        self.assertEqual(executed_steps, [0, 3, 6, 9])
+
+        # Epoch level stages are not limited
+        self.assertTrue(all(budget.should_execute('on_epoch_end', step) for step in range(3)))
+
+    def test_stages_tracked_separately(self):
+        budget = CallbackExecutionBudget(every_n_steps=2)
+        self.assertTrue(budget.should_execute('on_batch_begin', 0))
+        self.assertTrue(budget.should_execute('on_batch_end', 1))
+        self.assertFalse(budget.should_execute('on_batch_begin', 1))
+        self.assertTrue(budget.should_execute('on_batch_begin', 2))
+
+    def test_repeated_stage_in_same_step(self):
+        budget = CallbackExecutionBudget(every_n_steps=2)
+        executed = [(step, budget.should_execute('on_after_gradient_update', step))
+                    for step in range(4) for _ in range(3)]
+        self.assertEqual(
+            [step for step, decision in executed if decision],
+            [0, 0, 0, 2, 2, 2]
+        )
+
+    def test_step_time_fraction(self):
+        budget = CallbackExecutionBudget(max_step_time_fraction=0.1)
+        self.assertEqual(budget.get_execution_interval(), 1)
+        self.assertEqual(budget.get_execution_interval(mean_cost=0.001, mean_step_time=0.1), 1)
+        # Callback taking 50% of the step time has to be executed only every 5th step to fit into the 10% budget
+        self.assertEqual(budget.get_execution_interval(mean_cost=0.05, mean_step_time=0.1), 5)
+
+        self.assertEqual(
+            CallbackExecutionBudget(every_n_steps=10, max_step_time_fraction=0.1).get_execution_interval(0.05, 0.1), 10
+        )
+
+        executed_steps = [step for step in range(12) if budget.should_execute('on_batch_end', step, 0.05, 0.1)]
+        self.assertEqual(executed_steps, [0, 5, 10])
+
+    def test_param_checks(self):
+        with self.assertRaises(ValueError):
+            CallbackExecutionBudget(every_n_steps=0)
+        with self.assertRaises(ValueError):
+            CallbackExecutionBudget(max_step_time_fraction=0.)
+
+
+class TestCallbackCostTracker(unittest.TestCase):
+    def test_summary(self):
+        callback = AbstractCallback('my_callback')
+        tracker = CallbackCostTracker(ema_decay=0.5)
+        tracker.record(callback, 'on_batch_end', 0.002)
+        tracker.record(callback, 'on_batch_end', 0.004)
+        tracker.record_skip(callback, 'on_batch_end')
+        tracker.record(callback, 'on_epoch_end', 0.01)
+        for step_end_time in [1., 1.5, 2.5, 3.]:
+            tracker.record_step_end(step_end_time)
+
+        self.assertAlmostEqual(tracker.get_mean_cost(callback, 'on_batch_end'), 0.003)
+        self.assertIsNone(tracker.get_mean_cost(callback, 'on_batch_begin'))
+        self.assertAlmostEqual(tracker.mean_step_time, 0.625)
+
+        summary = tracker.get_summary()['my_callback']
+        self.assertEqual(summary['on_batch_end']['calls'], 2)
+        self.assertEqual(summary['on_batch_end']['skipped'], 1)
+        self.assertAlmostEqual(summary['on_batch_end']['total_ms'], 6.)
+        self.assertAlmostEqual(summary['on_batch_end']['mean_ms'], 3.)
+        self.assertAlmostEqual(summary['on_batch_end']['ms_per_step'], 1.5)
+        self.assertAlmostEqual(summary['on_epoch_end']['total_ms'], 10.)
+
+        tracker.reset()
+        self.assertEqual(tracker.get_summary(), {})
+
+
+class TestCallbacksHandlerBudget(unittest.TestCase):
+    def test_throttled_callback_in_train_loop(self):
+        dataset = TensorDataset(torch.randn(100, 10), torch.randint(low=0, high=2, size=(100,)).float())
+        model = SmallFFNet()
+        train_loop = TrainLoop(model, DataLoader(dataset, batch_size=10), None, None,
+                               Adam(model.parameters()), nn.BCELoss())
+
+        throttled_callback = CallbackTracker().set_execution_budget(every_n_steps=3)
+        self.assertIsInstance(throttled_callback, CallbackTracker)
+        full_callback = CallbackTracker()
+        full_callback.callback_name = 'CallbackTrackerFull'
+        train_loop.fit(num_epochs=2, callbacks=[throttled_callback, full_callback])
+
+        self.assertEqual(throttled_callback.call_ctr['on_batch_end'], 7)
+        self.assertEqual(throttled_callback.call_ctr['on_after_gradient_update'], 7)
+        self.assertEqual(throttled_callback.call_ctr['on_epoch_end'], 2)
+        self.assertEqual(full_callback.call_ctr['on_batch_end'], 20)
+
+        summary = train_loop.callbacks_handler.get_callback_cost_summary()
+        self.assertEqual(summary['CallbackTracker1']['on_batch_end']['calls'], 7)
+        self.assertEqual(summary['CallbackTracker1']['on_batch_end']['skipped'], 13)
+        self.assertEqual(summary['CallbackTrackerFull']['on_batch_end']['calls'], 20)
+        self.assertEqual(summary['CallbackTrackerFull']['on_epoch_end']['calls'], 2)
+        self.assertGreater(summary['CallbackTrackerFull']['on_batch_end']['ms_per_step'], 0.)
+        self.assertEqual(train_loop.callbacks_handler.cost_tracker.num_steps, 20)
+
+    def test_throttled_callback_multiple_optimizers(self):
+        dataset = TensorDataset(torch.randn(100, 10), torch.randint(low=0, high=10, size=(100,)))
+        train_loop = TrainLoop(MultiLossModel(MultiLossDummy(), MultiLossDummy()),
+                               DataLoader(dataset, batch_size=10), None, None,
+                               MultiOptimizer([DummyOptimizer(), DummyOptimizer()]), DummyLoss())
+
+        throttled_callback = CallbackTracker().set_execution_budget(every_n_steps=3)
+        train_loop.fit(num_epochs=2, callbacks=[throttled_callback])
+
+        # Gradient update stage is executed for both of the optimizers at each of the selected steps
+        self.assertEqual(throttled_callback.call_ctr['on_batch_end'], 7)
+        self.assertEqual(throttled_callback.call_ctr['on_after_gradient_update'], 14)
@@ -0,0 +1,209 @@
+import unittest
+import os
+from types import SimpleNamespace
+
+import numpy as np
+import torch
+import torch.distributed as dist
+import torch.multiprocessing as mp
+from torch.utils.data import DataLoader
+from torch.utils.data.distributed import DistributedSampler
+
+from aitoolbox.torchtrain.data.samplers import LengthBucketBatchSampler
+from aitoolbox.torchtrain.train_loop.components.ddp_gather import (
+    all_gather_tensors, pad_tensor, get_aligned_size, get_sample_order_index, get_shard_unique_mask,
+    get_shard_sample_indices, get_shard_sampler
+)
+from aitoolbox.torchtrain.train_loop.components.ddp_handler import DDPHandler
+from aitoolbox.experiment.result_package.basic_packages import RegressionResultPackage
+
+
+class TestDDPGatherUtils(unittest.TestCase):
+    def test_pad_tensor(self):
+        tensor = torch.ones(2, 3)
+        self.assertIs(pad_tensor(tensor, [2, 3]), tensor)
+
+        padded = pad_tensor(tensor, [3, 5], pad_value=-1)
+        self.assertEqual(padded.shape, (3, 5))
+        self.assertEqual(padded[:2, :3].tolist(), tensor.tolist())
+        self.assertEqual(padded.sum().item(), 6 - 9)
+
+    def test_get_aligned_size(self):
+        self.assertEqual(get_aligned_size(0), 0)
+        self.assertEqual(get_aligned_size(1), 16)
+        self.assertEqual(get_aligned_size(16), 16)
+        self.assertEqual(get_aligned_size(17), 32)
+
+    def test_get_sample_order_index(self):
+        # DistributedSampler with 5 samples over 2 processes pads in the sample 0 at the end
+        rank_indices = [torch.tensor([0, 2, 4]), torch.tensor([1, 3, 0])]
+        order_index = get_sample_order_index(rank_indices)
+        self.assertEqual(order_index.tolist(), [0, 3, 1, 4, 2])
+        self.assertEqual(torch.cat(rank_indices)[order_index].tolist(), [0, 1, 2, 3, 4])
+
+    def test_get_shard_unique_mask(self):
+        dataset = list(range(7))
+        samplers = [DistributedSampler(dataset, num_replicas=3, rank=rank, shuffle=False) for rank in range(3)]
+        # Total size of 9 is padded with 2 duplicates which end up at the end of the last two shards
+        self.assertIsNone(get_shard_unique_mask(samplers[0], 3))
+        self.assertEqual(get_shard_unique_mask(samplers[1], 3).tolist(), [True, True, False])
+        self.assertEqual(get_shard_unique_mask(samplers[2], 3).tolist(), [True, True, False])
+        # With the DataLoader drop_last
+        self.assertEqual(get_shard_unique_mask(samplers[2], 2), None)
+        # Predictions not aligned with samples
+        self.assertIsNone(get_shard_unique_mask(samplers[2], 6))
+
+        sampler_drop_last = DistributedSampler(dataset, num_replicas=3, rank=2, shuffle=False, drop_last=True)
+        self.assertIsNone(get_shard_unique_mask(sampler_drop_last, 2))
+
+    def test_get_shard_unique_mask_bucket_sampler(self):
+        # 7 batches of 2 samples over 3 processes are padded with 2 repeated batches
+        samplers = [LengthBucketBatchSampler(np.ones(14), batch_size=2, shuffle=False, num_replicas=3, rank=rank)
+                    for rank in range(3)]
+        self.assertIsNone(get_shard_unique_mask(samplers[0], 6))
+        self.assertEqual(get_shard_unique_mask(samplers[1], 6).tolist(), [True] * 4 + [False] * 2)
+        self.assertEqual(get_shard_unique_mask(samplers[2], 6).tolist(), [True] * 4 + [False] * 2)
+        # Predictions not aligned with samples
+        self.assertIsNone(get_shard_unique_mask(samplers[2], 4))
+        self.assertIsNone(get_shard_unique_mask(LengthBucketBatchSampler(np.ones(14), batch_size=2), 14))
+
+    def test_get_shard_sample_indices(self):
+        dataset = list(range(7))
+        sampler = DistributedSampler(dataset, num_replicas=3, rank=2, shuffle=False)
+        self.assertEqual(get_shard_sample_indices(sampler, 3).tolist(), [2, 5, 1])
+        # Outputs with fewer rows (e.g. per-batch outputs or the dropped last batch) can't be matched to samples
+        self.assertIsNone(get_shard_sample_indices(sampler, 2))
+        self.assertIsNone(get_shard_sample_indices(sampler, 4))
+
+        bucket_sampler = LengthBucketBatchSampler(np.ones(14), batch_size=2, shuffle=False, num_replicas=3, rank=2)
+        self.assertEqual(get_shard_sample_indices(bucket_sampler, 6).tolist(), [4, 5, 10, 11, 2, 3])
+        self.assertIsNone(get_shard_sample_indices(bucket_sampler, 4))
+
+        self.assertIsNone(get_shard_sample_indices(LengthBucketBatchSampler(np.ones(14), batch_size=2), 14))
+        self.assertIsNone(get_shard_sample_indices(None, 3))
+
+    def test_get_shard_sampler(self):
+        dataset = list(range(14))
+        bucket_sampler = LengthBucketBatchSampler(np.ones(14), batch_size=2, num_replicas=3, rank=0)
+        self.assertIs(get_shard_sampler(DataLoader(dataset, batch_sampler=bucket_sampler)), bucket_sampler)
+
+        sampler = DistributedSampler(dataset, num_replicas=3, rank=0)
+        self.assertIs(get_shard_sampler(DataLoader(dataset, sampler=sampler)), sampler)
+        self.assertIsNone(get_shard_sampler([1, 2, 3]))
+
+
+class TestDDPGather(unittest.TestCase):
+    def test_gather_on_gloo(self):
+        os.environ['MASTER_ADDR'] = 'localhost'
+        os.environ['MASTER_PORT'] = '8889'
+        mp.spawn(self._gather_on_gloo, nprocs=2)
+
+    @staticmethod
+    def _gather_on_gloo(rank):
+        dist.init_process_group(backend='gloo', init_method='env://', world_size=2, rank=rank)
+
+        # Different leading and trailing dimensions and dtypes gathered in a single flat collective
+        tensors = [
+            torch.arange(3 + rank * 2, dtype=torch.float32),
+            torch.full((2, 1 + rank), rank, dtype=torch.int64),
+            torch.tensor([True, False, bool(rank)][:2 + rank]),
+            torch.tensor(rank + 0.5, dtype=torch.float64)
+        ]
+        gathered = all_gather_tensors(tensors)
+        assert [t.tolist() for t in gathered[0]] == [[0., 1., 2.], [0., 1., 2., 3., 4.]]
+        assert [t.tolist() for t in gathered[1]] == [[[0], [0]], [[1, 1], [1, 1]]]
+        assert [t.tolist() for t in gathered[2]] == [[True, False], [True, False, True]]
+        assert [t.item() for t in gathered[3]] == [0.5, 1.5]
+        assert gathered[1][0].dtype == torch.int64
+
+        gathered_padded = all_gather_tensors(tensors[1:2], trim_trailing_dims=False)[0]
+        assert [t.tolist() for t in gathered_padded] == [[[0, 0], [0, 0]], [[1, 1], [1, 1]]]
+
+        ddp_handler = DDPHandler(SimpleNamespace(device=torch.device('cpu'), train_loader=None,
+                                                 validation_loader=None, test_loader=None))
+
+        # Uneven data across the processes
+        assert ddp_handler.mp_sync(torch.arange(1 + rank)).tolist() == [0, 0, 1]
+        assert ddp_handler.mp_sync(np.arange(1 + rank), return_tensor=False).tolist() == [0, 0, 1]
+        synced_dict = ddp_handler.mp_sync_dict({'a': torch.ones(1 + rank), 'b': [rank]})
+        assert synced_dict['a'].tolist() == [1., 1., 1.]
+        assert synced_dict['b'].tolist() == [0, 1]
+
+        # DistributedSampler pads the dataset of 7 samples with 1 duplicate
+        sampler = DistributedSampler(list(range(7)), num_replicas=2, rank=rank, shuffle=True, seed=3)
+        sample_idx = list(iter(sampler))
+        y_pred = torch.tensor(sample_idx, dtype=torch.float32).unsqueeze(1) * 10
+        y_test = torch.tensor(sample_idx)
+        metadata = {
+            'np_idx': np.array(sample_idx),
+            'text': [f'sample_{i}' for i in sample_idx],
+            'seq': torch.ones(len(sample_idx), 2 + rank)
+        }
+        y_pred_synced, y_test_synced, metadata_synced = ddp_handler.mp_sync_predictions(
+            y_pred, y_test, metadata, sampler=sampler
+        )
+        y_pred_all_ranks = ddp_handler.mp_sync(y_pred).tolist()
+        assert y_pred_synced.tolist() == [[i * 10.] for i in range(7)]
+        assert y_test_synced.tolist() == list(range(7))
+        assert metadata_synced['np_idx'].tolist() == list(range(7))
+        assert isinstance(metadata_synced['np_idx'], np.ndarray)
+        assert metadata_synced['text'] == [f'sample_{i}' for i in range(7)]
+        # Variable length outputs are padded to the longest one
+        assert metadata_synced['seq'].shape == (7, 3)
+
+        # Without the sampler the predictions are only concatenated
+        y_pred_synced, _, _ = ddp_handler.mp_sync_predictions(y_pred, y_test, {})
+        assert len(y_pred_synced) == 8
+
+        # Predictions not aligned with the dataset samples can't be reordered
+        y_pred_synced, y_test_synced, _ = ddp_handler.mp_sync_predictions(
+            torch.ones(len(sample_idx) * 2), y_test, {}, sampler=sampler
+        )
+        assert len(y_pred_synced) == 16
+        assert len(y_test_synced) == 8
+
+        # Only one of the processes has the predictions aligned with its samples, so none restores the sample order
+        y_pred_synced, _, _ = ddp_handler.mp_sync_predictions(
+            y_pred if rank == 0 else y_pred[:2], torch.arange(2), {}, sampler=sampler
+        )
+        assert y_pred_synced.tolist() == y_pred_all_ranks[:4] + y_pred_all_ranks[4:6]
+
+        # Elements which are ragged or empty in only some of the processes are gathered as objects by all of them
+        y_pred_synced, y_test_synced, metadata_synced = ddp_handler.mp_sync_predictions(
+            torch.ones(3, 2) if rank == 0 else torch.zeros(0), torch.arange(3 * (1 - rank)),
+            {'tokens': [[1, 2], [3]] if rank == 0 else [[4, 5]], 'ids': [0, 1] if rank == 0 else [2.5]}
+        )
+        assert y_pred_synced.tolist() == [[1., 1.]] * 3
+        assert y_test_synced.tolist() == [0, 1, 2]
+        assert metadata_synced['tokens'] == [[1, 2], [3], [4, 5]]
+        assert metadata_synced['ids'] == [0, 1, 2.5]
+
+        # Sharded evaluation: local shards without duplicates and reduction of only the sufficient statistics
+        y_pred_shard, y_test_shard, metadata_shard = ddp_handler.drop_padded_samples(y_pred, y_test, metadata, sampler)
+        assert len(y_pred_shard) == len(metadata_shard['text']) == 4 - rank
+        assert sorted(ddp_handler.mp_sync(y_test_shard).tolist()) == list(range(7))
+
+        # LengthBucketBatchSampler pads the 5 batches of 2 samples with 1 repeated batch
+        bucket_sampler = LengthBucketBatchSampler(np.ones(10), batch_size=2, num_replicas=2, rank=rank, seed=3)
+        bucket_idx = [idx for batch in bucket_sampler for idx in batch]
+        y_pred_synced, y_test_synced, _ = ddp_handler.mp_sync_predictions(
+            torch.tensor(bucket_idx) * 10, torch.tensor(bucket_idx), {}, sampler=bucket_sampler
+        )
+        assert y_pred_synced.tolist() == [i * 10 for i in range(10)]
+        assert y_test_synced.tolist() == list(range(10))
+        _, bucket_shard, _ = ddp_handler.drop_padded_samples(torch.tensor(bucket_idx), torch.tensor(bucket_idx), {},
+                                                             sampler=bucket_sampler)
+        assert sorted(ddp_handler.mp_sync(bucket_shard).tolist()) == list(range(10))
+
+        summed = ddp_handler.mp_sum_dict({'count': rank + 1, 'hist': np.array([[rank, 1], [2, 3]])})
+        assert summed['count'] == 3.
+        assert summed['hist'].tolist() == [[1., 2.], [4., 6.]]
+
+        sharded_pkg = RegressionResultPackage()
+        # Prediction error equals the sample index
+        sharded_pkg.prepare_result_package(y_test_shard.numpy(), y_pred_shard.numpy() / 5,
+                                           stats_reduce_fn=ddp_handler.mp_sum_dict)
+        assert np.isclose(sharded_pkg.get_results()['Mean_squared_error'], 91. / 7)
+        assert np.isclose(sharded_pkg.get_results()['Mean_absolute_error'], 3.)
+
+        dist.destroy_process_group()
@@ -1,11 +1,13 @@
 import unittest
 
+import torch
 from torch.utils.data.dataloader import DataLoader
 from torch.utils.data.distributed import DistributedSampler
 from tests.utils import SmallFFNet
 
 from aitoolbox import TrainLoop, BasicDataset
 from aitoolbox.torchtrain.train_loop.components.ddp_handler import DDPHandler
+from aitoolbox.torchtrain.train_loop.components.loader_builder import DataLoaderAutoTuner
 from aitoolbox.torchtrain.callbacks.ddp import DistributedSamplerSetEpoch
 
 
@@ -110,3 +112,50 @@ class TestDDPHandler(unittest.TestCase):
         self.assertEqual(ddp_data_sampler.num_replicas, 4)
         self.assertEqual(ddp_data_sampler.rank, 1)
         self.assertTrue(ddp_data_sampler.shuffle)
+
+    def test_build_loader_sampler_preserves_performance_settings(self):
+        generator = torch.Generator().manual_seed(5)
+        data_loader = DataLoader(BasicDataset([(1, 2) for _ in range(100)]), batch_size=4, num_workers=2,
+                                 persistent_workers=True, prefetch_factor=6, generator=generator,
+                                 multiprocessing_context='spawn')
+
+        ddp_data_loader, _ = DDPHandler.build_loader_sampler(data_loader, shuffle=True, world_size=4, rank=1)
+
+        self.assertEqual(ddp_data_loader.num_workers, 2)
+        self.assertTrue(ddp_data_loader.persistent_workers)
+        self.assertEqual(ddp_data_loader.prefetch_factor, 6)
+        self.assertIs(ddp_data_loader.generator, generator)
+        self.assertEqual(ddp_data_loader.multiprocessing_context.get_start_method(), 'spawn')
+
+    def test_build_loader_sampler_loader_settings(self):
+        data_loader = DataLoader(BasicDataset([(1, 2) for _ in range(100)]), num_workers=2, persistent_workers=True,
+                                 prefetch_factor=6)
+
+        ddp_data_loader, _ = DDPHandler.build_loader_sampler(data_loader, shuffle=False, world_size=4, rank=1,
+                                                             loader_settings={'num_workers': 0, 'pin_memory': True})
+        self.assertEqual(ddp_data_loader.num_workers, 0)
+        self.assertFalse(ddp_data_loader.persistent_workers)
+        self.assertIsNone(ddp_data_loader.prefetch_factor)
+        self.assertTrue(ddp_data_loader.pin_memory)
+
+    def test_add_distributed_samplers_loader_tuner(self):
+        train_loader = DataLoader(BasicDataset([(1, 2) for _ in range(100)]), shuffle=True)
+        val_loader = DataLoader(BasicDataset([(1, 2) for _ in range(100)]))
+        train_loop = TrainLoop(SmallFFNet(), train_loader, val_loader, None, None, None)
+
+        ddp_handler = DDPHandler(train_loop)
+        ddp_handler.add_distributed_samplers(world_size=4, rank=1, loader_tuner=DataLoaderAutoTuner(cpu_count=16),
+                                             num_local_processes=2, on_gpu=False)
+
+        for data_loader in [train_loop.train_loader, train_loop.validation_loader]:
+            self.assertEqual(data_loader.num_workers, 7)
+            self.assertEqual(data_loader.prefetch_factor, 2)
+            self.assertTrue(data_loader.persistent_workers)
+            self.assertFalse(data_loader.pin_memory)
+
+        self.assertEqual(list(ddp_handler.loader_configs.keys()), ['train', 'validation'])
+        self.assertEqual(ddp_handler.loader_configs['train']['num_workers'], 7)
+        self.assertEqual(train_loop.train_history.get_metadata()['ddp_data_loaders'], ddp_handler.loader_configs)
+
+        with self.assertRaises(TypeError):
+            DDPHandler(train_loop).add_distributed_samplers(world_size=4, rank=1, loader_tuner={'num_workers': 2})
@@ -0,0 +1,120 @@
+import unittest
+import threading
+from collections import namedtuple
+
+import torch
+import torch.nn as nn
+from torch.utils.data import TensorDataset, DataLoader
+from torch.optim.adam import Adam
+
+from tests.utils import SmallFFNet
+from aitoolbox.torchtrain.train_loop import TrainLoop
+from aitoolbox.torchtrain.train_loop.components.device_prefetch import DevicePrefetchLoader, transfer_batch_to_device
+
+Batch = namedtuple('Batch', ['x', 'y'])
+
+
+class TrackedIterable:
+    def __init__(self, num_batches, fail_at=None):
+        self.num_batches = num_batches
+        self.fail_at = fail_at
+        self.num_produced = 0
+        self.dataset = 'my_dataset'
+
+    def __len__(self):
+        return self.num_batches
+
+    def __iter__(self):
+        for i in range(self.num_batches):
+            if i == self.fail_at:
+                raise ValueError('Data loading failure')
+            self.num_produced += 1
+            yield torch.full((2, 3), float(i))
+
+
+class TestDevicePrefetchLoader(unittest.TestCase):
+    def test_thread_prefetch(self):
+        data_loader = TrackedIterable(10)
+        prefetch_loader = DevicePrefetchLoader(data_loader, torch.device('cpu'), num_prefetch=3)
+        self.assertTrue(prefetch_loader.use_thread)
+        self.assertEqual(len(prefetch_loader), 10)
+        self.assertEqual(prefetch_loader.dataset, 'my_dataset')
+
+        batches = list(prefetch_loader)
+        self.assertEqual(len(batches), 10)
+        for i, batch in enumerate(batches):
+            self.assertEqual(batch.tolist(), torch.full((2, 3), float(i)).tolist())
+
+        # Loader can be iterated repeatedly, e.g. over multiple epochs
+        self.assertEqual(len(list(prefetch_loader)), 10)
+
+    def test_prefetch_bounded_and_early_stop(self):
+        data_loader = TrackedIterable(100)
+        prefetch_loader = DevicePrefetchLoader(data_loader, torch.device('cpu'), num_prefetch=2)
+
+        batch_iterator = iter(prefetch_loader)
+        next(batch_iterator)
+        batch_iterator.close()
+
+        # One yielded batch, at most num_prefetch batches in the queue and one blocked on put
+        self.assertLessEqual(data_loader.num_produced, 4)
+        self.assertNotIn('DevicePrefetchLoader', [thread.name for thread in threading.enumerate()])
+
+    def test_data_loading_error_propagation(self):
+        prefetch_loader = DevicePrefetchLoader(TrackedIterable(10, fail_at=4), torch.device('cpu'))
+        batches = []
+        with self.assertRaises(ValueError):
+            for batch in prefetch_loader:
+                batches.append(batch)
+        self.assertEqual(len(batches), 4)
+
+    def test_param_checks(self):
+        with self.assertRaises(ValueError):
+            DevicePrefetchLoader([], torch.device('cpu'), num_prefetch=0)
+
+    def test_transfer_nested_batch(self):
+        batch = {'x': [torch.zeros(2), (torch.ones(2), 'text')], 'y': Batch(torch.ones(1), 5)}
+        moved_batch = transfer_batch_to_device(batch, torch.device('cpu'))
+
+        self.assertIsInstance(moved_batch['x'], list)
+        self.assertIsInstance(moved_batch['x'][1], tuple)
+        self.assertEqual(moved_batch['x'][1][1], 'text')
+        self.assertIsInstance(moved_batch['y'], Batch)
+        self.assertEqual(moved_batch['y'].y, 5)
+        self.assertEqual(moved_batch['y'].x.tolist(), [1.])
+
+
+class TestTrainLoopDevicePrefetch(unittest.TestCase):
+    def test_prefetched_training_matches(self):
+        dataset = TensorDataset(torch.randn(100, 10), torch.randint(low=0, high=2, size=(100,)).float())
+
+        train_histories = []
+        for device_prefetch in [0, 2]:
+            torch.manual_seed(0)
+            model = SmallFFNet()
+            train_loop = TrainLoop(model, DataLoader(dataset, batch_size=10), DataLoader(dataset, batch_size=30), None,
+                                   Adam(model.parameters()), nn.BCELoss(), device_prefetch=device_prefetch)
+            train_loop.fit(num_epochs=2)
+            y_pred, y_true, _ = train_loop.predict_on_validation_set()
+            self.assertEqual(len(y_pred), 100)
+            train_histories.append(train_loop.train_history['loss'])
+
+        for loss, loss_prefetch in zip(*train_histories):
+            self.assertAlmostEqual(loss, loss_prefetch, places=6)
+
+    def test_prefetch_wrapping(self):
+        data_loader = DataLoader(TensorDataset(torch.randn(10, 10)), batch_size=5)
+        model = SmallFFNet()
+
+        train_loop = TrainLoop(model, data_loader, None, None, Adam(model.parameters()), nn.BCELoss())
+        self.assertIs(train_loop.prefetch_to_device(data_loader), data_loader)
+
+        train_loop = TrainLoop(model, data_loader, None, None, Adam(model.parameters()), nn.BCELoss(),
+                               device_prefetch=3)
+        prefetch_loader = train_loop.prefetch_to_device(data_loader)
+        self.assertIsInstance(prefetch_loader, DevicePrefetchLoader)
+        self.assertEqual(prefetch_loader.num_prefetch, 3)
+        self.assertIs(train_loop.prefetch_to_device(prefetch_loader), prefetch_loader)
+
+        with self.assertRaises(ValueError):
+            TrainLoop(model, data_loader, None, None, Adam(model.parameters()), nn.BCELoss(), device_prefetch=-1)
@@ -0,0 +1,54 @@
+import unittest
+
+from torch.utils.data import DataLoader
+
+from aitoolbox import BasicDataset
+from aitoolbox.torchtrain.train_loop.components.loader_builder import (
+    get_data_loader_args, build_data_loader, describe_data_loader, DataLoaderAutoTuner
+)
+
+
+class TestLoaderBuilder(unittest.TestCase):
+    def test_replicate_data_loader(self):
+        data_loader = DataLoader(BasicDataset(list(range(20))), batch_size=5, num_workers=3, pin_memory=True,
+                                 persistent_workers=True, prefetch_factor=4, drop_last=True)
+        data_loader_args = get_data_loader_args(data_loader)
+        self.assertFalse(data_loader_args['shuffle'])
+        self.assertNotIn('sampler', data_loader_args)
+
+        replicated_loader = build_data_loader(data_loader_args)
+        self.assertEqual(describe_data_loader(replicated_loader), describe_data_loader(data_loader))
+        self.assertTrue(replicated_loader.drop_last)
+
+    def test_describe_data_loader(self):
+        data_loader = DataLoader(BasicDataset(list(range(20))), batch_size=5, num_workers=2,
+                                 multiprocessing_context='spawn')
+        self.assertEqual(
+            describe_data_loader(data_loader),
+            {'batch_size': 5, 'num_workers': 2, 'prefetch_factor': 2, 'persistent_workers': False,
+             'pin_memory': False, 'multiprocessing_context': 'spawn'}
+        )
+
+
+class TestDataLoaderAutoTuner(unittest.TestCase):
+    def test_loader_settings(self):
+        tuner = DataLoaderAutoTuner(cpu_count=32)
+        self.assertEqual(
+            tuner.get_loader_settings(num_local_processes=8, on_gpu=True),
+            {'num_workers': 3, 'pin_memory': True, 'prefetch_factor': 3, 'persistent_workers': True}
+        )
+        # Number of workers per process is capped
+        self.assertEqual(tuner.get_loader_settings(num_local_processes=1)['num_workers'], 8)
+        self.assertEqual(tuner.get_loader_settings(num_local_processes=1)['prefetch_factor'], 2)
+
+    def test_not_enough_cpus(self):
+        tuner = DataLoaderAutoTuner(cpu_count=4)
+        self.assertEqual(tuner.get_loader_settings(num_local_processes=4, on_gpu=False),
+                         {'num_workers': 0, 'pin_memory': False})
+
+    def test_param_checks(self):
+        self.assertGreaterEqual(DataLoaderAutoTuner().cpu_count, 1)
+        with self.assertRaises(ValueError):
+            DataLoaderAutoTuner(max_workers_per_process=-1)
+        with self.assertRaises(ValueError):
+            DataLoaderAutoTuner(target_prefetch_batches=0)
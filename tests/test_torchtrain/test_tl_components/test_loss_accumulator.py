@@ -0,0 +1,78 @@
+import unittest
+
+import torch
+
+from aitoolbox.torchtrain.multi_loss_optim import MultiLoss
+from aitoolbox.torchtrain.train_loop.components.loss_accumulator import LossAccumulator
+
+
+class DummyDDPHandler:
+    def __init__(self, other_rank_data):
+        self.other_rank_data = other_rank_data
+        self.mp_sync_ctr = 0
+
+    def mp_sync(self, data):
+        self.mp_sync_ctr += 1
+        return torch.cat([data, self.other_rank_data])
+
+
+class TestLossAccumulator(unittest.TestCase):
+    def test_init(self):
+        loss_accum = LossAccumulator()
+        self.assertIsNone(loss_accum.loss_sum)
+        self.assertIsNone(loss_accum.last_loss)
+        self.assertEqual(len(loss_accum), 0)
+
+        with self.assertRaises(ValueError):
+            loss_accum.get_mean_loss()
+        with self.assertRaises(ValueError):
+            loss_accum.get_last_loss()
+
+    def test_single_loss(self):
+        loss_accum = LossAccumulator()
+        losses = [1.5, 2., 10., 3.25]
+
+        for i, loss in enumerate(losses):
+            loss_accum.append(torch.tensor(loss))
+
+            self.assertEqual(len(loss_accum), i + 1)
+            self.assertEqual(loss_accum.get_last_loss().item(), loss)
+            self.assertAlmostEqual(loss_accum.get_mean_loss().item(), sum(losses[:i + 1]) / (i + 1))
+
+        self.assertEqual(loss_accum.get_mean_loss().dtype, torch.float64)
+
+        loss_accum.reset()
+        self.assertEqual(len(loss_accum), 0)
+        loss_accum.append(torch.tensor(5.))
+        self.assertEqual(loss_accum.get_mean_loss().item(), 5.)
+
+    def test_multi_loss(self):
+        loss_accum = LossAccumulator()
+        loss_accum.append(MultiLoss({'loss_2': torch.tensor(1.), 'loss_1': torch.tensor(10.)}))
+        loss_accum.append(MultiLoss({'loss_2': torch.tensor(3.), 'loss_1': torch.tensor(20.)}))
+
+        mean_loss = loss_accum.get_mean_loss()
+        self.assertIsInstance(mean_loss, MultiLoss)
+        self.assertEqual(mean_loss.item().get_loss_dict(), {'loss_1': 15., 'loss_2': 2.})
+        self.assertEqual(loss_accum.get_last_loss().item().get_loss_dict(), {'loss_1': 20., 'loss_2': 3.})
+
+    def test_ddp_sync(self):
+        loss_accum = LossAccumulator()
+        loss_accum.append(torch.tensor(2.))
+        loss_accum.append(torch.tensor(4.))
+
+        # Other rank accumulated the sum of 30 over 3 batches
+        ddp_handler = DummyDDPHandler(torch.tensor([[30., 3.]], dtype=torch.float64))
+        self.assertEqual(loss_accum.get_mean_loss(ddp_handler).item(), 36. / 5)
+        self.assertEqual(ddp_handler.mp_sync_ctr, 1)
+
+        # Without the handler only the local losses are considered
+        self.assertEqual(loss_accum.get_mean_loss().item(), 3.)
+
+    def test_ddp_sync_multi_loss(self):
+        loss_accum = LossAccumulator()
+        loss_accum.append(MultiLoss({'loss_1': torch.tensor(1.), 'loss_2': torch.tensor(10.)}))
+
+        ddp_handler = DummyDDPHandler(torch.tensor([[5., 30., 2.]], dtype=torch.float64))
+        self.assertEqual(loss_accum.get_mean_loss(ddp_handler).item().get_loss_dict(),
+                         {'loss_1': 2., 'loss_2': 40. / 3})
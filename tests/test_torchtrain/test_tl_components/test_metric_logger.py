@@ -0,0 +1,177 @@
+import unittest
+import os
+import csv
+import shutil
+
+import torch
+
+from aitoolbox.torchtrain.train_loop.components.metric_logger import (
+    AbstractMetricLogBackend, AsyncMetricLogger, CSVLogBackend, resolve_scalar_values
+)
+
+THIS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+class RecordingBackend(AbstractMetricLogBackend):
+    def __init__(self):
+        self.logged = []
+        self.flush_ctr = 0
+        self.closed = False
+
+    def log_scalars(self, metrics, step, commit=False):
+        self.logged.append((metrics, step, commit))
+
+    def flush(self):
+        self.flush_ctr += 1
+
+    def close(self):
+        self.closed = True
+
+
+class FailingBackend(AbstractMetricLogBackend):
+    def log_scalars(self, metrics, step, commit=False):
+        raise ValueError('Backend failure')
+
+
+class TestResolveScalarValues(unittest.TestCase):
+    def test_mixed_values(self):
+        values = [torch.tensor(1.5), torch.tensor([3.25]), torch.tensor(5, dtype=torch.long)]
+        resolved = resolve_scalar_values(values)
+        self.assertEqual(resolved, [1.5, 3.25, 5.])
+        self.assertTrue(all(type(value) is float for value in resolved))
+
+    def test_non_tensor_values_unchanged(self):
+        histogram, multi_element = object(), torch.tensor([1., 2.])
+        resolved = resolve_scalar_values([3, torch.tensor(0.5), 'text', histogram, 4.5, multi_element])
+
+        self.assertEqual(resolved[:3], [3, 0.5, 'text'])
+        self.assertIs(type(resolved[0]), int)
+        self.assertIs(resolved[3], histogram)
+        self.assertEqual(resolved[4], 4.5)
+        self.assertIs(resolved[5], multi_element)
+
+    def test_empty(self):
+        self.assertEqual(resolve_scalar_values([]), [])
+
+
+class TestAsyncMetricLogger(unittest.TestCase):
+    def test_background_logging(self):
+        backend = RecordingBackend()
+        logger = AsyncMetricLogger([backend], max_buffer_size=3)
+
+        for step in range(5):
+            logger.log_scalars({'loss': torch.tensor(float(step), requires_grad=True) * 2, 'lr': 0.1}, step)
+        logger.log_scalars({'acc': 0.9, 'epoch': 1}, 5, commit=True)
+        self.assertEqual(len(logger.buffer), 0)
+
+        logger.log_scalars({'acc': 0.95}, 6)
+        self.assertEqual(len(logger.buffer), 1)
+
+        logger.flush()
+        self.assertEqual(len(logger.buffer), 0)
+        self.assertEqual(backend.flush_ctr, 1)
+        self.assertIs(type(backend.logged[5][0]['epoch']), int)
+        self.assertEqual(
+            backend.logged,
+            [({'loss': float(step * 2), 'lr': 0.1}, step, False) for step in range(5)] +
+            [({'acc': 0.9, 'epoch': 1}, 5, True), ({'acc': 0.95}, 6, False)]
+        )
+
+        logger.close()
+        self.assertTrue(backend.closed)
+        self.assertIsNone(logger.worker)
+
+    def test_synchronous_logging(self):
+        backend = RecordingBackend()
+        logger = AsyncMetricLogger([backend], background=False)
+        logger.log_scalars({'loss': torch.tensor(0.5)}, 10)
+
+        self.assertEqual(backend.logged, [({'loss': 0.5}, 10, False)])
+        self.assertIsNone(logger.worker)
+        logger.close()
+
+    def test_multiple_backends(self):
+        backend_1, backend_2 = RecordingBackend(), RecordingBackend()
+        logger = AsyncMetricLogger([backend_1])
+        logger.add_backend(backend_2)
+        logger.log_scalars({'loss': torch.tensor(1.)}, 0)
+        logger.close()
+
+        self.assertEqual(backend_1.logged, [({'loss': 1.}, 0, False)])
+        self.assertEqual(backend_1.logged, backend_2.logged)
+
+    def test_backend_routing(self):
+        backend_1, backend_2 = RecordingBackend(), RecordingBackend()
+        logger = AsyncMetricLogger([backend_1, backend_2], max_buffer_size=2)
+        logger.log_scalars({'loss': torch.tensor(1.)}, 0, backends=[backend_1])
+        logger.log_scalars({'acc': 0.5}, 0, commit=True, backends=[backend_2])
+        logger.log_scalars({'lr': 0.1}, 1)
+        logger.flush()
+
+        self.assertEqual(backend_1.logged, [({'loss': 1.}, 0, False), ({'lr': 0.1}, 1, False)])
+        self.assertEqual(backend_2.logged, [({'acc': 0.5}, 0, True), ({'lr': 0.1}, 1, False)])
+        logger.close()
+
+    def test_remove_backend(self):
+        backend_1, backend_2 = RecordingBackend(), RecordingBackend()
+        logger = AsyncMetricLogger([backend_1, backend_2])
+        logger.log_scalars({'loss': torch.tensor(2.)}, 0, backends=[backend_1])
+
+        logger.remove_backend(backend_1)
+        # Metrics buffered before the removal are still logged into the removed backend
+        self.assertEqual(backend_1.logged, [({'loss': 2.}, 0, False)])
+        self.assertTrue(backend_1.closed)
+        self.assertEqual(logger.backends, [backend_2])
+
+        logger.log_scalars({'loss': torch.tensor(3.)}, 1)
+        logger.close()
+        self.assertEqual(len(backend_1.logged), 1)
+        self.assertEqual(backend_2.logged, [({'loss': 3.}, 1, False)])
+        self.assertTrue(backend_2.closed)
+
+    def test_worker_error_propagation(self):
+        logger = AsyncMetricLogger([FailingBackend()])
+        logger.log_scalars({'loss': torch.tensor(1.)}, 0)
+        with self.assertRaises(RuntimeError):
+            logger.flush()
+        # Error is raised only once
+        logger.flush()
+        logger.close()
+
+    def test_param_checks(self):
+        with self.assertRaises(TypeError):
+            AsyncMetricLogger([RecordingBackend(), 'backend'])
+        with self.assertRaises(ValueError):
+            AsyncMetricLogger(max_buffer_size=0)
+        with self.assertRaises(ValueError):
+            AsyncMetricLogger(max_pending_batches=0)
+
+
+class TestCSVLogBackend(unittest.TestCase):
+    def setUp(self):
+        self.log_dir = os.path.join(THIS_DIR, 'metric_logs')
+        os.makedirs(self.log_dir, exist_ok=True)
+
+    def tearDown(self):
+        if os.path.exists(self.log_dir):
+            shutil.rmtree(self.log_dir)
+
+    def test_csv_logging(self):
+        file_path = os.path.join(self.log_dir, 'metrics.csv')
+        logger = AsyncMetricLogger([CSVLogBackend(file_path)])
+        logger.log_scalars({'loss': torch.tensor(0.5), 'acc': 0.75}, 0)
+        logger.log_scalars({'loss': torch.tensor(0.25)}, 1)
+        logger.close()
+
+        # Appending into the existing file doesn't repeat the header
+        logger = AsyncMetricLogger([CSVLogBackend(file_path)], background=False)
+        logger.log_scalars({'loss': 0.125}, 2)
+        logger.close()
+
+        with open(file_path) as f:
+            rows = list(csv.reader(f))
+        self.assertEqual(
+            rows,
+            [['step', 'metric_name', 'value'], ['0', 'loss', '0.5'], ['0', 'acc', '0.75'],
+             ['1', 'loss', '0.25'], ['2', 'loss', '0.125']]
+        )
@@ -1,6 +1,14 @@
 import unittest
+import os
+import gc
+import tempfile
+from types import SimpleNamespace
+import numpy as np
+import torch
 
-from aitoolbox.torchtrain.train_loop.components.model_prediction_store import ModelPredictionStore
+from aitoolbox.torchtrain.train_loop.components.model_prediction_store import (
+    ModelPredictionStore, DiskPredictionStorage
+)
 
 
 class TestModelPredictionStore(unittest.TestCase):
@@ -52,6 +60,22 @@ class TestModelPredictionStore(unittest.TestCase):
         with self.assertRaises(ValueError):
             prediction_store.insert_test_predictions(([1] * 10, [12] * 10, {}), 5)
 
+    def test_insert_val_loss_and_predictions(self):
+        prediction_store = ModelPredictionStore(auto_purge=True)
+
+        prediction_store.insert_val_loss_and_predictions(12.3, ([1] * 10, [1] * 10, {}), 0)
+        self.assertEqual(prediction_store.prediction_store,
+                         {'iteration_idx': 0, 'val_loss': 12.3, 'val_pred': ([1] * 10, [1] * 10, {})})
+        self.assertTrue(prediction_store.has_val_loss(0))
+        self.assertTrue(prediction_store.has_val_predictions(0))
+
+        with self.assertRaises(ValueError):
+            prediction_store.insert_val_loss_and_predictions(1., ([2] * 10, [2] * 10, {}), 0)
+
+        prediction_store.insert_val_loss_and_predictions(1., ([2] * 10, [2] * 10, {}), 0, force_prediction=True)
+        self.assertEqual(prediction_store.get_val_loss(0), 1.)
+        self.assertEqual(prediction_store.get_val_predictions(0), ([2] * 10, [2] * 10, {}))
+
     def test_get_val_predictions(self):
         prediction_store = ModelPredictionStore()
 
@@ -92,3 +116,156 @@ class TestModelPredictionStore(unittest.TestCase):
 
         with self.assertRaises(ValueError):
             prediction_store.insert_val_predictions(([100] * 10, [1111] * 10, {}), 100)
+
+    def test_multi_iteration_cache(self):
+        prediction_store = ModelPredictionStore(auto_purge=True, keep_iterations=2)
+        prediction_store.insert_val_predictions(([1] * 10, [1] * 10, {}), 0)
+        prediction_store.insert_val_predictions(([2] * 10, [2] * 10, {}), 1)
+        self.assertTrue(prediction_store.has_val_predictions(0))
+        self.assertEqual(prediction_store.get_val_predictions(0), ([1] * 10, [1] * 10, {}))
+        self.assertEqual(prediction_store.get_val_predictions(1), ([2] * 10, [2] * 10, {}))
+
+        prediction_store.insert_val_predictions(([3] * 10, [3] * 10, {}), 2)
+        self.assertFalse(prediction_store.has_val_predictions(0))
+        self.assertTrue(prediction_store.has_val_predictions(1))
+
+    def test_state_key(self):
+        state = {'key': 'a'}
+        prediction_store = ModelPredictionStore(auto_purge=True, state_key_fn=lambda: state['key'])
+        prediction_store.insert_val_predictions(([1] * 10, [1] * 10, {}), 0)
+        self.assertTrue(prediction_store.has_val_predictions(0))
+
+        state['key'] = 'b'
+        self.assertFalse(prediction_store.has_val_predictions(0))
+        prediction_store.insert_val_predictions(([2] * 10, [2] * 10, {}), 0)
+        self.assertEqual(prediction_store.get_val_predictions(0), ([2] * 10, [2] * 10, {}))
+
+        state['key'] = 'a'
+        self.assertEqual(prediction_store.get_val_predictions(0), ([1] * 10, [1] * 10, {}))
+
+    def test_byte_budget_lru_eviction(self):
+        prediction_store = ModelPredictionStore(auto_purge=True, max_bytes=1000)
+        prediction_store.insert_train_predictions((torch.zeros(100), torch.zeros(10), {}), 0)
+        prediction_store.insert_val_predictions((torch.zeros(100), torch.zeros(10), {}), 0)
+        self.assertEqual(prediction_store.get_cache_stats()['size_bytes'], 880)
+
+        # Train predictions are the least recently used and get evicted
+        prediction_store.get_val_predictions(0)
+        prediction_store.insert_test_predictions((torch.zeros(100), torch.zeros(10), {}), 0)
+        self.assertFalse(prediction_store.has_train_predictions(0))
+        self.assertTrue(prediction_store.has_val_predictions(0))
+        self.assertTrue(prediction_store.has_test_predictions(0))
+
+        # Entry exceeding the whole budget is still kept
+        prediction_store.insert_val_loss(torch.zeros(1000), 0)
+        self.assertEqual(prediction_store.get_cache_stats()['num_entries'], 1)
+        self.assertTrue(prediction_store.has_val_loss(0))
+
+    def test_cache_stats(self):
+        prediction_store = ModelPredictionStore(auto_purge=True)
+        self.assertFalse(prediction_store.has_val_predictions(0))
+        prediction_store.insert_val_predictions((torch.zeros(10), torch.zeros(10), {}), 0)
+        prediction_store.get_val_predictions(0)
+        prediction_store.get_val_predictions(0)
+        prediction_store.insert_val_loss(1., 1)
+
+        self.assertEqual(
+            prediction_store.get_cache_stats(),
+            {'hits': 2, 'misses': 1, 'hit_rate': 2 / 3, 'evictions': 1, 'num_entries': 1, 'size_bytes': 0,
+             'sources': {'val_pred': {'hits': 2, 'misses': 1}}}
+        )
+
+        prediction_store.reset_cache_stats()
+        self.assertEqual(prediction_store.get_cache_stats()['hits'], 0)
+
+
+class TestDiskPredictionStorage(unittest.TestCase):
+    def test_spill_predictions(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            storage = DiskPredictionStorage(tmp_dir)
+            y_pred, y_test = torch.rand(100, 5), torch.randint(0, 5, (100,))
+            metadata = {'np_el': np.arange(100), 'text': ['a'] * 100}
+
+            y_pred_disk, y_test_disk, metadata_disk = storage.spill('val_pred', (y_pred, y_test, metadata))
+            self.assertEqual(y_pred_disk.tolist(), y_pred.tolist())
+            self.assertEqual(y_test_disk.tolist(), y_test.tolist())
+            self.assertEqual(y_test_disk.dtype, torch.int64)
+            self.assertIsInstance(metadata_disk['np_el'], np.memmap)
+            self.assertEqual(metadata_disk['text'], metadata['text'])
+            self.assertEqual(len(os.listdir(tmp_dir)), 3)
+            self.assertEqual(np.load(storage.source_files['val_pred'][0]).tolist(), y_pred.tolist())
+
+            # Overwriting the source deletes the old files
+            storage.spill('val_pred', (y_pred, y_test, {}))
+            self.assertEqual(len(os.listdir(tmp_dir)), 2)
+
+            storage.spill('test_pred', (y_pred, y_test, {}))
+            self.assertEqual(len(os.listdir(tmp_dir)), 4)
+            storage.evict()
+            self.assertEqual(os.listdir(tmp_dir), [])
+
+    def test_streamed_files(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            storage = DiskPredictionStorage(tmp_dir)
+            y_pred = torch.from_numpy(storage.create_array('train_pred', 'y_pred', (100, 2), np.float32))
+            y_pred[:] = 1.
+            self.assertEqual(len(storage.pending_files), 1)
+
+            y_pred_disk, _, _ = storage.spill('train_pred', (y_pred[:90], torch.rand(90), {}))
+            self.assertEqual(y_pred_disk.data_ptr(), y_pred.data_ptr())
+            self.assertEqual(len(storage.pending_files), 0)
+            self.assertEqual(len(storage.source_files['train_pred']), 2)
+            self.assertEqual(len(os.listdir(tmp_dir)), 2)
+
+    def test_temporary_storage_dir(self):
+        y_pred, y_test = torch.rand(10, 2), torch.rand(10)
+
+        storage = DiskPredictionStorage()
+        self.assertIsNone(storage.storage_dir)
+        storage.spill('val_pred', (y_pred, y_test, {}))
+        storage_dir = storage.storage_dir
+        self.assertEqual(len(os.listdir(storage_dir)), 2)
+        storage.cleanup()
+        self.assertFalse(os.path.exists(storage_dir))
+
+        # Temporary folder is also deleted when the storage gets garbage collected
+        storage = DiskPredictionStorage()
+        storage.spill('val_pred', (y_pred, y_test, {}))
+        storage_dir = storage.storage_dir
+        del storage
+        gc.collect()
+        self.assertFalse(os.path.exists(storage_dir))
+
+    def test_experiment_storage_dir(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            storage = DiskPredictionStorage()
+            storage.register_train_loop(SimpleNamespace(project_name='project', experiment_name='exp',
+                                                        experiment_timestamp='ts',
+                                                        local_model_result_folder_path=tmp_dir))
+            storage.spill('val_pred', (torch.rand(10), torch.rand(10), {}))
+            self.assertEqual(storage.storage_dir, os.path.join(tmp_dir, 'project', 'exp_ts', 'prediction_cache'))
+            self.assertEqual(len(os.listdir(storage.storage_dir)), 2)
+
+            storage.cleanup()
+            self.assertEqual(os.listdir(os.path.join(tmp_dir, 'project', 'exp_ts')), [])
+
+    def test_provided_storage_dir_kept(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            prediction_store = ModelPredictionStore(auto_purge=True, storage=DiskPredictionStorage(tmp_dir))
+            prediction_store.insert_val_predictions((torch.rand(10), torch.rand(10), {}), 0)
+            self.assertEqual(len(os.listdir(tmp_dir)), 2)
+
+            prediction_store.reset()
+            self.assertFalse(prediction_store.has_val_predictions(0))
+            self.assertTrue(os.path.exists(tmp_dir))
+            self.assertEqual(os.listdir(tmp_dir), [])
+
+    def test_prediction_store_storage(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            prediction_store = ModelPredictionStore(auto_purge=True, storage=DiskPredictionStorage(tmp_dir))
+            prediction_store.insert_train_predictions((torch.rand(10), torch.rand(10), {}), 0)
+            prediction_store.insert_train_loss(1.5, 0)
+            self.assertEqual(len(os.listdir(tmp_dir)), 2)
+
+            prediction_store.insert_val_predictions((torch.rand(10), torch.rand(10), {}), 1)
+            self.assertEqual(sorted(os.listdir(tmp_dir)), ['val_pred_y_pred_2.npy', 'val_pred_y_test_3.npy'])
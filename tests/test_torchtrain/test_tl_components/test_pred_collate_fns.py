@@ -1,8 +1,17 @@
 import unittest
+import os
+import tempfile
 import numpy as np
 import torch
+from torch.utils.data import TensorDataset, DataLoader
+
+from aitoolbox.utils import dict_util
 
 from aitoolbox.torchtrain.train_loop.components.pred_collate_fns import *
+from aitoolbox.torchtrain.train_loop.components.pred_collate_fns import (
+    PredictionBuffer, PreallocatedPredictionCollator, get_num_dataset_examples
+)
+from aitoolbox.torchtrain.train_loop.components.model_prediction_store import DiskPredictionStorage
 
 
 class TestBatchPredCollateFns(unittest.TestCase):
@@ -87,3 +96,124 @@ class TestAllPredTransformFns(unittest.TestCase):
     def test_keep_list_transf(self):
         data = list(range(100))
         self.assertEqual(keep_list_transf(data), data)
+
+
+class TestPreallocatedPredictionCollator(unittest.TestCase):
+    def test_get_num_dataset_examples(self):
+        dataset = TensorDataset(torch.randn(95, 3))
+        self.assertEqual(get_num_dataset_examples(DataLoader(dataset, batch_size=10)), 95)
+        self.assertEqual(get_num_dataset_examples(DataLoader(dataset, batch_sampler=[[0, 1], [2]])), None)
+        self.assertEqual(get_num_dataset_examples([torch.randn(10, 3)]), None)
+
+    def test_preallocated_collation(self):
+        y_pred_batches = [torch.rand(10, 3) for _ in range(9)] + [torch.rand(5, 3)]
+        y_test_batches = [torch.randint(0, 3, (len(b),)) for b in y_pred_batches]
+
+        collator = PreallocatedPredictionCollator()
+        collator.reset(95)
+        for y_pred_b, y_test_b in zip(y_pred_batches, y_test_batches):
+            collator.append(y_pred_b, y_test_b, None)
+
+        self.assertIsNotNone(collator.y_pred.buffer)
+        self.assertIsNone(collator.y_pred.batches)
+
+        y_pred, y_test, metadata = collator.get_predictions()
+        self.assertEqual(y_pred.tolist(), torch.cat(y_pred_batches).tolist())
+        self.assertEqual(y_test.tolist(), torch.cat(y_test_batches).tolist())
+        self.assertEqual(y_test.dtype, torch.int64)
+        self.assertEqual(metadata, {})
+        self.assertIsNone(collator.y_pred)
+
+    def test_metadata_collation(self):
+        metadata_batches = [{'idx': torch.arange(i * 10, (i + 1) * 10), 'np_el': np.ones((10, 2)) * i,
+                             'text': [f'{i}_{j}' for j in range(10)]}
+                            for i in range(3)]
+        collator = PreallocatedPredictionCollator()
+        collator.reset(30)
+        for metadata_batch in metadata_batches:
+            collator.append(torch.rand(10), torch.rand(10), metadata_batch)
+
+        _, _, metadata = collator.get_predictions()
+        expected_metadata = dict_util.combine_prediction_metadata_batches(metadata_batches)
+        self.assertEqual(metadata['idx'].tolist(), expected_metadata['idx'].tolist())
+        self.assertEqual(metadata['np_el'].tolist(), expected_metadata['np_el'].tolist())
+        self.assertEqual(metadata['text'], expected_metadata['text'])
+
+    def test_capacity_mismatch(self):
+        batches = [torch.rand(10, 2) for _ in range(5)]
+
+        # Underestimated capacity makes the buffer grow
+        buffer = PredictionBuffer(capacity=15)
+        for b in batches:
+            buffer.append(b)
+        self.assertEqual(len(buffer), 50)
+        predictions = buffer.get_predictions()
+        self.assertEqual(predictions.tolist(), torch.cat(batches).tolist())
+        # Unused part of the grown buffer isn't kept alive
+        self.assertEqual(predictions.untyped_storage().nbytes(), 50 * 2 * 4)
+
+        # Overestimated capacity (e.g. when the last batch gets dropped)
+        buffer = PredictionBuffer(capacity=100)
+        for b in batches:
+            buffer.append(b)
+        predictions = buffer.get_predictions()
+        self.assertEqual(predictions.tolist(), torch.cat(batches).tolist())
+        self.assertEqual(predictions.untyped_storage().nbytes(), 50 * 2 * 4)
+
+        buffer = PredictionBuffer(capacity=100)
+        buffer.append(np.ones((10, 2)))
+        self.assertEqual(buffer.get_predictions().base, None)
+
+    def test_fallback_to_concatenation(self):
+        buffer = PredictionBuffer(capacity=None)
+        buffer.append(torch.rand(10, 2))
+        self.assertIsNone(buffer.buffer)
+
+        # Batches with different trailing dimensions
+        batches = [torch.rand(10, 2), torch.rand(10, 2), torch.rand(10, 3)]
+        buffer = PredictionBuffer(capacity=30)
+        for b in batches:
+            buffer.append(b)
+        self.assertIsNone(buffer.buffer)
+        with self.assertRaises(RuntimeError):
+            buffer.get_predictions()
+
+        # Batches with different dtypes get type promoted as in the case of concatenation
+        batches = [torch.ones(10, dtype=torch.int64), torch.rand(10)]
+        buffer = PredictionBuffer(capacity=20)
+        for b in batches:
+            buffer.append(b)
+        self.assertEqual(buffer.get_predictions().tolist(), torch.cat(batches).tolist())
+
+    def test_disk_storage_resizing(self):
+        batches = [torch.rand(10, 2) for _ in range(5)]
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            storage = DiskPredictionStorage(tmp_dir)
+            collator = PreallocatedPredictionCollator()
+            # Underestimated capacity makes the buffers grow several times before they get trimmed
+            collator.reset(15, storage=storage, source_name='val_pred')
+            for b in batches:
+                collator.append(b, b[:, 0], None)
+
+            y_pred, y_test, _ = collator.get_predictions()
+            self.assertEqual(y_pred.tolist(), torch.cat(batches).tolist())
+            self.assertEqual(len(y_test), 50)
+            # Only the files of the final trimmed buffers are left
+            self.assertEqual(len(os.listdir(tmp_dir)), 2)
+            self.assertEqual(len(storage.pending_files), 2)
+            self.assertEqual(np.load(storage.pending_files[y_pred.data_ptr()][0]).shape, (50, 2))
+
+            storage.spill('val_pred', (y_pred, y_test, {}))
+            self.assertEqual(len(storage.pending_files), 0)
+            self.assertEqual(len(os.listdir(tmp_dir)), 2)
+
+    def test_pin_memory(self):
+        batches = [torch.rand(10, 2) for _ in range(3)]
+        collator = PreallocatedPredictionCollator(pin_memory=True)
+        collator.reset(30)
+        for b in batches:
+            collator.append(b, b, None)
+        y_pred, _, _ = collator.get_predictions()
+        self.assertEqual(y_pred.device, torch.device('cpu'))
+        self.assertEqual(y_pred.tolist(), torch.cat(batches).tolist())
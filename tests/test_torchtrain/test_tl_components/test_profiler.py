@@ -0,0 +1,162 @@
+import unittest
+import os
+import csv
+import json
+import shutil
+
+import torch
+import torch.nn as nn
+from torch.utils.data import TensorDataset, DataLoader
+from torch.optim.adam import Adam
+
+from tests.utils import SmallFFNet, CallbackTracker
+from aitoolbox.torchtrain.train_loop import TrainLoop
+from aitoolbox.torchtrain.callbacks.abstract import AbstractCallback
+from aitoolbox.torchtrain.train_loop.components.profiler import (
+    TrainLoopProfiler, DisabledProfiler, HISTORY_PHASES, get_batch_size
+)
+
+THIS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+class ProfileHistoryTracker(AbstractCallback):
+    def __init__(self):
+        AbstractCallback.__init__(self, 'ProfileHistoryTracker')
+        self.epoch_profiles = []
+
+    def on_epoch_end(self):
+        self.epoch_profiles.append((self.train_loop_obj.epoch,
+                                    list(self.train_loop_obj.train_history['profile_forward_time'])))
+
+
+class TestTrainLoopProfiler(unittest.TestCase):
+    def test_record_epoch_report(self):
+        profiler = TrainLoopProfiler()
+        profiler.start_epoch()
+        profiler.record('forward', 2.)
+        profiler.record('forward', 4.)
+        profiler.record('iteration', 5.)
+        profiler.record('data_loading', 1.)
+        profiler.record('callbacks/on_batch_end', 1.)
+        profiler.record('callbacks/on_epoch_end', 3.)
+        profiler.record_samples(torch.zeros(12, 3))
+
+        report = profiler.get_epoch_report()
+        self.assertEqual(report['phases']['forward'], {'count': 2, 'total': 6., 'max': 4., 'mean': 3.})
+        self.assertEqual(report['phases']['callbacks'], {'count': 2, 'total': 4., 'max': 3., 'mean': 2.})
+        self.assertEqual(report['num_samples'], 12)
+        self.assertEqual(report['samples_per_sec'], 2.)
+
+    def test_phase_timing(self):
+        profiler = TrainLoopProfiler()
+        with profiler.phase('forward'):
+            pass
+        with profiler.phase('forward'):
+            pass
+        self.assertEqual(profiler.phase_stats['forward']['count'], 2)
+        self.assertGreaterEqual(profiler.phase_stats['forward']['total'], 0.)
+
+        self.assertEqual(list(profiler.time_data_loading([1, 2, 3])), [1, 2, 3])
+        self.assertEqual(profiler.phase_stats['data_loading']['count'], 3)
+
+    def test_disabled_profiler(self):
+        profiler = DisabledProfiler()
+        self.assertFalse(profiler.enabled)
+        with profiler.phase('forward'):
+            pass
+        batches = [1, 2]
+        self.assertIs(profiler.time_data_loading(batches), batches)
+        self.assertEqual(profiler.phase_stats, {})
+        self.assertIsNone(profiler.end_epoch())
+        self.assertIsNone(profiler.finalize_epoch())
+
+    def test_finalize_epoch(self):
+        profiler = TrainLoopProfiler(trace_formats=())
+        profiler.start_epoch()
+        profiler.record('forward', 2.)
+        self.assertNotIn('callbacks', profiler.end_epoch()['phases'])
+
+        profiler.record('callbacks/on_epoch_end', 3.)
+        epoch_report = profiler.finalize_epoch()
+        self.assertEqual(epoch_report['phases']['callbacks']['total'], 3.)
+        self.assertEqual(profiler.epoch_reports, [epoch_report])
+        self.assertEqual(profiler.phase_stats, {})
+
+    def test_unsupported_trace_format(self):
+        with self.assertRaises(ValueError):
+            TrainLoopProfiler(trace_formats=('json', 'xml'))
+
+    def test_get_batch_size(self):
+        self.assertEqual(get_batch_size(torch.zeros(5, 2)), 5)
+        self.assertEqual(get_batch_size([torch.zeros(7, 2), torch.zeros(7)]), 7)
+        self.assertEqual(get_batch_size({'x': torch.zeros(3, 2)}), 3)
+        self.assertEqual(get_batch_size(['text a', 'text b']), 2)
+        self.assertEqual(get_batch_size(torch.tensor(1.)), 1)
+
+
+class TestTrainLoopProfiling(unittest.TestCase):
+    def setUp(self):
+        self.trace_dir = os.path.join(THIS_DIR, 'profiler_trace')
+
+    def tearDown(self):
+        if os.path.exists(self.trace_dir):
+            shutil.rmtree(self.trace_dir)
+
+    def test_profiled_training(self):
+        dataset = TensorDataset(torch.randn(100, 10), torch.randint(low=0, high=2, size=(100,)).float())
+        model = SmallFFNet()
+        callback = CallbackTracker()
+        train_loop = TrainLoop(model, DataLoader(dataset, batch_size=10), DataLoader(dataset, batch_size=50), None,
+                               Adam(model.parameters()), nn.BCELoss(),
+                               profiler=TrainLoopProfiler(trace_dir=self.trace_dir))
+        train_loop.fit(num_epochs=2, callbacks=[callback])
+
+        for phase_name in HISTORY_PHASES:
+            self.assertEqual(len(train_loop.train_history[f'profile_{phase_name}_time']), 2)
+            self.assertGreater(train_loop.train_history[f'profile_{phase_name}_time'][-1], 0.)
+        self.assertGreater(train_loop.train_history['profile_samples_per_sec'][-1], 0.)
+
+        epoch_report = train_loop.profiler.epoch_reports[0]
+        self.assertEqual(epoch_report['num_samples'], 100)
+        self.assertEqual(epoch_report['phases']['forward']['count'], 10)
+        self.assertEqual(epoch_report['phases']['data_loading']['count'], 10)
+        self.assertEqual(epoch_report['phases']['callback/CallbackTracker1/on_batch_end']['count'], 10)
+        self.assertEqual(epoch_report['phases']['callback/CallbackTracker1/on_epoch_end']['count'], 1)
+
+        with open(os.path.join(self.trace_dir, 'profiler_trace.json')) as f:
+            trace = json.load(f)
+        self.assertEqual([report['epoch'] for report in trace], [0, 1, 'end_of_training'])
+        self.assertIn('callbacks/on_train_end', trace[-1]['phases'])
+
+        with open(os.path.join(self.trace_dir, 'profiler_trace.csv')) as f:
+            rows = list(csv.reader(f))
+        self.assertEqual(rows[0], ['epoch', 'phase', 'count', 'total', 'mean', 'max'])
+        self.assertIn(['0', 'forward'], [row[:2] for row in rows])
+
+    def test_epoch_end_callbacks_see_current_epoch_profile(self):
+        dataset = TensorDataset(torch.randn(40, 10), torch.randint(low=0, high=2, size=(40,)).float())
+        model = SmallFFNet()
+        callback = ProfileHistoryTracker()
+        train_loop = TrainLoop(model, DataLoader(dataset, batch_size=10), None, None,
+                               Adam(model.parameters()), nn.BCELoss(), profiler=TrainLoopProfiler(trace_formats=()))
+        train_loop.fit(num_epochs=3, callbacks=[callback])
+
+        self.assertEqual([epoch for epoch, _ in callback.epoch_profiles], [0, 1, 2])
+        for epoch, epoch_profile in callback.epoch_profiles:
+            self.assertEqual(len(epoch_profile), epoch + 1)
+            self.assertEqual(epoch_profile[-1], train_loop.train_history['profile_forward_time'][epoch])
+            self.assertEqual(epoch_profile[-1], train_loop.profiler.epoch_reports[epoch]['phases']['forward']['total'])
+
+    def test_profiling_disabled_by_default(self):
+        dataset = TensorDataset(torch.randn(20, 10), torch.randint(low=0, high=2, size=(20,)).float())
+        model = SmallFFNet()
+        train_loop = TrainLoop(model, DataLoader(dataset, batch_size=10), None, None,
+                               Adam(model.parameters()), nn.BCELoss())
+        train_loop.fit(num_epochs=1, callbacks=[CallbackTracker()])
+
+        self.assertIsInstance(train_loop.profiler, DisabledProfiler)
+        self.assertNotIn('profile_forward_time', train_loop.train_history)
+
+    def test_wrong_profiler_type(self):
+        with self.assertRaises(TypeError):
+            TrainLoop(SmallFFNet(), None, None, None, None, None, profiler=True)
@@ -0,0 +1,134 @@
+import unittest
+
+import numpy as np
+import torch
+import torch.nn as nn
+from torch.utils.data import TensorDataset, DataLoader
+from torch.optim.adam import Adam
+
+from tests.utils import SmallFFNet
+from aitoolbox.torchtrain.train_loop import TrainLoop
+from aitoolbox.torchtrain.train_loop.components.train_loss_eval import (
+    FullTrainLossEvaluation, AccumulatedTrainLossEvaluation,
+    RandomSubsetTrainLossEvaluation, StridedSubsetTrainLossEvaluation,
+    build_batch_subset_loader, BatchSubsetSampler
+)
+
+
+class TestBuildBatchSubsetLoader(unittest.TestCase):
+    def test_list_loader(self):
+        self.assertEqual(build_batch_subset_loader(list(range(10)), [1, 4, 7]), [1, 4, 7])
+        self.assertEqual(build_batch_subset_loader(iter(range(10)), [1, 4, 7]), [1, 4, 7])
+
+    def test_torch_data_loader(self):
+        dataset = TensorDataset(torch.arange(100))
+        data_loader = DataLoader(dataset, batch_size=10)
+
+        subset_loader = build_batch_subset_loader(data_loader, [0, 3, 9])
+        self.assertEqual(len(subset_loader), 3)
+        self.assertEqual(
+            [batch[0].tolist() for batch in subset_loader],
+            [list(range(10)), list(range(30, 40)), list(range(90, 100))]
+        )
+
+    def test_torch_data_loader_settings_kept(self):
+        generator = torch.Generator()
+        data_loader = DataLoader(TensorDataset(torch.arange(100)), batch_size=10, num_workers=2,
+                                 persistent_workers=True, prefetch_factor=3, generator=generator)
+
+        subset_loader = build_batch_subset_loader(data_loader, [1, 2])
+        self.assertEqual(subset_loader.num_workers, 2)
+        self.assertTrue(subset_loader.persistent_workers)
+        self.assertEqual(subset_loader.prefetch_factor, 3)
+        self.assertIs(subset_loader.generator, generator)
+        self.assertIsInstance(subset_loader.batch_sampler, BatchSubsetSampler)
+
+    def test_torch_data_loader_reused(self):
+        data_loader = DataLoader(TensorDataset(torch.arange(100)), batch_size=10)
+
+        subset_loader = build_batch_subset_loader(data_loader, [0, 3])
+        reused_subset_loader = build_batch_subset_loader(data_loader, [5], subset_loader)
+        self.assertIs(reused_subset_loader, subset_loader)
+        self.assertEqual(len(reused_subset_loader), 1)
+        self.assertEqual([batch[0].tolist() for batch in reused_subset_loader], [list(range(50, 60))])
+
+        other_loader = DataLoader(TensorDataset(torch.arange(10)), batch_size=5)
+        self.assertIsNot(build_batch_subset_loader(other_loader, [1], subset_loader), subset_loader)
+
+
+class TestSubsetBatchSelection(unittest.TestCase):
+    def test_random_subset(self):
+        loss_eval = RandomSubsetTrainLossEvaluation(num_batches=5, seed=10)
+        selected = loss_eval.select_batches(100, epoch=0)
+        self.assertEqual(len(selected), 5)
+        self.assertEqual(selected, sorted(set(selected)))
+        self.assertEqual(selected, loss_eval.select_batches(100, epoch=0))
+        self.assertNotEqual(selected, loss_eval.select_batches(100, epoch=1))
+
+        self.assertEqual(loss_eval.select_batches(3, epoch=0), [0, 1, 2])
+
+        fixed_loss_eval = RandomSubsetTrainLossEvaluation(num_batches=5, seed=10, resample_each_epoch=False)
+        self.assertEqual(fixed_loss_eval.select_batches(100, epoch=0), fixed_loss_eval.select_batches(100, epoch=5))
+
+    def test_strided_subset(self):
+        self.assertEqual(StridedSubsetTrainLossEvaluation(stride=3).select_batches(10, epoch=0), [0, 3, 6, 9])
+        self.assertEqual(StridedSubsetTrainLossEvaluation(stride=3, offset=1).select_batches(10, epoch=0), [1, 4, 7])
+
+    def test_param_checks(self):
+        with self.assertRaises(ValueError):
+            RandomSubsetTrainLossEvaluation(num_batches=0)
+        with self.assertRaises(ValueError):
+            StridedSubsetTrainLossEvaluation(stride=0)
+        with self.assertRaises(ValueError):
+            StridedSubsetTrainLossEvaluation(stride=2, confidence=1.)
+
+    def test_confidence_interval(self):
+        loss_eval = StridedSubsetTrainLossEvaluation(stride=2)
+        batch_losses = torch.tensor([1., 2., 3., 4.], dtype=torch.float64)
+
+        ci = loss_eval.calculate_confidence_interval(batch_losses, population_size=8)
+        expected_ci = 1.959964 * np.std([1., 2., 3., 4.], ddof=1) / 2 * np.sqrt(4 / 7)
+        self.assertAlmostEqual(ci.item(), expected_ci, places=5)
+
+        # Whole population evaluated
+        self.assertEqual(loss_eval.calculate_confidence_interval(batch_losses, population_size=4).item(), 0.)
+        self.assertTrue(np.isnan(loss_eval.calculate_confidence_interval(batch_losses[:1], 8).item()))
+
+
+class TestTrainLoopTrainLossEvaluation(unittest.TestCase):
+    def test_default_strategy(self):
+        train_loop = self.run_train_loop(None)
+        self.assertIsInstance(train_loop.train_loss_eval, FullTrainLossEvaluation)
+        self.assertEqual(train_loop.train_history.get_metadata(), {'train_loss_eval': {'strategy': 'full'}})
+        self.assertNotIn('loss_ci', train_loop.train_history)
+
+    def test_accumulated_strategy(self):
+        train_loop = self.run_train_loop(AccumulatedTrainLossEvaluation())
+        self.assertEqual(train_loop.train_history['loss'], train_loop.train_history['accumulated_loss'])
+        self.assertFalse(train_loop.prediction_store.has_train_loss(train_loop.total_iteration_idx))
+        self.assertEqual(train_loop.train_history.get_metadata(), {'train_loss_eval': {'strategy': 'accumulated'}})
+
+    def test_subset_strategies(self):
+        train_loop = self.run_train_loop(StridedSubsetTrainLossEvaluation(stride=1))
+        full_loss = train_loop.evaluate_loss_on_train_set().item()
+        self.assertAlmostEqual(train_loop.train_history['loss'][-1], full_loss, places=5)
+        self.assertEqual(train_loop.train_history['loss_ci'], [0., 0.])
+
+        train_loop = self.run_train_loop(RandomSubsetTrainLossEvaluation(num_batches=3))
+        self.assertEqual(len(train_loop.train_history['loss']), 2)
+        self.assertEqual(len(train_loop.train_history['loss_ci']), 2)
+        self.assertEqual(train_loop.train_history.get_metadata()['train_loss_eval']['strategy'], 'random_subset')
+
+    def test_wrong_strategy_type(self):
+        with self.assertRaises(TypeError):
+            self.run_train_loop('full')
+
+    @staticmethod
+    def run_train_loop(train_loss_eval):
+        dataset = TensorDataset(torch.randn(100, 10), torch.randint(low=0, high=2, size=(100,)).float())
+        model = SmallFFNet()
+        train_loop = TrainLoop(model, DataLoader(dataset, batch_size=10), None, None,
+                               Adam(model.parameters()), nn.BCELoss(),
+                               train_loss_eval=train_loss_eval)
+        train_loop.fit(num_epochs=2)
+        return train_loop
@@ -1,5 +1,6 @@
 import unittest
 import os
+import tempfile
 
 from tests.utils import *
 
@@ -18,6 +19,8 @@ from aitoolbox.torchtrain.multi_loss_optim import MultiOptimizer
 from aitoolbox.torchtrain.schedulers.basic import ReduceLROnPlateauScheduler, StepLRScheduler
 from aitoolbox.torchtrain.schedulers.warmup import LinearWithWarmupScheduler
 from aitoolbox.torchtrain.callbacks.basic import EarlyStopping, ListRegisteredCallbacks
+from aitoolbox.torchtrain.train_loop.components.model_prediction_store import DiskPredictionStorage
+from aitoolbox.torchtrain.train_loop.components.pred_collate_fns import PreallocatedPredictionCollator
 
 
 class TestTrainLoop(unittest.TestCase):
@@ -680,6 +683,148 @@ class TestTrainLoop(unittest.TestCase):
         self.assertEqual(train_loop.prediction_store.prediction_store['iteration_idx'], 0)
         self.assertEqual(list(train_loop.prediction_store.prediction_store.keys()), ['iteration_idx', 'val_pred'])
 
+    def test_fused_loss_and_predictions(self):
+        torch.manual_seed(0)
+        dataset = TensorDataset(torch.randn(100, 10), torch.randint(low=0, high=2, size=(100,)).float())
+        data_loader = DataLoader(dataset, batch_size=10)
+
+        model = FusedEvalFFNet()
+        train_loop = TrainLoop(model, data_loader, data_loader, None, None, nn.BCELoss())
+
+        loss, (y_pred, y_test, metadata) = train_loop.evaluate_loss_and_predict_on_validation_set()
+        self.assertEqual(model.forward_ctr, 10)
+        self.assertEqual(train_loop.prediction_store.get_val_loss(-1), loss)
+
+        loss_separate = train_loop.evaluate_model_loss(data_loader)
+        y_pred_separate, y_test_separate, _ = train_loop.predict_with_model(data_loader)
+        self.assertAlmostEqual(loss.item(), loss_separate.item(), places=5)
+        self.assertEqual(y_pred.tolist(), y_pred_separate.tolist())
+        self.assertEqual(y_test.tolist(), y_test_separate.tolist())
+        self.assertEqual(metadata, {})
+
+        # Both loss and predictions are taken from the cache
+        model.forward_ctr = 0
+        loss_cached, predictions_cached = train_loop.evaluate_loss_and_predict_on_validation_set()
+        self.assertEqual(model.forward_ctr, 0)
+        self.assertEqual(loss_cached, loss)
+        self.assertEqual(train_loop.predict_on_validation_set()[0].tolist(), predictions_cached[0].tolist())
+
+        # Only the missing predictions are calculated
+        train_loop.evaluate_loss_on_train_set()
+        model.forward_ctr = 0
+        train_loop.evaluate_loss_and_predict_on_train_set()
+        self.assertEqual(model.forward_ctr, 10)
+
+        loss_float, _ = train_loop.evaluate_loss_and_predict_on_validation_set(force_prediction=True,
+                                                                             float_dict_format=True)
+        self.assertIsInstance(loss_float, float)
+
+    def test_preallocated_prediction_collation(self):
+        dataset = TensorDataset(torch.randn(95, 10), torch.randint(low=0, high=2, size=(95,)).float())
+        data_loader = DataLoader(dataset, batch_size=10)
+        model = SmallFFNet()
+
+        train_loop = TrainLoop(model, data_loader, None, None, None, nn.BCELoss(),
+                               collate_batch_pred_fn=PreallocatedPredictionCollator())
+        self.assertIsInstance(train_loop.pred_collator, PreallocatedPredictionCollator)
+        y_pred, y_test, metadata = train_loop.predict_with_model(data_loader)
+
+        # Preallocated collation is opt-in
+        train_loop_default = TrainLoop(model, data_loader, None, None, None, nn.BCELoss())
+        self.assertIsNone(train_loop_default.pred_collator)
+        y_pred_list, y_test_list, metadata_list = train_loop_default.predict_with_model(data_loader)
+
+        self.assertEqual(y_pred.shape, (95, 1))
+        self.assertEqual(y_pred.tolist(), y_pred_list.tolist())
+        self.assertEqual(y_test.tolist(), y_test_list.tolist())
+        self.assertEqual(metadata, metadata_list)
+
+        train_loop_pinned = TrainLoop(model, data_loader, None, None, None, nn.BCELoss(),
+                                      collate_batch_pred_fn=PreallocatedPredictionCollator(pin_memory=True))
+        loss, (y_pred_pinned, _, _) = train_loop_pinned.evaluate_loss_and_predict_with_model(data_loader)
+        self.assertEqual(y_pred_pinned.tolist(), y_pred.tolist())
+
+    def test_prediction_cache_model_state_key(self):
+        dataset = TensorDataset(torch.randn(50, 10), torch.randint(low=0, high=2, size=(50,)).float())
+        data_loader = DataLoader(dataset, batch_size=10)
+        model = FusedEvalFFNet()
+        train_loop = TrainLoop(model, data_loader, data_loader, None, Adam(model.parameters()), nn.BCELoss())
+
+        y_pred, _, _ = train_loop.predict_on_validation_set()
+        train_loop.predict_on_validation_set()
+        self.assertEqual(model.forward_ctr, 5)
+
+        # Changing the model weights invalidates the cached predictions even at the same iteration
+        with torch.no_grad():
+            model.l1.weight.add_(1.)
+        y_pred_new, _, _ = train_loop.predict_on_validation_set()
+        self.assertEqual(model.forward_ctr, 10)
+        self.assertNotEqual(y_pred.tolist(), y_pred_new.tolist())
+
+        stats = train_loop.prediction_store.get_cache_stats()
+        self.assertEqual((stats['hits'], stats['misses']), (1, 2))
+
+    def test_prediction_cache_settings(self):
+        dataset = TensorDataset(torch.randn(50, 10), torch.randint(low=0, high=2, size=(50,)).float())
+        data_loader = DataLoader(dataset, batch_size=10)
+        model = FusedEvalFFNet()
+
+        train_loop = TrainLoop(model, data_loader, data_loader, None, Adam(model.parameters()), nn.BCELoss())
+        self.assertEqual(train_loop.prediction_store.keep_iterations, 1)
+        self.assertIsNone(train_loop.prediction_store.max_bytes)
+
+        train_loop = TrainLoop(model, data_loader, data_loader, None, Adam(model.parameters()), nn.BCELoss(),
+                               prediction_keep_iterations=2, prediction_max_bytes=10000)
+        self.assertEqual(train_loop.prediction_store.keep_iterations, 2)
+        self.assertEqual(train_loop.prediction_store.max_bytes, 10000)
+
+        train_loop.predict_on_validation_set()
+        train_loop.total_iteration_idx += 1
+        train_loop.predict_on_train_set()
+        # Predictions from the previous iteration are kept in the cache
+        self.assertTrue(train_loop.prediction_store.has_val_predictions(-1))
+        self.assertTrue(train_loop.prediction_store.has_train_predictions(0))
+
+        with self.assertRaises(ValueError):
+            TrainLoop(model, data_loader, data_loader, None, Adam(model.parameters()), nn.BCELoss(),
+                      prediction_keep_iterations=0)
+
+    def test_disk_prediction_storage(self):
+        dataset = TensorDataset(torch.randn(95, 10), torch.randint(low=0, high=2, size=(95,)).float())
+        data_loader = DataLoader(dataset, batch_size=10)
+        model = SmallFFNet()
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            storage = DiskPredictionStorage(tmp_dir)
+            # Predictions are streamed into the storage files by the preallocated collator
+            train_loop = TrainLoop(model, data_loader, data_loader, None, Adam(model.parameters()), nn.BCELoss(),
+                                   collate_batch_pred_fn=PreallocatedPredictionCollator(), prediction_storage=storage)
+            y_pred, y_test, _ = train_loop.predict_on_validation_set()
+            self.assertEqual(sorted(os.listdir(tmp_dir)), ['val_pred_y_pred_0.npy', 'val_pred_y_test_1.npy'])
+            self.assertEqual(len(storage.pending_files), 0)
+            self.assertEqual(np.load(os.path.join(tmp_dir, 'val_pred_y_pred_0.npy')).tolist(), y_pred.tolist())
+
+            y_pred_mem, y_test_mem, _ = train_loop.predict_with_model(data_loader)
+            self.assertEqual(y_pred.tolist(), y_pred_mem.tolist())
+            self.assertEqual(y_test.tolist(), y_test_mem.tolist())
+
+            train_loop.total_iteration_idx += 1
+            train_loop.predict_on_train_set()
+            self.assertEqual(sorted(os.listdir(tmp_dir)), ['train_pred_y_pred_2.npy', 'train_pred_y_test_3.npy'])
+
+    def test_fused_eval_datasets_auto_end_of_epoch(self):
+        dataset = TensorDataset(torch.randn(100, 10), torch.randint(low=0, high=2, size=(100,)).float())
+        data_loader = DataLoader(dataset, batch_size=10)
+
+        model = FusedEvalFFNet()
+        train_loop = TrainLoop(model, data_loader, data_loader, None, Adam(model.parameters()), nn.BCELoss())
+        train_loop.fused_eval_datasets.add('validation')
+        train_loop.fit(num_epochs=1)
+
+        self.assertTrue(train_loop.prediction_store.has_val_loss(train_loop.total_iteration_idx))
+        self.assertTrue(train_loop.prediction_store.has_val_predictions(train_loop.total_iteration_idx))
+        self.assertFalse(train_loop.prediction_store.has_train_predictions(train_loop.total_iteration_idx))
+
     def test_ddp_env_settings(self):
         dummy_optimizer = DummyOptimizer()
         dummy_loss = DummyLoss()
@@ -859,6 +1004,29 @@ class TestMultiLossOptiTrainLoop(unittest.TestCase):
         self.assertEqual(loss_result, {'loss_1': 32.0, 'loss_2': 32.0})
 
 
+class FusedEvalFFNet(SmallFFNet):
+    def __init__(self):
+        super().__init__()
+        self.forward_ctr = 0
+
+    def forward(self, x):
+        self.forward_ctr += 1
+        return super().forward(x)
+
+    def get_loss(self, batch_data, criterion, device):
+        x, y = batch_data
+        return criterion(self(x).squeeze(), y)
+
+    def get_predictions(self, batch_data, device):
+        x, y = batch_data
+        return self(x).squeeze(), y, {}
+
+    def get_loss_and_predictions(self, batch_data, criterion, device):
+        x, y = batch_data
+        pred_y = self(x).squeeze()
+        return criterion(pred_y, y), pred_y, y, {}
+
+
 class BatchedAverageAfterBatchPredictionCB(AbstractCallback):
     def __init__(self):
         super().__init__('')
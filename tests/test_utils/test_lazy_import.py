@@ -0,0 +1,87 @@
+import unittest
+import json
+import os
+import subprocess
+import sys
+import types
+
+from aitoolbox.utils.lazy_import import lazy_module_attributes
+
+# Import of the torchtrain API on top of already imported torch should stay well below this budget (in seconds)
+TORCHTRAIN_IMPORT_TIME_BUDGET = 1.
+
+HEAVY_MODULES = ['wandb', 'sklearn', 'pandas', 'seaborn', 'matplotlib', 'boto3', 'botocore', 'google.cloud.storage',
+                 'torch.utils.tensorboard', 'transformers', 'nltk']
+
+IMPORT_BENCHMARK_SCRIPT = """
+import json
+import sys
+import time
+
+import torch
+
+start_time = time.perf_counter()
+import aitoolbox
+import aitoolbox.torchtrain
+from aitoolbox.torchtrain import TrainLoop, TrainLoopCheckpointEndSave, TTModel
+from aitoolbox.torchtrain.callbacks import ModelPerformanceEvaluation, EarlyStopping, WandBTracking
+from aitoolbox.torchtrain.callbacks.model_save import ModelCheckpoint
+from aitoolbox.experiment import ClassificationResultPackage
+import_time = time.perf_counter() - start_time
+
+print(json.dumps({'import_time': import_time, 'heavy_modules': [m for m in %s if m in sys.modules]}))
+""" % HEAVY_MODULES
+
+
+class TestLazyModuleAttributes(unittest.TestCase):
+    def setUp(self):
+        self.module = types.ModuleType('aitoolbox_lazy_test_module')
+        sys.modules[self.module.__name__] = self.module
+        self.module.__getattr__, self.module.__dir__ = lazy_module_attributes(
+            self.module.__name__, {'OrderedDict': 'collections', 'dumps': 'json'}
+        )
+
+    def tearDown(self):
+        del sys.modules[self.module.__name__]
+
+    def test_attribute_loaded_and_cached(self):
+        import collections
+
+        self.assertNotIn('OrderedDict', vars(self.module))
+        self.assertIs(self.module.OrderedDict, collections.OrderedDict)
+        self.assertIs(vars(self.module)['OrderedDict'], collections.OrderedDict)
+
+    def test_dir(self):
+        self.assertIn('OrderedDict', dir(self.module))
+        self.assertIn('dumps', dir(self.module))
+
+    def test_missing_attribute(self):
+        with self.assertRaises(AttributeError):
+            self.module.missing_attribute
+        with self.assertRaises(AttributeError):
+            self.module.__missing_dunder__
+        self.assertFalse(hasattr(self.module, 'missing_attribute'))
+
+    def test_package_api(self):
+        import aitoolbox
+        from aitoolbox.torchtrain.train_loop.train_loop import TrainLoop
+        from aitoolbox.torchtrain.callbacks.basic import EarlyStopping
+
+        self.assertIs(aitoolbox.TrainLoop, TrainLoop)
+        self.assertIs(aitoolbox.EarlyStopping, EarlyStopping)
+        self.assertIn('TrainLoop', dir(aitoolbox))
+        self.assertIn('WandBTracking', aitoolbox.__all__)
+
+        import aitoolbox.torchtrain.callbacks
+        self.assertIs(aitoolbox.torchtrain.callbacks.basic.EarlyStopping, EarlyStopping)
+
+
+class TestImportTime(unittest.TestCase):
+    def test_torchtrain_import_time(self):
+        project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        output = subprocess.run([sys.executable, '-c', IMPORT_BENCHMARK_SCRIPT], cwd=project_root,
+                                capture_output=True, text=True, check=True).stdout
+        benchmark = json.loads(output.strip().split('\n')[-1])
+
+        self.assertEqual(benchmark['heavy_modules'], [])
+        self.assertLess(benchmark['import_time'], TORCHTRAIN_IMPORT_TIME_BUDGET)
@@ -108,6 +108,22 @@ class TestUtil(unittest.TestCase):
             [[1, 2, 3], [4, 5, 3], [3, 3, 3], [10, 2, 3], [40, 5, 3], [30, 3, 3], [100, 2, 3], [400, 5, 3], [300, 3, 3]]
         )
 
+    def test_map_in_process_chunks(self):
+        values, weights = list(range(10)), list(range(10, 20))
+        self.assertEqual(util.map_in_process_chunks(weighted_sum, values, weights, num_workers=0, chunk_size=3),
+                         [weighted_sum(values, weights)])
+        self.assertEqual(util.map_in_process_chunks(weighted_sum, values, weights, num_workers=2, chunk_size=10),
+                         [weighted_sum(values, weights)])
+
+        chunk_results = util.map_in_process_chunks(weighted_sum, values, weights, num_workers=2, chunk_size=3)
+        self.assertEqual(chunk_results,
+                         [weighted_sum(values[i:i + 3], weights[i:i + 3]) for i in range(0, 10, 3)])
+        self.assertEqual(sum(chunk_results), weighted_sum(values, weights))
+
+
+def weighted_sum(values, weights):
+    return sum(value * weight for value, weight in zip(values, weights))
+
 
 class EmptyFunctions:
     def __init__(self):
@@ -449,3 +449,14 @@ class TrainLoopFitMethodTracking(TrainLoop):
                    num_nodes=1, node_rank=0, num_gpus=torch.cuda.device_count()):
         return 'train_ddp', num_epochs, num_iterations, callbacks, grad_accumulation, ddp_model_args, \
                in_process_data_load, num_nodes
+
+
+class RecordingResultsSaver:
+    def __init__(self):
+        self.saved_file_batches = []
+
+    def create_experiment_cloud_storage_folder_structure(self, project_name, experiment_name, experiment_timestamp):
+        return f'{project_name}/{experiment_name}_{experiment_timestamp}/results'
+
+    def save_files(self, file_paths):
+        self.saved_file_batches.append(file_paths)